@@ -21,6 +21,32 @@ class SsqPredictRequest(BaseModel):
     predict_time: str
     mode: str
 
+def _ssq_attempts(cycle, idx):
+    attempts = []
+    for model in ['liuyao','liuren','qimen','ai']:
+        if model == 'liuyao': pr, pb = cycle.predict_liuyao(idx)
+        elif model == 'liuren': pr, pb = cycle.predict_liuren(idx)
+        elif model == 'qimen': pr, pb = cycle.predict_qimen(idx)
+        else: pr, pb = cycle.predict_ai(idx)
+        attempts.append({'strategy': model, 'pred_reds': pr, 'pred_blue': pb})
+    return attempts
+
+
+def _ssq_mode_job(cycle, mode):
+    idx = len(cycle.history) - 1
+    # 根据mode选择模型
+    if mode == '小六爻':
+        return cycle.predict_liuyao(idx)
+    if mode == '小六壬':
+        return cycle.predict_liuren(idx)
+    if mode == '奇门遁甲':
+        return cycle.predict_qimen(idx)
+    if mode == '紫薇奇数':
+        return cycle.predict_ai(idx) # 可自定义紫薇逻辑
+    # AI融合预测
+    return cycle._fuse_from_attempts(_ssq_attempts(cycle, idx))
+
+
 # 新增API路由
 @app.post("/api/ssq_predict")
 async def api_ssq_predict(req: SsqPredictRequest):
@@ -28,29 +54,9 @@ async def api_ssq_predict(req: SsqPredictRequest):
     接收前端双色球预测参数，调用融合预测逻辑，返回结果。
     """
     try:
-        # 解析参数，调用ssq_predict_cycle
-        from ssq_predict_cycle import SSQPredictCycle
-        cycle = SSQPredictCycle(data_path='ssq_history.csv')
-        idx = len(cycle.history) - 1
-        # 根据mode选择模型
-        if req.mode == '小六爻':
-            reds, blue = cycle.predict_liuyao(idx)
-        elif req.mode == '小六壬':
-            reds, blue = cycle.predict_liuren(idx)
-        elif req.mode == '奇门遁甲':
-            reds, blue = cycle.predict_qimen(idx)
-        elif req.mode == '紫薇奇数':
-            reds, blue = cycle.predict_ai(idx) # 可自定义紫薇逻辑
-        else:
-            # AI融合预测
-            attempts = []
-            for model in ['liuyao','liuren','qimen','ai']:
-                if model == 'liuyao': pr, pb = cycle.predict_liuyao(idx)
-                elif model == 'liuren': pr, pb = cycle.predict_liuren(idx)
-                elif model == 'qimen': pr, pb = cycle.predict_qimen(idx)
-                else: pr, pb = cycle.predict_ai(idx)
-                attempts.append({'strategy': model, 'pred_reds': pr, 'pred_blue': pb})
-            reds, blue = cycle._fuse_from_attempts(attempts)
+        # 解析参数，在常驻预测服务的预热实例上调用融合预测逻辑
+        from ssq_predict_service import get_service
+        reds, blue = await get_service().run(_ssq_mode_job, req.mode)
         return JSONResponse({
             'status': 'ok',
             'date': req.date,
@@ -352,69 +358,124 @@ async def ssq_eval_run(background_tasks: BackgroundTasks):
 
 
 @app.get("/ssq/eval_grid")
-async def ssq_eval_grid(window: int = 100, diversify: bool = True, seed: int | None = 42, apply: bool = False):
+async def ssq_eval_grid(window: int = 100, diversify: Optional[bool] = None, seed: int | None = 42, apply: bool = False,
+                        workers: int | None = None, halving_eta: int = 3):
     """参数化网格评估：对比 red/blue 双侧 temp/top-p/alpha 组合在最近窗口内的表现。
     - apply=True: 将最佳组合写回 ssq_strategy_weights.json 的 fusion 字段，并记录 fusion_evidence。
+    - workers: 进程数（默认 SSQ_GRID_WORKERS，未设置为 1）；halving_eta: 逐轮减半淘汰比例，<=1 时全部组合跑满窗口。
+    - 评估在线程池中执行，不阻塞事件循环。
+    - 网格按单注融合评分，没有候选集合可做多样性约束：传入 diversify 返回 400。
     """
+    if diversify is not None:
+        return JSONResponse({'status': 'error', 'error': 'diversify 不适用于网格评估（单注融合评分），请去掉该参数'},
+                            status_code=400)
     try:
+        from starlette.concurrency import run_in_threadpool
         from ssq_eval_grid import evaluate_grid, EvalConfig
-        cfg = EvalConfig(window=window, diversify=diversify, seed=seed, apply_best=bool(apply))
-        out = evaluate_grid(cfg)
+        cfg = EvalConfig(window=window, seed=seed, apply_best=bool(apply),
+                         workers=workers, halving_eta=halving_eta)
+        out = await run_in_threadpool(evaluate_grid, cfg)
         return out
     except Exception as e:
         logger.error(f"eval_grid 失败: {e}")
         return {'status': 'error', 'error': str(e)}
 
 
+def _ssq_selfcheck_job(cyc):
+    history = cyc.history
+    if not history:
+        return {'status': 'error', 'error': 'no_history'}
+    idx = len(history) - 1
+    attempts = _ssq_attempts(cyc, idx)
+    # 单组融合
+    reds, blue = cyc._fuse_from_attempts(attempts)
+    # 多候选生成
+    cands = cyc.generate_candidates_from_attempts(attempts, count=5)
+    # 统计多样性（平均重合度）
+    overlaps = []
+    for i in range(len(cands)):
+        for j in range(i+1, len(cands)):
+            overlaps.append(len(set(cands[i]['reds']) & set(cands[j]['reds'])))
+    avg_overlap = sum(overlaps)/len(overlaps) if overlaps else 0.0
+    return {
+        'status': 'ok',
+        'fusion_params': {
+            'alpha_red': cyc.alpha_red,
+            'temp_red': cyc.temp_red,
+            'top_p_red': cyc.top_p_red,
+            'alpha_blue': cyc.alpha_blue,
+            'temp_blue': cyc.temp_blue,
+            'top_p_blue': cyc.top_p_blue,
+            'diversify': cyc.enforce_candidate_diversity,
+            'max_overlap': cyc.max_overlap_reds,
+        },
+        'cultural_gamma': getattr(cyc, 'cultural_gamma', None),
+        'one_fused': {'reds': reds, 'blue': blue},
+        'candidates': cands,
+        'avg_overlap': round(avg_overlap, 3),
+    }
+
+
 @app.get("/ssq/selfcheck")
 async def ssq_selfcheck():
     """轻量自检：验证融合逻辑、参数加载（fusion/env）与多候选多样性是否工作，返回一组摘要。"""
     try:
-        from ssq_predict_cycle import SSQPredictCycle
-        cyc = SSQPredictCycle(data_path='ssq_history.csv')
-        history = cyc.history
-        if not history:
-            return {'status': 'error', 'error': 'no_history'}
-        idx = len(history) - 1
-        attempts = []
-        for m in ['liuyao','liuren','qimen','ai']:
-            if m == 'liuyao': pr, pb = cyc.predict_liuyao(idx)
-            elif m == 'liuren': pr, pb = cyc.predict_liuren(idx)
-            elif m == 'qimen': pr, pb = cyc.predict_qimen(idx)
-            else: pr, pb = cyc.predict_ai(idx)
-            attempts.append({'strategy': m, 'pred_reds': pr, 'pred_blue': pb})
-        # 单组融合
-        reds, blue = cyc._fuse_from_attempts(attempts)
-        # 多候选生成
-        cands = cyc.generate_candidates_from_attempts(attempts, count=5)
-        # 统计多样性（平均重合度）
-        overlaps = []
-        for i in range(len(cands)):
-            for j in range(i+1, len(cands)):
-                overlaps.append(len(set(cands[i]['reds']) & set(cands[j]['reds'])))
-        avg_overlap = sum(overlaps)/len(overlaps) if overlaps else 0.0
-        return {
-            'status': 'ok',
-            'fusion_params': {
-                'alpha_red': cyc.alpha_red,
-                'temp_red': cyc.temp_red,
-                'top_p_red': cyc.top_p_red,
-                'alpha_blue': cyc.alpha_blue,
-                'temp_blue': cyc.temp_blue,
-                'top_p_blue': cyc.top_p_blue,
-                'diversify': cyc.enforce_candidate_diversity,
-                'max_overlap': cyc.max_overlap_reds,
-            },
-            'cultural_gamma': getattr(cyc, 'cultural_gamma', None),
-            'one_fused': {'reds': reds, 'blue': blue},
-            'candidates': cands,
-            'avg_overlap': round(avg_overlap, 3),
-        }
+        from ssq_predict_service import get_service
+        return await get_service().run(_ssq_selfcheck_job)
     except Exception as e:
         logger.error(f"selfcheck 失败: {e}")
         return {'status': 'error', 'error': str(e)}
 
 
+def _ssq_predict_job(cycle, count=1, train_ai=False, diversify=None, temp_red=None, temp_blue=None,
+                     top_p_red=None, top_p_blue=None, max_overlap=None, seed=None):
+    if train_ai:
+        # 训练只作用于本次请求的独立 AI 模型，常驻实例保持不变
+        try:
+            from ssq_ai_model import SSQAIModel
+            cycle.ai_model = SSQAIModel(cycle.data_manager)
+            _ = cycle.ai_model.train()
+        except Exception:
+            pass
+    history = cycle.history
+    if not history:
+        return {'status': 'error', 'error': 'no_history'}
+    idx = len(history) - 1
+    # 临时注入参数（仅当显式传入时覆盖），否则使用权重文件中的最佳融合参数
+    try:
+        if diversify is not None:
+            cycle.enforce_candidate_diversity = bool(diversify)
+        if temp_red is not None:
+            cycle.temp_red = float(temp_red)
+        if temp_blue is not None:
+            cycle.temp_blue = float(temp_blue)
+        if top_p_red is not None:
+            cycle.top_p_red = float(top_p_red)
+        if top_p_blue is not None:
+            cycle.top_p_blue = float(top_p_blue)
+        if max_overlap is not None:
+            cycle.max_overlap_reds = int(max_overlap)
+        if seed is not None:
+            import random as _rnd
+            _rnd.seed(int(seed))
+    except Exception:
+        pass
+    attempts = _ssq_attempts(cycle, idx)
+    n = max(1, min(50, int(count)))
+    if n == 1:
+        reds, blue = cycle._fuse_from_attempts(attempts)
+        out = [{'reds': sorted(reds), 'blue': int(blue)}]
+    else:
+        out = cycle.generate_candidates_from_attempts(attempts, count=n)
+    return {'status': 'ok', 'candidates': out, 'params': {
+        'diversify': bool(cycle.enforce_candidate_diversity),
+        'temp_red': float(cycle.temp_red), 'temp_blue': float(cycle.temp_blue),
+        'top_p_red': float(cycle.top_p_red), 'top_p_blue': float(cycle.top_p_blue),
+        'alpha_red': float(cycle.alpha_red),
+        'max_overlap': int(cycle.max_overlap_reds), 'seed': seed,
+    }}
+
+
 @app.get("/ssq/predict")
 async def ssq_predict(
     count: int = 1,
@@ -430,64 +491,51 @@ async def ssq_predict(
     """基于当前策略与权重返回融合预测候选（不落盘）。
     - count>1: 生成多组候选并按重合度阈值去相似。
     - 可选参数：diversify、temp_*/top_p_*（温度与top-p采样）、max_overlap（红球最多重合数）、seed（可复现随机种子）。
+    - 计算在常驻预测服务（ssq_predict_service）的预热实例上进行，不阻塞事件循环。
+    - 带 seed 的相同请求合并计算并缓存到数据/权重/先验变化为止；不带 seed 的请求取自后台预生成池。
     """
     try:
-        from ssq_predict_cycle import SSQPredictCycle
-        cycle = SSQPredictCycle(data_path='ssq_history.csv')
+        from ssq_predict_service import get_predict_cache, get_service
+        params = dict(count=max(1, min(50, int(count))), diversify=diversify, temp_red=temp_red,
+                      temp_blue=temp_blue, top_p_red=top_p_red, top_p_blue=top_p_blue,
+                      max_overlap=max_overlap, seed=seed)
         if train_ai:
-            try:
-                _ = cycle.ai_model.train()
-            except Exception:
-                pass
-        history = cycle.history
-        if not history:
-            return {'status': 'error', 'error': 'no_history'}
-        idx = len(history) - 1
-        true_reds, true_blue = history[idx]  # 用最近一期的期次上下文做基准
-        # 临时注入参数（仅当显式传入时覆盖），否则使用权重文件中的最佳融合参数
-        try:
-            if diversify is not None:
-                cycle.enforce_candidate_diversity = bool(diversify)
-            if temp_red is not None:
-                cycle.temp_red = float(temp_red)
-            if temp_blue is not None:
-                cycle.temp_blue = float(temp_blue)
-            if top_p_red is not None:
-                cycle.top_p_red = float(top_p_red)
-            if top_p_blue is not None:
-                cycle.top_p_blue = float(top_p_blue)
-            if max_overlap is not None:
-                cycle.max_overlap_reds = int(max_overlap)
-            if seed is not None:
-                import random as _rnd
-                _rnd.seed(int(seed))
-        except Exception:
-            pass
-        attempts = []
-        for model in ['liuyao','liuren','qimen','ai']:
-            if model == 'liuyao': pr, pb = cycle.predict_liuyao(idx)
-            elif model == 'liuren': pr, pb = cycle.predict_liuren(idx)
-            elif model == 'qimen': pr, pb = cycle.predict_qimen(idx)
-            else: pr, pb = cycle.predict_ai(idx)
-            attempts.append({'strategy': model, 'pred_reds': pr, 'pred_blue': pb})
-        n = max(1, min(50, int(count)))
-        if n == 1:
-            reds, blue = cycle._fuse_from_attempts(attempts)
-            out = [{'reds': sorted(reds), 'blue': int(blue)}]
-        else:
-            out = cycle.generate_candidates_from_attempts(attempts, count=n)
-        return {'status': 'ok', 'candidates': out, 'params': {
-            'diversify': bool(cycle.enforce_candidate_diversity),
-            'temp_red': float(cycle.temp_red), 'temp_blue': float(cycle.temp_blue),
-            'top_p_red': float(cycle.top_p_red), 'top_p_blue': float(cycle.top_p_blue),
-            'alpha_red': float(cycle.alpha_red),
-            'max_overlap': int(cycle.max_overlap_reds), 'seed': seed,
-        }}
+            # 训练结果每次不同且开销大，不走缓存
+            return await get_service().run(_ssq_predict_job, train_ai=True, **params)
+        key = tuple(sorted(params.items()))
+        return await get_predict_cache().get(_ssq_predict_job, key, seed is not None, **params)
     except Exception as e:
         logger.error(f"即时融合预测失败: {e}")
         return {'status': 'error', 'error': str(e)}
 
 
+@app.get("/ssq/service")
+async def ssq_service_stats():
+    """常驻预测服务状态：快照代次、加载时间、重建次数与执行器配置；/ssq/predict 缓存命中统计。"""
+    from ssq_predict_service import get_predict_cache, get_service
+    return {'status': 'ok', 'service': get_service().stats(), 'cache': get_predict_cache().stats()}
+
+
+@app.get("/ssq/live")
+async def ssq_live(limit: int = 50):
+    """返回持续预测流最近 N 条记录与最新快照（只读取末尾分段，不整文件加载）。"""
+    try:
+        from ssq_live_log import tail_records
+        items = tail_records(
+            os.path.join('reports', 'ssq_live_predictions.d'), max(1, min(2000, int(limit))),
+            legacy_path=os.path.join('reports', 'ssq_live_predictions.jsonl'),
+        )
+        latest = None
+        path = os.path.join('static', 'ssq_live_prediction.json')
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                latest = json.load(f)
+        return {'status': 'ok', 'count': len(items), 'items': items, 'latest': latest}
+    except Exception as e:
+        logger.error(f"读取持续预测流失败: {e}")
+        return {'status': 'error', 'error': str(e)}
+
+
 @app.post("/api/optimize_models")
 async def api_optimize_models(background_tasks: BackgroundTasks):
     """触发模型优化（异步执行）"""
@@ -652,6 +700,29 @@ async def api_bazi_paipan(source: str = 'solar', year: int = 1990, month: int =
         return {'status': 'error', 'error': str(e)}
 
 
+@app.post("/bazi/paipan_batch")
+async def api_bazi_paipan_batch(request: Request, source: str = 'solar', tz: str | None = None, sect: int = 2,
+                                format: str | None = None, output: str | None = None):
+    """批量排盘：请求体为 JSON Lines（默认）、CSV（Content-Type 含 csv 或 format=csv）或 JSON 数组。
+    - 每条记录：id、source、year、month、day、hour、minute、second、is_leap_month、tz、sect；缺省项取查询参数
+    - 输出按块流式返回，output=jsonl|csv（默认与输入一致，JSON 数组输入按 jsonl 输出），逐行与 /bazi/paipan 一致
+    """
+    from fastapi.responses import StreamingResponse
+    from bazi_paipan_batch import BATCH_MAX, MEDIA_TYPES, detect_format, parse_records, stream_paipan
+    try:
+        body = await request.body()
+        fmt = detect_format(body, format, request.headers.get('content-type', ''))
+        records = parse_records(body, fmt)
+    except Exception as e:
+        logger.error(f"bazi paipan_batch 解析失败: {e}")
+        return JSONResponse({'status': 'error', 'error': str(e)}, status_code=400)
+    if len(records) > BATCH_MAX:
+        return JSONResponse({'status': 'error', 'error': f'too_many_records: {len(records)} > {BATCH_MAX}'}, status_code=413)
+    out = (output or ('csv' if fmt == 'csv' else 'jsonl')).lower()
+    out = out if out in MEDIA_TYPES else 'jsonl'
+    return StreamingResponse(stream_paipan(records, out, source=source, tz=tz, sect=sect), media_type=MEDIA_TYPES[out])
+
+
 @app.get("/ssq/weights_history")
 async def ssq_weights_history(limit: int = 200):
     """返回权重历史（JSONL）最近N条"""
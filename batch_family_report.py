@@ -2,7 +2,7 @@
 批量家庭八字预测分析报告生成脚本
 - 输入多组夫妻信息，自动排盘并生成标准Markdown表格报告
 """
-from bazi_chart import solar2bazi
+from bazi_chart import bazi_records, solar2bazi, solar2bazi_many
 from collections import Counter
 
 families = [
@@ -21,11 +21,13 @@ def get_wuxing(gan_zhi):
         wuxing.append(zhi_map.get(z,'未知'))
     return Counter(wuxing)
 
-def family_report_md(family):
+def family_report_md(family, bazi_w=None, bazi_h=None):
     wife = family['wife']
     husband = family['husband']
-    bazi_w = solar2bazi(wife['year'], wife['month'], wife['day'], wife['hour'], wife['minute'], 0)
-    bazi_h = solar2bazi(husband['year'], husband['month'], husband['day'], husband['hour'], husband['minute'], 0)
+    if bazi_w is None:
+        bazi_w = solar2bazi(wife['year'], wife['month'], wife['day'], wife['hour'], wife['minute'], 0)
+    if bazi_h is None:
+        bazi_h = solar2bazi(husband['year'], husband['month'], husband['day'], husband['hour'], husband['minute'], 0)
     wuxing_w = get_wuxing(bazi_w)
     wuxing_h = get_wuxing(bazi_h)
     combined = Counter()
@@ -60,9 +62,14 @@ def family_report_md(family):
     return md
 
 def batch_generate_md(families, out_path):
+    # 所有成员一次批量排盘
+    people = [p for fam in families for p in (fam['wife'], fam['husband'])]
+    cols = solar2bazi_many([p['year'] for p in people], [p['month'] for p in people], [p['day'] for p in people],
+                           [p['hour'] for p in people], [p['minute'] for p in people], 0)
+    charts = bazi_records(cols)
     with open(out_path, 'w', encoding='utf-8') as f:
-        for fam in families:
-            f.write(family_report_md(fam))
+        for i, fam in enumerate(families):
+            f.write(family_report_md(fam, charts[2 * i], charts[2 * i + 1]))
             f.write('\n---\n')
 
 if __name__ == '__main__':
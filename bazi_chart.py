@@ -6,11 +6,15 @@
 - solar2bazi(公历, tz, sect)
 - lunar2bazi(农历, tz, sect)
 返回四柱干支、天干/地支拆分、生肖、节气与中/西历对应信息。
+- solar2bazi_many / lunar2bazi_many：整列输入（标量参数自动广播），返回列式结果（见 MANY_COLUMNS），
+  bazi_records 可将列式结果还原为与单条接口相同结构的字典列表。
+- 1900-2100 年优先查 ganzhi_calendar 预计算表（内存映射，O(1)），表缺失或越界时回退 lunar-python。
 """
 from __future__ import annotations
 
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, List, Sequence, Tuple, Optional, Union
 import datetime as _dt
+import numpy as np
 try:
     from zoneinfo import ZoneInfo as _ZoneInfo  # Python 3.9+
 except Exception:  # pragma: no cover
@@ -213,14 +217,27 @@ def _safe_leap(lunar: Any) -> bool:
     return False
 
 
+def _calendar():
+    try:
+        from ganzhi_calendar import get_calendar
+        return get_calendar()
+    except Exception:
+        return None
+
+
 def solar2bazi(year: int, month: int, day: int, hour: int = 12, minute: int = 0, second: int = 0, *, tz: Optional[str] = None, sect: int = 2) -> Dict[str, Any]:
+    # 换算到北京时间
+    by, bm, bd, bh, bmin, bs = _to_bj_components(year, month, day, hour, minute, second, tz)
+    cal = _calendar()
+    if cal is not None:
+        out = cal.bazi(by, bm, bd, bh, bmin, bs, sect=sect)
+        if out is not None:
+            return out
     # 惰性导入，避免编辑器找不到依赖时报错
     global Solar
     if Solar is None:
         from lunar_python import Solar as _Solar  # type: ignore
         Solar = _Solar
-    # 换算到北京时间
-    by, bm, bd, bh, bmin, bs = _to_bj_components(year, month, day, hour, minute, second, tz)
     solar = Solar.fromYmdHms(by, bm, bd, bh, bmin, bs)
     lunar = solar.getLunar()
     return _bazi_from_lunar(lunar, sect=sect)
@@ -231,12 +248,26 @@ def lunar2bazi(year: int, month: int, day: int, is_leap_month: bool = False, hou
     先将农历YMD映射到对应的公历日期（北京时间），再用“给定时区的时刻”换算成北京时间的时分秒，最终以北京时间排盘。
     这样处理能在跨时区场景下更贴近“先换算到北京时刻再排盘”的习惯。
     """
+    # 先拿到该农历日期对应的公历日（以北京时间定义的传统农历为准）
+    cal = _calendar()
+    found = cal.lunar_to_solar(year, month, day) if cal is not None else None
+    if found is not None:
+        solar_y, solar_m, solar_d = found
+    else:
+        solar_y, solar_m, solar_d = _lunar_to_solar(year, month, day, is_leap_month)
+
+    # 将“输入时刻（在 tz 时区）”换算为北京时间的时刻
+    by, bm, bd, bh, bmin, bs = _to_bj_components(solar_y, solar_m, solar_d, hour, minute, second, tz)
+
+    # 最终以北京时间的公历时刻排盘
+    return solar2bazi(by, bm, bd, bh, bmin, bs, tz='Asia/Shanghai', sect=sect)
+
+
+def _lunar_to_solar(year: int, month: int, day: int, is_leap_month: bool = False) -> Tuple[int, int, int]:
     global Lunar
     if Lunar is None:
         from lunar_python import Lunar as _Lunar  # type: ignore
         Lunar = _Lunar
-
-    # 先拿到该农历日期对应的公历日（以北京时间定义的传统农历为准）
     try:
         lunar_date = None
         # 先尝试带闰月标记版本
@@ -253,16 +284,168 @@ def lunar2bazi(year: int, month: int, day: int, is_leap_month: bool = False, hou
         if lunar_date is None:
             lunar_date = Lunar.fromYmd(year, month, day)  # type: ignore
         s = lunar_date.getSolar()
-        solar_y, solar_m, solar_d = s.getYear(), s.getMonth(), s.getDay()
+        return s.getYear(), s.getMonth(), s.getDay()
     except Exception:
         # 兜底：若失败，按输入年月日近似作为公历
-        solar_y, solar_m, solar_d = year, month, day
+        return year, month, day
 
-    # 将“输入时刻（在 tz 时区）”换算为北京时间的时刻
-    by, bm, bd, bh, bmin, bs = _to_bj_components(solar_y, solar_m, solar_d, hour, minute, second, tz)
 
-    # 最终以北京时间的公历时刻排盘
-    return solar2bazi(by, bm, bd, bh, bmin, bs, tz='Asia/Shanghai', sect=sect)
+MANY_COLUMNS = (
+    'year', 'month', 'day', 'hour', 'sect',
+    'solar_year', 'solar_month', 'solar_day',
+    'lunar_year', 'lunar_month', 'lunar_day', 'leap', 'month_in_chinese', 'day_in_chinese',
+    'zodiac', 'jie_qi', 'error',
+)
+
+
+def _column(value: Any, n: int) -> List[Any]:
+    if isinstance(value, (list, tuple, np.ndarray)):
+        if len(value) != n:
+            raise ValueError(f'列长度不一致：{len(value)} != {n}')
+        return list(value)
+    return [value] * n
+
+
+def _to_bj_many(years, months, days, hours, minutes, seconds, tzs) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """逐行换算到北京时间 -> ((n, 6) int64, 各行错误信息)。北京时区输入原样返回，不做逐行换算。"""
+    n = len(years)
+    out = np.zeros((n, 6), dtype=np.int64)
+    errors: List[Optional[str]] = [None] * n
+    bj = _bj_tz()
+    tzinfos: Dict[Any, _dt.tzinfo] = {}
+    for i in range(n):
+        try:
+            comps = (int(years[i]), int(months[i]), int(days[i]), int(hours[i]), int(minutes[i]), int(seconds[i]))
+            tz = tzs[i]
+            tzinfo = tzinfos.get(tz)
+            if tzinfo is None:
+                tzinfo = tzinfos[tz] = _parse_tz(tz)
+            if tzinfo is bj and 0 <= comps[3] <= 23 and 0 <= comps[4] <= 59 and 0 <= comps[5] <= 59:
+                _dt.date(*comps[:3])
+                out[i] = comps
+            else:
+                out[i] = _to_bj_components(*comps, tz)
+        except Exception as e:
+            errors[i] = str(e)
+    return out, errors
+
+
+def _fill_row(cols: Dict[str, List[Any]], i: int, b: Dict[str, Any]) -> None:
+    for k in ('year', 'month', 'day', 'hour', 'sect', 'zodiac', 'jie_qi'):
+        cols[k][i] = b.get(k)
+    for k in ('year', 'month', 'day'):
+        cols['solar_' + k][i] = b['solar'][k]
+        cols['lunar_' + k][i] = b['lunar'][k]
+    for k in ('leap', 'month_in_chinese', 'day_in_chinese'):
+        cols[k][i] = b['lunar'][k]
+
+
+def solar2bazi_many(years: Sequence[int], months: Union[int, Sequence[int]], days: Union[int, Sequence[int]],
+                    hours: Union[int, Sequence[int]] = 12, minutes: Union[int, Sequence[int]] = 0,
+                    seconds: Union[int, Sequence[int]] = 0, *, tz: Union[Optional[str], Sequence[Optional[str]]] = None,
+                    sect: Union[int, Sequence[int]] = 2) -> Dict[str, List[Any]]:
+    """批量公历排盘：按列返回，逐行与 solar2bazi 一致；出错行的 error 列为错误信息，其余列为 None。"""
+    n = len(years)
+    hours, minutes, seconds = _column(hours, n), _column(minutes, n), _column(seconds, n)
+    bj, errors = _to_bj_many(list(years), _column(months, n), _column(days, n), hours, minutes, seconds, _column(tz, n))
+    cols: Dict[str, List[Any]] = {k: [None] * n for k in MANY_COLUMNS}
+    cols['error'] = errors
+    sects = []
+    for i, v in enumerate(_column(sect, n)):
+        try:
+            sects.append(1 if int(v) == 1 else 2)
+        except Exception as e:
+            sects.append(2)
+            errors[i] = errors[i] or str(e)
+    good = np.array([e is None for e in errors], dtype=bool)
+    cal = _calendar()
+    ok = np.zeros(n, dtype=bool)
+    if cal is not None and good.any():
+        idx = np.flatnonzero(good)
+        b = bj[idx]
+        from ganzhi_calendar import GANZHI, JIE_QI, LUNAR_DAY, LUNAR_MONTH, SHENGXIAO, ordinals
+        sect_arr = np.asarray(sects, dtype=np.int64)[idx]
+        res = cal.bazi_many(ordinals(b[:, 0], b[:, 1], b[:, 2]), b[:, 3], b[:, 4], b[:, 5], sect_arr)
+        hit = res['ok']
+        ok[idx[hit]] = True
+        gz = np.array(GANZHI, dtype=object)
+        lm = res['lunar_month'][hit]
+        ly = res['lunar_year'][hit]
+        values = {
+            'year': gz[res['year'][hit]], 'month': gz[res['month'][hit]],
+            'day': gz[res['day'][hit]], 'hour': gz[res['hour'][hit]],
+            'sect': sect_arr[hit].tolist(),
+            'solar_year': b[hit, 0].tolist(), 'solar_month': b[hit, 1].tolist(), 'solar_day': b[hit, 2].tolist(),
+            'lunar_year': ly.tolist(), 'lunar_month': lm.tolist(), 'lunar_day': res['lunar_day'][hit].tolist(),
+            'leap': (lm < 0).tolist(),
+            'month_in_chinese': [('闰' if m < 0 else '') + LUNAR_MONTH[abs(m)] for m in lm.tolist()],
+            'day_in_chinese': np.array(LUNAR_DAY, dtype=object)[res['lunar_day'][hit]],
+            'zodiac': np.array(SHENGXIAO, dtype=object)[(ly - 4) % 12],
+            'jie_qi': np.array(('',) + JIE_QI, dtype=object)[res['jie_qi'][hit] + 1],
+        }
+        rows = idx[hit].tolist()
+        for k, vals in values.items():
+            col = cols[k]
+            for i, v in zip(rows, list(vals)):
+                col[i] = v
+    # 表外或无表的行逐条走 lunar-python
+    for i in np.flatnonzero(good & ~ok).tolist():
+        try:
+            _fill_row(cols, i, solar2bazi(*(int(v) for v in bj[i]), tz='Asia/Shanghai', sect=sects[i]))
+        except Exception as e:
+            errors[i] = str(e)
+    return cols
+
+
+def lunar2bazi_many(years: Sequence[int], months: Union[int, Sequence[int]], days: Union[int, Sequence[int]],
+                    is_leap_month: Union[bool, Sequence[bool]] = False, hours: Union[int, Sequence[int]] = 12,
+                    minutes: Union[int, Sequence[int]] = 0, seconds: Union[int, Sequence[int]] = 0, *,
+                    tz: Union[Optional[str], Sequence[Optional[str]]] = None,
+                    sect: Union[int, Sequence[int]] = 2) -> Dict[str, List[Any]]:
+    """批量农历排盘：逐行按 lunar2bazi 的口径换算为公历后交给 solar2bazi_many。"""
+    n = len(years)
+    months, days, leaps = _column(months, n), _column(days, n), _column(is_leap_month, n)
+    cal = _calendar()
+    sy: List[Any] = [0] * n
+    sm: List[Any] = [1] * n
+    sd: List[Any] = [1] * n
+    errors: List[Optional[str]] = [None] * n
+    for i in range(n):
+        try:
+            y, m, d = int(years[i]), int(months[i]), int(days[i])
+            found = cal.lunar_to_solar(y, m, d) if cal is not None else None
+            sy[i], sm[i], sd[i] = found if found is not None else _lunar_to_solar(y, m, d, bool(leaps[i]))
+        except Exception as e:
+            errors[i] = str(e)
+    cols = solar2bazi_many(sy, sm, sd, hours, minutes, seconds, tz=tz, sect=sect)
+    for i, e in enumerate(errors):
+        if e is not None:
+            for k in MANY_COLUMNS:
+                cols[k][i] = None
+            cols['error'][i] = e
+    return cols
+
+
+def bazi_records(cols: Dict[str, List[Any]]) -> List[Optional[Dict[str, Any]]]:
+    """列式结果 -> 与 solar2bazi 返回值同结构的字典列表（出错行为 None）。"""
+    out: List[Optional[Dict[str, Any]]] = []
+    for i in range(len(cols['error'])):
+        if cols['error'][i] is not None:
+            out.append(None)
+            continue
+        y, m, d, h = cols['year'][i], cols['month'][i], cols['day'][i], cols['hour'][i]
+        out.append({
+            'year': y, 'month': m, 'day': d, 'hour': h, 'sect': cols['sect'][i],
+            'gan': [y[0], m[0], d[0], h[0]],
+            'zhi': [y[1], m[1], d[1], h[1]],
+            'lunar': {k: cols[c][i] for k, c in (
+                ('year', 'lunar_year'), ('month', 'lunar_month'), ('day', 'lunar_day'), ('leap', 'leap'),
+                ('month_in_chinese', 'month_in_chinese'), ('day_in_chinese', 'day_in_chinese'))},
+            'solar': {'year': cols['solar_year'][i], 'month': cols['solar_month'][i], 'day': cols['solar_day'][i]},
+            'zodiac': cols['zodiac'][i],
+            'jie_qi': cols['jie_qi'][i],
+        })
+    return out
 
 
 if __name__ == '__main__':
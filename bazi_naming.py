@@ -7,12 +7,20 @@
 说明：
 - 不做历法换算（转换请用 bazi_chart 模块的 solar2bazi/lunar2bazi）；
 - 词库来源：data/element_chars.json 或根目录 element_chars.json；若均不存在则使用内建小字库。
+  每个五行下可为字列表，或 {"char": "铭", "strokes": 14, "pinyin": "ming"} 形式的带元数据条目。
+- 字库按文件 mtime 缓存为 CharLibrary（字→五行索引、元数据），评分按五行向量整列计算，前 N 名用有界堆选取；
+  候选池惰性展开，单次请求耗时与字库规模无关。
 """
 from __future__ import annotations
 
+import heapq
+import itertools
 import json
 import os
-from typing import Dict, List, Tuple, Optional
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Optional
+
+import numpy as np
 
 # 天干地支五行映射（常用版本，简化）
 GAN_WUXING = {
@@ -26,29 +34,109 @@ ZHI_WUXING = {
 
 WUXING_ORDER = ['金','木','水','火','土']
 
-def load_element_chars() -> Dict[str, List[str]]:
-    """加载五行取名常用字库（优先 data/element_chars.json，其次根目录 element_chars.json）。"""
-    candidates = [
+_FALLBACK_CHARS = {
+    '金': ['铭','锋','钧','鑫','铠','锐','钊','钟','镇','铎','鋆','铖'],
+    '木': ['林','柏','柯','楠','栋','槐','桂','森','荣','桐','榕','槿'],
+    '水': ['涵','清','润','泽','淇','洋','淳','渊','浩','涟','淞','沐'],
+    '火': ['炎','煜','熙','瑜','炜','熠','烁','烽','焕','炫','炯','煊'],
+    '土': ['坤','坡','城','垚','垣','堃','培','坦','墉','垦','堰','埕']
+}
+
+
+class CharLibrary:
+    """五行取名字库：各五行用字（保持文件次序）、字→五行索引（同字多属时取首次出现）与可选的笔画/拼音元数据。"""
+
+    def __init__(self, data: Dict[str, Iterable[Any]]):
+        self.chars: Dict[str, List[str]] = {}
+        self.meta: Dict[str, Dict[str, Any]] = {}
+        self.element_of: Dict[str, str] = {}
+        for elem, items in data.items():
+            chars: List[str] = []
+            for item in items:
+                if isinstance(item, dict):
+                    ch = str(item.get('char') or '')
+                    if not ch:
+                        continue
+                    self.meta.setdefault(ch, {k: v for k, v in item.items() if k != 'char'})
+                else:
+                    ch = str(item)
+                chars.append(ch)
+                self.element_of.setdefault(ch, elem)
+            self.chars[elem] = chars
+        # 元素编号：WUXING_ORDER 各占 0-4，其他键依次排后，最后一位表示“不在字库”
+        self.elements = list(WUXING_ORDER) + [e for e in self.chars if e not in WUXING_ORDER]
+        self._eid = {e: i for i, e in enumerate(self.elements)}
+        self._vec_cache: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.element_of)
+
+    def eid(self, ch: Optional[str]) -> int:
+        e = self.element_of.get(ch) if ch else None
+        return self._eid[e] if e is not None else len(self.elements)
+
+    def pref_vector(self, gender_seq: List[str], style_seq: List[str]) -> np.ndarray:
+        """性别/风格序列带来的各五行基础分（末位为不在字库的 0 分），按序列组合缓存。"""
+        key = (tuple(gender_seq), tuple(style_seq))
+        vec = self._vec_cache.get(key)
+        if vec is None:
+            vec = np.zeros(len(self.elements) + 1)
+            for i, elem in enumerate(self.elements):
+                if elem in gender_seq:
+                    vec[i] += (len(WUXING_ORDER) - gender_seq.index(elem)) * 0.15
+                if elem in style_seq:
+                    vec[i] += (len(WUXING_ORDER) - style_seq.index(elem)) * 0.2
+            self._vec_cache[key] = vec
+        return vec
+
+    def score_vector(self, primary: str, secondary: str, gender_seq: List[str], style_seq: List[str]) -> np.ndarray:
+        vec = self.pref_vector(gender_seq, style_seq).copy()
+        if primary in self._eid:
+            vec[self._eid[primary]] += 2.0
+        if secondary in self._eid:
+            vec[self._eid[secondary]] += 1.0
+        return vec
+
+
+_LIBRARY: Dict[str, Tuple[Tuple[int, int], CharLibrary]] = {}
+_LIBRARY_LOCK = threading.Lock()
+
+
+def _library_paths() -> List[str]:
+    return [
         os.path.join(os.getcwd(), 'data', 'element_chars.json'),
         os.path.join(os.getcwd(), 'element_chars.json'),
     ]
-    for path in candidates:
-        if os.path.exists(path):
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # 仅取前若干，避免极端长列表影响排序/输出（可按需调整）
-                    return {k: list(v) for k, v in data.items()}
-            except Exception:
-                continue
-    # 兜底小字库
-    return {
-        '金': ['铭','锋','钧','鑫','铠','锐','钊','钟','镇','铎','鋆','铖'],
-        '木': ['林','柏','柯','楠','栋','槐','桂','森','荣','桐','榕','槿'],
-        '水': ['涵','清','润','泽','淇','洋','淳','渊','浩','涟','淞','沐'],
-        '火': ['炎','煜','熙','瑜','炜','熠','烁','烽','焕','炫','炯','煊'],
-        '土': ['坤','坡','城','垚','垣','堃','培','坦','墉','垦','堰','埕']
-    }
+
+
+def get_char_library() -> CharLibrary:
+    """加载并缓存字库（优先 data/element_chars.json，其次根目录 element_chars.json）；文件变化后自动重载。"""
+    for path in _library_paths():
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        sig = (st.st_mtime_ns, st.st_size)
+        hit = _LIBRARY.get(path)
+        if hit is not None and hit[0] == sig:
+            return hit[1]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lib = CharLibrary(json.load(f))
+        except Exception:
+            continue
+        with _LIBRARY_LOCK:
+            _LIBRARY[path] = (sig, lib)
+        return lib
+    hit = _LIBRARY.get('')
+    if hit is None:
+        hit = _LIBRARY[''] = ((0, 0), CharLibrary(_FALLBACK_CHARS))
+    return hit[1]
+
+
+def load_element_chars() -> Dict[str, List[str]]:
+    """加载五行取名常用字库（优先 data/element_chars.json，其次根目录 element_chars.json）。"""
+    return {k: list(v) for k, v in get_char_library().chars.items()}
 
 def parse_bazi(bazi_text: str) -> Tuple[List[str], List[str]]:
     """解析八字字符串为天干列表与地支列表。输入示例："辛酉年 丁未月 壬午日 戊午时""" 
@@ -99,7 +187,7 @@ def _style_pref_sequence(style: str) -> List[str]:
     return WUXING_ORDER
 
 def _score_combo(c1: str, c2: Optional[str], primary: str, secondary: str, gender_seq: List[str], style_seq: List[str], lib_map: Dict[str, List[str]]) -> float:
-    # 给定名组合的得分：弱项覆盖 + 性别风格偏好 + 基础频度
+    # 给定名组合的得分：弱项覆盖 + 性别风格偏好 + 基础频度（逐条参考实现；pick_names 使用 _score_pairs 整列计算）
     def char_element(ch: str) -> Optional[str]:
         for e, chars in lib_map.items():
             if ch in chars:
@@ -136,6 +224,36 @@ def _score_combo(c1: str, c2: Optional[str], primary: str, secondary: str, gende
         base += 0.2
     return base
 
+def _score_pairs(lib: CharLibrary, e1: np.ndarray, e2: Optional[np.ndarray], primary: str, secondary: str,
+                 gender_seq: List[str], style_seq: List[str]) -> np.ndarray:
+    """整列计算名字得分（e1/e2 为 CharLibrary 元素编号，单名 e2 为 None），与 _score_combo 逐条一致。"""
+    vec = lib.score_vector(primary, secondary, gender_seq, style_seq)
+    none = len(lib.elements)
+    p = lib._eid.get(primary, none)
+    q = lib._eid.get(secondary, none)
+    score = vec[e1]
+    if e2 is None:
+        return score + np.where(e1 == p, 0.4, 0.0)
+    score = score + vec[e2]
+    # 鼓励主弱+次弱的搭配；两字不同五行再加分
+    score += np.where((e1 == p) & (e2 == q), 0.4, 0.0)
+    score += np.where((e1 != none) & (e2 != none) & (e1 != e2), 0.2, 0.0)
+    return score
+
+
+def _unique_pairs(pairs: Iterator[Tuple[str, str]], limit: int) -> List[Tuple[str, str]]:
+    seen = set()
+    out: List[Tuple[str, str]] = []
+    for a, b in pairs:
+        if (a, b) in seen or (b, a) in seen:
+            continue
+        seen.add((a, b))
+        out.append((a, b))
+        if len(out) >= limit:
+            break
+    return out
+
+
 def pick_names(
     surname: str,
     counts: Dict[str, int],
@@ -147,9 +265,9 @@ def pick_names(
 ) -> List[Dict[str, str]]:
     """根据五行强弱、性别与风格偏好给出名字。
     - single=True 产出单字名；False 产出双字名。
-    - 排序依据：弱项覆盖优先，叠加性别与风格序列权重。
+    - 排序依据：弱项覆盖优先，叠加性别与风格序列权重（得分保留三位小数，同分按生成次序）。
     """
-    lib = load_element_chars()
+    lib = get_char_library()
     # 找弱项（计数小者优先）
     weak_sorted = sorted(WUXING_ORDER, key=lambda w: counts.get(w, 0))
     primary = weak_sorted[0]
@@ -158,21 +276,18 @@ def pick_names(
     gender_seq = _gender_pref_sequence(gender)
     style_seq = _style_pref_sequence(style)
 
-    # 候选池
-    pool_primary = list(lib.get(primary, []))
-    pool_secondary = list(lib.get(secondary, []))
-    # 扩展：按性别与风格序列组织其它池
-    extra_pools: List[str] = []
-    for w in gender_seq:
-        if w not in (primary, secondary):
-            extra_pools.extend(lib.get(w, []))
-    # 扩展风格（追加，保持去重）
-    for w in style_seq:
-        for ch in lib.get(w, []):
-            if ch not in extra_pools and ch not in pool_primary and ch not in pool_secondary:
-                extra_pools.append(ch)
-
-    results: List[Dict[str, str]] = []
+    # 候选池（惰性展开）：主弱、次弱，其后按性别序列接其余五行
+    # （风格序列只会补入已在上述池中的字，故不再单独展开）
+    pool_primary = lib.chars.get(primary, [])
+    pool_secondary = lib.chars.get(secondary, [])
+
+    def extra_pools() -> Iterator[str]:
+        return itertools.chain.from_iterable(
+            lib.chars.get(w, []) for w in gender_seq if w not in (primary, secondary))
+
+    names: List[str] = []
+    chars1: List[str] = []
+    chars2: List[str] = []
     used = set()
 
     def push_name(c1: str, c2: Optional[str]):
@@ -183,62 +298,42 @@ def pick_names(
         name = f"{surname}{c1}{'' if single else (c2 or '')}"
         if name in used:
             return
-        score = _score_combo(c1, None if single else c2, primary, secondary, gender_seq, style_seq, lib)
-        explain = (
-            f"弱项补益：主‘{primary}’{(' + 次‘'+secondary+'’') if not single else ''}；"
-            f"风格：{style or 'neutral'}；性别：{gender or 'neutral'}"
-        )
         used.add(name)
-        results.append({
-            'name': name,
-            'explain': explain,
-            'primary': primary,
-            'secondary': secondary,
-            'score': f"{score:.3f}",
-        })
+        names.append(name)
+        chars1.append(c1)
+        chars2.append(c2 or '')
 
     # 生成候选
     if single:
         # 单字名：按主弱池为主，辅以偏好池补充
-        for ch in pool_primary + pool_secondary + extra_pools:
+        for ch in itertools.chain(pool_primary, pool_secondary, extra_pools()):
             push_name(ch, None)
-            if len(results) >= count * 3:
+            if len(names) >= count * 3:
                 break
     else:
-        # 双字名：优先主弱+次弱，其次主弱+偏好
-        pairs: List[Tuple[str, str]] = []
-        for c1 in pool_primary:
-            for c2 in (pool_secondary if pool_secondary else extra_pools):
-                pairs.append((c1, c2))
+        # 双字名：优先主弱+次弱，其次主弱+偏好；去重后最多 500 组
+        pairs: Iterator[Tuple[str, str]] = (
+            (c1, c2) for c1 in pool_primary for c2 in (pool_secondary if pool_secondary else extra_pools()))
         if not pool_secondary:
             # 主弱 + 偏好，补充更多组合
-            for c1 in pool_primary[:20]:
-                for c2 in extra_pools[:30]:
-                    pairs.append((c1, c2))
-        # 去重并截断
-        seen = set()
-        trimmed: List[Tuple[str, str]] = []
-        for a,b in pairs:
-            if (a,b) in seen or (b,a) in seen:
-                continue
-            seen.add((a,b))
-            trimmed.append((a,b))
-            if len(trimmed) >= 500:
-                break
-        for a,b in trimmed:
+            pairs = itertools.chain(pairs, ((c1, c2) for c1 in pool_primary[:20]
+                                            for c2 in itertools.islice(extra_pools(), 30)))
+        for a, b in _unique_pairs(pairs, 500):
             push_name(a, b)
 
-    # 排序取前N
-    def score_key(x: Dict[str,str]) -> float:
-        try:
-            return float(x.get('score','0'))
-        except Exception:
-            return 0.0
-    results.sort(key=score_key, reverse=True)
-    # 去掉内部评分字段
-    for r in results:
-        r.pop('score', None)
-    return results[:max(1, min(100, count))]
+    if not names:
+        return []
+    e1 = np.array([lib.eid(c) for c in chars1], dtype=np.int64)
+    e2 = None if single else np.array([lib.eid(c) for c in chars2], dtype=np.int64)
+    scores = _score_pairs(lib, e1, e2, primary, secondary, gender_seq, style_seq)
+    # 排序键与旧版一致：三位小数得分降序，同分保持生成次序（nlargest 稳定）
+    keys = [float(f"{x:.3f}") for x in scores.tolist()]
+    top = heapq.nlargest(max(1, min(100, count)), range(len(names)), key=keys.__getitem__)
+    explain = (
+        f"弱项补益：主‘{primary}’{(' + 次‘'+secondary+'’') if not single else ''}；"
+        f"风格：{style or 'neutral'}；性别：{gender or 'neutral'}"
+    )
+    return [{'name': names[i], 'explain': explain, 'primary': primary, 'secondary': secondary} for i in top]
 
 def generate_names(
     surname: str,
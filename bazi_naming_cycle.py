@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 """
 八字起名任务循环（轻量）：
-- 读取队列文件 queue/bazi_naming.jsonl（每行一个请求）
+- 从持久队列 bazi_naming_queue（SQLite，租约 + 确认）批量取任务，线程池并发生成；
+  旧版 queue/bazi_naming.jsonl 中的请求会先迁入队列
 - 字段：surname, bazi, gender=neutral, count=10, style=neutral, single=false
-- 生成结果写入 results/bazi_naming/<timestamp>.json，并在日志中输出简要信息
-- 若队列不存在则按间隔休眠等待
+- 生成结果写入 results/bazi_naming/<timestamp>.json，并在日志中输出简要信息；写完才 ack，
+  处理失败 nack 后按尝试次数退避重试，进程中断未 ack 的任务在可见性超时后重新可见
+- 可选 DeepSeek 精调按批合并为一次调用，批内未返回的任务再单独调用
+- 队列为空时从 BAZI_NAMING_POLL_SECONDS 起指数退避休眠，上限 BAZI_NAMING_INTERVAL_SECONDS
 
 环境变量：
 - BAZI_NAMING_INTERVAL_SECONDS (默认 60)
+- BAZI_NAMING_POLL_SECONDS (默认 1)
+- BAZI_NAMING_WORKERS (默认 4)
+- BAZI_NAMING_DEEPSEEK_BATCH (默认 4)
+- BAZI_NAMING_RETAIN_SECONDS (已完成任务保留时长，默认 7 天)
 
 依赖：bazi_naming.generate_names
 """
@@ -16,8 +23,12 @@ import sys
 import json
 import time
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from bazi_naming_queue import Job, NamingQueue, get_queue
+from env_config import env_int
 
 try:
     from bazi_naming import generate_names, load_element_chars
@@ -48,23 +59,11 @@ def _interval() -> int:
         return 60
 
 
-def _read_one() -> Dict[str, Any] | None:
-    if not QUEUE.exists():
-        return None
+def _poll_seconds() -> float:
     try:
-        with open(QUEUE, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        if not lines:
-            return None
-        first = lines[0]
-        remain = lines[1:]
-        # 覆盖写回剩余
-        with open(QUEUE, 'w', encoding='utf-8') as f:
-            f.writelines(remain)
-        return json.loads(first)
-    except Exception as e:
-        print(f"[bazi_naming_cycle] 读取队列失败: {e}", flush=True)
-        return None
+        return max(0.05, float(os.getenv('BAZI_NAMING_POLL_SECONDS', '1')))
+    except Exception:
+        return 1.0
 
 
 def _write_result(req: Dict[str, Any], data: Dict[str, Any]) -> None:
@@ -151,129 +150,236 @@ def _local_rank(candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return scored[:15]
 
 
-def _try_deepseek(base_top: List[Dict[str, Any]], surname: str, bazi_text: str) -> Dict[str, Any]:
-    """调用 DeepSeek 对 base_top 进行语义/文化精调排序，返回 {'items': [...], 'top3': [...]} 或 {'error': ...}
-    安全失败：返回 error，不抛异常。
-    """
+def _deepseek_context(surname: str, bazi_text: str) -> Dict[str, Any]:
+    bazi_desc = '按本地分析：日主癸水，局中土火偏旺，喜金为首、水次之，木少量为宜，忌火土过多。'
+    return {
+        'gender': 'female',
+        'surname': surname,
+        'bazi': bazi_text.replace('年', ' ').replace('月', ' ').replace('日', ' ').replace('时', ' ').strip(),
+        'preference': '金>水>木(少量)，避火土',
+        'bazi_note': bazi_desc,
+    }
+
+
+def _deepseek_candidates(base_top: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {'name': it['name'], 'elems': it.get('elems'), 'local': it.get('score_local', 0)}
+        for it in base_top
+    ]
+
+
+_DEEPSEEK_SYSTEM = (
+    '你是中文起名与周易顾问。请严格按要求仅输出合法JSON，'
+    '基于五行喜用、语义美感、音律与歧义规避，对候选名综合评分。'
+)
+
+
+def _deepseek_client():
+    """返回 (client, error)；未启用或不可用时 client 为 None。"""
     if not _deepseek_enabled():
-        return {'error': 'disabled'}
+        return None, 'disabled'
     key = os.getenv('DEEPSEEK_API_KEY')
     if not key:
-        return {'error': 'no_api_key'}
+        return None, 'no_api_key'
     if DeepseekAPI is None:
-        return {'error': 'client_unavailable'}
+        return None, 'client_unavailable'
+    return DeepseekAPI(api_key=key), None
+
+
+def _deepseek_chat(api, user_prompt: Dict[str, Any], max_tokens: int) -> Tuple[Optional[Dict[str, Any]], str]:
+    messages = [
+        {"role": "system", "content": _DEEPSEEK_SYSTEM},
+        {"role": "user", "content": json.dumps(user_prompt, ensure_ascii=False)},
+    ]
+    resp = api.chat(messages, model="deepseek-chat", temperature=0.35, max_tokens=max_tokens)
+    content = (
+        resp.get('choices', [{}])[0].get('message', {}).get('content', '') if isinstance(resp, dict) else ''
+    ).strip()
+    js = None
+    try:
+        js = json.loads(content)
+    except Exception:
+        import re
+        m = re.search(r'\{.*\}', content, re.S)
+        if m:
+            try:
+                js = json.loads(m.group(0))
+            except Exception:
+                js = None
+    return (js if isinstance(js, dict) else None), content
+
+
+def _refine(base_top: List[Dict[str, Any]], js: Dict[str, Any]) -> Dict[str, Any]:
+    byname = {it['name']: it for it in base_top}
+    refined: List[Dict[str, Any]] = []
+    for it in js.get('items', []):
+        nm = it.get('name')
+        sc = it.get('score', 0)
+        rsn = it.get('reason', '')
+        if nm in byname:
+            base = byname[nm]
+            refined.append({
+                'name': nm,
+                'score_ai': sc,
+                'reason': rsn,
+                'elems': base.get('elems'),
+                'score_local': base.get('score_local'),
+            })
+    refined.sort(key=lambda x: (x['score_ai'], x['score_local']), reverse=True)
+    return {'items': refined[:10], 'top3': js.get('top3')}
+
+
+def _try_deepseek(base_top: List[Dict[str, Any]], surname: str, bazi_text: str) -> Dict[str, Any]:
+    """调用 DeepSeek 对 base_top 进行语义/文化精调排序，返回 {'items': [...], 'top3': [...]} 或 {'error': ...}
+    安全失败：返回 error，不抛异常。
+    """
     try:
-        api = DeepseekAPI(api_key=key)
-        bazi_desc = '按本地分析：日主癸水，局中土火偏旺，喜金为首、水次之，木少量为宜，忌火土过多。'
-        names_block = [
-            {'name': it['name'], 'elems': it.get('elems'), 'local': it.get('score_local', 0)}
-            for it in base_top
-        ]
-        sys_prompt = (
-            '你是中文起名与周易顾问。请严格按要求仅输出合法JSON，'
-            '基于五行喜用、语义美感、音律与歧义规避，对候选名综合评分。'
-        )
+        api, err = _deepseek_client()
+        if api is None:
+            return {'error': err}
         user_prompt = {
-            'context': {
-                'gender': 'female',
-                'surname': surname,
-                'bazi': bazi_text.replace('年', ' ').replace('月', ' ').replace('日', ' ').replace('时', ' ').strip(),
-                'preference': '金>水>木(少量)，避火土',
-                'bazi_note': bazi_desc,
-            },
-            'candidates': names_block,
+            'context': _deepseek_context(surname, bazi_text),
+            'candidates': _deepseek_candidates(base_top),
             'instruction': (
                 '请按 0~10 打分，给出理由，返回 {"items":[{"name":"..","score":..,"reason":".."},..],'
                 '"top3":["..","..",".."]}。只输出纯JSON，不要任何额外文字；若无法完成，请仅输出 {}。'
             ),
         }
-        messages = [
-            {"role": "system", "content": sys_prompt},
-            {"role": "user", "content": json.dumps(user_prompt, ensure_ascii=False)},
-        ]
-        resp = api.chat(messages, model="deepseek-chat", temperature=0.35, max_tokens=1400)
-        content = (
-            resp.get('choices', [{}])[0].get('message', {}).get('content', '') if isinstance(resp, dict) else ''
-        ).strip()
-        js = None
-        try:
-            js = json.loads(content)
-        except Exception:
-            import re
-            m = re.search(r'\{.*\}', content, re.S)
-            if m:
-                try:
-                    js = json.loads(m.group(0))
-                except Exception:
-                    js = None
-        if js and isinstance(js, dict) and 'items' in js:
-            byname = {it['name']: it for it in base_top}
-            refined: List[Dict[str, Any]] = []
-            for it in js.get('items', []):
-                nm = it.get('name')
-                sc = it.get('score', 0)
-                rsn = it.get('reason', '')
-                if nm in byname:
-                    base = byname[nm]
-                    refined.append({
-                        'name': nm,
-                        'score_ai': sc,
-                        'reason': rsn,
-                        'elems': base.get('elems'),
-                        'score_local': base.get('score_local'),
-                    })
-            refined.sort(key=lambda x: (x['score_ai'], x['score_local']), reverse=True)
-            return {'items': refined[:10], 'top3': js.get('top3')}
+        js, content = _deepseek_chat(api, user_prompt, max_tokens=1400)
+        if js and 'items' in js:
+            return _refine(base_top, js)
         return {'error': 'parse_failed', 'raw': content}
     except Exception as e:
         return {'error': str(e)}
 
 
+def _try_deepseek_batch(tasks: List[Tuple[List[Dict[str, Any]], str, str]]) -> List[Dict[str, Any]]:
+    """多任务合并为一次 DeepSeek 调用；批内缺失或解析失败的任务回退到单独调用。安全失败，不抛异常。"""
+    if len(tasks) <= 1:
+        return [_try_deepseek(*t) for t in tasks]
+    try:
+        api, err = _deepseek_client()
+        if api is None:
+            return [{'error': err} for _ in tasks]
+        user_prompt = {
+            'tasks': [
+                {'task_id': i, 'context': _deepseek_context(surname, bazi), 'candidates': _deepseek_candidates(base_top)}
+                for i, (base_top, surname, bazi) in enumerate(tasks)
+            ],
+            'instruction': (
+                '对每个任务分别按 0~10 打分并给出理由，返回 {"results":[{"task_id":0,'
+                '"items":[{"name":"..","score":..,"reason":".."},..],"top3":["..","..",".."]},..]}。'
+                '只输出纯JSON，不要任何额外文字；若无法完成，请仅输出 {}。'
+            ),
+        }
+        js, _ = _deepseek_chat(api, user_prompt, max_tokens=min(8000, 1400 * len(tasks)))
+        by_task: Dict[int, Dict[str, Any]] = {}
+        for res in (js or {}).get('results') or []:
+            try:
+                if isinstance(res, dict) and 'items' in res:
+                    by_task[int(res.get('task_id'))] = res
+            except Exception:
+                continue
+    except Exception:
+        by_task = {}
+    return [_refine(t[0], by_task[i]) if i in by_task else _try_deepseek(*t) for i, t in enumerate(tasks)]
+
+
+def _parse_request(req: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'surname': req.get('surname') or '张',
+        'bazi': req.get('bazi') or '辛酉年 丁未月 壬午日 戊午时',
+        'gender': req.get('gender') or 'neutral',
+        'count': int(req.get('count') or 10),
+        'style': req.get('style') or 'neutral',
+        'single': bool(req.get('single') or False),
+    }
+
+
+def _generate(req: Dict[str, Any]) -> Dict[str, Any]:
+    """单个任务的本地生成（无 DeepSeek）；参数非法时抛出，由调用方 nack。"""
+    p = _parse_request(req)
+    if generate_names is None:
+        return {'error': 'generate_names unavailable', 'items': []}
+    data = generate_names(surname=p['surname'], bazi_text=p['bazi'], gender=p['gender'], count=p['count'],
+                          style=p['style'], single=p['single'])
+    # 可选：本地排序摘要
+    try:
+        base_top = _local_rank(data.get('candidates') or [])
+        if base_top:
+            data['base_top'] = base_top
+    except Exception as e:
+        print(f"[bazi_naming_cycle] base_top error: {e}", flush=True)
+    return data
+
+
+def process_batch(queue: NamingQueue, jobs: List[Job], pool: ThreadPoolExecutor) -> int:
+    """并发生成一批任务，合并 DeepSeek 精调，逐个落盘并 ack；返回成功条数。"""
+    futures = [pool.submit(_generate, job.payload) for job in jobs]
+    ready: List[Tuple[Job, Dict[str, Any]]] = []
+    for job, fut in zip(jobs, futures):
+        try:
+            ready.append((job, fut.result()))
+        except Exception as e:
+            print(f"[bazi_naming_cycle] 处理失败 #{job.id}: {e}", flush=True)
+            queue.nack(job, error=str(e), delay=min(300.0, 5.0 * 2 ** job.attempts))
+    if _deepseek_enabled():
+        size = env_int('BAZI_NAMING_DEEPSEEK_BATCH', 4, lo=1, hi=64)
+        todo = [(job, data) for job, data in ready if 'candidates' in data]
+        chunks = [todo[i:i + size] for i in range(0, len(todo), size)]
+
+        def rerank(chunk: List[Tuple[Job, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+            reqs = [_parse_request(j.payload) for j, _ in chunk]
+            return _try_deepseek_batch([(d.get('base_top') or [], r['surname'], r['bazi'])
+                                        for (_, d), r in zip(chunk, reqs)])
+
+        results = pool.map(rerank, chunks)
+        for chunk, outs in zip(chunks, results):
+            for (job, data), ds in zip(chunk, outs):
+                data['deepseek'] = ds
+                print(f"[bazi_naming_cycle] deepseek #{job.id}: {('ok' if 'items' in ds else ds.get('error'))}", flush=True)
+    done = 0
+    for job, data in ready:
+        _write_result(job.payload, data)
+        if queue.ack(job):
+            done += 1
+        else:
+            print(f"[bazi_naming_cycle] 租约已失效 #{job.id}（可能被重复处理）", flush=True)
+    return done
+
+
 def main() -> None:
     print("[bazi_naming_cycle] 启动", flush=True)
     if generate_names is None:
         print("[bazi_naming_cycle] bazi_naming 不可用，进入空闲等待模式", flush=True)
-    while True:
-        req = _read_one()
-        if req is None:
-            time.sleep(_interval())
-            continue
-        try:
-            surname = req.get('surname') or '张'
-            bazi = req.get('bazi') or '辛酉年 丁未月 壬午日 戊午时'
-            gender = req.get('gender') or 'neutral'
-            count = int(req.get('count') or 10)
-            style = req.get('style') or 'neutral'
-            single = bool(req.get('single') or False)
-            if generate_names is None:
-                data = {'error': 'generate_names unavailable', 'items': []}
-            else:
-                data = generate_names(surname=surname, bazi_text=bazi, gender=gender, count=count, style=style, single=single)
-                # 可选：本地排序摘要
-                try:
-                    base_top = _local_rank(data.get('candidates') or [])
-                    print(f"[bazi_naming_cycle] base_top computed: {len(base_top)}", flush=True)
-                    if base_top:
-                        data['base_top'] = base_top
-                except Exception as e:
-                    print(f"[bazi_naming_cycle] base_top error: {e}", flush=True)
-                # 可选：DeepSeek 精调
+    queue = get_queue()
+    workers = env_int('BAZI_NAMING_WORKERS', 4, lo=1, hi=64)
+    try:
+        retain = float(os.getenv('BAZI_NAMING_RETAIN_SECONDS', str(7 * 86400)))
+    except Exception:
+        retain = 7 * 86400.0
+    idle = _poll_seconds()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bazi-naming') as pool:
+        while True:
+            try:
+                migrated = queue.import_jsonl(QUEUE)
+                if migrated:
+                    print(f"[bazi_naming_cycle] 迁入旧队列 {migrated} 条", flush=True)
+                jobs = queue.lease(workers * 2)
+            except Exception as e:
+                print(f"[bazi_naming_cycle] 读取队列失败: {e}", flush=True)
+                jobs = []
+            if not jobs:
                 try:
-                    if _deepseek_enabled():
-                        print("[bazi_naming_cycle] deepseek enabled", flush=True)
-                        ds = _try_deepseek(data.get('base_top') or [], surname=surname, bazi_text=bazi)
-                        data['deepseek'] = ds
-                        print(f"[bazi_naming_cycle] deepseek status: {('ok' if 'items' in ds else ds.get('error'))}", flush=True)
-                    else:
-                        print("[bazi_naming_cycle] deepseek disabled", flush=True)
-                except Exception as e:
-                    data['deepseek'] = { 'error': str(e) }
-                    print(f"[bazi_naming_cycle] deepseek error: {e}", flush=True)
-            _write_result(req, data)
-        except Exception as e:
-            print(f"[bazi_naming_cycle] 处理失败: {e}", flush=True)
-        # 小间隔，避免忙等
-        time.sleep(1)
+                    queue.prune(retain)
+                except Exception:
+                    pass
+                time.sleep(idle)
+                idle = min(float(_interval()), idle * 2)
+                continue
+            idle = _poll_seconds()
+            done = process_batch(queue, jobs, pool)
+            print(f"[bazi_naming_cycle] 本批完成 {done}/{len(jobs)}", flush=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,224 @@
+"""
+八字起名任务队列（SQLite，WAL）
+
+- 入队/出队走 (status, visible_at, id) 索引，与队列长度无关；多进程并发安全（BEGIN IMMEDIATE 串行化租约）
+- 出队即租约：任务在可见性超时（BAZI_NAMING_VISIBILITY_SECONDS，默认 300）内对其他消费者不可见，
+  处理完成后 ack；超时未 ack 的任务自动重新可见，超过 BAZI_NAMING_MAX_ATTEMPTS（默认 5）次转入 dead
+- ack/nack 校验租约令牌，超时后被他人重新租走的任务不会被旧消费者误确认
+- stats() 给出积压深度、在途数（租约未过期）、延迟重试数（nack 后等待退避）、最老等待时长与最近完成任务的排队/处理耗时分位
+- 兼容旧版 queue/bazi_naming.jsonl：import_jsonl 在文件锁下整体迁入并清空
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from env_config import env_float, env_int
+
+ROOT = Path(__file__).resolve().parent
+DB_PATH = os.getenv('BAZI_NAMING_QUEUE_DB', str(ROOT / 'queue' / 'bazi_naming.db'))
+LEGACY_QUEUE = ROOT / 'queue' / 'bazi_naming.jsonl'
+
+
+class Job:
+    __slots__ = ('id', 'payload', 'attempts', 'lease', 'enqueued_at', 'leased_at')
+
+    def __init__(self, id: int, payload: Dict[str, Any], attempts: int, lease: str, enqueued_at: float, leased_at: float):
+        self.id = id
+        self.payload = payload
+        self.attempts = attempts
+        self.lease = lease
+        self.enqueued_at = enqueued_at
+        self.leased_at = leased_at
+
+
+class NamingQueue:
+    """可见性超时 + 确认语义的持久队列；连接按线程复用。"""
+
+    def __init__(self, path: Optional[str] = None, visibility: Optional[float] = None,
+                 max_attempts: Optional[int] = None):
+        self.path = path or DB_PATH
+        self.visibility = visibility if visibility is not None else env_float('BAZI_NAMING_VISIBILITY_SECONDS', 300.0)
+        self.max_attempts = max_attempts or env_int('BAZI_NAMING_MAX_ATTEMPTS', 5, lo=1)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+              id          INTEGER PRIMARY KEY AUTOINCREMENT,
+              payload     TEXT NOT NULL,
+              status      TEXT NOT NULL DEFAULT 'queued',
+              visible_at  REAL NOT NULL,
+              enqueued_at REAL NOT NULL,
+              leased_at   REAL,
+              finished_at REAL,
+              attempts    INTEGER NOT NULL DEFAULT 0,
+              lease       TEXT,
+              error       TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_ready ON jobs(status, visible_at, id);
+            CREATE INDEX IF NOT EXISTS jobs_finished ON jobs(status, finished_at);
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # ---------- 生产 ----------
+    def enqueue(self, payload: Dict[str, Any]) -> int:
+        return self.enqueue_many([payload])[0]
+
+    def enqueue_many(self, payloads: Iterable[Dict[str, Any]]) -> List[int]:
+        now = time.time()
+        conn = self._conn()
+        ids: List[int] = []
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for p in payloads:
+                cur = conn.execute('INSERT INTO jobs(payload, visible_at, enqueued_at) VALUES (?, ?, ?)',
+                                   (json.dumps(p, ensure_ascii=False), now, now))
+                ids.append(int(cur.lastrowid))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return ids
+
+    def import_jsonl(self, path: Optional[Path] = None) -> int:
+        """迁入旧版 JSONL 队列（与旧版写入方相同的 flock 下读取并清空），返回迁入条数。"""
+        path = Path(path or LEGACY_QUEUE)
+        if not path.exists() or path.stat().st_size == 0:
+            return 0
+        with open(path, 'r+', encoding='utf-8') as f:
+            try:
+                import fcntl  # type: ignore
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            except Exception:
+                pass
+            payloads = []
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    payloads.append(json.loads(line))
+                except Exception:
+                    continue
+            self.enqueue_many(payloads)
+            f.seek(0)
+            f.truncate()
+        return len(payloads)
+
+    # ---------- 消费 ----------
+    def lease(self, n: int = 1) -> List[Job]:
+        """租出至多 n 个可见任务；超过最大尝试次数的任务转入 dead。"""
+        now = time.time()
+        token = uuid.uuid4().hex
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute("UPDATE jobs SET status='dead', lease=NULL, finished_at=? "
+                         "WHERE status='queued' AND visible_at<=? AND attempts>=?",
+                         (now, now, self.max_attempts))
+            rows = conn.execute(
+                "SELECT id, payload, attempts, enqueued_at FROM jobs WHERE status='queued' AND visible_at<=? "
+                "ORDER BY visible_at, id LIMIT ?", (now, max(1, int(n)))).fetchall()
+            if rows:
+                conn.executemany(
+                    'UPDATE jobs SET visible_at=?, leased_at=?, attempts=attempts+1, lease=? WHERE id=?',
+                    [(now + self.visibility, now, token, r[0]) for r in rows])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        jobs = []
+        for jid, payload, attempts, enq in rows:
+            try:
+                data = json.loads(payload)
+            except Exception:
+                data = {}
+            jobs.append(Job(int(jid), data, int(attempts) + 1, token, float(enq), now))
+        return jobs
+
+    def ack(self, job: Job) -> bool:
+        cur = self._conn().execute(
+            "UPDATE jobs SET status='done', finished_at=?, lease=NULL WHERE id=? AND lease=? AND status='queued'",
+            (time.time(), job.id, job.lease))
+        return cur.rowcount == 1
+
+    def nack(self, job: Job, error: str = '', delay: float = 0.0) -> bool:
+        """放回队列（delay 秒后可见）；尝试次数已满则直接转入 dead。"""
+        status = 'dead' if job.attempts >= self.max_attempts else 'queued'
+        cur = self._conn().execute(
+            'UPDATE jobs SET status=?, visible_at=?, lease=NULL, error=?, finished_at=? '
+            "WHERE id=? AND lease=? AND status='queued'",
+            (status, time.time() + max(0.0, delay), error[:2000], time.time() if status == 'dead' else None,
+             job.id, job.lease))
+        return cur.rowcount == 1
+
+    def prune(self, older_than: float) -> int:
+        """删除 older_than 秒前完成的任务（dead 保留以便排查）。"""
+        cur = self._conn().execute("DELETE FROM jobs WHERE status='done' AND finished_at<?", (time.time() - older_than,))
+        return cur.rowcount
+
+    # ---------- 指标 ----------
+    def stats(self, recent: int = 200) -> Dict[str, Any]:
+        now = time.time()
+        conn = self._conn()
+        depth = conn.execute("SELECT COUNT(*), MIN(enqueued_at) FROM jobs WHERE status='queued' AND visible_at<=?", (now,)).fetchone()
+        # visible_at>now 的 queued 任务：持有租约的是在途，nack 退避中（租约已清空）的是延迟重试
+        in_flight, delayed = conn.execute(
+            "SELECT COUNT(lease), COUNT(*) - COUNT(lease) FROM jobs WHERE status='queued' AND visible_at>?",
+            (now,)).fetchone()
+        dead = conn.execute("SELECT COUNT(*) FROM jobs WHERE status='dead'").fetchone()[0]
+        done = conn.execute(
+            "SELECT finished_at - enqueued_at, finished_at - leased_at FROM jobs WHERE status='done' "
+            "ORDER BY finished_at DESC LIMIT ?", (int(recent),)).fetchall()
+
+        def pct(values: List[float], q: float) -> Optional[float]:
+            if not values:
+                return None
+            values = sorted(values)
+            return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+        total = [float(r[0]) for r in done]
+        service = [float(r[1]) for r in done if r[1] is not None]
+        return {
+            'depth': int(depth[0]),
+            'in_flight': int(in_flight),
+            'delayed': int(delayed),
+            'dead': int(dead),
+            'oldest_wait_sec': round(now - depth[1], 3) if depth[1] is not None else 0.0,
+            'recent_done': len(done),
+            'latency_p50_sec': pct(total, 0.5),
+            'latency_p95_sec': pct(total, 0.95),
+            'service_p50_sec': pct(service, 0.5),
+            'visibility_sec': self.visibility,
+        }
+
+
+_QUEUE: Optional[NamingQueue] = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_queue() -> NamingQueue:
+    """进程级默认队列（BAZI_NAMING_QUEUE_DB）。"""
+    global _QUEUE
+    if _QUEUE is None:
+        with _QUEUE_LOCK:
+            if _QUEUE is None:
+                _QUEUE = NamingQueue()
+    return _QUEUE
@@ -0,0 +1,132 @@
+"""
+批量排盘：解析 JSON Lines / CSV / JSON 数组记录，按块交给 bazi_chart 的 *_many 列式接口，逐块流式输出
+
+记录字段：id（原样回传）、source（solar|lunar）、year、month、day、hour、minute、second、
+is_leap_month、tz、sect；缺省的 source/tz/sect 取请求级默认值。单条记录出错只填 error 列，不影响其余记录。
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+from bazi_chart import MANY_COLUMNS, lunar2bazi_many, solar2bazi_many
+
+try:
+    BATCH_MAX = int(os.getenv('BAZI_BATCH_MAX', '100000'))
+except Exception:
+    BATCH_MAX = 100000
+try:
+    BATCH_CHUNK = int(os.getenv('BAZI_BATCH_CHUNK', '2000'))
+except Exception:
+    BATCH_CHUNK = 2000
+
+OUTPUT_FIELDS = ('id', 'source') + MANY_COLUMNS
+MEDIA_TYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv; charset=utf-8'}
+_TRUE = ('1', 'true', 'yes', 'y', 't')
+
+
+def detect_format(body: bytes, fmt: Optional[str] = None, content_type: str = '') -> str:
+    fmt = (fmt or '').lower()
+    if fmt in ('csv', 'jsonl', 'json'):
+        return fmt
+    if 'csv' in (content_type or '').lower():
+        return 'csv'
+    return 'json' if body.lstrip()[:1] == b'[' else 'jsonl'
+
+
+def parse_records(body: bytes, fmt: str) -> List[Dict[str, Any]]:
+    """请求体 -> 记录列表；无法解析的 JSON 行记为 {'_error': ...}，保持行序。"""
+    text = body.decode('utf-8-sig')
+    if fmt == 'csv':
+        return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+    if fmt == 'json':
+        data = json.loads(text or '[]')
+        if not isinstance(data, list):
+            raise ValueError('JSON 请求体须为数组')
+        return [r if isinstance(r, dict) else {'_error': '记录须为对象'} for r in data]
+    out: List[Dict[str, Any]] = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+            out.append(rec if isinstance(rec, dict) else {'_error': '记录须为对象'})
+        except Exception as e:
+            out.append({'_error': f'JSON 解析失败: {e}'})
+    return out
+
+
+def _get(rec: Dict[str, Any], key: str, default: Any) -> Any:
+    v = rec.get(key)
+    return default if v is None or v == '' else v
+
+
+def _int(rec: Dict[str, Any], key: str, default: Optional[int] = None) -> int:
+    v = _get(rec, key, default)
+    if v is None:
+        raise ValueError(f'缺少字段 {key}')
+    return int(float(v)) if isinstance(v, str) else int(v)
+
+
+def paipan_chunk(records: List[Dict[str, Any]], source: str = 'solar', tz: Optional[str] = None,
+                 sect: int = 2) -> List[Dict[str, Any]]:
+    """一块记录 -> 平铺结果行（字段见 OUTPUT_FIELDS），公历与农历记录各自整列计算后按原序合并。"""
+    n = len(records)
+    rows: List[Dict[str, Any]] = [{} for _ in range(n)]
+    groups: Dict[str, Dict[str, List[Any]]] = {}
+    for i, rec in enumerate(records):
+        src = str(_get(rec, 'source', source) or 'solar').lower()
+        src = 'lunar' if src == 'lunar' else 'solar'
+        rows[i] = {'id': rec.get('id'), 'source': src}
+        try:
+            if '_error' in rec:
+                raise ValueError(rec['_error'])
+            leap = _get(rec, 'is_leap_month', False)
+            values = (
+                _int(rec, 'year'), _int(rec, 'month'), _int(rec, 'day'),
+                _int(rec, 'hour', 12), _int(rec, 'minute', 0), _int(rec, 'second', 0),
+                str(leap).strip().lower() in _TRUE if isinstance(leap, str) else bool(leap),
+                _get(rec, 'tz', tz), _int(rec, 'sect', sect),
+            )
+        except Exception as e:
+            rows[i].update({k: None for k in MANY_COLUMNS})
+            rows[i]['error'] = str(e)
+            continue
+        g = groups.setdefault(src, {'index': [], 'values': []})
+        g['index'].append(i)
+        g['values'].append(values)
+    for src, g in groups.items():
+        y, m, d, h, mi, s, leap, tzs, sects = (list(c) for c in zip(*g['values']))
+        if src == 'lunar':
+            cols = lunar2bazi_many(y, m, d, leap, h, mi, s, tz=tzs, sect=sects)
+        else:
+            cols = solar2bazi_many(y, m, d, h, mi, s, tz=tzs, sect=sects)
+        for j, i in enumerate(g['index']):
+            for k in MANY_COLUMNS:
+                rows[i][k] = cols[k][j]
+    return rows
+
+
+def stream_paipan(records: List[Dict[str, Any]], output: str = 'jsonl', chunk: Optional[int] = None,
+                  **defaults: Any) -> Iterator[str]:
+    """按块排盘并逐块产出 JSON Lines 或 CSV 文本。"""
+    chunk = max(1, int(chunk or BATCH_CHUNK))
+    if output == 'csv':
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=OUTPUT_FIELDS, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        for start in range(0, len(records), chunk):
+            writer.writerows(paipan_chunk(records[start:start + chunk], **defaults))
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+        if buf.tell():
+            yield buf.getvalue()
+        return
+    for start in range(0, len(records), chunk):
+        yield ''.join(json.dumps({k: row.get(k) for k in OUTPUT_FIELDS}, ensure_ascii=False) + '\n'
+                      for row in paipan_chunk(records[start:start + chunk], **defaults))
+
@@ -123,12 +123,11 @@ def run_ai(req: RunRequest):
 
 
 @app.post("/bazi/naming/enqueue")
+@app.post("/bazi/enqueue")
 def api_enqueue_bazi_naming(req: BaziEnqueueRequest):
-    """将起名任务写入队列 queue/bazi_naming.jsonl（与循环程序共享）。"""
+    """将起名任务写入持久队列（bazi_naming_queue，与 bazi_naming_cycle 共享），返回任务号与队列指标。"""
     try:
-        root = Path(__file__).resolve().parents[1]
-        q = root / 'queue' / 'bazi_naming.jsonl'
-        q.parent.mkdir(parents=True, exist_ok=True)
+        from bazi_naming_queue import get_queue
         payload = {
             'surname': req.surname,
             'bazi': req.bazi,
@@ -137,24 +136,23 @@ def api_enqueue_bazi_naming(req: BaziEnqueueRequest):
             'style': (req.style or 'neutral'),
             'single': bool(req.single or False),
         }
-        line = json.dumps(payload, ensure_ascii=False) + "\n"
-        try:
-            import fcntl  # type: ignore
-            with open(q, 'a', encoding='utf-8') as f:
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                f.write(line)
-                f.flush()
-                os.fsync(f.fileno())
-                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-        except Exception:
-            # 无 fcntl 环境时，退化为普通写入
-            with open(q, 'a', encoding='utf-8') as f:
-                f.write(line)
-        return {"status":"ok","queued":True}
+        queue = get_queue()
+        job_id = queue.enqueue(payload)
+        return {"status": "ok", "queued": True, "id": job_id, "queue": queue.stats()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"enqueue failed: {e}")
 
 
+@app.get("/bazi/naming/queue")
+def api_bazi_naming_queue():
+    """起名队列指标：积压深度、在途数、dead 数、最老等待时长与最近完成任务的耗时分位。"""
+    try:
+        from bazi_naming_queue import get_queue
+        return {"status": "ok", "queue": get_queue().stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"queue stats failed: {e}")
+
+
 # ====== Calendar & BaZi endpoints with tz/sect ======
 @app.get("/calendar/solar2lunar")
 def api_solar2lunar(year: int, month: int, day: int, hour: int = 12, minute: int = 0, second: int = 0, tz: Optional[str] = None, sect: int = 2):
@@ -229,3 +227,24 @@ def api_bazi_paipan(source: str = 'solar', year: int = 1990, month: int = 1, day
         return {'status': 'ok', 'data': data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"bazi paipan failed: {e}")
+
+
+@app.post("/bazi/paipan_batch")
+async def api_bazi_paipan_batch(request: Request, source: str = 'solar', tz: Optional[str] = None, sect: int = 2,
+                                format: Optional[str] = None, output: Optional[str] = None):
+    """批量排盘：JSON Lines / CSV / JSON 数组输入，按块流式返回 jsonl 或 csv（见 bazi_paipan_batch）。"""
+    if solar2bazi is None or lunar2bazi is None:
+        raise HTTPException(status_code=500, detail="bazi_chart not available")
+    from fastapi.responses import StreamingResponse
+    from bazi_paipan_batch import BATCH_MAX, MEDIA_TYPES, detect_format, parse_records, stream_paipan
+    body = await request.body()
+    fmt = detect_format(body, format, request.headers.get('content-type', ''))
+    try:
+        records = parse_records(body, fmt)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"bazi paipan_batch parse failed: {e}")
+    if len(records) > BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"too many records: {len(records)} > {BATCH_MAX}")
+    out = (output or ('csv' if fmt == 'csv' else 'jsonl')).lower()
+    out = out if out in MEDIA_TYPES else 'jsonl'
+    return StreamingResponse(stream_paipan(records, out, source=source, tz=tz, sect=sect), media_type=MEDIA_TYPES[out])
@@ -2,104 +2,202 @@
 深度学习文化模型（轻量版）
 - 目标：学习从多文化视角与周期特征到红/蓝号码分布的映射
 - 实现：使用 scikit-learn 的多输出 MLPRegressor 进行回归，输出可解释为概率分数
+- 推理导出：save() 同时写出 <模型名>_npy/ 目录（扁平 .npy 权重 + meta.json），
+  load_fast() 以内存映射加载并用纯 NumPy 批量前向（49 个小 MLP 叠成矩阵乘），
+  推理进程无需导入 scikit-learn/反序列化 joblib，多个 worker 共享同一份只读页
 
 注意：为保证鲁棒性与轻量，本模型在历史数据不足时会回退到简单的文化打分或随机输出。
 """
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
 import os
 import math
 import random
+import shutil
+import tempfile
 
 import numpy as np
-from sklearn.neural_network import MLPRegressor
-from sklearn.multioutput import MultiOutputRegressor
-from joblib import dump, load
 
 from cultural_predictor import CulturalPredictor
+from ssq_history_index import HistoryIndex
 
 
 def _sigmoid(x: np.ndarray) -> np.ndarray:
     return 1.0 / (1.0 + np.exp(-x))
 
 
+# 三种文化视角的偏置与五行分组（红 1..33、蓝 1..16 按 mod 5 分组）
+_PROFILES = [
+    ('liuyao', {'hour': 1.6, 'day': 1.2}),
+    ('liuren', {'month': 1.5, 'day': 1.3}),
+    ('qimen', {'season': 1.5, 'day': 1.2}),
+]
+_RED_GROUPS = [
+    [1, 6, 11, 16, 21, 26, 31],
+    [2, 7, 12, 17, 22, 27, 32],
+    [3, 8, 13, 18, 23, 28, 33],
+    [4, 9, 14, 19, 24, 29],
+    [5, 10, 15, 20, 25, 30],
+]
+_BLUE_GROUPS = [[1, 6, 11, 16], [2, 7, 12], [3, 8, 13], [4, 9, 14], [5, 10, 15]]
+# 周期性编码：模拟多尺度节律（周/月/季度/年等）
+_CYCLE_PERIODS = [5, 7, 9, 10, 12, 27, 54]
+# 每个周期按余数预先算好 (sin, cos)，整列查表即可，与逐期 math.sin/cos 完全一致
+_CYCLE_TABLES = [
+    np.array([[math.sin(2.0 * math.pi * r / float(p)), math.cos(2.0 * math.pi * r / float(p))] for r in range(p)])
+    for p in _CYCLE_PERIODS
+]
+
+
+def _culture_features() -> List[float]:
+    """当前时辰下三种文化视角的红/蓝五行分组总分（30 维）；与期号无关，整批样本共用一次。"""
+    feats: List[float] = []
+    for _name, bias in _PROFILES:
+        rs, bs = CulturalPredictor().scores(bias=bias)
+        feats.extend(sum(rs.get(i, 0.0) for i in g) for g in _RED_GROUPS)
+        feats.extend(sum(bs.get(i, 0.0) for i in g) for g in _BLUE_GROUPS)
+    return feats
+
+
+def _cycle_features(issue_idx: np.ndarray) -> np.ndarray:
+    """(n,) 期序号 -> (n, 14) 周期 sin/cos 编码。"""
+    return np.hstack([tbl[issue_idx % p] for p, tbl in zip(_CYCLE_PERIODS, _CYCLE_TABLES)])
+
+
+def _structural_features(reds: np.ndarray) -> np.ndarray:
+    """(n, 6) 红球 -> (n, 3)：最长连号、最大间距、奇数比例。"""
+    pr = np.sort(reds, axis=1)
+    step = np.diff(pr, axis=1)
+    run = np.ones(len(pr), dtype=np.int64)
+    best = np.ones(len(pr), dtype=np.int64)
+    for j in range(step.shape[1]):
+        run = np.where(step[:, j] == 1, run + 1, 1)
+        best = np.maximum(best, run)
+    gaps = step.max(axis=1) if step.shape[1] else np.zeros(len(pr), dtype=np.int64)
+    odds = (pr % 2 == 1).sum(axis=1)
+    return np.column_stack([best.astype(float), gaps.astype(float), odds.astype(float) / 6.0])
+
+
+def _normalize_rows(m: np.ndarray) -> np.ndarray:
+    """逐行归一化；行和为 0 时保持原样。"""
+    s = m.sum(axis=1, keepdims=True)
+    return np.where(s > 0, m / np.maximum(1e-9, s), m)
+
+
+EXPORT_VERSION = 1
+
+_ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0.0),
+    'tanh': np.tanh,
+    'logistic': _sigmoid,
+    'identity': lambda x: x,
+}
+
+
+def export_dir_for(path: str) -> str:
+    """joblib 模型路径对应的 .npy 导出目录：models/cultural_deep.joblib -> models/cultural_deep_npy。"""
+    return os.path.splitext(path)[0] + '_npy'
+
+
+class StackedMLP:
+    """把 M 个同结构的单输出 MLPRegressor 叠成批量矩阵乘的纯 NumPy 前向计算。
+
+    第一层各模型共享输入，拼成一个 (d, M*h1) 矩阵一次相乘；其后各层按模型批量 einsum。
+    """
+
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray]], activation: str):
+        if activation not in _ACTIVATIONS:
+            raise ValueError(f'不支持的激活函数: {activation}')
+        self.layers = layers
+        self.activation = activation
+
+    @property
+    def n_outputs(self) -> int:
+        return self.layers[-1][1].shape[0]
+
+    @classmethod
+    def from_regressors(cls, regressors: Sequence) -> 'StackedMLP':
+        """由若干已训练的 MLPRegressor（隐藏层结构、激活函数须一致）构造。"""
+        first = regressors[0]
+        shapes = [c.shape for c in first.coefs_]
+        for r in regressors:
+            if [c.shape for c in r.coefs_] != shapes or r.activation != first.activation or r.out_activation_ != 'identity':
+                raise ValueError('MLP 结构不一致，无法叠加')
+        w0 = np.concatenate([r.coefs_[0] for r in regressors], axis=1)
+        b0 = np.concatenate([r.intercepts_[0] for r in regressors])
+        layers = [(w0, b0)]
+        for k in range(1, len(shapes)):
+            layers.append((np.stack([r.coefs_[k] for r in regressors]), np.stack([r.intercepts_[k] for r in regressors])))
+        return cls(layers, first.activation)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """X (n, d) -> (n, M)。"""
+        act = _ACTIVATIONS[self.activation]
+        w0, b0 = self.layers[0]
+        h = X @ w0 + b0
+        if len(self.layers) == 1:
+            return h
+        # 第一层输出按模型切分为 (n, M, h1)
+        h = act(h).reshape(len(X), self.layers[1][0].shape[0], -1)
+        for k, (w, b) in enumerate(self.layers[1:], start=1):
+            h = np.einsum('nmh,mhk->nmk', h, w) + b
+            if k < len(self.layers) - 1:
+                h = act(h)
+        return h[:, :, 0]
+
+
 class CulturalDeepModel:
-    def __init__(self):
-        # 两个多输出回归器：红(33维)、蓝(16维)
-        base = MLPRegressor(hidden_layer_sizes=(64,), activation='relu', solver='adam',
-                            learning_rate='adaptive', max_iter=200, random_state=42, early_stopping=True)
-        self.red_model = MultiOutputRegressor(base)
-        base2 = MLPRegressor(hidden_layer_sizes=(64,), activation='relu', solver='adam',
-                             learning_rate='adaptive', max_iter=200, random_state=43, early_stopping=True)
-        self.blue_model = MultiOutputRegressor(base2)
+    def __init__(self, regressors: bool = True):
+        # 两个多输出回归器：红(33维)、蓝(16维)；仅推理（load_fast）时不创建，免去导入 scikit-learn
+        self.red_model = None
+        self.blue_model = None
+        if regressors:
+            self.red_model, self.blue_model = self._new_regressors()
+        # 纯 NumPy 叠加前向（红 33 + 蓝 16 个输出），训练/加载后构建
+        self._stacked: Optional[StackedMLP] = None
         self._fitted = False
         self._mu = None
         self._std = None
         # 训练期间的“衰减冷热”状态，用于在线推理复用
         self._hot_red_last: Optional[List[float]] = None
         self._hot_blue_last: Optional[List[float]] = None
+        # 按期分布 LRU：键为 (期序号, 当前时辰文化分组分数)，重训后清空
+        self._dist_cache: 'OrderedDict[tuple, Tuple[List[float], List[float]]]' = OrderedDict()
+        self.dist_cache_size = max(1, int(float(os.getenv('SSQ_CULDL_DIST_CACHE', '1024'))))
+        self.dist_hits = 0
+        self.dist_misses = 0
+
+    @staticmethod
+    def _new_regressors():
+        from sklearn.neural_network import MLPRegressor
+        from sklearn.multioutput import MultiOutputRegressor
+        base = MLPRegressor(hidden_layer_sizes=(64,), activation='relu', solver='adam',
+                            learning_rate='adaptive', max_iter=200, random_state=42, early_stopping=True)
+        base2 = MLPRegressor(hidden_layer_sizes=(64,), activation='relu', solver='adam',
+                             learning_rate='adaptive', max_iter=200, random_state=43, early_stopping=True)
+        return MultiOutputRegressor(base), MultiOutputRegressor(base2)
+
+    def _build_stacked(self) -> None:
+        try:
+            self._stacked = StackedMLP.from_regressors(list(self.red_model.estimators_) + list(self.blue_model.estimators_))
+        except Exception:
+            self._stacked = None
 
     def _features_for_issue(self, issue_idx: int, hot_red: Optional[np.ndarray] = None, hot_blue: Optional[np.ndarray] = None) -> np.ndarray:
         """构造一条样本的特征向量。
         - 多文化视角（六爻/六壬/奇门）的红/蓝分组（五行）总分
         - 周期性编码：issue_idx 在若干周期下的 sin/cos
         """
-        profiles = [
-            ('liuyao', {'hour': 1.6, 'day': 1.2}),
-            ('liuren', {'month': 1.5, 'day': 1.3}),
-            ('qimen', {'season': 1.5, 'day': 1.2}),
-        ]
-        feats: List[float] = []
-        # 聚合五行分组分数
-        for _name, bias in profiles:
-            rs, bs = CulturalPredictor().scores(bias=bias)
-            # 红分 1..33 -> 五行组的总分粗聚合
-            groups = {
-                'wood': sum(rs.get(i, 0.0) for i in [1, 6, 11, 16, 21, 26, 31]),
-                'fire': sum(rs.get(i, 0.0) for i in [2, 7, 12, 17, 22, 27, 32]),
-                'earth': sum(rs.get(i, 0.0) for i in [3, 8, 13, 18, 23, 28, 33]),
-                'metal': sum(rs.get(i, 0.0) for i in [4, 9, 14, 19, 24, 29]),
-                'water': sum(rs.get(i, 0.0) for i in [5, 10, 15, 20, 25, 30]),
-            }
-            b_groups = {
-                'wood': sum(bs.get(i, 0.0) for i in [1, 6, 11, 16]),
-                'fire': sum(bs.get(i, 0.0) for i in [2, 7, 12]),
-                'earth': sum(bs.get(i, 0.0) for i in [3, 8, 13]),
-                'metal': sum(bs.get(i, 0.0) for i in [4, 9, 14]),
-                'water': sum(bs.get(i, 0.0) for i in [5, 10, 15]),
-            }
-            feats.extend([
-                groups['wood'], groups['fire'], groups['earth'], groups['metal'], groups['water'],
-                b_groups['wood'], b_groups['fire'], b_groups['earth'], b_groups['metal'], b_groups['water'],
-            ])
-        # 周期性编码：模拟多尺度节律（周/月/季度/年等）
-        periods = [5, 7, 9, 10, 12, 27, 54]
-        for p in periods:
-            angle = 2.0 * math.pi * (issue_idx % p) / float(p)
-            feats.append(math.sin(angle))
-            feats.append(math.cos(angle))
+        feats: List[float] = _culture_features()
+        feats.extend(_cycle_features(np.array([issue_idx]))[0].tolist())
         # 结构性特征（来自历史上一期）：连号长度、最大间距、奇偶比例
         try:
             if issue_idx > 0:
                 prev_reds, prev_blue = self._history[issue_idx - 1]  # type: ignore[attr-defined]
-                pr = sorted(prev_reds)
-                # 连号长度
-                run = 1
-                best = 1
-                for i in range(1, len(pr)):
-                    if pr[i] == pr[i-1] + 1:
-                        run += 1
-                        best = max(best, run)
-                    else:
-                        run = 1
-                feats.append(float(best))
-                # 最大间距
-                gaps = [pr[i] - pr[i-1] for i in range(1, len(pr))]
-                feats.append(float(max(gaps) if gaps else 0))
-                # 奇偶比例
-                odds = sum(1 for x in pr if x % 2 == 1)
-                feats.append(float(odds) / 6.0)
+                feats.extend(_structural_features(np.array([list(prev_reds)]))[0].tolist())
             else:
                 feats.extend([0.0, 0.0, 0.0])
         except Exception:
@@ -118,55 +216,52 @@ class CulturalDeepModel:
                 feats.extend([0.0] * 16)
         return np.asarray(feats, dtype=float)
 
-    def _build_dataset(self, history: List[Tuple[List[int], int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        X: List[np.ndarray] = []
-        Y_red: List[np.ndarray] = []  # 33维0/1
-        Y_blue: List[np.ndarray] = []  # 16维0/1
+    def _build_dataset(self, history: List[Tuple[List[int], int]], index: Optional[HistoryIndex] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """整段历史一次性构造特征矩阵与 0/1 标签（红 33 维、蓝 16 维）。
+
+        文化分组分数与期号无关，只算一次后广播；周期编码查表；结构特征与标签按列向量化；
+        衰减冷热由历史索引的递推矩阵给出（第 i 行为前 i 期的衰减计数）。
+        """
         # 使用指数衰减的冷热统计作为时变特征
         decay = float(os.getenv('SSQ_CULDL_DECAY', '0.995')) if 'SSQ_CULDL_DECAY' in os.environ else 0.995
-        hot_r = np.zeros((33,), dtype=float)
-        hot_b = np.zeros((16,), dtype=float)
-    # 存下历史供结构性特征使用
+        if index is None or len(index) != len(history):
+            index = HistoryIndex().sync(history)
+        hot_red_rows, hot_blue_rows = index.decayed_matrix(decay)
+        # 存下历史供结构性特征使用
         self._history = history  # type: ignore[attr-defined]
-        for idx, (reds, blue) in enumerate(history):
-            # 归一化衰减概率（作为当前样本的冷热特征）
-            hr = hot_r / max(1e-9, hot_r.sum()) if hot_r.sum() > 0 else hot_r
-            hb = hot_b / max(1e-9, hot_b.sum()) if hot_b.sum() > 0 else hot_b
-            x = self._features_for_issue(idx, hr, hb)
-            y_r = np.zeros((33,), dtype=float)
-            for r in set(reds):
-                if 1 <= r <= 33:
-                    y_r[r-1] = 1.0
-            y_b = np.zeros((16,), dtype=float)
-            if 1 <= int(blue) <= 16:
-                y_b[int(blue)-1] = 1.0
-            X.append(x)
-            Y_red.append(y_r)
-            Y_blue.append(y_b)
-            # 更新衰减冷热计数（先衰减再叠加当前）
-            if decay < 1.0:
-                hot_r *= decay
-                hot_b *= decay
-            for r in reds:
-                if 1 <= r <= 33:
-                    hot_r[r-1] += 1.0
-            if 1 <= int(blue) <= 16:
-                hot_b[int(blue)-1] += 1.0
-        if not X:
+        n = len(history)
+        if n == 0:
             return np.zeros((0, 10)), np.zeros((0, 33)), np.zeros((0, 16))
-        Xn = np.vstack(X)
-        Yr = np.vstack(Y_red)
-        Yb = np.vstack(Y_blue)
+        reds = np.array([list(r) for r, _ in history], dtype=np.int64)
+        blues = np.array([int(b) for _, b in history], dtype=np.int64)
+        rows = np.arange(n)
+        structural = np.zeros((n, 3))
+        structural[1:] = _structural_features(reds[:-1])
+        Xn = np.hstack([
+            np.broadcast_to(np.asarray(_culture_features(), dtype=float), (n, 30)),
+            _cycle_features(rows),
+            structural,
+            _normalize_rows(hot_red_rows[:n]),
+            _normalize_rows(hot_blue_rows[:n]),
+        ])
+        Yr = np.zeros((n, 33), dtype=float)
+        ok = (reds >= 1) & (reds <= 33)
+        Yr[np.broadcast_to(rows[:, None], reds.shape)[ok], reds[ok] - 1] = 1.0
+        Yb = np.zeros((n, 16), dtype=float)
+        ok = (blues >= 1) & (blues <= 16)
+        Yb[rows[ok], blues[ok] - 1] = 1.0
         # 保存训练末状态（用于在线预测）
-        hr_last = hot_r / max(1e-9, hot_r.sum()) if hot_r.sum() > 0 else hot_r
-        hb_last = hot_b / max(1e-9, hot_b.sum()) if hot_b.sum() > 0 else hot_b
-        self._hot_red_last = hr_last.tolist()
-        self._hot_blue_last = hb_last.tolist()
+        self._hot_red_last = _normalize_rows(hot_red_rows[n:n + 1])[0].tolist()
+        self._hot_blue_last = _normalize_rows(hot_blue_rows[n:n + 1])[0].tolist()
         return Xn, Yr, Yb
 
-    def fit(self, history: List[Tuple[List[int], int]]) -> bool:
+    def fit(self, history: List[Tuple[List[int], int]], index: Optional[HistoryIndex] = None) -> bool:
+        self._dist_cache.clear()
+        self._stacked = None
         try:
-            X, Yr, Yb = self._build_dataset(history)
+            if self.red_model is None or self.blue_model is None:
+                self.red_model, self.blue_model = self._new_regressors()
+            X, Yr, Yb = self._build_dataset(history, index)
             # 数据太少就放弃训练
             if X.shape[0] < 50:
                 self._fitted = False
@@ -181,13 +276,16 @@ class CulturalDeepModel:
             self.red_model.fit(Xs, Yr)
             self.blue_model.fit(Xs, Yb)
             self._fitted = True
+            self._build_stacked()
             return True
         except Exception:
             self._fitted = False
             return False
 
     def save(self, path: str) -> bool:
+        """保存 joblib 全量模型，并同步写出 .npy 推理导出（导出失败不影响返回值）。"""
         try:
+            from joblib import dump
             payload = {
                 'mu': self._mu,
                 'std': self._std,
@@ -198,15 +296,17 @@ class CulturalDeepModel:
                 'hot_blue_last': self._hot_blue_last,
             }
             dump(payload, path)
-            return True
         except Exception:
             return False
+        self.export_npy(export_dir_for(path))
+        return True
 
     @staticmethod
     def load(path: str) -> Optional['CulturalDeepModel']:
         try:
+            from joblib import load
             obj = load(path)
-            mdl = CulturalDeepModel()
+            mdl = CulturalDeepModel(regressors=False)
             mdl._mu = obj.get('mu')
             mdl._std = obj.get('std')
             mdl.red_model = obj.get('red')
@@ -214,32 +314,183 @@ class CulturalDeepModel:
             mdl._fitted = bool(obj.get('fitted', False))
             mdl._hot_red_last = obj.get('hot_red_last')
             mdl._hot_blue_last = obj.get('hot_blue_last')
+            if mdl._fitted:
+                mdl._build_stacked()
             return mdl
         except Exception:
             return None
 
-    def predict_distributions(self, issue_idx: int) -> Tuple[List[float], List[float]]:
-        """返回红33维与蓝16维的概率分布（和为1）。若未训练成功则基于文化分数退化。"""
-        x = self._features_for_issue(issue_idx)
+    def export_npy(self, out_dir: str) -> bool:
+        """写出推理导出：每个权重矩阵一个 .npy（可内存映射）+ meta.json；整体目录原子替换。"""
+        if self._stacked is None or not self._fitted:
+            return False
+        parent = os.path.dirname(os.path.abspath(out_dir))
+        tmp = None
+        try:
+            os.makedirs(parent, exist_ok=True)
+            tmp = tempfile.mkdtemp(prefix='.tmp_culdl_', dir=parent)
+            arrays = {'mu': self._mu, 'std': self._std}
+            if isinstance(self._hot_red_last, list) and isinstance(self._hot_blue_last, list):
+                arrays['hot_last'] = np.asarray(self._hot_red_last + self._hot_blue_last, dtype=float)
+            for k, (w, b) in enumerate(self._stacked.layers):
+                arrays[f'w{k}'] = w
+                arrays[f'b{k}'] = b
+            for name, arr in arrays.items():
+                np.save(os.path.join(tmp, name + '.npy'), np.ascontiguousarray(arr, dtype=np.float64))
+            meta = {
+                'version': EXPORT_VERSION,
+                'activation': self._stacked.activation,
+                'n_layers': len(self._stacked.layers),
+                'n_red': 33,
+                'n_blue': 16,
+            }
+            with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            # mkdtemp 以 0700 创建，改名后保留该权限；放开读/遍历，其他用户的推理进程才能映射
+            os.chmod(tmp, 0o755)
+            # 旧目录先改名再删除：已映射旧文件的进程不受影响
+            old = None
+            if os.path.exists(out_dir):
+                old = tempfile.mkdtemp(prefix='.old_culdl_', dir=parent)
+                os.rmdir(old)
+                os.replace(out_dir, old)
+            os.replace(tmp, out_dir)
+            tmp = None
+            if old:
+                shutil.rmtree(old, ignore_errors=True)
+            return True
+        except Exception:
+            return False
+        finally:
+            if tmp:
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    @staticmethod
+    def load_npy(out_dir: str, mmap: bool = True) -> Optional['CulturalDeepModel']:
+        """加载 .npy 推理导出（默认只读内存映射）；得到的模型只能推理，不能继续训练。"""
+        try:
+            with open(os.path.join(out_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != EXPORT_VERSION:
+                return None
+            mode = 'r' if mmap else None
+
+            def arr(name: str) -> np.ndarray:
+                return np.load(os.path.join(out_dir, name + '.npy'), mmap_mode=mode)
+
+            mdl = CulturalDeepModel(regressors=False)
+            mdl._mu = arr('mu')
+            mdl._std = arr('std')
+            if os.path.exists(os.path.join(out_dir, 'hot_last.npy')):
+                hot = arr('hot_last').tolist()
+                mdl._hot_red_last, mdl._hot_blue_last = hot[:meta['n_red']], hot[meta['n_red']:]
+            mdl._stacked = StackedMLP([(arr(f'w{k}'), arr(f'b{k}')) for k in range(int(meta['n_layers']))], meta['activation'])
+            mdl._fitted = True
+            return mdl
+        except Exception:
+            return None
+
+    @staticmethod
+    def load_fast(path: str) -> Optional['CulturalDeepModel']:
+        """优先加载与 joblib 同步的 .npy 导出；导出缺失或比 joblib 旧时加载 joblib 并补写导出。"""
+        out_dir = export_dir_for(path)
+        meta = os.path.join(out_dir, 'meta.json')
+        try:
+            fresh = os.path.exists(meta) and (not os.path.exists(path) or os.path.getmtime(meta) >= os.path.getmtime(path))
+        except Exception:
+            fresh = False
+        if fresh:
+            mdl = CulturalDeepModel.load_npy(out_dir)
+            if mdl is not None:
+                return mdl
+        if not os.path.exists(path):
+            return None
+        mdl = CulturalDeepModel.load(path)
+        if mdl is not None:
+            mdl.export_npy(out_dir)
+        return mdl
+
+    def _features_matrix(self, indices: Sequence[int], culture: List[float]) -> np.ndarray:
+        """多期推理特征矩阵，逐行与 _features_for_issue(idx) 相同（冷热列取训练末状态）。"""
+        idx = np.asarray(list(indices), dtype=np.int64)
+        n = len(idx)
+        structural = np.zeros((n, 3))
+        hist = getattr(self, '_history', None)
+        rows: List[int] = []
+        prev: List[List[int]] = []
+        if hist is not None:
+            for j, i in enumerate(idx.tolist()):
+                if i > 0:
+                    try:
+                        prev.append(list(hist[i - 1][0]))
+                        rows.append(j)
+                    except Exception:
+                        pass
+        if prev:
+            structural[rows] = _structural_features(np.array(prev))
+        if isinstance(self._hot_red_last, list) and isinstance(self._hot_blue_last, list):
+            hot = self._hot_red_last + self._hot_blue_last
+        else:
+            hot = [0.0] * 49
+        return np.hstack([
+            np.broadcast_to(np.asarray(culture, dtype=float), (n, 30)),
+            _cycle_features(idx),
+            structural,
+            np.broadcast_to(np.asarray(hot, dtype=float), (n, 49)),
+        ])
+
+    def _forward(self, indices: List[int], culture: List[float]) -> List[Tuple[List[float], List[float]]]:
         if getattr(self, '_fitted', False):
             try:
-                xs = (x - self._mu) / self._std
-                red_raw = np.asarray(self.red_model.predict(xs.reshape(1, -1))[0])
-                blue_raw = np.asarray(self.blue_model.predict(xs.reshape(1, -1))[0])
-                red_p = _sigmoid(red_raw)
-                blue_p = _sigmoid(blue_raw)
-                red_p = red_p / max(1e-9, red_p.sum())
-                blue_p = blue_p / max(1e-9, blue_p.sum())
-                return red_p.tolist(), blue_p.tolist()
+                xs = (self._features_matrix(indices, culture) - self._mu) / self._std
+                if self._stacked is not None:
+                    raw = self._stacked.predict(xs)
+                    red_p, blue_p = _sigmoid(raw[:, :33]), _sigmoid(raw[:, 33:])
+                else:
+                    red_p = _sigmoid(np.asarray(self.red_model.predict(xs)))
+                    blue_p = _sigmoid(np.asarray(self.blue_model.predict(xs)))
+                red_p = red_p / np.maximum(1e-9, red_p.sum(axis=1, keepdims=True))
+                blue_p = blue_p / np.maximum(1e-9, blue_p.sum(axis=1, keepdims=True))
+                return [(r.tolist(), b.tolist()) for r, b in zip(red_p, blue_p)]
             except Exception:
                 pass
-        # 退化：使用文化评分归一化
+        # 退化：使用文化评分归一化（与期次无关）
         rs, bs = CulturalPredictor().scores(bias={'hour': 1.6, 'day': 1.2})
         red_arr = np.array([max(0.0, float(rs.get(i, 0.0))) for i in range(1,34)], dtype=float)
         blue_arr = np.array([max(0.0, float(bs.get(i, 0.0))) for i in range(1,17)], dtype=float)
         red_sum = red_arr.sum() or 1.0
         blue_sum = blue_arr.sum() or 1.0
-        return (red_arr / red_sum).tolist(), (blue_arr / blue_sum).tolist()
+        dist = ((red_arr / red_sum).tolist(), (blue_arr / blue_sum).tolist())
+        return [dist] * len(indices)
+
+    def predict_distributions_batch(self, issue_indices: Sequence[int]) -> List[Tuple[List[float], List[float]]]:
+        """多期红33/蓝16概率分布：未缓存的期次合并为一次矩阵前向计算，结果进入按期 LRU。"""
+        culture = _culture_features()
+        ctx = tuple(culture)
+        keys = [(int(i), ctx) for i in issue_indices]
+        found: Dict[tuple, Tuple[List[float], List[float]]] = {}
+        missing: List[tuple] = []
+        for key in dict.fromkeys(keys):
+            hit = self._dist_cache.get(key)
+            if hit is None:
+                missing.append(key)
+                continue
+            self._dist_cache.move_to_end(key)
+            self.dist_hits += 1
+            found[key] = hit
+        if missing:
+            self.dist_misses += len(missing)
+            for key, dist in zip(missing, self._forward([k[0] for k in missing], culture)):
+                found[key] = dist
+                self._dist_cache[key] = dist
+            while len(self._dist_cache) > self.dist_cache_size:
+                self._dist_cache.popitem(last=False)
+        # 返回副本，避免调用方修改共享缓存
+        return [(list(found[k][0]), list(found[k][1])) for k in keys]
+
+    def predict_distributions(self, issue_idx: int) -> Tuple[List[float], List[float]]:
+        """返回红33维与蓝16维的概率分布（和为1）。若未训练成功则基于文化分数退化。"""
+        return self.predict_distributions_batch([issue_idx])[0]
 
     def predict_numbers(self, issue_idx: int, k_reds: int = 6) -> Tuple[List[int], int]:
         red_p, blue_p = self.predict_distributions(issue_idx)
@@ -4,8 +4,11 @@
 """
 from __future__ import annotations
 
+import os
+import threading
+from collections import OrderedDict
 from typing import Dict, Any, Tuple, List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
 try:
     from bazi_chart import solar2bazi
@@ -60,6 +63,22 @@ def _bazi_for_datetime(dt: datetime) -> Optional[Dict[str, Any]]:
         return None
 
 
+def _hour_bucket(dt: datetime) -> int:
+    """时辰分桶：子(23-1)、丑(1-3)…亥(21-23)。
+    23 点的子时归入次日日干起时柱，因此与当日 0 点分开计为第 12 桶。"""
+    if dt.hour == 23:
+        return 12
+    return (dt.hour + 1) // 2
+
+
+def _bucket_key(dt: datetime) -> Tuple[int, int, int, int]:
+    return (dt.year, dt.month, dt.day, _hour_bucket(dt))
+
+
+def _bias_key(bias: Optional[Dict[str, float]]) -> Tuple[Tuple[str, float], ...]:
+    return tuple(sorted((str(k), float(v)) for k, v in (bias or {}).items()))
+
+
 def _pillar_wuxing(pillar: str) -> Optional[str]:
     if not pillar or not isinstance(pillar, str):
         return None
@@ -73,50 +92,164 @@ def _pillar_wuxing(pillar: str) -> Optional[str]:
     return None
 
 
+def _compute_scores(bazi: Optional[Dict[str, Any]], month: int, bias: Dict[str, float] | None = None) -> Tuple[Dict[int, float], Dict[int, float]]:
+    red_scores: Dict[int, float] = {i: 0.0 for i in range(1, 34)}
+    blue_scores: Dict[int, float] = {i: 0.0 for i in range(1, 17)}
+    bias = bias or {}
+
+    # 1) 基于四柱五行打分
+    pillars = []
+    if bazi:
+        pillars = [bazi.get('year'), bazi.get('month'), bazi.get('day'), bazi.get('hour')]
+    # 若 bazi 不可得，用月份近似季节五行
+    if not pillars:
+        pillars = [''] * 4
+
+    weights = [1.0, 1.0, 1.5, 1.2]  # 年/月/日/时权重（偏重日主、时）
+    for pillar, w in zip(pillars, weights):
+        wx = _pillar_wuxing(pillar)
+        if wx:
+            for n in RED_GROUPS.get(wx, []):
+                red_scores[n] += 1.0 * w
+            for n in BLUE_GROUPS.get(wx, []):
+                blue_scores[n] += 1.0 * w
+
+    # 2) 季节/节气加权（近似：用月份）
+    wx_season = SEASON_WUXING.get(month)
+    if wx_season:
+        for n in RED_GROUPS.get(wx_season, []):
+            red_scores[n] += 0.6
+        for n in BLUE_GROUPS.get(wx_season, []):
+            blue_scores[n] += 0.6
+
+    # 3) 可选偏置（不同文化模型的差异化权重）
+    # bias 形如 {'year': 0.5, 'month': 1.0, 'day': 2.0, 'hour': 1.5, 'season': 0.8}
+    # 这里简单乘上总体缩放因子
+    if bias:
+        factor = max(0.1, float(sum(bias.values()) / max(1, len(bias))))
+        for i in red_scores:
+            red_scores[i] *= factor
+        for i in blue_scores:
+            blue_scores[i] *= factor
+
+    return red_scores, blue_scores
+
+
+class CulturalScoreCache:
+    """按时辰分桶的文化打分缓存。
+
+    - 四柱只随时柱（两小时一个时辰）变化，故以 (年, 月, 日, 时辰桶) 为键缓存排盘结果，
+      以 (年, 月, 日, 时辰桶, bias) 为键缓存红/蓝打分；LRU 有界并统计命中/未命中。
+    - precompute() 预先为一段时间内的全部时辰排盘，写入预计算表，闭环复盘等内层循环从而不再调用历法库；
+      预计算表同样按 LRU 有界（table_maxsize），长期运行的服务反复预计算新时段时不会无界增长。
+    注意：节气交接落在某个时辰中间时，该时辰内月柱以桶内首次排盘时刻为准。
+    """
+
+    def __init__(self, maxsize: int = 4096, table_maxsize: int = 4096):
+        self.maxsize = max(1, int(maxsize))
+        self.table_maxsize = max(1, int(table_maxsize))
+        self._bazi: 'OrderedDict[Tuple[int, int, int, int], Optional[Dict[str, Any]]]' = OrderedDict()
+        self._scores: 'OrderedDict[tuple, Tuple[Dict[int, float], Dict[int, float]]]' = OrderedDict()
+        self._table: 'OrderedDict[Tuple[int, int, int, int], Optional[Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.table_hits = 0
+        self.calendar_calls = 0
+
+    def bazi(self, dt: datetime) -> Optional[Dict[str, Any]]:
+        key = _bucket_key(dt)
+        with self._lock:
+            if key in self._table:
+                self._table.move_to_end(key)
+                self.table_hits += 1
+                return self._table[key]
+            if key in self._bazi:
+                self._bazi.move_to_end(key)
+                return self._bazi[key]
+        value = _bazi_for_datetime(dt)
+        with self._lock:
+            self.calendar_calls += 1
+            self._bazi[key] = value
+            while len(self._bazi) > self.maxsize:
+                self._bazi.popitem(last=False)
+        return value
+
+    def scores(self, dt: datetime, bias: Dict[str, float] | None = None) -> Tuple[Dict[int, float], Dict[int, float]]:
+        key = _bucket_key(dt) + (_bias_key(bias),)
+        with self._lock:
+            hit = self._scores.get(key)
+            if hit is not None:
+                self._scores.move_to_end(key)
+                self.hits += 1
+        if hit is None:
+            hit = _compute_scores(self.bazi(dt), dt.month, bias)
+            with self._lock:
+                self.misses += 1
+                self._scores[key] = hit
+                while len(self._scores) > self.maxsize:
+                    self._scores.popitem(last=False)
+        # 返回副本，避免调用方修改共享缓存
+        return dict(hit[0]), dict(hit[1])
+
+    def precompute(self, start: Optional[datetime] = None, hours: int = 24 * 7) -> int:
+        """为 [start, start+hours) 内每个时辰排盘并写入预计算表，返回新增条目数。"""
+        t = (start or datetime.now()).replace(minute=0, second=0, microsecond=0)
+        end = t + timedelta(hours=max(0, int(hours)))
+        added = 0
+        while t < end:
+            key = _bucket_key(t)
+            if key not in self._table:
+                value = _bazi_for_datetime(t)
+                with self._lock:
+                    self.calendar_calls += 1
+                    self._table[key] = value
+                    while len(self._table) > self.table_maxsize:
+                        self._table.popitem(last=False)
+                added += 1
+            t += timedelta(hours=1)
+        return added
+
+    def clear(self, table: bool = False) -> None:
+        with self._lock:
+            self._bazi.clear()
+            self._scores.clear()
+            if table:
+                self._table.clear()
+            self.hits = self.misses = self.table_hits = self.calendar_calls = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits / total) if total else 0.0,
+                'table_hits': self.table_hits,
+                'table_size': len(self._table),
+                'table_maxsize': self.table_maxsize,
+                'calendar_calls': self.calendar_calls,
+                'size': len(self._scores),
+                'maxsize': self.maxsize,
+            }
+
+
+try:
+    _CACHE_SIZE = int(float(os.getenv('CULTURE_SCORE_CACHE_SIZE', '4096')))
+except Exception:
+    _CACHE_SIZE = 4096
+try:
+    _TABLE_SIZE = int(float(os.getenv('CULTURE_TABLE_MAX', '4096')))
+except Exception:
+    _TABLE_SIZE = 4096
+SCORE_CACHE = CulturalScoreCache(maxsize=_CACHE_SIZE, table_maxsize=_TABLE_SIZE)
+
+
 class CulturalPredictor:
     def __init__(self, dt: Optional[datetime] = None):
         self.dt = dt or datetime.now()
-        self.bazi = _bazi_for_datetime(self.dt)
+        self.bazi = SCORE_CACHE.bazi(self.dt)
 
     def scores(self, bias: Dict[str, float] | None = None) -> Tuple[Dict[int, float], Dict[int, float]]:
-        """返回红/蓝球的打分（分数越高越偏好）。"""
-        red_scores: Dict[int, float] = {i: 0.0 for i in range(1, 34)}
-        blue_scores: Dict[int, float] = {i: 0.0 for i in range(1, 17)}
-        bias = bias or {}
-
-        # 1) 基于四柱五行打分
-        pillars = []
-        if self.bazi:
-            pillars = [self.bazi.get('year'), self.bazi.get('month'), self.bazi.get('day'), self.bazi.get('hour')]
-        # 若 bazi 不可得，用月份近似季节五行
-        if not pillars:
-            pillars = [''] * 4
-
-        weights = [1.0, 1.0, 1.5, 1.2]  # 年/月/日/时权重（偏重日主、时）
-        for pillar, w in zip(pillars, weights):
-            wx = _pillar_wuxing(pillar)
-            if wx:
-                for n in RED_GROUPS.get(wx, []):
-                    red_scores[n] += 1.0 * w
-                for n in BLUE_GROUPS.get(wx, []):
-                    blue_scores[n] += 1.0 * w
-
-        # 2) 季节/节气加权（近似：用月份）
-        wx_season = SEASON_WUXING.get(self.dt.month)
-        if wx_season:
-            for n in RED_GROUPS.get(wx_season, []):
-                red_scores[n] += 0.6
-            for n in BLUE_GROUPS.get(wx_season, []):
-                blue_scores[n] += 0.6
-
-        # 3) 可选偏置（不同文化模型的差异化权重）
-        # bias 形如 {'year': 0.5, 'month': 1.0, 'day': 2.0, 'hour': 1.5, 'season': 0.8}
-        # 这里简单乘上总体缩放因子
-        if bias:
-            factor = max(0.1, float(sum(bias.values()) / max(1, len(bias))))
-            for i in red_scores:
-                red_scores[i] *= factor
-            for i in blue_scores:
-                blue_scores[i] *= factor
-
-        return red_scores, blue_scores
+        """返回红/蓝球的打分（分数越高越偏好）。同一时辰与 bias 的结果由 SCORE_CACHE 复用。"""
+        return SCORE_CACHE.scores(self.dt, bias)
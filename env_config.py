@@ -0,0 +1,34 @@
+"""
+环境变量配置读取（各常驻服务/队列共用）
+
+- env_float / env_int：缺失或无法解析时取默认值；给定 lo/hi 时把解析出的值截断到区间内
+- env_int 先按浮点解析再取整，"4" 与 "4.0" 均可
+"""
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+
+def env_float(name: str, default: float, lo: Optional[float] = None, hi: Optional[float] = None) -> float:
+    try:
+        value = float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+    if lo is not None:
+        value = max(lo, value)
+    if hi is not None:
+        value = min(hi, value)
+    return value
+
+
+def env_int(name: str, default: int, lo: Optional[int] = None, hi: Optional[int] = None) -> int:
+    try:
+        value = int(float(os.getenv(name, str(default))))
+    except Exception:
+        return default
+    if lo is not None:
+        value = max(lo, value)
+    if hi is not None:
+        value = min(hi, value)
+    return value
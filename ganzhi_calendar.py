@@ -0,0 +1,275 @@
+"""
+干支历预计算表（1900-2100）
+
+- 每个公历日一行：农历年/月/日（闰月为负）、日柱、当日 00:00:00 与 23:59:59 的年柱/月柱、
+  节（交节即换月，立春同时换年）交接的当日秒数、当日节气名
+- 以 .npy 结构化数组存放（默认 data/ganzhi_calendar.npy，可用 BAZI_CALENDAR_PATH 覆盖），内存映射只读加载
+- 时柱与两种晚子时流派的日柱由规则直接算出，与 lunar-python 的 EightChar 口径一致
+- 表由 tools/build_ganzhi_calendar.py 用 lunar-python 逐日生成并交叉校验；表缺失或日期越界时
+  bazi_chart 回退到 lunar-python
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+GAN = ("甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸")
+ZHI = ("子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥")
+GANZHI = tuple(GAN[i % 10] + ZHI[i % 12] for i in range(60))
+SHENGXIAO = ("鼠", "牛", "虎", "兔", "龙", "蛇", "马", "羊", "猴", "鸡", "狗", "猪")
+LUNAR_MONTH = ("", "正", "二", "三", "四", "五", "六", "七", "八", "九", "十", "冬", "腊")
+LUNAR_DAY = ("", "初一", "初二", "初三", "初四", "初五", "初六", "初七", "初八", "初九", "初十",
+             "十一", "十二", "十三", "十四", "十五", "十六", "十七", "十八", "十九", "二十",
+             "廿一", "廿二", "廿三", "廿四", "廿五", "廿六", "廿七", "廿八", "廿九", "三十")
+JIE_QI = ("冬至", "小寒", "大寒", "立春", "雨水", "惊蛰", "春分", "清明", "谷雨", "立夏", "小满", "芒种",
+          "夏至", "小暑", "大暑", "立秋", "处暑", "白露", "秋分", "寒露", "霜降", "立冬", "小雪", "大雪")
+
+START = _dt.date(1900, 1, 1)
+END = _dt.date(2100, 12, 31)
+DEFAULT_PATH = os.getenv('BAZI_CALENDAR_PATH',
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ganzhi_calendar.npy'))
+
+DTYPE = np.dtype([
+    ('ordinal', '<i4'),      # 公历日序号（date.toordinal）
+    ('lunar_year', '<i2'),
+    ('lunar_month', 'i1'),   # 闰月为负
+    ('lunar_day', 'i1'),
+    ('day_gz', 'u1'),        # 六十甲子序号
+    ('year_gz0', 'u1'),      # 00:00:00 的年柱
+    ('year_gz1', 'u1'),      # 23:59:59 的年柱
+    ('month_gz0', 'u1'),
+    ('month_gz1', 'u1'),
+    ('switch_sec', '<i4'),   # 交节时刻（当日秒数），无交节为 -1
+    ('jie_qi', 'i1'),        # JIE_QI 序号，无节气为 -1
+])
+
+_GZ_INDEX = {gz: i for i, gz in enumerate(GANZHI)}
+_ORDINAL_EPOCH = _dt.date(1970, 1, 1).toordinal()
+
+
+def ordinals(years: np.ndarray, months: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """整列公历年月日 -> date.toordinal()（不校验日期合法性）。"""
+    y = np.asarray(years, dtype=np.int64)
+    m = np.asarray(months, dtype=np.int64)
+    d = np.asarray(days, dtype=np.int64)
+    ym = (y - 1970).astype('datetime64[Y]') + (m - 1).astype('timedelta64[M]')
+    return ym.astype('datetime64[D]').astype(np.int64) + (d - 1) + _ORDINAL_EPOCH
+
+
+def _time_zhi(hour: int) -> int:
+    # 23:00-00:59 为子时，其后每两小时一支
+    return 0 if hour == 23 else (hour + 1) // 2
+
+
+class GanzhiCalendar:
+    """按公历日 O(1) 查表的八字排盘。"""
+
+    def __init__(self, table: np.ndarray):
+        self.table = table
+        self.start = int(table['ordinal'][0])
+        # 逐列取出（内存映射下为视图），避免逐行构造记录对象
+        self._cols = {name: table[name] for name in DTYPE.names}
+        self._lunar_index: Optional[Dict[Tuple[int, int, int], int]] = None
+
+    def __len__(self) -> int:
+        return int(self.table.shape[0])
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'GanzhiCalendar':
+        table = np.load(path or DEFAULT_PATH, mmap_mode='r')
+        if table.dtype != DTYPE:
+            raise ValueError('干支历表结构不匹配，请重新生成')
+        return cls(table)
+
+    def row(self, year: int, month: int, day: int) -> Optional[int]:
+        """公历日期所在行号；越界（含需要次日日柱的最后一行）返回 None。"""
+        try:
+            i = _dt.date(year, month, day).toordinal() - self.start
+        except ValueError:
+            return None
+        return i if 0 <= i < len(self) - 1 else None
+
+    def bazi_many(self, ords: np.ndarray, hours: np.ndarray, minutes: np.ndarray, seconds: np.ndarray,
+                  sects: np.ndarray) -> Dict[str, np.ndarray]:
+        """整列查表：返回四柱六十甲子序号、农历与节气列，以及是否在表内的 ok 掩码（越界行的值无意义）。"""
+        rows = np.asarray(ords, dtype=np.int64) - self.start
+        ok = (rows >= 0) & (rows < len(self) - 1)
+        r = np.where(ok, rows, 0)
+        hours = np.asarray(hours, dtype=np.int64)
+        c = self._cols
+        sw = c['switch_sec'][r].astype(np.int64)
+        secs = hours * 3600 + np.asarray(minutes, dtype=np.int64) * 60 + np.asarray(seconds, dtype=np.int64)
+        after = (sw >= 0) & (secs >= sw)
+        today = c['day_gz'][r].astype(np.int64)
+        late = hours == 23
+        exact = np.where(late, c['day_gz'][r + 1].astype(np.int64), today)
+        tz = np.where(late, 0, (hours + 1) // 2)
+        gan = (exact % 10 % 5 * 2 + tz) % 10
+        return {
+            'ok': ok,
+            'year': np.where(after, c['year_gz1'][r], c['year_gz0'][r]).astype(np.int64),
+            'month': np.where(after, c['month_gz1'][r], c['month_gz0'][r]).astype(np.int64),
+            'day': np.where(np.asarray(sects) == 1, exact, today),
+            # 干支同奇偶时 (6g - 5z) mod 60 即为六十甲子序号
+            'hour': (6 * gan - 5 * tz) % 60,
+            'lunar_year': c['lunar_year'][r].astype(np.int64),
+            'lunar_month': c['lunar_month'][r].astype(np.int64),
+            'lunar_day': c['lunar_day'][r].astype(np.int64),
+            'jie_qi': c['jie_qi'][r].astype(np.int64),
+        }
+
+    def lunar_to_solar(self, year: int, month: int, day: int) -> Optional[Tuple[int, int, int]]:
+        """农历年月日（闰月为负）-> 公历年月日；表中无此日返回 None。"""
+        if self._lunar_index is None:
+            ly = self._cols['lunar_year'].tolist()
+            lm = self._cols['lunar_month'].tolist()
+            ld = self._cols['lunar_day'].tolist()
+            self._lunar_index = {(y, m, d): i for i, (y, m, d) in enumerate(zip(ly, lm, ld))}
+        i = self._lunar_index.get((int(year), int(month), int(day)))
+        if i is None:
+            return None
+        d = _dt.date.fromordinal(self.start + i)
+        return d.year, d.month, d.day
+
+    def bazi(self, year: int, month: int, day: int, hour: int, minute: int, second: int,
+             sect: int = 2) -> Optional[Dict[str, Any]]:
+        """北京时间公历时刻的排盘结果，字段与 bazi_chart._bazi_from_lunar 一致；越界返回 None。"""
+        i = self.row(year, month, day)
+        if i is None:
+            return None
+        sect = 1 if int(sect) == 1 else 2
+        c = self._cols
+        sw = int(c['switch_sec'][i])
+        after = sw >= 0 and hour * 3600 + minute * 60 + second >= sw
+        y_gz = GANZHI[int(c['year_gz1'][i] if after else c['year_gz0'][i])]
+        m_gz = GANZHI[int(c['month_gz1'][i] if after else c['month_gz0'][i])]
+        today = int(c['day_gz'][i])
+        # 晚子时：时干按次日日干起；流派 1 的日柱也算次日
+        exact = int(c['day_gz'][i + 1]) if hour == 23 else today
+        d_gz = GANZHI[today if sect == 2 else exact]
+        tz = _time_zhi(hour)
+        h_gz = GAN[(exact % 10 % 5 * 2 + tz) % 10] + ZHI[tz]
+        ly, lm, ld = int(c['lunar_year'][i]), int(c['lunar_month'][i]), int(c['lunar_day'][i])
+        jq = int(c['jie_qi'][i])
+        return {
+            'year': y_gz,
+            'month': m_gz,
+            'day': d_gz,
+            'hour': h_gz,
+            'sect': sect,
+            'gan': [y_gz[0], m_gz[0], d_gz[0], h_gz[0]],
+            'zhi': [y_gz[1], m_gz[1], d_gz[1], h_gz[1]],
+            'lunar': {
+                'year': ly,
+                'month': lm,
+                'day': ld,
+                'leap': lm < 0,
+                'month_in_chinese': ('闰' if lm < 0 else '') + LUNAR_MONTH[abs(lm)],
+                'day_in_chinese': LUNAR_DAY[ld],
+            },
+            'solar': {'year': year, 'month': month, 'day': day},
+            'zodiac': SHENGXIAO[(ly - 4) % 12],
+            'jie_qi': JIE_QI[jq] if jq >= 0 else '',
+        }
+
+
+_CALENDAR: Any = None
+_CALENDAR_LOCK = threading.Lock()
+
+
+def get_calendar() -> Optional[GanzhiCalendar]:
+    """进程级干支历表；文件缺失或损坏时返回 None（调用方回退 lunar-python）。"""
+    global _CALENDAR
+    if _CALENDAR is None:
+        with _CALENDAR_LOCK:
+            if _CALENDAR is None:
+                try:
+                    _CALENDAR = GanzhiCalendar.load()
+                except Exception:
+                    _CALENDAR = False
+    return _CALENDAR or None
+
+
+# ---------- 生成与校验（离线，依赖 lunar-python） ----------
+def _lunar_at(d: _dt.date, sec: int):
+    from lunar_python import Solar
+    return Solar.fromYmdHms(d.year, d.month, d.day, sec // 3600, sec // 60 % 60, sec % 60).getLunar()
+
+
+def _switch_sec(lunar: Any, d: _dt.date) -> int:
+    """当日交节时刻：取节气表中落在当日的节气时刻。"""
+    secs = set()
+    for solar in lunar.getJieQiTable().values():
+        if (solar.getYear(), solar.getMonth(), solar.getDay()) == (d.year, d.month, d.day):
+            secs.add(solar.getHour() * 3600 + solar.getMinute() * 60 + solar.getSecond())
+    if len(secs) != 1:
+        raise ValueError(f'{d} 交节时刻不唯一: {sorted(secs)}')
+    return secs.pop()
+
+
+def build_table(start: _dt.date = START, end: _dt.date = END) -> np.ndarray:
+    """用 lunar-python 逐日生成 [start, end] 的表（另附 end 次日一行供晚子时取次日日柱）。"""
+    n = end.toordinal() - start.toordinal() + 2
+    table = np.zeros(n, dtype=DTYPE)
+    for i in range(n):
+        d = _dt.date.fromordinal(start.toordinal() + i)
+        first, last = _lunar_at(d, 0), _lunar_at(d, 86399)
+        y0, y1 = _GZ_INDEX[first.getYearInGanZhiExact()], _GZ_INDEX[last.getYearInGanZhiExact()]
+        m0, m1 = _GZ_INDEX[first.getMonthInGanZhiExact()], _GZ_INDEX[last.getMonthInGanZhiExact()]
+        sw = -1
+        if (y0, m0) != (y1, m1):
+            sw = _switch_sec(first, d)
+            before, at = _lunar_at(d, sw - 1), _lunar_at(d, sw)
+            if (_GZ_INDEX[before.getMonthInGanZhiExact()], _GZ_INDEX[at.getMonthInGanZhiExact()]) != (m0, m1):
+                raise ValueError(f'{d} 交节时刻与月柱切换不符')
+        name = first.getJieQi()
+        table[i] = (d.toordinal(), first.getYear(), first.getMonth(), first.getDay(),
+                    _GZ_INDEX[first.getDayInGanZhi()], y0, y1, m0, m1, sw,
+                    JIE_QI.index(name) if name else -1)
+    return table
+
+
+def save_table(table: np.ndarray, path: Optional[str] = None) -> str:
+    import tempfile
+    path = path or DEFAULT_PATH
+    d = os.path.dirname(path) or '.'
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, suffix='.npy.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, table)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+        raise
+    return path
+
+
+def verify(calendar: GanzhiCalendar, samples: int = 2000, seed: int = 0) -> int:
+    """随机时刻（含交节前后一秒与晚子时）对照 lunar-python，返回不一致条数。"""
+    import random
+    from bazi_chart import _bazi_from_lunar
+    rng = random.Random(seed)
+    switch_rows = np.flatnonzero(calendar._cols['switch_sec'][:-1] >= 0)
+    bad = 0
+    for k in range(samples):
+        if k % 4 == 0 and len(switch_rows):
+            i = int(switch_rows[rng.randrange(len(switch_rows))])
+            sec = int(calendar._cols['switch_sec'][i]) + rng.choice((-1, 0))
+            sec = min(max(sec, 0), 86399)
+        else:
+            i = rng.randrange(len(calendar) - 1)
+            sec = rng.choice((rng.randrange(86400), 23 * 3600 + rng.randrange(3600)))
+        d = _dt.date.fromordinal(calendar.start + i)
+        hms = (sec // 3600, sec // 60 % 60, sec % 60)
+        for sect in (1, 2):
+            if calendar.bazi(d.year, d.month, d.day, *hms, sect=sect) != _bazi_from_lunar(_lunar_at(d, sec), sect=sect):
+                bad += 1
+    return bad
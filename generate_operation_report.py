@@ -92,17 +92,17 @@ def get_latest_prediction():
             except Exception:
                 window = 200
             try:
-                live_jl = Path('reports') / 'ssq_live_predictions.jsonl'
-                if live_jl.exists():
-                    with open(live_jl, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()[-max(1, window):]
+                from ssq_live_log import tail_records
+                recent = tail_records(
+                    os.path.join('reports', 'ssq_live_predictions.d'), max(1, window),
+                    legacy_path=os.path.join('reports', 'ssq_live_predictions.jsonl'),
+                )
+                if recent:
                     from collections import Counter
                     rc = Counter()
                     bc = Counter()
-                    import json as _json
-                    for line in lines:
+                    for obj in recent:
                         try:
-                            obj = _json.loads(line)
                             fused = obj.get('fused') or {}
                             reds2 = fused.get('reds') or []
                             blue2 = fused.get('blue')
@@ -373,17 +373,16 @@ def generate_report():
         report = report + "\n" + "\n".join(extra_cl)
 
     # 附加：持续预测流统计（最近窗口）
-    def load_live_stats(path: str = 'reports/ssq_live_predictions.jsonl') -> Optional[Dict[str, Any]]:
+    def load_live_stats(path: str = 'reports/ssq_live_predictions.d', legacy_path: str = 'reports/ssq_live_predictions.jsonl') -> Optional[Dict[str, Any]]:
         try:
-            if not os.path.exists(path):
-                return None
             try:
                 window = int(os.getenv('SSQ_REPORT_LIVE_WINDOW', '200'))
             except Exception:
                 window = 200
-            with open(path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()[-max(1, window):]
-            import json as _json
+            from ssq_live_log import tail_records
+            recent = tail_records(path, max(1, window), legacy_path=legacy_path)
+            if not recent:
+                return None
             from collections import Counter
             n = 0
             strat_counter = Counter()
@@ -399,10 +398,8 @@ def generate_report():
                 'max_overlap': 0.0,
             }
             diversify_true = 0
-            for line in lines:
-                try:
-                    obj = _json.loads(line)
-                except Exception:
+            for obj in recent:
+                if not isinstance(obj, dict):
                     continue
                 n += 1
                 attempts = obj.get('attempts') or []
@@ -0,0 +1,247 @@
+"""
+人物扩张/抽取调度器（person_predict_cycle 用）
+
+- 按「下次到期时间」排序的小顶堆：每个 (任务, 人物) 只在到期时出堆，出堆/入堆 O(log n)，与人数无关
+- 阻塞的外部调用（联网检索、Deepseek）放到线程池执行，不阻塞事件循环；并发上限 PERSON_ENRICH_CONCURRENCY（默认 4）
+- 每个外部 API 一个令牌桶限速：PERSON_RESEARCH_RPS（默认 1）、PERSON_DEEPSEEK_RPS（默认 2），桶容量取 max(1, rps)
+- 状态写入合并：PersonStatusStore 只标脏，按 PERSON_STATUS_FLUSH_SECONDS（默认 5）批量原子落盘
+- 任务异常时在 min(间隔, PERSON_ENRICH_RETRY_SECONDS（默认 600）) 后重试
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from env_config import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """异步令牌桶：rate 个/秒，最多积攒 capacity 个；rate<=0 表示不限速。"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:  # 排队取令牌，先到先得
+            self._refill()
+            while self.tokens < 1.0:
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1.0
+
+
+class PersonStatusStore:
+    """person_expand_status.json 的内存视图：mark() 只更新内存并标脏，flush() 批量落盘（tmp + 原子替换）。"""
+
+    def __init__(self, path: str, flush_seconds: Optional[float] = None):
+        self.path = path
+        self.flush_seconds = flush_seconds if flush_seconds is not None else env_float('PERSON_STATUS_FLUSH_SECONDS', 5.0)
+        self.status: Dict[str, Any] = {"persons": {}}
+        self.dirty = 0
+        self.writes = 0
+        self._last_flush = time.monotonic()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.status = data
+                    self.status.setdefault("persons", {})
+            except Exception:
+                pass
+
+    def get(self, name: str) -> Dict[str, Any]:
+        return self.status.setdefault("persons", {}).setdefault(name, {})
+
+    def mark(self, name: str, key: str, ts: float) -> None:
+        self.get(name)[key] = ts
+        self.dirty += 1
+
+    def maybe_flush(self) -> bool:
+        if self.dirty and time.monotonic() - self._last_flush >= self.flush_seconds:
+            return self.flush()
+        return False
+
+    def flush(self) -> bool:
+        if not self.dirty:
+            return False
+        self._last_flush = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.status, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+            self.dirty = 0
+            self.writes += 1
+            return True
+        except Exception as e:
+            logger.warning(f"写入 {os.path.basename(self.path)} 失败: {e}")
+            return False
+
+
+class EnrichTask:
+    """一类周期性任务：func(person) -> (done, record)，在 bucket 限速下每 interval 秒对每个人物执行一次。"""
+    __slots__ = ('kind', 'func', 'interval', 'status_key', 'bucket')
+
+    def __init__(self, kind: str, func: Callable[[Dict[str, Any]], Tuple[bool, Any]], interval: float,
+                 status_key: str, bucket: TokenBucket):
+        self.kind = kind
+        self.func = func
+        self.interval = max(0.0, float(interval))
+        self.status_key = status_key
+        self.bucket = bucket
+
+
+class EnrichScheduler:
+    """按到期时间调度 EnrichTask；run() 作为后台协程常驻，stop() 后等待在途任务并落盘状态。"""
+
+    def __init__(self, store: PersonStatusStore, tasks: Iterable[EnrichTask], concurrency: Optional[int] = None,
+                 retry_seconds: Optional[float] = None):
+        self.store = store
+        self.tasks = {t.kind: t for t in tasks}
+        self.concurrency = max(1, int(concurrency or env_int('PERSON_ENRICH_CONCURRENCY', 4)))
+        self.retry_seconds = retry_seconds if retry_seconds is not None else env_float('PERSON_ENRICH_RETRY_SECONDS', 600.0)
+        self.persons: Dict[str, Dict[str, Any]] = {}
+        self.counts = {'done': 0, 'skipped': 0, 'failed': 0}
+        self._heap: List[Tuple[float, int, str, str]] = []
+        self._queued: set = set()
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._running: set = set()
+        self._stopping = False
+
+    # ---------- 排程 ----------
+    def _push(self, due: float, kind: str, name: str) -> None:
+        heapq.heappush(self._heap, (due, next(self._seq), kind, name))
+        self._queued.add((kind, name))
+
+    def schedule(self, persons: Iterable[Dict[str, Any]]) -> int:
+        """登记/更新人物；新登记的 (任务, 人物) 按上次执行时间 + 间隔入堆，返回新增条数。"""
+        added = 0
+        for person in persons:
+            name = person.get("name") or "UNKNOWN"
+            self.persons[name] = person
+            pstate = self.store.get(name)
+            for kind, task in self.tasks.items():
+                if (kind, name) in self._queued:
+                    continue
+                last = pstate.get(task.status_key)
+                try:
+                    due = float(last) + task.interval if last else 0.0
+                except Exception:
+                    due = 0.0
+                self._push(due, kind, name)
+                added += 1
+        if added and self._wake is not None:
+            self._wake.set()
+        return added
+
+    def next_due(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            'persons': len(self.persons),
+            'scheduled': len(self._heap),
+            'overdue': sum(1 for due, _, _, _ in self._heap if due <= now),
+            'running': len(self._running),
+            'status_writes': self.store.writes,
+            **self.counts,
+        }
+
+    # ---------- 执行 ----------
+    async def _execute(self, kind: str, name: str, sem: asyncio.Semaphore) -> None:
+        task = self.tasks[kind]
+        person = self.persons.get(name)
+        try:
+            if person is None:
+                return
+            await task.bucket.acquire()
+            started = time.time()
+            try:
+                done, _ = await asyncio.to_thread(task.func, person)
+            except Exception as e:
+                logger.warning(f"{kind} 失败({name}): {e}")
+                self.counts['failed'] += 1
+                self._push(time.time() + min(task.interval, self.retry_seconds), kind, name)
+                return
+            if done:
+                self.store.mark(name, task.status_key, started)
+                self.counts['done'] += 1
+            else:
+                self.counts['skipped'] += 1
+            self._push(started + task.interval, kind, name)
+        finally:
+            sem.release()
+            if self._wake is not None:
+                self._wake.set()
+
+    async def run(self) -> None:
+        self._wake = asyncio.Event()
+        sem = asyncio.Semaphore(self.concurrency)
+        try:
+            while not self._stopping:
+                now = time.time()
+                # 先占并发名额再出堆：名额用满时到期任务留在堆里，不会无界堆积协程
+                while self._heap and self._heap[0][0] <= now and not self._stopping:
+                    if sem.locked():
+                        break
+                    await sem.acquire()
+                    _, _, kind, name = heapq.heappop(self._heap)
+                    self._queued.discard((kind, name))
+                    t = asyncio.create_task(self._execute(kind, name, sem))
+                    self._running.add(t)
+                    t.add_done_callback(self._running.discard)
+                self.store.maybe_flush()
+                due = self.next_due()
+                timeout = self.store.flush_seconds
+                if due is not None and not sem.locked():
+                    timeout = min(timeout, max(0.0, due - time.time()))
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=max(0.01, timeout))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._running:
+                await asyncio.gather(*list(self._running), return_exceptions=True)
+            self.store.flush()
+
+    def stop(self) -> None:
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+
+
+def build_tasks(expand: Optional[Callable] = None, extract: Optional[Callable] = None,
+                expand_interval: float = 24 * 3600, extract_interval: float = 48 * 3600) -> List[EnrichTask]:
+    """person_predict_cycle 的两类任务：外部扩张（research 限速）与内部抽取（deepseek 限速）。"""
+    tasks = []
+    if expand is not None:
+        tasks.append(EnrichTask('expand', expand, expand_interval, 'last_expand_ts',
+                                TokenBucket(env_float('PERSON_RESEARCH_RPS', 1.0))))
+    if extract is not None:
+        tasks.append(EnrichTask('extract', extract, extract_interval, 'last_extract_ts',
+                                TokenBucket(env_float('PERSON_DEEPSEEK_RPS', 2.0))))
+    return tasks
@@ -8,6 +8,9 @@
 3. 每次复盘均触发新知识学习、新模式发现和系统自主升级
 4. 所有学习、发现、升级过程自动记录到知识库
 5. 系统全程静默自主运行，无需人工干预
+
+外部扩张/内部抽取由 person_enrich_scheduler 在后台按到期时间调度（线程池执行、按 API 令牌桶限速、
+状态批量落盘），主循环不再被逐人的阻塞调用卡住。
 """
 
 import asyncio
@@ -20,6 +23,8 @@ import logging
 from typing import Dict, List, Any, Tuple
 import traceback
 
+from person_enrich_scheduler import EnrichScheduler, PersonStatusStore, build_tasks
+
 # 扩展能力：外部互联网检索与内部大模型抽取
 try:
     from internet_research import research_and_summarize  # type: ignore
@@ -66,24 +71,6 @@ def _ensure_dirs():
     os.makedirs(REPORTS_DIR, exist_ok=True)
     os.makedirs(STATIC_DIR, exist_ok=True)
 
-def _load_person_status() -> Dict[str, Any]:
-    _ensure_dirs()
-    if os.path.exists(PERSON_STATUS_FILE):
-        try:
-            with open(PERSON_STATUS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {"persons": {}}
-    return {"persons": {}}
-
-def _save_person_status(status: Dict[str, Any]):
-    _ensure_dirs()
-    try:
-        with open(PERSON_STATUS_FILE, "w", encoding="utf-8") as f:
-            json.dump(status, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        logger.warning(f"写入 person_expand_status.json 失败: {e}")
-
 def _append_jsonl(path: str, obj: Dict[str, Any]):
     _ensure_dirs()
     try:
@@ -230,8 +217,10 @@ class XuanjiPersonPredictor:
     def __init__(self):
         self.learning_cycles = 0
         self.knowledge_base = []
-        # 加载人名到最近一次扩张/抽取的状态
-        self.person_status = _load_person_status()
+        # 加载人名到最近一次扩张/抽取的状态（写入由 status_store 合并落盘）
+        _ensure_dirs()
+        self.status_store = PersonStatusStore(PERSON_STATUS_FILE)
+        self.person_status = self.status_store.status
     async def predict_and_learn(self, person: Dict) -> Dict:
         # 用玄机AI系统进行预测（可集成本地API或大模型API）
         # 这里只做模拟，实际可调用AI系统API
@@ -270,25 +259,32 @@ class XuanjiPersonPredictor:
         with open(PERSON_KNOWLEDGE_FILE, "w", encoding="utf-8") as f:
             json.dump(self.knowledge_base, f, ensure_ascii=False, indent=2)
     def maybe_expand_and_extract(self, person: Dict[str, Any]):
-        """按频控为单个人物执行外部扩张与内部抽取。"""
+        """按频控为单个人物同步执行外部扩张与内部抽取（单次调用用；主循环走 enrichment_scheduler）。"""
         try:
             name = person.get("name") or "UNKNOWN"
-            pstate = (self.person_status.setdefault("persons", {}).setdefault(name, {}))
+            pstate = self.status_store.get(name)
             now = _now_ts()
             # 外部扩张
             if PERSON_NET_EXPAND and _should_run(pstate.get("last_expand_ts"), PERSON_EXPAND_INTERVAL):
                 done, rec = expand_person_with_internet(person)
                 if done:
-                    pstate["last_expand_ts"] = now
-                    _save_person_status(self.person_status)
+                    self.status_store.mark(name, "last_expand_ts", now)
             # 内部抽取
             if PERSON_LLM_EXTRACT and _should_run(pstate.get("last_extract_ts"), PERSON_EXTRACT_INTERVAL):
                 done, rec = extract_person_facts(person)
                 if done:
-                    pstate["last_extract_ts"] = now
-                    _save_person_status(self.person_status)
+                    self.status_store.mark(name, "last_extract_ts", now)
+            self.status_store.flush()
         except Exception as e:
             logger.warning(f"扩张/抽取流程异常: {e}")
+    def enrichment_scheduler(self) -> EnrichScheduler:
+        """按开关构建扩张/抽取调度器（与本实例共享状态存储）。"""
+        tasks = build_tasks(
+            expand_person_with_internet if PERSON_NET_EXPAND else None,
+            extract_person_facts if PERSON_LLM_EXTRACT else None,
+            PERSON_EXPAND_INTERVAL, PERSON_EXTRACT_INTERVAL,
+        )
+        return EnrichScheduler(self.status_store, tasks)
 
 async def main():
     logger.info("启动历史人物与系统自知人物AI预测与复盘循环任务...")
@@ -296,17 +292,28 @@ async def main():
         collector = PersonDataCollector()
         persons = await collector.fetch_person_data()
         predictor = XuanjiPersonPredictor()
-        # 主循环：对每个人物反复复盘
-        for cycle in range(1000):  # 可无限循环
-            for person in persons:
-                summary = await predictor.predict_and_learn(person)
-                logger.info(f"复盘周期{summary['cycle']}：{summary['name']}，预测：{summary['prediction']}，事实：{summary['fact']}，吻合：{summary['match']}")
-                # 每人处理后尝试扩张/抽取（按频控与开关执行）
-                predictor.maybe_expand_and_extract(person)
-                await predictor.upgrade_and_discover()
-            if cycle % 10 == 0:
-                await predictor.save_knowledge()
-            await asyncio.sleep(5)  # 静默后台运行，间隔5秒
+        # 扩张/抽取在后台按到期时间调度（按开关启用）
+        scheduler = predictor.enrichment_scheduler()
+        scheduler.schedule(persons)
+        runner = asyncio.create_task(scheduler.run()) if scheduler.tasks else None
+        try:
+            # 主循环：对每个人物反复复盘
+            for cycle in range(1000):  # 可无限循环
+                for i, person in enumerate(persons):
+                    summary = await predictor.predict_and_learn(person)
+                    logger.info(f"复盘周期{summary['cycle']}：{summary['name']}，预测：{summary['prediction']}，事实：{summary['fact']}，吻合：{summary['match']}")
+                    await predictor.upgrade_and_discover()
+                    if i % 100 == 99:
+                        await asyncio.sleep(0)  # 让出事件循环，调度器及时派发/回收任务
+                if cycle % 10 == 0:
+                    await predictor.save_knowledge()
+                    if runner is not None:
+                        logger.info(f"扩张/抽取调度: {scheduler.stats()}")
+                await asyncio.sleep(5)  # 静默后台运行，间隔5秒
+        finally:
+            if runner is not None:
+                scheduler.stop()
+                await runner
         logger.info("任务完成。知识库已保存。")
     except Exception as e:
         logger.error(f"任务执行出错: {e}")
@@ -14,6 +14,7 @@
 """
 
 import asyncio
+import math
 import random
 import time
 import json
@@ -22,9 +23,18 @@ import sys
 import datetime
 import logging
 import requests
+import argparse
+import tempfile
 from typing import Dict, List, Tuple, Any, Optional
 import traceback
 
+import numpy as np
+
+from ssq_draw_table import DrawTable, as_history_view, draw_arrays, history_index
+from ssq_eval_kernel import popcount as _popcount, red_mask as _red_mask
+from ssq_fusion_engine import UniformStream
+from ssq_history_index import HistoryIndex
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -44,6 +54,15 @@ LOCAL_API_URL = "http://localhost:8000"
 DATA_CACHE_FILE = "ssq_history_data.json"
 LEARNING_RESULTS_FILE = "ssq_learning_cycles.txt"
 MODEL_STATE_FILE = "ssq_ai_model_state.json"
+# 断点续跑：检查点（已完成期序号、模型状态、随机数状态）与逐期统计的二进制旁路文件
+CHECKPOINT_FILE = "ssq_ai_checkpoint.json"
+STATS_FILE = "ssq_ai_stats.bin"
+CHECKPOINT_VERSION = 1
+CHECKPOINT_EVERY = int(os.environ.get("SSQ_CHECKPOINT_EVERY", "10"))
+STATS_DTYPE = np.dtype([("index", "<i4"), ("level", "i1"), ("attempts", "<i4")])
+# 逐注回测的批量向量化采样（结果与逐次实现逐位一致），设为 0 关闭
+BACKTEST_BULK = os.environ.get("SSQ_BACKTEST_BULK", "1") != "0"
+BULK_MAX_BATCH = 8192
 
 # 双色球相关常量
 RED_BALL_COUNT = 6
@@ -135,6 +154,20 @@ class SSQPredictionModel:
             return 0.0
         return sum(self.accuracy_history) / len(self.accuracy_history)
 
+    def state_dict(self) -> Dict:
+        """可 JSON 序列化的模型状态，用于检查点"""
+        return {
+            "weight": self.weight,
+            "accuracy_history": list(self.accuracy_history),
+            "learning_cycles": self.learning_cycles
+        }
+
+    def load_state_dict(self, state: Dict) -> None:
+        """从检查点恢复模型状态"""
+        self.weight = state.get("weight", self.weight)
+        self.accuracy_history = list(state.get("accuracy_history", []))
+        self.learning_cycles = state.get("learning_cycles", 0)
+
 
 class PatternBasedModel(SSQPredictionModel):
     """基于模式识别的预测模型"""
@@ -143,7 +176,21 @@ class PatternBasedModel(SSQPredictionModel):
         super().__init__("Pattern_Model", 1.2)
         self.patterns = {}
         self.pattern_confidence = {}
+        # 历史前缀和索引：开奖表视图共用整表索引，普通列表的前缀切片只做增量追加
+        self._index = HistoryIndex()
     
+    def state_dict(self) -> Dict:
+        state = super().state_dict()
+        # 模式表按插入顺序保存，恢复后权重累乘次序不变
+        state["patterns"] = json.loads(json.dumps(self.patterns))
+        state["pattern_confidence"] = dict(self.pattern_confidence)
+        return state
+
+    def load_state_dict(self, state: Dict) -> None:
+        super().load_state_dict(state)
+        self.patterns = dict(state.get("patterns", {}))
+        self.pattern_confidence = dict(state.get("pattern_confidence", {}))
+
     async def detect_patterns(self, history_data: List[Dict]) -> None:
         """检测历史数据中的模式"""
         if len(history_data) < 10:
@@ -194,15 +241,10 @@ class PatternBasedModel(SSQPredictionModel):
         if len(history_data) < 10:
             return
         
-        recent = history_data[-10:]
-        red_freq = {i: 0 for i in RED_BALL_RANGE}
-        blue_freq = {i: 0 for i in BLUE_BALL_RANGE}
-        
-        # 统计近期号码频率
-        for draw in recent:
-            for ball in draw["red_balls"]:
-                red_freq[ball] += 1
-            blue_freq[draw["blue_ball"]] += 1
+        # 统计近期号码频率（最近10期窗口，前缀和差分）
+        index, end = history_index(history_data, self._index)
+        red_freq = dict(zip(RED_BALL_RANGE, index.red_counts(end, end - 10).tolist()))
+        blue_freq = dict(zip(BLUE_BALL_RANGE, index.blue_counts(end, end - 10).tolist()))
         
         # 找出热号和冷号
         hot_reds = sorted([(k, v) for k, v in red_freq.items() if v >= 3], 
@@ -286,37 +328,7 @@ class PatternBasedModel(SSQPredictionModel):
     async def predict(self, history_data: List[Dict]) -> Tuple[List[int], int]:
         """基于发现的模式进行预测"""
         await self.detect_patterns(history_data)
-        
-        # 候选号码池
-        red_candidates = {i: 1.0 for i in RED_BALL_RANGE}  # 默认权重为1
-        blue_candidates = {i: 1.0 for i in BLUE_BALL_RANGE}  # 默认权重为1
-        
-        # 根据模式调整权重
-        for pattern_id, pattern in self.patterns.items():
-            confidence = self.pattern_confidence.get(pattern_id, 0.5)
-            
-            if pattern["type"] == "cycle" and "last_seen" in pattern:
-                # 周期性模式
-                for ball in pattern["last_seen"]["red_balls"]:
-                    red_candidates[ball] *= (1 + confidence)
-                blue_candidates[pattern["last_seen"]["blue_ball"]] *= (1 + confidence)
-            
-            elif pattern["type"] in ["hot", "cold"] and "balls" in pattern:
-                # 热冷号模式
-                is_blue = "blue" in pattern_id
-                candidates = blue_candidates if is_blue else red_candidates
-                factor = 1.2 if pattern["type"] == "hot" else 0.8
-                
-                for ball in pattern["balls"]:
-                    if ball in candidates:
-                        candidates[ball] *= (factor * confidence)
-        
-        # 选择权重最高的号码
-        red_weights = [(ball, weight) for ball, weight in red_candidates.items()]
-        blue_weights = [(ball, weight) for ball, weight in blue_candidates.items()]
-        
-        red_weights.sort(key=lambda x: x[1], reverse=True)
-        blue_weights.sort(key=lambda x: x[1], reverse=True)
+        red_weights, blue_weights = self._candidate_weights()
         
         # 选择红球
         selected_reds = []
@@ -353,6 +365,71 @@ class PatternBasedModel(SSQPredictionModel):
                 break
         
         return sorted(selected_reds), selected_blue
+
+    # 批量模式每注消耗的均匀随机数：6 个红球 + 1 个蓝球
+    BULK_DRAWS = RED_BALL_COUNT + 1
+
+    def predict_bulk(self, u: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """按行批量抽样（须先 detect_patterns）；u 为 (B, 7) 均匀数，与逐次 predict 的取数顺序一致。"""
+        red_weights, blue_weights = self._candidate_weights()
+        b = u.shape[0]
+        balls = np.array([ball for ball, _ in red_weights])
+        n = len(balls)
+        # 转置存放 (候选, 行)：逐候选累加是 n 次长度为 B 的向量加法，六个红球全批一起抽
+        wt = np.repeat(np.array([weight for _, weight in red_weights], dtype=float)[:, None], b, axis=1)
+        cum = np.empty_like(wt)
+        rows = np.arange(b)
+        reds = np.zeros((b, RED_BALL_COUNT), dtype=np.int64)
+        tiny = np.finfo(float).tiny
+        for k in range(RED_BALL_COUNT):
+            # 已抽走的位置记 0：顺序累加不变，与逐次从列表中 pop 后重新求和一致
+            cum[0] = wt[0]
+            for i in range(1, n):
+                np.add(cum[i - 1], wt[i], out=cum[i])
+            # 各列单调不减，"首个累计 >= r 的位置"即累计 < r 的个数（逐行 searchsorted）；
+            # r 取不小于 tiny，u=0 时落在首个未抽走的候选上，与逐次实现相同
+            r = np.maximum(u[:, k] * cum[-1], tiny)
+            j = np.count_nonzero(cum < r, axis=0)
+            reds[:, k] = balls[j]
+            wt[j, rows] = 0.0
+        b_balls = np.array([ball for ball, _ in blue_weights])
+        b_cum = np.cumsum(np.array([weight for _, weight in blue_weights], dtype=float))
+        blue = b_balls[np.searchsorted(b_cum, u[:, RED_BALL_COUNT] * b_cum[-1], side='left')]
+        return reds, blue
+
+    def _candidate_weights(self) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]:
+        """由当前模式计算红/蓝候选权重，按权重降序（同权保持号码顺序）。"""
+        # 候选号码池
+        red_candidates = {i: 1.0 for i in RED_BALL_RANGE}  # 默认权重为1
+        blue_candidates = {i: 1.0 for i in BLUE_BALL_RANGE}  # 默认权重为1
+        
+        # 根据模式调整权重
+        for pattern_id, pattern in self.patterns.items():
+            confidence = self.pattern_confidence.get(pattern_id, 0.5)
+            
+            if pattern["type"] == "cycle" and "last_seen" in pattern:
+                # 周期性模式
+                for ball in pattern["last_seen"]["red_balls"]:
+                    red_candidates[ball] *= (1 + confidence)
+                blue_candidates[pattern["last_seen"]["blue_ball"]] *= (1 + confidence)
+            
+            elif pattern["type"] in ["hot", "cold"] and "balls" in pattern:
+                # 热冷号模式
+                is_blue = "blue" in pattern_id
+                candidates = blue_candidates if is_blue else red_candidates
+                factor = 1.2 if pattern["type"] == "hot" else 0.8
+                
+                for ball in pattern["balls"]:
+                    if ball in candidates:
+                        candidates[ball] *= (factor * confidence)
+        
+        # 选择权重最高的号码
+        red_weights = [(ball, weight) for ball, weight in red_candidates.items()]
+        blue_weights = [(ball, weight) for ball, weight in blue_candidates.items()]
+        
+        red_weights.sort(key=lambda x: x[1], reverse=True)
+        blue_weights.sort(key=lambda x: x[1], reverse=True)
+        return red_weights, blue_weights
     
     async def learn(self, history_data: List[Dict], actual_result: Dict) -> None:
         """从结果中学习，调整模式权重"""
@@ -401,61 +478,72 @@ class NeuralNetworkModel(SSQPredictionModel):
             "blue": [random.random() for _ in range(5)]
         }
     
+    def state_dict(self) -> Dict:
+        state = super().state_dict()
+        state["weights"] = {k: list(v) for k, v in self.weights.items()}
+        return state
+
+    def load_state_dict(self, state: Dict) -> None:
+        super().load_state_dict(state)
+        if "weights" in state:
+            self.weights = {k: list(v) for k, v in state["weights"].items()}
+
     def _extract_features(self, history_data: List[Dict]) -> Tuple[List[float], List[float]]:
         """从历史数据提取特征"""
-        if len(history_data) < 10:
+        static = self._static_features(history_data)
+        if static is None:
             return [0] * 10, [0] * 5
+        red_features, blue_features = static
         
-        recent = history_data[-10:]
+        # 5-10. 其他特征，这里简化为随机值
+        red_features.extend([random.random() for _ in range(6)])
+        
+        # 3-5. 其他特征，这里简化为随机值
+        blue_features.extend([random.random() for _ in range(3)])
+        
+        return red_features, blue_features
+
+    def _static_features(self, history_data: List[Dict]) -> Optional[Tuple[List[float], List[float]]]:
+        """特征中与随机数无关的部分（红 4 维、蓝 2 维）；不足 10 期返回 None。"""
+        if len(history_data) < 10:
+            return None
+        
+        reds, blues = draw_arrays(history_data, 10)
+        reds = reds.astype(np.int64)
+        blues = blues.astype(np.int64)
         
         # 红球特征
         red_features = []
         # 1. 最近5期红球平均值
-        red_avg = sum(sum(d["red_balls"]) for d in recent[-5:]) / (5 * 6)
+        red_avg = int(reds[-5:].sum()) / (5 * 6)
         red_features.append(red_avg / 33)  # 归一化
         
         # 2. 最近10期红球频率分布熵
-        red_freq = {i: 0 for i in RED_BALL_RANGE}
-        for draw in recent:
-            for ball in draw["red_balls"]:
-                red_freq[ball] += 1
+        red_freq = np.bincount(reds.ravel(), minlength=34)[1:].tolist()
         
-        entropy = -sum((v/60) * math.log(v/60 + 0.0001) for v in red_freq.values() if v > 0)
+        entropy = -sum((v/60) * math.log(v/60 + 0.0001) for v in red_freq if v > 0)
         red_features.append(min(entropy / 5, 1.0))  # 归一化
         
         # 3. 最近一期和值
-        last_sum = sum(recent[-1]["red_balls"]) / 150  # 归一化
+        last_sum = int(reds[-1].sum()) / 150  # 归一化
         red_features.append(last_sum)
         
         # 4. 连号比例
-        consecutive_count = 0
-        for draw in recent:
-            sorted_red = sorted(draw["red_balls"])
-            for i in range(len(sorted_red)-1):
-                if sorted_red[i+1] - sorted_red[i] == 1:
-                    consecutive_count += 1
+        consecutive_count = int((np.diff(np.sort(reds, axis=1), axis=1) == 1).sum())
         red_features.append(consecutive_count / 50)  # 归一化
         
-        # 5-10. 其他特征，这里简化为随机值
-        red_features.extend([random.random() for _ in range(6)])
-        
         # 蓝球特征
         blue_features = []
         # 1. 最近10期蓝球平均值
-        blue_avg = sum(d["blue_ball"] for d in recent) / 10
+        blue_avg = int(blues.sum()) / 10
         blue_features.append(blue_avg / 16)  # 归一化
         
         # 2. 蓝球频率分布
-        blue_freq = {i: 0 for i in BLUE_BALL_RANGE}
-        for draw in recent:
-            blue_freq[draw["blue_ball"]] += 1
+        blue_freq = np.bincount(blues, minlength=17)[1:].tolist()
         
-        blue_entropy = -sum((v/10) * math.log(v/10 + 0.0001) for v in blue_freq.values() if v > 0)
+        blue_entropy = -sum((v/10) * math.log(v/10 + 0.0001) for v in blue_freq if v > 0)
         blue_features.append(min(blue_entropy / 3, 1.0))  # 归一化
         
-        # 3-5. 其他特征，这里简化为随机值
-        blue_features.extend([random.random() for _ in range(3)])
-        
         return red_features, blue_features
     
     def _predict_with_features(self, red_features: List[float], blue_features: List[float]) -> Tuple[List[float], List[float]]:
@@ -496,6 +584,40 @@ class NeuralNetworkModel(SSQPredictionModel):
         
         return sorted(selected_reds), selected_blue
     
+    def bulk_draws(self, history_data: List[Dict]) -> int:
+        """批量模式每注消耗的均匀随机数：随机特征（不足 10 期时无）+ 33 红 + 16 蓝噪声。"""
+        return (0 if len(history_data) < 10 else 9) + len(RED_BALL_RANGE) + len(BLUE_BALL_RANGE)
+
+    def predict_bulk(self, history_data: List[Dict], u: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """按行批量预测；u 为 (B, bulk_draws) 均匀数，逐元素运算顺序与逐次 predict 相同。"""
+        static = self._static_features(history_data)
+        b = u.shape[0]
+        if static is None:
+            red_f = [np.zeros(b)] * 10
+            blue_f = [np.zeros(b)] * 5
+            off = 0
+        else:
+            red_f = [np.full(b, float(x)) for x in static[0]] + [u[:, i] for i in range(6)]
+            blue_f = [np.full(b, float(x)) for x in static[1]] + [u[:, 6 + i] for i in range(3)]
+            off = 9
+
+        def dot(feats, weights):
+            # 与 sum(f * w for ...) 相同的逐项顺序累加
+            acc = None
+            for f, w in zip(feats, weights):
+                acc = f * w if acc is None else acc + f * w
+            return acc
+
+        n_red = len(RED_BALL_RANGE)
+        red_score = dot(red_f, self.weights["red"])[:, None] * 0.8 + u[:, off:off + n_red] * 0.2
+        blue_score = dot(blue_f, self.weights["blue"])[:, None] * 0.8 + u[:, off + n_red:] * 0.2
+        red_p = np.maximum(0.01, np.minimum(red_score, 1.0))
+        blue_p = np.maximum(0.01, np.minimum(blue_score, 1.0))
+        # 降序稳定排序：同分保持号码顺序
+        reds = np.argsort(-red_p, axis=1, kind='stable')[:, :RED_BALL_COUNT] + 1
+        blue = np.argmax(blue_p, axis=1) + 1
+        return reds, blue
+
     async def learn(self, history_data: List[Dict], actual_result: Dict) -> None:
         """从结果中学习，调整网络权重"""
         await super().learn(history_data, actual_result)
@@ -820,8 +942,93 @@ class SSQFusionPredictor:
         
         return sorted(selected_reds), selected_blue
     
-    async def predict_until_match(self, history_data: List[Dict], target: Dict, max_attempts: int = 100000) -> int:
-        """预测直到完全匹配目标"""
+    def _bulk_supported(self) -> bool:
+        # DeepSeek 等外部模型无法批量化；仅默认的模式 + 神经网络组合走批量路径
+        return [type(m) for m in self.models] == [PatternBasedModel, NeuralNetworkModel]
+
+    def _weight_schedule(self) -> List[Tuple[float, ...]]:
+        """逐次 predict 每次调用前都会归一化权重；返回第 1、2… 次调用实际使用的权重，直到不再变化。"""
+        weights = tuple(m.weight for m in self.models)
+        schedule = []
+        while True:
+            total = sum(weights)
+            nxt = tuple(w / total for w in weights)
+            schedule.append(nxt)
+            if nxt == weights or len(schedule) >= 16:
+                return schedule
+            weights = nxt
+
+    def _predict_bulk(self, history_data: List[Dict], u: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """批量融合预测：u 为每注的均匀数行，weights 为 (B, 模型数) 每注使用的模型权重。"""
+        pattern, network = self.models
+        b = u.shape[0]
+        rows = np.arange(b)[:, None]
+        p_reds, p_blue = pattern.predict_bulk(u[:, :PatternBasedModel.BULK_DRAWS])
+        n_reds, n_blue = network.predict_bulk(history_data, u[:, PatternBasedModel.BULK_DRAWS:])
+        red_votes = np.zeros((b, len(RED_BALL_RANGE)))
+        blue_votes = np.zeros((b, len(BLUE_BALL_RANGE)))
+        # 按模型顺序累加投票，浮点次序与逐次实现一致
+        for (reds, blue), col in (((p_reds, p_blue), 0), ((n_reds, n_blue), 1)):
+            w = weights[:, col]
+            red_votes[rows, reds - 1] += w[:, None]
+            blue_votes[rows[:, 0], blue - 1] += w
+        reds = np.sort(np.argsort(-red_votes, axis=1, kind='stable')[:, :RED_BALL_COUNT] + 1, axis=1)
+        return reds, np.argmax(blue_votes, axis=1) + 1
+
+    async def _predict_until_match_bulk(self, history_data: List[Dict], target: Dict, max_attempts: int) -> Tuple[int, int]:
+        """predict_until_match 的批量版本：整批取随机数、向量化预测与位掩码比对，返回值与随机状态均与逐次实现一致。"""
+        pattern, network = self.models
+        await pattern.detect_patterns(history_data)
+        per = PatternBasedModel.BULK_DRAWS + network.bulk_draws(history_data)
+        schedule = np.array(self._weight_schedule())
+        target_mask = _red_mask(np.array([target["red_balls"]]))[0]
+        target_blue = target["blue_ball"]
+
+        stream = UniformStream()
+        attempts = 0
+        match_level = 0
+        size = 256
+        try:
+            while attempts < max_attempts:
+                k = min(size, max_attempts - attempts)
+                u = stream.draw(k * per).reshape(k, per)
+                idx = np.minimum(np.arange(attempts, attempts + k), len(schedule) - 1)
+                reds, blue = self._predict_bulk(history_data, u, schedule[idx])
+
+                red_count = _popcount(_red_mask(reds) & target_mask)
+                red_match = red_count == RED_BALL_COUNT
+                blue_match = blue == target_blue
+                # 每注的匹配等级；0 表示该注不改变当前等级
+                level = np.where(blue_match, np.where(red_count == 5, 5, 1), 0)
+                level = np.where(red_match, np.where(blue_match, 7, -6), level)
+
+                hit = np.flatnonzero(level == 7)
+                n = int(hit[0]) + 1 if hit.size else k
+                changed = np.flatnonzero(level[:n])
+                if changed.size:
+                    match_level = int(level[changed[-1]])
+                # 与逐次实现相同的每 10000 注进度日志（完全命中的那一注不记录）
+                for j in range(-attempts % 10000 or 10000, n + (0 if hit.size else 1), 10000):
+                    logger.info(f"尝试 {attempts + j} 次，当前匹配: 红球 {int(red_count[j - 1])}/6，蓝球 {'命中' if blue_match[j - 1] else '未命中'}")
+                attempts += n
+                if hit.size:
+                    break
+                size = min(size * 2, BULK_MAX_BATCH)
+        finally:
+            stream.commit(attempts * per)
+            if attempts:
+                last = schedule[min(attempts, len(schedule)) - 1]
+                pattern.weight, network.weight = float(last[0]), float(last[1])
+        return attempts, match_level
+
+    async def predict_until_match(self, history_data: List[Dict], target: Dict, max_attempts: int = 100000,
+                                  bulk: Optional[bool] = None) -> int:
+        """预测直到完全匹配目标
+
+        bulk 默认取 SSQ_BACKTEST_BULK；模型组合不支持批量时自动回退逐次预测。
+        """
+        if (BACKTEST_BULK if bulk is None else bulk) and self._bulk_supported():
+            return await self._predict_until_match_bulk(history_data, target, max_attempts)
         attempts = 0
         match_level = 0
         
@@ -857,17 +1064,97 @@ class SSQFusionPredictor:
         
         return attempts, match_level
     
-    async def learn_from_history(self, history_data: List[Dict]) -> Dict:
-        """从历史数据中学习"""
+    @staticmethod
+    def _draw_key(draw: Dict) -> List:
+        return [str(draw.get("period", "")), list(draw["red_balls"]), draw["blue_ball"]]
+
+    def _write_checkpoint(self, history, next_index: int, pending: List[Tuple[int, int, int]]) -> None:
+        """先追加统计旁路文件，再原子替换检查点；二者之间中断时以检查点记录的条数为准。"""
+        if pending:
+            with open(STATS_FILE, "ab") as f:
+                np.array(pending, dtype=STATS_DTYPE).tofile(f)
+        version, internal, gauss = random.getstate()
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "next_index": next_index,
+            "last_draw": self._draw_key(history[next_index - 1]),
+            "stats_count": len(self.match_history),
+            "learning_cycles": self.learning_cycles,
+            "perfect_matches": self.perfect_matches,
+            "models": {model.name: model.state_dict() for model in self.models},
+            "random_state": [version, list(internal), gauss]
+        }
+        d = os.path.dirname(os.path.abspath(CHECKPOINT_FILE))
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=d)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, CHECKPOINT_FILE)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except Exception:
+                pass
+            raise
+
+    def _resume_checkpoint(self, history) -> int:
+        """恢复检查点，返回下一个待处理的期序号；检查点缺失或与历史数据不符时返回 1（从头开始）。"""
+        if not os.path.exists(CHECKPOINT_FILE):
+            return 1
+        try:
+            with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            next_index = int(state["next_index"])
+            if state.get("version") != CHECKPOINT_VERSION or not 1 <= next_index <= len(history):
+                raise ValueError("检查点版本或期序号不匹配")
+            if state["last_draw"] != self._draw_key(history[next_index - 1]):
+                raise ValueError("检查点与当前历史数据不一致")
+            count = int(state["stats_count"])
+            stats = np.fromfile(STATS_FILE, dtype=STATS_DTYPE) if os.path.exists(STATS_FILE) else np.zeros(0, STATS_DTYPE)
+            if len(stats) < count:
+                raise ValueError("统计旁路文件不完整")
+        except Exception as e:
+            logger.warning(f"无法从检查点恢复，将从头开始: {e}")
+            return 1
+        # 丢弃检查点之后写入的统计（这些期会重新回放）
+        os.truncate(STATS_FILE, count * STATS_DTYPE.itemsize)
+        stats = stats[:count]
+        self.match_history = stats["level"].tolist()
+        self.attempt_counts = stats["attempts"].tolist()
+        self.learning_cycles = state["learning_cycles"]
+        self.perfect_matches = state["perfect_matches"]
+        for model in self.models:
+            if model.name in state["models"]:
+                model.load_state_dict(state["models"][model.name])
+        version, internal, gauss = state["random_state"]
+        random.setstate((version, tuple(internal), gauss))
+        logger.info(f"从检查点恢复：已完成至第 {next_index - 1} 期序号，学习周期 {self.learning_cycles}")
+        return next_index
+
+    async def learn_from_history(self, history_data: List[Dict], resume: bool = False,
+                                 checkpoint_every: Optional[int] = None) -> Dict:
+        """从历史数据中学习
+
+        每 checkpoint_every 期（默认 SSQ_CHECKPOINT_EVERY）原子写入检查点；resume=True 时从检查点继续，
+        续跑结果与不中断运行一致。逐期匹配级别与尝试次数完整记录在 STATS_FILE 中。
+        """
         if len(history_data) < 2:
             return {"status": "数据不足", "cycles": 0}
         
+        # 对每一期进行预测和学习：前缀为共享开奖表上的视图，不复制
+        history = as_history_view(history_data)
+        every = max(1, int(checkpoint_every or CHECKPOINT_EVERY))
+        start = self._resume_checkpoint(history) if resume else 1
+        if start == 1:
+            # 新的回放：清空统计旁路文件
+            open(STATS_FILE, "wb").close()
+        pending: List[Tuple[int, int, int]] = []
+        
         logger.info("开始从历史数据学习...")
         
-        # 对每一期进行预测和学习
-        for i in range(1, len(history_data)):
-            current_history = history_data[:i]
-            target = history_data[i]
+        for i in range(start, len(history)):
+            current_history = history[:i]
+            target = history[i]
             
             # 预测直到匹配
             attempts, match_level = await self.predict_until_match(current_history, target, max_attempts=100000)
@@ -879,11 +1166,16 @@ class SSQFusionPredictor:
             
             self.match_history.append(match_level)
             self.attempt_counts.append(attempts)
+            pending.append((i, match_level, attempts))
             
             # 所有模型从结果学习
             for model in self.models:
                 await model.learn(current_history, target)
             
+            if i % every == 0 or i == len(history) - 1:
+                self._write_checkpoint(history, i + 1, pending)
+                pending.clear()
+            
             logger.info(f"学习周期 {self.learning_cycles}，期号 {target['period']}，匹配级别 {match_level}，尝试次数 {attempts}")
             
             # 每10个周期保存一次状态
@@ -963,7 +1255,7 @@ async def notify_api_server(message: str, level: str = "info") -> None:
         logger.warning(f"无法连接到本地API服务器: {e}")
 
 
-async def main():
+async def main(resume: bool = False):
     """主函数"""
     logger.info("启动双色球历史数据分析与预测系统...")
     
@@ -977,6 +1269,8 @@ async def main():
             return
         
         logger.info(f"成功获取 {len(history_data)} 期历史数据")
+        # 打包为共享开奖表，后续预测/学习均使用零拷贝视图
+        history_data = DrawTable.from_records(history_data).view()
         
         # 创建预测器
         predictor = SSQFusionPredictor()
@@ -988,7 +1282,7 @@ async def main():
         await notify_api_server("双色球预测系统已启动，准备进行历史数据分析")
         
         # 从历史数据中学习
-        result = await predictor.learn_from_history(history_data)
+        result = await predictor.learn_from_history(history_data, resume=resume)
         
         logger.info(f"学习结果: {result}")
         await notify_api_server(f"历史数据学习完成。周期: {result['cycles']}, 完全匹配: {result.get('perfect_matches', 0)}")
@@ -1035,12 +1329,13 @@ async def main():
         await notify_api_server(f"系统错误: {str(e)}", "error")
 
 if __name__ == "__main__":
-    # 添加对数学模块的导入
-    import math
+    parser = argparse.ArgumentParser(description="双色球历史回测与自主学习")
+    parser.add_argument("--resume", action="store_true", help=f"从 {CHECKPOINT_FILE} 断点续跑")
+    args = parser.parse_args()
     
     # 确保目录存在
     try:
-        asyncio.run(main())
+        asyncio.run(main(resume=args.resume))
     except Exception as e:
         logger.error(f"主函数执行失败: {e}")
         traceback.print_exc()
\ No newline at end of file
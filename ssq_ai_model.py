@@ -36,6 +36,16 @@ class SSQAIModel:
         self._best_rf_n = 50
         self._blue_alpha = 0.2  # 蓝球概率先验融合强度（训练期自适应）
         self._red_prior_gamma = 0.2  # 红球先验分数权重（预测期用于重排）
+        # 模型版本：每次（重新）训练递增，按期缓存以 (版本, 期次) 为键
+        self._version = 0
+        self._issue_cache = {}
+        self._dist_cache = {}
+        self._cache_size = 4096
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # 滚动前推（walk-forward）训练状态：当前模型仅见过 [_wf_start, _wf_end) 的开奖
+        self._wf_start = None
+        self._wf_end = None
         try:
             with open(self._train_count_file, 'r', encoding='utf-8') as f:
                 self.cumulative_train_count = int(f.read().strip())
@@ -56,7 +66,15 @@ class SSQAIModel:
             y_blue.append(next_blue - 1)
         return np.array(X), np.array(y_red), np.array(y_blue)
 
+    def _bump_version(self):
+        self._version += 1
+        self._issue_cache.clear()
+        self._dist_cache.clear()
+
     def train(self):
+        self._bump_version()
+        self._wf_start = None
+        self._wf_end = None
         np = _get_np()
         RF = _get_sklearn_rf()
         XGB = _get_xgb()
@@ -150,9 +168,20 @@ class SSQAIModel:
             f"累计训练期数: {self.cumulative_train_count}"
         )
 
-    def _red_frequency_prior(self):
-        # 历史红球频率先验（归一化）
+    def _history_index(self):
+        try:
+            return self.data_manager.index()
+        except Exception:
+            return None
+
+    def _red_frequency_prior(self, history_end=None):
+        # 历史红球频率先验（归一化）；history_end 限定只统计该期之前
+        idx = self._history_index()
+        if idx is not None:
+            return idx.red_frequency(history_end)
         history = self.data_manager.history
+        if history_end is not None:
+            history = history[:history_end]
         freq = {i: 0 for i in range(1, 34)}
         for reds, _ in history:
             for r in reds:
@@ -161,12 +190,18 @@ class SSQAIModel:
         total = float(sum(freq.values())) or 1.0
         return {i: (freq[i] / total) for i in range(1, 34)}
 
-    def _blue_prior_from_history(self):
+    def _blue_prior_from_history(self, history_end=None):
         # 历史蓝球频率先验（长度16的数组）
         np = _get_np()
+        idx = self._history_index()
+        if idx is not None:
+            return idx.blue_frequency(history_end)
         freq = [0.0] * 16
+        history = self.data_manager.history
+        if history_end is not None:
+            history = history[:history_end]
         try:
-            for _, b in self.data_manager.history:
+            for _, b in history:
                 if 1 <= int(b) <= 16:
                     freq[int(b) - 1] += 1.0
             arr = np.array(freq, dtype=float)
@@ -175,7 +210,11 @@ class SSQAIModel:
         except Exception:
             return np.ones(16, dtype=float) / 16.0
 
-    def predict(self, input_data=None):
+    def _hot_reds(self, history_end=None):
+        hot, _ = self.data_manager.get_hot_cold(history_end)
+        return hot
+
+    def predict(self, input_data=None, history_end=None):
         np = _get_np()
         if self.rf_model is None or np is None:
             return self._random_predict()
@@ -196,7 +235,7 @@ class SSQAIModel:
                 uniques.append(r)
         # 不足部分：优先用历史热号兜底，其次随机
         try:
-            hot, _ = self.data_manager.get_hot_cold()
+            hot = self._hot_reds(history_end)
         except Exception:
             hot = []
         for h in hot:
@@ -211,7 +250,7 @@ class SSQAIModel:
                 seen.add(c)
                 uniques.append(c)
         # 基于历史先验对候选进行重排（正则化）
-        prior = self._red_frequency_prior()
+        prior = self._red_frequency_prior(history_end)
         gamma = float(self._red_prior_gamma)
         candidates = list(set(uniques + hot))
         scores = {c: (1.0 + gamma * prior.get(c, 0.0)) for c in candidates}
@@ -225,7 +264,7 @@ class SSQAIModel:
                     if proba is not None:
                         proba = np.array(proba).reshape(-1)
                         # 历史先验：蓝球出现频率
-                        prior = self._blue_prior_from_history()
+                        prior = self._blue_prior_from_history(history_end)
                         alpha = float(self._blue_alpha)
                         calib = (1 - alpha) * proba[:16] + alpha * prior.reshape(-1)
                         idx = int(np.argmax(calib))
@@ -240,6 +279,73 @@ class SSQAIModel:
             blue = random.randint(1,16)
         return reds, blue
 
+    # ---------- 滚动前推（walk-forward）增量训练 ----------
+    def fit_window(self, end, window=None):
+        """仅用第 end 期之前的开奖训练（样本对 i→i+1 满足 i+1<end），可选只取最近 window 对。
+        沿用最近一次全量训练选出的 n_estimators 与蓝球 alpha，不再做网格搜索。"""
+        np = _get_np()
+        RF = _get_sklearn_rf()
+        XGB = _get_xgb()
+        history = self.data_manager.history
+        end = max(0, min(int(end), len(history)))
+        lo = 0 if not window or window <= 0 else max(0, end - 1 - int(window))
+        pairs = range(lo, end - 1)
+        self._bump_version()
+        self._wf_start, self._wf_end = lo, end
+        if np is None or RF is None or len(pairs) < 10:
+            self.rf_model = None
+            self.xgb_model = None
+            return False
+        X = np.array([list(history[i][0]) + [history[i][1]] for i in pairs])
+        y_red = np.array([list(history[i + 1][0]) for i in pairs])
+        y_blue = np.array([history[i + 1][1] - 1 for i in pairs])
+        self.rf_model = [RF(n_estimators=self._best_rf_n, random_state=42) for _ in range(6)]
+        for i in range(6):
+            self.rf_model[i].fit(X, y_red[:, i])
+        self.xgb_model = None
+        if XGB is not None and len(set(y_blue.tolist())) == 16:
+            try:
+                self.xgb_model = XGB(n_estimators=50, random_state=42, eval_metric='mlogloss')
+                self.xgb_model.fit(X, y_blue)
+            except Exception:
+                self.xgb_model = None
+        return True
+
+    def ensure_walk_forward(self, issue_idx, refit_every=50, window=1000):
+        """保证当前模型只见过第 issue_idx 期之前的数据；每累计 refit_every 期按滚动窗口重训一次。
+        训练截止点对齐到 refit_every 的整数倍，与遍历次序/并行切分无关。返回是否发生了重训。"""
+        k = max(1, int(refit_every))
+        end = int(issue_idx) - int(issue_idx) % k
+        if self._wf_end == end:
+            return False
+        self.fit_window(end, window)
+        return True
+
+    def _features_for_issue(self, issue_idx):
+        history = self.data_manager.history
+        if 0 < issue_idx <= len(history):
+            reds, blue = history[issue_idx - 1]
+            return list(reds) + [blue]
+        if history and issue_idx > len(history):
+            reds, blue = history[-1]
+            return list(reds) + [blue]
+        return None
+
+    def predict_issue(self, issue_idx):
+        """以上一期开奖为输入预测第 issue_idx 期；同一模型版本下按期缓存。"""
+        key = (self._version, int(issue_idx))
+        hit = self._issue_cache.get(key)
+        if hit is not None:
+            self.cache_hits += 1
+            return list(hit[0]), hit[1]
+        self.cache_misses += 1
+        end = self._wf_end if self._wf_end is not None else None
+        reds, blue = self.predict(self._features_for_issue(int(issue_idx)), history_end=end)
+        if len(self._issue_cache) >= self._cache_size:
+            self._issue_cache.pop(next(iter(self._issue_cache)))
+        self._issue_cache[key] = (list(reds), blue)
+        return list(reds), blue
+
     def _random_predict(self):
         reds = random.sample(range(1,34), 6)
         blue = random.randint(1,16)
@@ -260,10 +366,27 @@ class SSQAIModel:
         return '\n'.join(logs)
 
     # 新增：输出红蓝分布用于融合/评估
-    def get_distributions(self):
+    def get_distributions(self, issue_idx=None):
+        """红33/蓝16 分布。issue_idx 给定时以上一期为输入、仅用该期之前的先验，并按期缓存。"""
+        key = (self._version, len(self.data_manager.history), issue_idx)
+        hit = self._dist_cache.get(key)
+        if hit is not None:
+            self.cache_hits += 1
+            return list(hit[0]), list(hit[1])
+        self.cache_misses += 1
+        out = self._compute_distributions(issue_idx)
+        if len(self._dist_cache) >= self._cache_size:
+            self._dist_cache.pop(next(iter(self._dist_cache)))
+        self._dist_cache[key] = out
+        return list(out[0]), list(out[1])
+
+    def _compute_distributions(self, issue_idx=None):
         np = _get_np()
+        end = None
+        if issue_idx is not None:
+            end = max(0, min(int(issue_idx), len(self.data_manager.history)))
         # 红球：使用历史频率先验作为近似分布
-        red_prior = self._red_frequency_prior()
+        red_prior = self._red_frequency_prior(end)
         red_p = np.array([red_prior[i] for i in range(1,34)], dtype=float)
         red_p = red_p / (float(red_p.sum()) or 1.0)
         # 蓝球：若有模型概率则返回校准后分布，否则历史先验
@@ -271,7 +394,10 @@ class SSQAIModel:
             try:
                 # 构造一个默认输入（使用最近一期红+蓝作为特征）
                 hist = self.data_manager.history
-                if hist:
+                feats = self._features_for_issue(int(issue_idx)) if issue_idx is not None else None
+                if feats is not None:
+                    X = np.array(feats).reshape(1, -1)
+                elif hist:
                     last_reds, last_blue = hist[-1]
                     X = np.array(last_reds + [last_blue]).reshape(1, -1)
                 else:
@@ -279,14 +405,14 @@ class SSQAIModel:
                 proba = self.xgb_model.predict_proba(X)
                 if proba is not None:
                     p = np.array(proba).reshape(-1)[:16]
-                    prior = self._blue_prior_from_history().reshape(-1)
+                    prior = self._blue_prior_from_history(end).reshape(-1)
                     alpha = float(self._blue_alpha)
                     blue_p = (1 - alpha) * p + alpha * prior
                     blue_p = blue_p / (float(blue_p.sum()) or 1.0)
                 else:
-                    blue_p = self._blue_prior_from_history()
+                    blue_p = self._blue_prior_from_history(end)
             except Exception:
-                blue_p = self._blue_prior_from_history()
+                blue_p = self._blue_prior_from_history(end)
         else:
-            blue_p = self._blue_prior_from_history()
+            blue_p = self._blue_prior_from_history(end)
         return red_p.tolist(), (blue_p.reshape(-1).tolist() if hasattr(blue_p, 'reshape') else list(blue_p))
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+闭环复盘自适应尝试预算
+- 6+1 完全匹配的单注概率约为 1/17721088，按尝试上限硬跑几乎总是徒劳
+- 按策略跟踪“最佳部分命中”（红球重合数 + 蓝球是否命中），逐轮计算边际提升
+- 已跑满 min_rounds 轮、且最近 patience 轮内所有策略的最佳命中总提升低于 min_gain 时提前结束本期
+- 同时给出剩余预算内出现完全匹配的概率上界（按随机投注计），用于报告佐证提前退出的代价
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+# 随机一注 6+1 完全命中的概率：1 / (C(33,6) * 16)
+P_EXACT = 1.0 / (1107568 * 16)
+
+
+def partial_score(pred_reds: Iterable[int], pred_blue: int, true_reds: Iterable[int], true_blue: int) -> Tuple[int, int]:
+    """部分命中：(红球重合数, 蓝球是否命中)。"""
+    return len(set(pred_reds) & set(true_reds)), int(pred_blue == true_blue)
+
+
+class AttemptBudget:
+    """单期尝试预算调度器：每条尝试调用 observe()，每轮结束调用 end_round() 判断是否提前退出。"""
+
+    def __init__(self, min_rounds: int = 3, patience: int = 3, min_gain: float = 0.5, blue_weight: float = 1.0):
+        self.min_rounds = max(1, int(min_rounds))
+        self.patience = max(1, int(patience))
+        self.min_gain = float(min_gain)
+        self.blue_weight = float(blue_weight)
+        self.best: Dict[str, Tuple[int, int]] = {}
+        self.rounds = 0
+        self._round_gain = 0.0
+        self._gains: deque = deque(maxlen=self.patience)
+
+    def _value(self, hit: Tuple[int, int]) -> float:
+        return hit[0] + self.blue_weight * hit[1]
+
+    def observe(self, strategy: str, pred_reds, pred_blue, true_reds, true_blue) -> None:
+        hit = partial_score(pred_reds, pred_blue, true_reds, true_blue)
+        prev = self.best.get(strategy)
+        if prev is None:
+            self.best[strategy] = hit
+            self._round_gain += self._value(hit)
+        elif self._value(hit) > self._value(prev):
+            self.best[strategy] = hit
+            self._round_gain += self._value(hit) - self._value(prev)
+
+    def end_round(self) -> bool:
+        """结束一轮，返回 True 表示应提前结束本期。"""
+        self.rounds += 1
+        self._gains.append(self._round_gain)
+        self._round_gain = 0.0
+        # 首轮建立基线的“提升”不计入判断
+        if self.rounds < self.min_rounds or self.rounds <= self.patience:
+            return False
+        return sum(self._gains) < self.min_gain
+
+    @staticmethod
+    def exact_match_bound(remaining_attempts: Optional[int]) -> Optional[float]:
+        """剩余尝试内出现完全匹配的概率上界（并集界）。"""
+        if remaining_attempts is None:
+            return None
+        return min(1.0, max(0, int(remaining_attempts)) * P_EXACT)
+
+    def best_hits(self) -> Dict[str, list]:
+        return {k: [v[0], v[1]] for k, v in self.best.items()}
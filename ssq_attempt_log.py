@@ -0,0 +1,166 @@
+"""
+闭环预测尝试日志（列式存储）
+- 以定长类型数组保存期次、策略编号、尝试序号、匹配标记与时间戳，号码按 6 红 + 1 蓝打包为 7 字节
+- 各期真实开奖号码按期只存一份；meta 仅在非空时稀疏保存
+- 策略统计在追加时增量维护，汇总为 O(策略数)
+- 对外提供与旧版 List[Dict] 兼容的只读视图：len / 下标 / 切片 / 迭代均返回原字段结构的 dict
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence
+
+_BALLS = 7  # 6 红 + 1 蓝
+_NO_BLUE = 0xFF  # 未选蓝球的占位（合法蓝球为 1..16）
+
+
+def _pack(reds: Sequence[int], blue: Optional[int]) -> bytes:
+    rs = sorted(int(r) for r in reds)[:6]
+    rs += [0] * (6 - len(rs))  # 不足 6 个时以 0 占位
+    return bytes(rs + [int(blue) & 0xFF if blue is not None else _NO_BLUE])
+
+
+def _unpack(raw: bytes):
+    blue = int(raw[6])
+    return [r for r in raw[:6] if r], (None if blue == _NO_BLUE else blue)
+
+
+class AttemptLog:
+    """列式尝试日志，兼容旧版 loop_attempts（dict 列表）的读取方式。"""
+
+    def __init__(self):
+        self._issue = array('i')
+        self._strategy = array('B')
+        self._attempt = array('I')
+        self._match = array('B')
+        self._ts = array('d')
+        self._balls = bytearray()
+        self._truth: Dict[int, bytes] = {}
+        self._meta: Dict[int, Dict[str, object]] = {}
+        self._names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    # ---------- 写入 ----------
+    def _strategy_id(self, name: str) -> int:
+        sid = self._name_ids.get(name)
+        if sid is None:
+            sid = len(self._names)
+            if sid > 255:
+                raise ValueError('策略种类超过 256 个')
+            self._names.append(name)
+            self._name_ids[name] = sid
+        return sid
+
+    def add(
+        self,
+        issue: int,
+        strategy: str,
+        pred_reds: Sequence[int],
+        pred_blue: Optional[int],
+        true_reds: Sequence[int],
+        true_blue: int,
+        is_match: bool,
+        attempt_index: int,
+        timestamp: float,
+        meta: Optional[Dict[str, object]] = None,
+    ) -> None:
+        strategy = str(strategy)
+        self._issue.append(int(issue))
+        self._strategy.append(self._strategy_id(strategy))
+        self._attempt.append(int(attempt_index))
+        self._match.append(1 if is_match else 0)
+        self._ts.append(float(timestamp))
+        self._balls += _pack(pred_reds, pred_blue)
+        if int(issue) not in self._truth:
+            self._truth[int(issue)] = _pack(true_reds, true_blue)
+        if meta:
+            self._meta[len(self._issue) - 1] = meta
+        entry = self._stats.setdefault(strategy, {'attempts': 0, 'matches': 0})
+        entry['attempts'] += 1
+        if is_match:
+            entry['matches'] += 1
+
+    def append(self, record: Dict[str, object]) -> None:
+        """兼容旧接口：追加一条 dict 记录。"""
+        self.add(
+            record.get('issue', 0),
+            record.get('strategy', ''),
+            record.get('pred_reds', []),
+            record.get('pred_blue', 0),
+            record.get('true_reds', []),
+            record.get('true_blue', 0),
+            bool(record.get('is_match')),
+            record.get('attempt_index', 0),
+            record.get('timestamp', 0.0),
+            record.get('meta') or None,
+        )
+
+    def extend(self, other) -> None:
+        """合并另一份日志（并行复盘子进程结果）或 dict 记录序列。"""
+        if not isinstance(other, AttemptLog):
+            for rec in other:
+                self.append(rec)
+            return
+        offset = len(self)
+        remap = array('B', [self._strategy_id(n) for n in other._names])
+        self._issue.extend(other._issue)
+        self._strategy.extend(array('B', (remap[s] for s in other._strategy)))
+        self._attempt.extend(other._attempt)
+        self._match.extend(other._match)
+        self._ts.extend(other._ts)
+        self._balls += other._balls
+        for k, v in other._truth.items():
+            self._truth.setdefault(k, v)
+        for k, v in other._meta.items():
+            self._meta[offset + k] = v
+        for name, st in other._stats.items():
+            entry = self._stats.setdefault(name, {'attempts': 0, 'matches': 0})
+            entry['attempts'] += st['attempts']
+            entry['matches'] += st['matches']
+
+    def clear(self) -> None:
+        self.__init__()
+
+    # ---------- 读取 ----------
+    def __len__(self) -> int:
+        return len(self._issue)
+
+    def _row(self, i: int) -> Dict[str, object]:
+        issue = self._issue[i]
+        pred_reds, pred_blue = _unpack(self._balls[i * _BALLS:(i + 1) * _BALLS])
+        true_reds, true_blue = _unpack(self._truth.get(issue, bytes(_BALLS)))
+        return {
+            'issue': issue,
+            'strategy': self._names[self._strategy[i]],
+            'pred_reds': pred_reds,
+            'pred_blue': pred_blue,
+            'true_reds': true_reds,
+            'true_blue': true_blue,
+            'is_match': bool(self._match[i]),
+            'attempt_index': self._attempt[i],
+            'timestamp': self._ts[i],
+            'meta': self._meta.get(i, {}),
+        }
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._row(i) for i in range(*idx.indices(len(self)))]
+        n = len(self)
+        if idx < 0:
+            idx += n
+        if not 0 <= idx < n:
+            raise IndexError('attempt index out of range')
+        return self._row(idx)
+
+    def __iter__(self) -> Iterator[Dict[str, object]]:
+        for i in range(len(self)):
+            yield self._row(i)
+
+    def strategy_stats(self) -> Dict[str, Dict[str, int]]:
+        """按策略的尝试/完全匹配计数（增量维护，返回副本）。"""
+        return {k: dict(v) for k, v in self._stats.items()}
+
+    def nbytes(self) -> int:
+        cols = (self._issue, self._strategy, self._attempt, self._match, self._ts)
+        return sum(c.itemsize * len(c) for c in cols) + len(self._balls) + _BALLS * len(self._truth)
@@ -19,36 +19,19 @@ from __future__ import annotations
 import argparse
 import json
 import os
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from ssq_data import SSQDataManager
+from ssq_eval_kernel import EvalWindow, load_window
+from ssq_history_index import HistoryIndex
 from ssq_predict_cycle import SSQPredictCycle
 
 
-def evaluate_strategy_on_history(cycle: SSQPredictCycle, strategy: str) -> Tuple[float, float, int]:
-    """返回 (红球平均命中率, 蓝球命中率, 样本数)。"""
-    reds_hit_total = 0
-    blue_hit_total = 0
-    samples = 0
-    for idx, (true_reds, true_blue) in enumerate(cycle.history):
-        if strategy == 'liuyao':
-            pred_reds, pred_blue = cycle.predict_liuyao(idx)
-        elif strategy == 'liuren':
-            pred_reds, pred_blue = cycle.predict_liuren(idx)
-        elif strategy == 'qimen':
-            pred_reds, pred_blue = cycle.predict_qimen(idx)
-        elif strategy == 'ai':
-            pred_reds, pred_blue = cycle.predict_ai(idx)
-        else:
-            continue
-        reds_hit = len(set(pred_reds) & set(true_reds))
-        blue_hit = 1 if pred_blue == true_blue else 0
-        reds_hit_total += reds_hit
-        blue_hit_total += blue_hit
-        samples += 1
-    if samples == 0:
-        return 0.0, 0.0, 0
-    return (reds_hit_total / samples / 6.0), (blue_hit_total / samples), samples
+def evaluate_strategy_on_history(cycle: SSQPredictCycle, strategy: str, window: Optional[EvalWindow] = None) -> Tuple[float, float, int]:
+    """返回 (红球平均命中率, 蓝球命中率, 样本数)；多个策略共用同一个评估窗口（见 ssq_eval_kernel）。"""
+    if window is None:
+        window = load_window(cycle)
+    return window.strategy_rates(strategy)
 
 
 def compute_weights(metrics: Dict[str, Dict[str, float]]) -> Dict[str, float]:
@@ -65,14 +48,16 @@ def compute_weights(metrics: Dict[str, Dict[str, float]]) -> Dict[str, float]:
     return {k: (v / total) for k, v in raw_scores.items()}
 
 
-def build_ball_priors(history: List[Tuple[List[int], int]]) -> Dict[str, Dict[str, int]]:
-    red_freq = {str(n): 0 for n in range(1, 34)}
-    blue_freq = {str(n): 0 for n in range(1, 17)}
-    for reds, blue in history:
-        for r in reds:
-            red_freq[str(r)] += 1
-        blue_freq[str(blue)] += 1
-    return {'red': red_freq, 'blue': blue_freq}
+def build_ball_priors(history: List[Tuple[List[int], int]], index: Optional[HistoryIndex] = None) -> Dict[str, Dict[str, int]]:
+    # 频次直接取历史索引的前缀和（未提供索引时就地构建）
+    if index is None or len(index) != len(history):
+        index = HistoryIndex().sync(history)
+    red = index.red_counts().tolist()
+    blue = index.blue_counts().tolist()
+    return {
+        'red': {str(n): int(red[n - 1]) for n in range(1, 34)},
+        'blue': {str(n): int(blue[n - 1]) for n in range(1, 17)},
+    }
 
 
 def main():
@@ -99,8 +84,10 @@ def main():
     # 可选窗口裁剪
     if args.window and args.window > 0:
         cycle.history = cycle.history[-args.window:]
+    # 全部策略的逐期预测一次产出并落盘缓存（历史与权重未变时直接复用）
+    window = load_window(cycle, strategies=strategies)
     for s in strategies:
-        reds_rate, blue_rate, samples = evaluate_strategy_on_history(cycle, s)
+        reds_rate, blue_rate, samples = evaluate_strategy_on_history(cycle, s, window)
         metrics[s] = {
             'reds_rate': round(reds_rate, 6),
             'blue_rate': round(blue_rate, 6),
@@ -166,7 +153,8 @@ def main():
         json.dump(payload, f, ensure_ascii=False, indent=2)
     print(f"✅ 已写入策略权重 -> {args.out}: {payload['weights']}")
 
-    priors = build_ball_priors(cycle.history)
+    shared = cycle.data_manager.index() if cycle.history is cycle.data_manager.history else None
+    priors = build_ball_priors(cycle.history, shared)
     with open(args.priors, 'w', encoding='utf-8') as f:
         json.dump(priors, f, ensure_ascii=False, indent=2)
     print(f"✅ 已写入号码先验 -> {args.priors}")
@@ -5,12 +5,26 @@
 import csv
 import random
 
+try:
+    from ssq_history_index import HistoryIndex
+except Exception:  # numpy 不可用时退回逐期统计
+    HistoryIndex = None
+
 class SSQDataManager:
     def __init__(self, csv_path=None):
         self.history = []
         self.csv_path = csv_path or 'ssq_history.csv'
+        self._index = None
         self._load_or_init_history()
 
+    def index(self):
+        """历史前缀和索引（惰性构建，新开奖追加后增量对齐）；不可用时返回 None。"""
+        if HistoryIndex is None:
+            return None
+        if self._index is None:
+            self._index = HistoryIndex()
+        return self._index.sync(self.history)
+
     def _load_or_init_history(self):
         import os
         if os.path.exists(self.csv_path):
@@ -64,10 +78,13 @@ class SSQDataManager:
             for row in new_rows:
                 writer.writerow(row)
 
-    def get_hot_cold(self):
-        # 统计红球冷热号
+    def get_hot_cold(self, end=None):
+        # 统计红球冷热号；end 限定只统计该期之前
+        idx = self.index()
+        if idx is not None:
+            return idx.hot_cold(end)
         count = {n:0 for n in range(1,34)}
-        for reds, _ in self.history:
+        for reds, _ in (self.history if end is None else self.history[:end]):
             for n in reds:
                 count[n] += 1
         hot = sorted(count, key=lambda x: -count[x])[:6]
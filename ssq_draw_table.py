@@ -0,0 +1,152 @@
+"""
+双色球开奖表与零拷贝历史视图
+- DrawTable：一次性把 ssq_history_data.json 打包为 int8 数组（红 (n, 6)、蓝 (n,)），期号/日期共享存放
+- HistoryView：表上的 [start, stop) 偏移 + 长度视图；切片返回新视图（O(1)，不复制），
+  下标访问按需生成与原 JSON 记录相同结构的字典，模型可继续按 List[Dict] 的方式使用
+- draw_arrays()：取历史末尾 k 期的数组；视图直接切片，普通列表只打包末尾 k 期
+- DrawTable.index()：整表一次构建的 HistoryIndex（前缀和）；history_index() 把视图映射为该索引上的行号，
+  任意前缀视图的窗口频次/遗漏等查询仍为 O(1)
+
+回测逐期传入 history[:i] 时不再复制前缀，整轮回放的内存搬运由 O(n²) 降为 O(n)。
+"""
+from __future__ import annotations
+
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ssq_history_index import HistoryIndex, dict_draw
+
+RED_COUNT = 6
+
+
+def _full_code(reds: Sequence[int], blue: int) -> str:
+    return " ".join(f"{n:02d}" for n in reds) + f" + {blue:02d}"
+
+
+class DrawTable:
+    """打包存储的开奖表（只追加，不修改已有行）。"""
+
+    def __init__(self, reds: np.ndarray, blues: np.ndarray,
+                 periods: Optional[List[str]] = None, dates: Optional[List[str]] = None):
+        self.reds = np.ascontiguousarray(reds, dtype=np.int8).reshape(-1, RED_COUNT)
+        self.blues = np.ascontiguousarray(blues, dtype=np.int8).reshape(-1)
+        n = len(self.blues)
+        self.periods = periods if periods is not None else [""] * n
+        self.dates = dates if dates is not None else [""] * n
+        self._index: Optional[HistoryIndex] = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> 'DrawTable':
+        """由 [{'period', 'date', 'red_balls', 'blue_ball', ...}] 构建。"""
+        records = list(records)
+        reds = np.array([r["red_balls"] for r in records], dtype=np.int8).reshape(-1, RED_COUNT)
+        blues = np.array([r["blue_ball"] for r in records], dtype=np.int8)
+        periods = [str(r.get("period", "")) for r in records]
+        dates = [str(r.get("date", "")) for r in records]
+        return cls(reds, blues, periods, dates)
+
+    @classmethod
+    def from_json(cls, path: str) -> 'DrawTable':
+        """读取 ssq_history_data.json（回测缓存格式）。"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_records(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.blues)
+
+    def record(self, i: int) -> Dict:
+        reds = self.reds[i].tolist()
+        blue = int(self.blues[i])
+        return {
+            "period": self.periods[i],
+            "date": self.dates[i],
+            "red_balls": reds,
+            "blue_ball": blue,
+            "full_code": _full_code(reds, blue),
+        }
+
+    def index(self) -> HistoryIndex:
+        """整表的前缀和索引（首次调用时由打包数组构建，之后所有视图共享）。"""
+        if self._index is None:
+            self._index = HistoryIndex(zip(self.reds.tolist(), self.blues.tolist()))
+        return self._index
+
+    def view(self, start: int = 0, stop: Optional[int] = None) -> 'HistoryView':
+        n = len(self)
+        stop = n if stop is None else max(0, min(int(stop), n))
+        return HistoryView(self, max(0, min(int(start), stop)), stop)
+
+
+class HistoryView:
+    """DrawTable 上的只读连续视图，行为与 List[Dict] 的只读操作一致。"""
+
+    __slots__ = ("table", "start", "stop")
+
+    def __init__(self, table: DrawTable, start: int, stop: int):
+        self.table = table
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, key: Union[int, slice]):
+        n = self.stop - self.start
+        if isinstance(key, slice):
+            lo, hi, step = key.indices(n)
+            if step != 1:
+                return [self.table.record(self.start + i) for i in range(lo, hi, step)]
+            return HistoryView(self.table, self.start + lo, self.start + max(lo, hi))
+        i = int(key)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("history view index out of range")
+        return self.table.record(self.start + i)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self.start, self.stop):
+            yield self.table.record(i)
+
+    def __repr__(self) -> str:
+        return f"HistoryView([{self.start}:{self.stop}] of {len(self.table)})"
+
+    @property
+    def reds(self) -> np.ndarray:
+        """红球数组视图 (len, 6)，int8，不复制。"""
+        return self.table.reds[self.start:self.stop]
+
+    @property
+    def blues(self) -> np.ndarray:
+        return self.table.blues[self.start:self.stop]
+
+
+def as_history_view(history: Union[HistoryView, DrawTable, Sequence[Dict]]) -> HistoryView:
+    """统一为 HistoryView；List[Dict] 会被打包一次。"""
+    if isinstance(history, HistoryView):
+        return history
+    if isinstance(history, DrawTable):
+        return history.view()
+    return DrawTable.from_records(history).view()
+
+
+def draw_arrays(history: Union[HistoryView, Sequence[Dict]], k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """末尾 k 期（默认全部）的 (红 (k, 6), 蓝 (k,)) 数组；视图为零拷贝切片。"""
+    if isinstance(history, HistoryView):
+        start = history.start if k is None else max(history.start, history.stop - int(k))
+        return history.table.reds[start:history.stop], history.table.blues[start:history.stop]
+    tail = history if k is None else history[max(0, len(history) - int(k)):]
+    reds = np.array([d["red_balls"] for d in tail], dtype=np.int8).reshape(-1, RED_COUNT)
+    blues = np.array([d["blue_ball"] for d in tail], dtype=np.int8)
+    return reds, blues
+
+
+def history_index(history: Union[HistoryView, Sequence[Dict]],
+                  fallback: Optional[HistoryIndex] = None) -> Tuple[HistoryIndex, int]:
+    """(索引, 历史末端在索引中的行号)：视图查整表共享索引；普通列表增量同步到 fallback（缺省新建）。"""
+    if isinstance(history, HistoryView):
+        return history.table.index(), history.stop
+    index = (fallback if fallback is not None else HistoryIndex()).sync(history, key=dict_draw)
+    return index, len(index)
@@ -1,12 +1,31 @@
+"""
+双色球融合参数网格评估
+
+- 四种策略的尝试号码与融合参数无关：每期只生成一次尝试（ssq_eval_kernel，落盘缓存）、计票并取先验，之后所有参数组合共享
+- 各组合在窗口内逐期向量化融合（同一组合的各期作为矩阵的行一次采样），组合之间使用公共随机数
+  （每期固定一行均匀数），评分差异只来自参数本身
+- 逐轮减半（successive halving）：先用最近的少量期次评估全部组合，只保留前 1/eta 进入下一轮，
+  直至完整窗口；被淘汰的组合在结果中标记 pruned 并给出其评估期数
+- 组合按块分发到进程池（workers 或 SSQ_GRID_WORKERS 显式指定时启用，默认 1 即进程内串行）；进程池用 spawn 启动，
+  不继承调用方（如 API 服务）的线程与锁，子进程在初始化时接收共享的预计算数据
+"""
 from __future__ import annotations
 
+import math
+import random
 import time
-from dataclasses import dataclass
-from typing import Dict, List, Tuple, Any
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Any, Optional
 import json, os
 
+import numpy as np
+
+from ssq_eval_kernel import load_window, popcount, red_mask
+from ssq_fusion_engine import FusionEngine, RED_N, BLUE_N
 from ssq_predict_cycle import SSQPredictCycle
 
+PARAM_KEYS = ['temp_red', 'top_p_red', 'alpha_red', 'temp_blue', 'top_p_blue', 'alpha_blue']
+
 
 @dataclass
 class EvalConfig:
@@ -14,13 +33,16 @@ class EvalConfig:
     temp_red_list: List[float] = None  # type: ignore
     top_p_red_list: List[float] = None  # type: ignore
     alpha_red_list: List[float] = None  # type: ignore
-    diversify: bool = True
     seed: int | None = 42
     # 新增：蓝球侧参数与是否写回最佳
     temp_blue_list: List[float] = None  # type: ignore
     top_p_blue_list: List[float] = None  # type: ignore
     alpha_blue_list: List[float] = None  # type: ignore
     apply_best: bool = False
+    # 并行与逐轮减半：workers=None 取 SSQ_GRID_WORKERS（未设置为 1）；halving_eta<=1 关闭减半
+    workers: Optional[int] = None
+    halving_eta: int = 3
+    halving_min_issues: int = 20
 
     def __post_init__(self):
         if self.temp_red_list is None:
@@ -36,16 +58,307 @@ class EvalConfig:
         if self.alpha_blue_list is None:
             self.alpha_blue_list = [0.0, 0.1]
 
+    def combos(self) -> List[Dict[str, float]]:
+        """按旧版六重循环的次序展开参数组合。"""
+        out: List[Dict[str, float]] = []
+        for temp_red in self.temp_red_list:
+            for top_p_red in self.top_p_red_list:
+                for alpha_red in self.alpha_red_list:
+                    for temp_blue in self.temp_blue_list:
+                        for top_p_blue in self.top_p_blue_list:
+                            for alpha_blue in self.alpha_blue_list:
+                                out.append({
+                                    'temp_red': temp_red, 'top_p_red': top_p_red, 'alpha_red': alpha_red,
+                                    'temp_blue': temp_blue, 'top_p_blue': top_p_blue, 'alpha_blue': alpha_blue,
+                                })
+        return out
+
+    def resolved_workers(self) -> int:
+        if self.workers is not None:
+            return max(1, int(self.workers))
+        try:
+            return max(1, int(os.getenv('SSQ_GRID_WORKERS', '') or 1))
+        except Exception:
+            return 1
+
+
+# ---------- 共享预计算 ----------
+@dataclass
+class GridData:
+    """窗口内各期与参数无关的融合输入；行次序即评估次序（最近一期在前）。"""
+    issues: List[int]
+    attempts: List[List[Dict[str, Any]]]
+    weights: Dict[str, float]
+    raw_red: np.ndarray  # (W,33) 加权原始票数
+    raw_blue: np.ndarray  # (W,16)
+    total_red: np.ndarray  # (W,) 按首次出现次序累加的总票数
+    total_blue: np.ndarray
+    pos_red: np.ndarray  # (W,33) most_common 同票次序键：首次出现序号，未出现为 100+号码
+    pos_blue: np.ndarray
+    red_prior: np.ndarray  # (W,33)
+    blue_prior: np.ndarray  # (W,16)
+    true_mask: np.ndarray  # (W,) 开奖红球位掩码
+    true_blue: np.ndarray  # (W,)
+    uniforms: np.ndarray  # (W,7) 公共随机数：红6列 + 蓝1列
+    regular: np.ndarray  # (W,) 计票合法且红蓝总票数为正，可走批量路径
+    mem_red: Optional[np.ndarray] = None
+    mem_blue: Optional[np.ndarray] = None
+    alpha_mem_red: float = 0.0
+    alpha_mem_blue: float = 0.0
+    region_buckets: List[Tuple[int, int]] = field(default_factory=lambda: [(1, 11), (12, 22), (23, 33)])
+    enforce_region_coverage: bool = True
+    seed: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.issues)
+
+
+def _raw_votes(weights: Dict[str, float], attempts: List[Dict[str, Any]]):
+    """与 FusionEngine.tally 相同次序累加原始票数（不含先验与记忆）。"""
+    red = np.zeros(RED_N)
+    blue = np.zeros(BLUE_N)
+    pos_red = 100.0 + np.arange(1, RED_N + 1)
+    pos_blue = 100.0 + np.arange(1, BLUE_N + 1)
+    red_seen: Dict[int, None] = {}
+    blue_seen: Dict[int, None] = {}
+    red_idx: List[int] = []
+    red_w: List[float] = []
+    blue_idx: List[int] = []
+    blue_w: List[float] = []
+    for attempt in attempts:
+        try:
+            w = float(weights.get(str(attempt.get('strategy')), 1.0))
+        except Exception:
+            w = 1.0
+        for r in attempt.get('pred_reds', []):
+            red_seen.setdefault(r, None)
+            red_idx.append(r)
+            red_w.append(w)
+        b = attempt.get('pred_blue')
+        if isinstance(b, int):
+            blue_seen.setdefault(b, None)
+            blue_idx.append(b)
+            blue_w.append(w)
+    if any((not isinstance(r, (int, np.integer))) or not (1 <= r <= RED_N) for r in red_seen) or \
+            any(not (1 <= b <= BLUE_N) for b in blue_seen):
+        return red, blue, 0.0, 0.0, pos_red, pos_blue, False
+    if red_idx:
+        np.add.at(red, np.asarray(red_idx, dtype=int) - 1, np.asarray(red_w, dtype=float))
+    if blue_idx:
+        np.add.at(blue, np.asarray(blue_idx, dtype=int) - 1, np.asarray(blue_w, dtype=float))
+    for i, r in enumerate(red_seen):
+        pos_red[r - 1] = i
+    for i, b in enumerate(blue_seen):
+        pos_blue[b - 1] = i
+    total_red = float(sum(float(red[r - 1]) for r in red_seen))
+    total_blue = float(sum(float(blue[b - 1]) for b in blue_seen))
+    return red, blue, total_red, total_blue, pos_red, pos_blue, total_red > 0 and total_blue > 0
+
+
+def build_grid_data(
+    issues: List[int],
+    attempts: List[List[Dict[str, Any]]],
+    engines: List[FusionEngine],
+    truths: List[Tuple[List[int], int]],
+    seed: Optional[int] = None,
+) -> GridData:
+    """由逐期尝试、基准融合上下文（提供权重/先验/文化记忆）与开奖号码构造共享数据。"""
+    rows = [_raw_votes(e.weights, a) for e, a in zip(engines, attempts)]
+    base = engines[0] if engines else FusionEngine()
+    W = len(issues)
+    return GridData(
+        issues=list(issues),
+        attempts=list(attempts),
+        weights=dict(base.weights),
+        raw_red=np.array([r[0] for r in rows]).reshape(W, RED_N),
+        raw_blue=np.array([r[1] for r in rows]).reshape(W, BLUE_N),
+        total_red=np.array([r[2] for r in rows], dtype=float),
+        total_blue=np.array([r[3] for r in rows], dtype=float),
+        pos_red=np.array([r[4] for r in rows]).reshape(W, RED_N),
+        pos_blue=np.array([r[5] for r in rows]).reshape(W, BLUE_N),
+        red_prior=np.array([e.red_prior for e in engines], dtype=float).reshape(W, RED_N),
+        blue_prior=np.array([e.blue_prior for e in engines], dtype=float).reshape(W, BLUE_N),
+        true_mask=red_mask(np.array([list(reds)[:6] for reds, _ in truths], dtype=np.int64).reshape(W, 6)),
+        true_blue=np.array([int(b) for _, b in truths], dtype=np.int64),
+        uniforms=np.random.RandomState(seed).random_sample((W, 7)),
+        regular=np.array([r[6] for r in rows], dtype=bool),
+        mem_red=base.mem_red,
+        mem_blue=base.mem_blue,
+        alpha_mem_red=base.alpha_mem_red,
+        alpha_mem_blue=base.alpha_mem_blue,
+        region_buckets=list(base.region_buckets),
+        enforce_region_coverage=base.enforce_region_coverage,
+        seed=seed,
+    )
+
+
+def prepare_grid(cycle: SSQPredictCycle, window_idx: List[int], seed: Optional[int] = None) -> GridData:
+    """策略尝试取自评估内核（每期一次、落盘缓存），逐期构造融合上下文（最近一期在前）。"""
+    win = load_window(cycle, issues=window_idx, seed=seed)
+    rows = list(reversed(range(len(win))))
+    attempts = [win.attempts(i) for i in rows]
+    engines = [cycle._fusion_engine(a) for a in attempts]
+    truths = [win.true_draw(i) for i in rows]
+    return build_grid_data([int(win.issues[i]) for i in rows], attempts, engines, truths, seed)
+
+
+# ---------- 单个组合的向量化评估 ----------
+def _combo_engine(data: GridData, params: Dict[str, float], row: Optional[int] = None) -> FusionEngine:
+    """组合参数的融合上下文；给定 row 时带上该期先验与文化记忆（标量回退用）。"""
+    engine = FusionEngine(
+        weights=data.weights,
+        red_prior=None if row is None else data.red_prior[row],
+        blue_prior=None if row is None else data.blue_prior[row],
+        region_buckets=data.region_buckets,
+        enforce_region_coverage=data.enforce_region_coverage,
+        **{k: float(params[k]) for k in PARAM_KEYS},
+    )
+    engine.mem_red, engine.mem_blue = data.mem_red, data.mem_blue
+    engine.alpha_mem_red, engine.alpha_mem_blue = data.alpha_mem_red, data.alpha_mem_blue
+    return engine
+
 
-def _attempts_for_issue(cycle: SSQPredictCycle, idx: int) -> List[Dict[str, Any]]:
-    attempts: List[Dict[str, Any]] = []
-    for model in ['liuyao', 'liuren', 'qimen', 'ai']:
-        if model == 'liuyao': pr, pb = cycle.predict_liuyao(idx)
-        elif model == 'liuren': pr, pb = cycle.predict_liuren(idx)
-        elif model == 'qimen': pr, pb = cycle.predict_qimen(idx)
-        else: pr, pb = cycle.predict_ai(idx)
-        attempts.append({'strategy': model, 'pred_reds': pr, 'pred_blue': pb})
-    return attempts
+def _regular_rows(weights: np.ndarray, ok: np.ndarray, temp: float, at_least: int) -> np.ndarray:
+    ws = np.maximum(weights, 0.0)
+    if abs(temp - 1.0) > 1e-9:
+        ws = ws ** (1.0 / max(1e-6, temp))
+    return ok & ((ws > 0).sum(axis=1) >= at_least) & np.isfinite(ws).all(axis=1)
+
+
+def score_rows(data: GridData, params: Dict[str, float], lo: int, hi: int) -> Tuple[int, int, int]:
+    """组合在第 lo..hi-1 行上的（红球命中总数, 蓝球命中数, 完全命中数）。
+
+    计票/排序/采样与 FusionEngine.tally + sample 逐行一致，只是各期叠成矩阵一次完成。
+    """
+    engine = _combo_engine(data, params)
+    rows = slice(lo, hi)
+    tot_r = data.total_red[rows, None]
+    tot_b = data.total_blue[rows, None]
+    red = data.raw_red[rows] + engine.alpha_red * data.red_prior[rows] * tot_r
+    blue = data.raw_blue[rows] + engine.alpha_blue * data.blue_prior[rows] * tot_b
+    if data.mem_red is not None:
+        red = red + engine.alpha_mem_red * data.mem_red * tot_r
+    if data.mem_blue is not None:
+        blue = blue + engine.alpha_mem_blue * data.mem_blue * tot_b
+    ok = data.regular[rows].copy()
+    if engine.use_sampling_red:
+        # 与 tally 相同：按 most_common 插入次序顺序累加判断总票数为正
+        order = np.argsort(data.pos_red[rows], axis=1, kind='stable')
+        ok &= np.cumsum(np.take_along_axis(red, order, axis=1), axis=1)[:, -1] > 0
+        ok = _regular_rows(red, ok, engine.temp_red, 6)
+    if engine.use_sampling_blue:
+        ok = _regular_rows(blue, ok, engine.temp_blue, 1)
+    fused: List[Optional[Tuple[List[int], int]]] = [None] * (hi - lo)
+    idx = np.flatnonzero(ok)
+    if idx.size:
+        # most_common：票数降序，同票按首次出现次序
+        red_rank = np.lexsort((data.pos_red[rows][idx], -red[idx]), axis=-1) + 1
+        blue_rank = np.lexsort((data.pos_blue[rows][idx], -blue[idx]), axis=-1) + 1
+        u = data.uniforms[rows][idx]
+        # 公共随机数：蓝球始终取第 7 列，与红球是否采样无关
+        u = u if engine.use_sampling_red else u[:, 6:]
+        samples = engine.sample_rows(red[idx], blue[idx], red_rank.tolist(), blue_rank.tolist(), u, engine.use_sampling_red)
+        for j, item in zip(idx.tolist(), samples):
+            fused[j] = item
+    for j in np.flatnonzero(~ok).tolist():
+        # 非常规计票：按期固定种子走逐次融合
+        if data.seed is not None:
+            random.seed(f"{data.seed}:{data.issues[lo + j]}")
+        scalar = _combo_engine(data, params, lo + j)
+        fused[j] = scalar.sample(scalar.tally(data.attempts[lo + j]), 1)[0]
+    if not fused:
+        return 0, 0, 0
+    mask = red_mask(np.array([r for r, _ in fused], dtype=np.int64))
+    hit_blue = np.array([b for _, b in fused]) == data.true_blue[rows]
+    full = hit_blue & (mask == data.true_mask[rows])
+    return int(popcount(mask & data.true_mask[rows]).sum()), int(hit_blue.sum()), int(full.sum())
+
+
+def _score(red_hits: int, blue_hits: int, full: int, count: int) -> float:
+    # 汇总评分（可调整权重）
+    return full * 100.0 + (blue_hits / float(count)) * 10.0 + red_hits / float(count)
+
+
+def halving_rungs(n: int, eta: int, min_issues: int) -> List[int]:
+    """逐轮评估的累计期数，末轮为完整窗口。"""
+    rungs = [n]
+    if eta > 1:
+        while rungs[0] // eta >= max(1, min_issues):
+            rungs.insert(0, rungs[0] // eta)
+    return rungs
+
+
+# ---------- 进程池入口 ----------
+_WORKER_DATA: Optional[GridData] = None
+
+
+def _grid_worker_init(data: GridData) -> None:
+    global _WORKER_DATA
+    _WORKER_DATA = data
+
+
+def _grid_worker(task) -> List[Tuple[int, int, int]]:
+    params_list, lo, hi = task
+    return [score_rows(_WORKER_DATA, p, lo, hi) for p in params_list]
+
+
+def search_grid(data: GridData, cfg: EvalConfig) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """在共享数据上评估全部组合（逐轮减半 + 进程池），返回（结果, 各轮期数）。"""
+    combos = cfg.combos()
+    n = len(data)
+    rungs = halving_rungs(n, int(cfg.halving_eta), int(cfg.halving_min_issues))
+    totals = [[0, 0, 0] for _ in combos]
+    evaluated = [0] * len(combos)
+    alive = list(range(len(combos)))
+    workers = min(cfg.resolved_workers(), len(combos)) if n else 1
+    pool = None
+    if workers > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # spawn：在多线程宿主（API 服务）里 fork 会复制持有中的锁，子进程可能死锁
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_grid_worker_init, initargs=(data,))
+    try:
+        lo = 0
+        for r, hi in enumerate(rungs):
+            # 只评估本轮新增的期次，累加到已有计数上
+            if pool is None:
+                parts = [score_rows(data, combos[c], lo, hi) for c in alive]
+            else:
+                step = max(1, math.ceil(len(alive) / (workers * 4)))
+                chunks = [alive[i:i + step] for i in range(0, len(alive), step)]
+                tasks = [([combos[c] for c in chunk], lo, hi) for chunk in chunks]
+                parts = [p for block in pool.map(_grid_worker, tasks) for p in block]
+            for c, part in zip(alive, parts):
+                totals[c] = [a + b for a, b in zip(totals[c], part)]
+                evaluated[c] = hi
+            lo = hi
+            if r + 1 < len(rungs):
+                ranked = sorted(alive, key=lambda c: _score(*totals[c], hi), reverse=True)
+                alive = sorted(ranked[:max(1, math.ceil(len(ranked) / cfg.halving_eta))])
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    survivors = set(alive)
+    results: List[Dict[str, Any]] = []
+    for c, params in enumerate(combos):
+        count = evaluated[c]
+        if count == 0:
+            continue
+        red_hits, blue_hits, full = totals[c]
+        res: Dict[str, Any] = dict(params)
+        res.update({
+            'window': count,
+            'red_hits_avg': red_hits / float(count),
+            'blue_hit_rate': blue_hits / float(count),
+            'full_matches': full,
+            'pruned': c not in survivors,
+        })
+        res['score'] = _score(red_hits, blue_hits, full, count)
+        results.append(res)
+    # 完整窗口的组合在前，其次按得分
+    results.sort(key=lambda x: (x['window'], x['score']), reverse=True)
+    return results, rungs
 
 
 def evaluate_grid(cfg: EvalConfig) -> Dict[str, Any]:
@@ -57,67 +370,19 @@ def evaluate_grid(cfg: EvalConfig) -> Dict[str, Any]:
         return {'status': 'error', 'error': 'no_history'}
     start = max(0, n - int(cfg.window))
     window_idx = list(range(start, n))
+    data = prepare_grid(cycle, window_idx, cfg.seed)
+    t_prep = time.time() - t0
+    results, rungs = search_grid(data, cfg)
 
-    results: List[Dict[str, Any]] = []
-    for temp_red in cfg.temp_red_list:
-        for top_p_red in cfg.top_p_red_list:
-            for alpha_red in cfg.alpha_red_list:
-                for temp_blue in cfg.temp_blue_list:
-                    for top_p_blue in cfg.top_p_blue_list:
-                        for alpha_blue in cfg.alpha_blue_list:
-                # 注入参数
-                            cycle.temp_red = float(temp_red)
-                            cycle.top_p_red = float(top_p_red)
-                            cycle.alpha_red = float(alpha_red)
-                            cycle.temp_blue = float(temp_blue)
-                            cycle.top_p_blue = float(top_p_blue)
-                            cycle.alpha_blue = float(alpha_blue)
-                            cycle.enforce_candidate_diversity = bool(cfg.diversify)
-                            if cfg.seed is not None:
-                                import random as _rnd
-                                _rnd.seed(int(cfg.seed))
-
-                            red_hits_total = 0
-                            blue_hits_total = 0
-                            full_match_total = 0
-                            count = 0
-                            for idx in window_idx:
-                                true_reds, true_blue = history[idx]
-                                attempts = _attempts_for_issue(cycle, idx)
-                                reds, blue = cycle._fuse_from_attempts(attempts)
-                                # 计分
-                                red_hits_total += len(set(reds) & set(true_reds))
-                                blue_hits_total += 1 if blue == true_blue else 0
-                                full_match_total += 1 if (set(reds) == set(true_reds) and blue == true_blue) else 0
-                                count += 1
-
-                            if count == 0:
-                                continue
-                            res = {
-                                'temp_red': temp_red,
-                                'top_p_red': top_p_red,
-                                'alpha_red': alpha_red,
-                                'temp_blue': temp_blue,
-                                'top_p_blue': top_p_blue,
-                                'alpha_blue': alpha_blue,
-                                'window': count,
-                                'red_hits_avg': red_hits_total / float(count),
-                                'blue_hit_rate': blue_hits_total / float(count),
-                                'full_matches': full_match_total,
-                            }
-                            # 汇总评分（可调整权重）
-                            res['score'] = (
-                                res['full_matches'] * 100.0 + res['blue_hit_rate'] * 10.0 + res['red_hits_avg']
-                            )
-                            results.append(res)
-
-    # 排序，得分高在前
-    results.sort(key=lambda x: x['score'], reverse=True)
     out = {
         'status': 'ok',
         'evaluated': len(results),
+        'pruned': sum(1 for r in results if r['pruned']),
+        'rungs': rungs,
+        'workers': cfg.resolved_workers(),
         'best': results[0] if results else None,
         'results': results,
+        'prepare_sec': round(t_prep, 3),
         'elapsed_sec': round(time.time() - t0, 3),
     }
     # 可选：将最佳结果写回融合配置
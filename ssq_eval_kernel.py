@@ -0,0 +1,234 @@
+"""
+双色球评估内核
+
+- 一次产出窗口内各策略的预测：(期数 × 策略 × 7) int16 数组，列 0-5 为红球（保持策略输出次序，不足 6 个以 0 补齐），
+  列 6 为蓝球（缺失为 0）
+- 命中统计基于 33 位红球掩码与 popcount，不再逐期做集合交集
+- 给定种子的窗口落盘缓存（SSQ_EVAL_CACHE_DIR，默认 models/eval_cache/*.npz），键为
+  （历史哈希, 权重文件哈希, 文化时辰, 种子, 期次, 策略, AI 模型版本）；无种子时各策略随机取样，默认不缓存；
+  自动调优、近期评估、多候选评估与网格评估都是它之上的薄视图
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KERNEL_VERSION = 1
+STRATEGIES: Tuple[str, ...] = ('liuyao', 'liuren', 'qimen', 'ai')
+CACHE_DIR = os.getenv('SSQ_EVAL_CACHE_DIR', 'models/eval_cache')
+WEIGHTS_FILE = 'ssq_strategy_weights.json'
+try:
+    CACHE_KEEP = int(float(os.getenv('SSQ_EVAL_CACHE_KEEP', '32')))
+except Exception:
+    CACHE_KEEP = 32
+
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(x: np.ndarray) -> np.ndarray:
+    """逐元素统计 int64 位掩码中 1 的个数（旧版 NumPy 无 bitwise_count 时查表）。"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(x).astype(np.int64)
+    b = np.ascontiguousarray(x, dtype=np.int64).view(np.uint8).reshape(np.shape(x) + (8,))
+    return _POPCOUNT8[b].sum(axis=-1, dtype=np.int64)
+
+
+def red_mask(reds: np.ndarray) -> np.ndarray:
+    """(..., k) 红球号码 -> (...) 位掩码（第 n-1 位表示号码 n，0 为补位不计）。"""
+    r = np.asarray(reds, dtype=np.int64)
+    bits = np.where(r > 0, np.left_shift(np.int64(1), np.maximum(r, 1) - 1), np.int64(0))
+    return np.bitwise_or.reduce(bits, axis=-1)
+
+
+def pack_draws(draws: Sequence[Tuple[Sequence[int], Optional[int]]]) -> np.ndarray:
+    """[(reds, blue), ...] -> (N, 7) int16，红球保持原次序并以 0 补齐。"""
+    out = np.zeros((len(draws), 7), dtype=np.int16)
+    for i, (reds, blue) in enumerate(draws):
+        reds = [int(r) for r in list(reds)[:6]]
+        out[i, :len(reds)] = reds
+        out[i, 6] = int(blue) if isinstance(blue, (int, np.integer)) else 0
+    return out
+
+
+def history_hash(history: Sequence[Tuple[Sequence[int], int]]) -> str:
+    return hashlib.sha1(pack_draws(history).tobytes()).hexdigest()
+
+
+def weights_hash(path: str) -> str:
+    """权重/融合配置文件内容哈希（文化 gamma 等也在其中，会影响各策略输出）。"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except Exception:
+        return 'none'
+
+
+class EvalWindow:
+    """窗口内各策略预测与开奖号码；命中统计均为整窗数组运算。"""
+
+    def __init__(self, issues: np.ndarray, preds: np.ndarray, truth: np.ndarray,
+                 strategies: Sequence[str] = STRATEGIES, key: str = ''):
+        self.issues = np.asarray(issues, dtype=np.int64)
+        self.preds = np.asarray(preds, dtype=np.int16)  # (W, S, 7)
+        self.truth = np.asarray(truth, dtype=np.int16)  # (W, 7)
+        self.strategies = tuple(strategies)
+        self.key = key
+        self._truth_mask = red_mask(self.truth[:, :6])
+
+    def __len__(self) -> int:
+        return int(self.issues.size)
+
+    # ---------- 命中 ----------
+    def red_hits(self) -> np.ndarray:
+        """(W, S) 各策略红球命中数。"""
+        return popcount(red_mask(self.preds[:, :, :6]) & self._truth_mask[:, None])
+
+    def blue_hits(self) -> np.ndarray:
+        """(W, S) 各策略蓝球是否命中。"""
+        return self.preds[:, :, 6] == self.truth[:, None, 6]
+
+    def hits(self, reds: np.ndarray, blues: np.ndarray, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """任意号码与对应期开奖比对：reds (W, ..., 6)，blues (W, ...)，返回（红命中数, 蓝命中, 完全命中）。"""
+        truth = self.truth if rows is None else self.truth[rows]
+        tmask = red_mask(truth[:, :6])
+        blues = np.asarray(blues)
+        shape = (len(truth),) + (1,) * (blues.ndim - 1)
+        mask = red_mask(reds)
+        blue_hit = blues == truth[:, 6].reshape(shape)
+        return popcount(mask & tmask.reshape(shape)), blue_hit, blue_hit & (mask == tmask.reshape(shape))
+
+    def strategy_rates(self, strategy: str) -> Tuple[float, float, int]:
+        """(红球平均命中率, 蓝球命中率, 样本数)，与 ssq_auto_tuner 口径一致。"""
+        if strategy not in self.strategies or not len(self):
+            return 0.0, 0.0, 0
+        s = self.strategies.index(strategy)
+        n = len(self)
+        return float(self.red_hits()[:, s].sum()) / n / 6.0, float(self.blue_hits()[:, s].sum()) / n, n
+
+    # ---------- 融合输入 ----------
+    def attempts(self, row: int) -> List[Dict[str, object]]:
+        out: List[Dict[str, object]] = []
+        for s, name in enumerate(self.strategies):
+            p = self.preds[row, s]
+            blue = int(p[6])
+            out.append({'strategy': name, 'pred_reds': [int(r) for r in p[:6] if r], 'pred_blue': blue if blue else None})
+        return out
+
+    def true_draw(self, row: int) -> Tuple[List[int], int]:
+        t = self.truth[row]
+        return [int(r) for r in t[:6] if r], int(t[6])
+
+    # ---------- 落盘 ----------
+    def save(self, path: str) -> None:
+        d = os.path.dirname(path) or '.'
+        os.makedirs(d, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=d, suffix='.npz.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, issues=self.issues, preds=self.preds, truth=self.truth,
+                         strategies=np.array(self.strategies), key=np.array(self.key))
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except Exception:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'EvalWindow':
+        with np.load(path) as z:
+            return cls(z['issues'], z['preds'], z['truth'], [str(s) for s in z['strategies']], str(z['key']))
+
+
+def predict_window(cycle, issues: Sequence[int], strategies: Sequence[str] = STRATEGIES,
+                   seed: Optional[int] = None) -> EvalWindow:
+    """逐期依次调用各策略（与旧版评估循环的调用次序一致），打包为 EvalWindow。"""
+    if seed is not None:
+        random.seed(int(seed))
+    funcs = {name: getattr(cycle, f'predict_{name}') for name in strategies}
+    preds = np.zeros((len(issues), len(strategies), 7), dtype=np.int16)
+    for i, idx in enumerate(issues):
+        preds[i] = pack_draws([funcs[name](idx) for name in strategies])
+    truth = pack_draws([cycle.history[idx] for idx in issues])
+    return EvalWindow(np.asarray(list(issues), dtype=np.int64), preds, truth, strategies)
+
+
+def window_key(cycle, issues: Sequence[int], strategies: Sequence[str] = STRATEGIES,
+               seed: Optional[int] = None, weights_path: Optional[str] = None) -> str:
+    from cultural_predictor import _bucket_key
+    ai = getattr(cycle, 'ai_model', None)
+    parts = {
+        'v': KERNEL_VERSION,
+        'history': history_hash(cycle.history),
+        'weights': weights_hash(weights_path or WEIGHTS_FILE),
+        # 文化偏好分按时辰变化，各策略重排依赖它
+        'culture': list(_bucket_key(datetime.now())),
+        'seed': seed,
+        'issues': [int(issues[0]), int(issues[-1]), len(issues)] if len(issues) else [],
+        'strategies': list(strategies),
+        'ai': [int(getattr(ai, '_version', 0)), bool(getattr(ai, 'rf_model', None)),
+               bool(getattr(cycle, 'ai_walk_forward', False))],
+    }
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _prune_cache(cache_dir: str, keep: int) -> None:
+    try:
+        files = [os.path.join(cache_dir, f) for f in os.listdir(cache_dir) if f.endswith('.npz')]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for path in files[max(1, keep):]:
+            os.remove(path)
+    except Exception:
+        pass
+
+
+def load_window(cycle, window: Optional[int] = None, issues: Optional[Sequence[int]] = None,
+                strategies: Sequence[str] = STRATEGIES, seed: Optional[int] = None,
+                cache: Optional[bool] = None, cache_dir: Optional[str] = None) -> EvalWindow:
+    """取窗口预测：命中缓存直接读取，否则预测并落盘。
+
+    window 为最近期数（None/0 表示全部历史），issues 显式指定期次时优先。
+    cache 缺省时只缓存给定 seed 的窗口：无种子时策略输入来自随机取样，缓存会让同一时辰内的
+    重复评估拿到同一份冻结样本；确需复用时显式传 cache=True。
+    给定 seed 时，返回前以派生种子重置全局随机数，使后续融合与是否命中缓存无关。
+    """
+    if cache is None:
+        cache = seed is not None
+    n = len(cycle.history)
+    if issues is None:
+        start = 0 if not window or window <= 0 else max(0, n - int(window))
+        issues = range(start, n)
+    issues = [int(i) for i in issues]
+    cache_dir = cache_dir or CACHE_DIR
+    key = window_key(cycle, issues, strategies, seed)
+    path = os.path.join(cache_dir, f'{key}.npz')
+    win: Optional[EvalWindow] = None
+    if cache and os.path.exists(path):
+        try:
+            win = EvalWindow.load(path)
+            if win.key != key or win.issues.tolist() != issues:
+                win = None
+            else:
+                os.utime(path)
+        except Exception:
+            win = None
+    if win is None:
+        win = predict_window(cycle, issues, strategies, seed)
+        win.key = key
+        if cache:
+            try:
+                win.save(path)
+                _prune_cache(cache_dir, CACHE_KEEP)
+            except Exception:
+                pass
+    if seed is not None:
+        random.seed(f'{int(seed)}:{key}')
+    return win
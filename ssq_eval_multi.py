@@ -9,17 +9,17 @@ from __future__ import annotations
 import time
 from typing import Dict, List, Tuple, Optional
 
+import numpy as np
+
+from ssq_eval_kernel import load_window
 from ssq_predict_cycle import SSQPredictCycle
 
 
 def evaluate_multi(window: int = 100, n: int = 5, diversify: bool = True, seed: Optional[int] = 42) -> Dict[str, object]:
     cyc = SSQPredictCycle(data_path='ssq_history.csv')
-    # 注入多样性和随机种子（仅对本次评估生效）
+    # 注入多样性（仅对本次评估生效）；随机种子由评估内核在取得策略预测后统一重置
     try:
         cyc.enforce_candidate_diversity = bool(diversify)
-        if seed is not None:
-            import random as _rnd
-            _rnd.seed(int(seed))
     except Exception:
         pass
 
@@ -28,42 +28,27 @@ def evaluate_multi(window: int = 100, n: int = 5, diversify: bool = True, seed:
         return {'status': 'error', 'error': 'no_history'}
 
     start = max(0, len(history) - int(window))
-    best_reds_hits: List[int] = []
-    blue_hit_any: List[int] = []
-    full_matches: int = 0
     details_tail: List[Dict[str, object]] = []
     n_eff = max(1, min(50, int(n)))
 
-    for idx in range(start, len(history)):
-        true_reds, true_blue = history[idx]
-        # 四策略各出一组，作为融合输入
-        attempts: List[Dict[str, object]] = []
-        for model in ['liuyao','liuren','qimen','ai']:
-            if model == 'liuyao': pr, pb = cyc.predict_liuyao(idx)
-            elif model == 'liuren': pr, pb = cyc.predict_liuren(idx)
-            elif model == 'qimen': pr, pb = cyc.predict_qimen(idx)
-            else: pr, pb = cyc.predict_ai(idx)
-            attempts.append({'strategy': model, 'pred_reds': pr, 'pred_blue': pb})
-        # 生成N组候选
-        cands = cyc.generate_candidates_from_attempts(attempts, count=n_eff)
-        # 统计本期最优红命中、是否任一命中蓝球、是否出现完全匹配
-        brh = 0
-        bh_any = 0
-        fm = 0
-        for c in cands:
-            cr = c['reds']
-            cb = c['blue']
-            rh = len(set(cr) & set(true_reds))
-            if rh > brh:
-                brh = rh
-            if cb == true_blue:
-                bh_any = 1
-            if set(cr) == set(true_reds) and cb == true_blue:
-                fm = 1
+    # 四策略各出一组（评估内核一次产出并缓存），作为融合输入
+    win = load_window(cyc, issues=range(start, len(history)), seed=seed)
+    best_reds_hits: List[int] = []
+    blue_hit_any: List[int] = []
+    full_matches: int = 0
+    for i in range(len(win)):
+        # 生成N组候选，按掩码一次比对：本期最优红命中、是否任一命中蓝球、是否出现完全匹配
+        cands = cyc.generate_candidates_from_attempts(win.attempts(i), count=n_eff)
+        brh = bh_any = fm = 0
+        if cands:
+            rh, bh, fh = win.hits(np.array([[c['reds'] for c in cands]]), np.array([[c['blue'] for c in cands]]), rows=[i])
+            brh, bh_any, fm = int(rh.max()), int(bh.any()), int(fh.any())
         best_reds_hits.append(brh)
         blue_hit_any.append(bh_any)
         full_matches += fm
+        idx = int(win.issues[i])
         if idx >= len(history) - 10:  # 收集最近10期详情
+            true_reds, true_blue = win.true_draw(i)
             details_tail.append({
                 'issue_idx': idx,
                 'true_reds': sorted(true_reds),
@@ -15,6 +15,9 @@ import json
 import time
 from typing import Dict, List, Tuple
 
+import numpy as np
+
+from ssq_eval_kernel import load_window
 from ssq_predict_cycle import SSQPredictCycle
 
 
@@ -25,46 +28,31 @@ def evaluate_recent(window: int = 100) -> Dict[str, object]:
         return {'error': 'no_history'}
 
     # 为评估：对每期用当前策略预测该期（非真实可用，但可用于相对表现的稳定观察）
-    reds_hits: List[int] = []
-    blue_hits: List[int] = []
-    # 按策略分别统计
+    # 四个策略的逐期预测由评估内核一次产出（落盘缓存），分策略命中为整窗掩码运算
     strategies = ['liuyao', 'liuren', 'qimen', 'ai']
-    per_reds_hits: Dict[str, List[int]] = {s: [] for s in strategies}
-    per_blue_hits: Dict[str, List[int]] = {s: [] for s in strategies}
+    win = load_window(cycle, issues=range(max(0, len(history) - window), len(history)), strategies=strategies)
+    per_reds = win.red_hits()
+    per_blue = win.blue_hits()
+    per_reds_hits: Dict[str, List[int]] = {s: per_reds[:, i].tolist() for i, s in enumerate(strategies)}
+    per_blue_hits: Dict[str, List[int]] = {s: per_blue[:, i].astype(int).tolist() for i, s in enumerate(strategies)}
+    fused = [cycle._fuse_from_attempts(win.attempts(i)) for i in range(len(win))]
     per_issue_details: List[Dict[str, object]] = []
-    start = max(0, len(history) - window)
-    for idx in range(start, len(history)):
-        true_reds, true_blue = history[idx]
-        # 使用四个策略一次各出一个候选后做融合
-        attempts: List[Dict[str, object]] = []
-        for model in strategies:
-            if model == 'liuyao':
-                pr, pb = cycle.predict_liuyao(idx)
-            elif model == 'liuren':
-                pr, pb = cycle.predict_liuren(idx)
-            elif model == 'qimen':
-                pr, pb = cycle.predict_qimen(idx)
-            else:
-                pr, pb = cycle.predict_ai(idx)
-            attempts.append({'strategy': model, 'pred_reds': pr, 'pred_blue': pb})
-            # 分策略命中
-            rh_m = len(set(pr) & set(true_reds))
-            bh_m = 1 if pb == true_blue else 0
-            per_reds_hits[model].append(rh_m)
-            per_blue_hits[model].append(bh_m)
-        fused_reds, fused_blue = cycle._fuse_from_attempts(attempts)
-        rh = len(set(fused_reds) & set(true_reds))
-        bh = 1 if fused_blue == true_blue else 0
-        reds_hits.append(rh)
-        blue_hits.append(bh)
+    if fused:
+        rh_arr, bh_arr, _ = win.hits(np.array([r for r, _ in fused]), np.array([b for _, b in fused]))
+        reds_hits: List[int] = rh_arr.tolist()
+        blue_hits: List[int] = bh_arr.astype(int).tolist()
+    else:
+        reds_hits, blue_hits = [], []
+    for i, (fused_reds, fused_blue) in enumerate(fused):
+        true_reds, true_blue = win.true_draw(i)
         per_issue_details.append({
-            'issue_idx': idx,
+            'issue_idx': int(win.issues[i]),
             'true_reds': sorted(true_reds),
             'true_blue': true_blue,
             'pred_reds': sorted(fused_reds),
             'pred_blue': fused_blue,
-            'reds_hit': rh,
-            'blue_hit': bh,
+            'reds_hit': reds_hits[i],
+            'blue_hit': blue_hits[i],
         })
 
     avg_reds_hit = sum(reds_hits) / len(reds_hits) if reds_hits else 0.0
@@ -0,0 +1,458 @@
+"""
+双色球融合引擎（向量化版）
+- 以 33 维红球 / 16 维蓝球 NumPy 票数向量替代逐球 Counter 累加
+- 权重、号码先验、文化记忆按期加载一次，多组候选在一次批量调用中完成采样
+- 温度 / top-p 采样在数组上批量进行，并与 Python random 全局随机流逐次对齐：
+  固定种子时与逐次调用旧版 _fuse_from_attempts 的结果完全一致
+
+说明：批量采样借助 numpy.random.RandomState 与 random 模块同为 MT19937 且
+random() 的 53 位浮点生成方式一致，因此可直接搬运状态；用多少，推进多少。
+"""
+from __future__ import annotations
+
+import random
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+RED_N = 33
+BLUE_N = 16
+
+
+# ---------- 标量采样（与旧版逐次实现一致，亦作为非常规情形的兜底） ----------
+def weighted_sample_single(values: List[int], weights: List[float], temperature: float = 1.0, top_p: float = 1.0) -> int:
+    assert len(values) == len(weights)
+    # 温度缩放：p_i ∝ w_i^(1/T)
+    ws = [max(0.0, w) for w in weights]
+    if sum(ws) <= 0:
+        return random.choice(values)
+    if abs(temperature - 1.0) > 1e-9:
+        invT = 1.0 / max(1e-6, temperature)
+        ws = [w ** invT for w in ws]
+    s = sum(ws)
+    probs = [w / s for w in ws]
+    # top-p 过滤
+    if top_p < 0.999:
+        pairs = sorted(zip(values, probs), key=lambda x: x[1], reverse=True)
+        cum = 0.0
+        kept: List[Tuple[int, float]] = []
+        for v, p in pairs:
+            kept.append((v, p))
+            cum += p
+            if cum >= top_p:
+                break
+        vs = [v for v, _ in kept]
+        ps = [p for _, p in kept]
+        s2 = sum(ps) or 1.0
+        ps = [p / s2 for p in ps]
+        return random.choices(vs, weights=ps, k=1)[0]
+    return random.choices(values, weights=probs, k=1)[0]
+
+
+def weighted_sample_without_replacement(values: List[int], weights: List[float], k: int, temperature: float = 1.0, top_p: float = 1.0) -> List[int]:
+    selected: List[int] = []
+    pool_vals = list(values)
+    pool_w = [max(0.0, w) for w in weights]
+    for _ in range(max(0, k)):
+        if not pool_vals:
+            break
+        choice = weighted_sample_single(pool_vals, pool_w, temperature=temperature, top_p=top_p)
+        selected.append(choice)
+        # 移除已选择项
+        idx = pool_vals.index(choice)
+        pool_vals.pop(idx)
+        pool_w.pop(idx)
+    # 若不够则随机补齐
+    while len(selected) < k:
+        c = random.choice([v for v in range(1, 34) if v not in selected])
+        selected.append(c)
+    return selected
+
+
+# ---------- 与 random 模块共享的批量均匀数 ----------
+class UniformStream:
+    """从 random 模块当前状态派生的 MT19937 均匀数流。
+
+    draw(n) 批量取数（不影响 random 模块）；commit() 时按实际消耗数推进 random 模块状态，
+    保证之后的随机调用与逐次旧实现完全一致。
+    """
+
+    def __init__(self):
+        version, internal, gauss = random.getstate()
+        self._version = version
+        self._gauss = gauss
+        self._keys = np.asarray(internal[:624], dtype=np.uint32)
+        self._pos = int(internal[624])
+        self._rs = self._fresh()
+        self._drawn = 0
+
+    def _fresh(self) -> np.random.RandomState:
+        rs = np.random.RandomState()
+        rs.set_state(('MT19937', self._keys, self._pos))
+        return rs
+
+    def draw(self, n: int) -> np.ndarray:
+        self._drawn += int(n)
+        return self._rs.random_sample(int(n))
+
+    def commit(self, used: int) -> None:
+        rs = self._rs if used == self._drawn else self._fresh()
+        if rs is not self._rs and used > 0:
+            rs.random_sample(int(used))
+        _name, keys, pos = rs.get_state()[:3]
+        random.setstate((self._version, tuple(int(x) for x in keys) + (int(pos),), self._gauss))
+
+
+def _pick(cum: np.ndarray, x: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """逐行 bisect_right(cum_row, x_row, 0, hi_row)。"""
+    idx = (cum <= x[:, None]).sum(axis=1)
+    return np.minimum(idx, hi)
+
+
+def _batch_weighted_rows(pool: np.ndarray, removed: np.ndarray, u: np.ndarray, temperature: float, top_p: float) -> np.ndarray:
+    """对 pool 的每一行做一次加权抽样，返回列下标；removed 标记已抽走（旧版从池中移除）的元素。"""
+    n, width = pool.shape
+    rows = np.arange(n)
+    ws = pool
+    if abs(temperature - 1.0) > 1e-9:
+        ws = ws ** (1.0 / max(1e-6, temperature))
+    # 顺序累加求和，保持与 Python sum() 相同的浮点次序（已移除项以 0 占位，不改变结果）
+    s = np.cumsum(ws, axis=1)[:, -1]
+    probs = ws / s[:, None]
+    in_pool = ~removed
+    if top_p < 0.999:
+        # 与旧版一致：池内元素按概率降序（稳定）排序，累计到 top_p 为止
+        order = np.argsort(np.where(in_pool, -probs, np.inf), axis=1, kind='stable')
+        ps = np.take_along_axis(probs, order, axis=1)
+        cum = np.cumsum(ps, axis=1)
+        reach = (cum >= top_p) & np.take_along_axis(in_pool, order, axis=1)
+        last = np.where(reach.any(axis=1), reach.argmax(axis=1), in_pool.sum(axis=1) - 1)
+        ps = np.where(np.arange(width)[None, :] <= last[:, None], ps, 0.0)
+        s2 = np.cumsum(ps, axis=1)[:, -1]
+        s2 = np.where(s2 == 0.0, 1.0, s2)
+        cq = np.cumsum(ps / s2[:, None], axis=1)
+        j = _pick(cq, u * cq[:, -1], last)
+        return order[rows, j]
+    cq = np.cumsum(probs, axis=1)
+    hi = width - 1 - np.argmax(in_pool[:, ::-1], axis=1)
+    return _pick(cq, u * cq[:, -1], hi)
+
+
+class FusionTally:
+    """一次融合的计票结果（红33/蓝16），可被多次采样复用。"""
+
+    def __init__(self):
+        self.red = np.zeros(RED_N, dtype=float)
+        self.blue = np.zeros(BLUE_N, dtype=float)
+        self.red_ranking: List[int] = []  # 等价 Counter.most_common(33) 的号码次序
+        self.blue_ranking: List[int] = []
+        self.red_keys = False  # Counter 是否非空
+        self.blue_keys = False
+        self.regular = True  # 是否可走批量路径（否则退回逐次标量实现）
+        self.sampling_red = False  # 红球是否走温度/top-p 采样
+        self.attempts: List[Dict[str, object]] = []
+
+
+class FusionEngine:
+    """单期融合上下文：权重、先验与文化记忆在构造时一次性给定。"""
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        red_prior: Optional[Sequence[float]] = None,
+        blue_prior: Optional[Sequence[float]] = None,
+        mem_red: Optional[Dict[int, float]] = None,
+        mem_blue: Optional[Dict[int, float]] = None,
+        alpha_red: float = 0.1,
+        alpha_blue: float = 0.1,
+        alpha_mem_red: float = 0.0,
+        alpha_mem_blue: float = 0.0,
+        temp_red: float = 1.0,
+        temp_blue: float = 1.0,
+        top_p_red: float = 1.0,
+        top_p_blue: float = 1.0,
+        region_buckets: Optional[List[Tuple[int, int]]] = None,
+        enforce_region_coverage: bool = True,
+        trace: Optional[Dict[str, object]] = None,
+    ):
+        self.weights = dict(weights or {})
+        self.red_prior = np.zeros(RED_N) if red_prior is None else np.asarray(red_prior, dtype=float)
+        self.blue_prior = np.zeros(BLUE_N) if blue_prior is None else np.asarray(blue_prior, dtype=float)
+        self.alpha_red = float(alpha_red)
+        self.alpha_blue = float(alpha_blue)
+        self.alpha_mem_red = float(alpha_mem_red)
+        self.alpha_mem_blue = float(alpha_mem_blue)
+        self.temp_red = float(temp_red)
+        self.temp_blue = float(temp_blue)
+        self.top_p_red = float(top_p_red)
+        self.top_p_blue = float(top_p_blue)
+        self.region_buckets = list(region_buckets or [(1, 11), (12, 22), (23, 33)])
+        self.enforce_region_coverage = bool(enforce_region_coverage)
+        self.trace: Dict[str, object] = trace if trace is not None else {"weights": dict(self.weights), "priors": {}}
+        # 文化记忆：预先归一为向量（和为0时不参与）
+        self.mem_red: Optional[np.ndarray] = None
+        self.mem_blue: Optional[np.ndarray] = None
+        if (self.alpha_mem_red > 1e-9 or self.alpha_mem_blue > 1e-9) and (mem_red is not None or mem_blue is not None):
+            mred = mem_red or {}
+            mblue = mem_blue or {}
+            rsum = sum(float(mred.get(k, 0.0)) for k in range(1, 34))
+            bsum = sum(float(mblue.get(k, 0.0)) for k in range(1, 17))
+            if rsum > 0:
+                self.mem_red = np.array([float(mred.get(k, 0.0)) for k in range(1, 34)]) / rsum
+            if bsum > 0:
+                self.mem_blue = np.array([float(mblue.get(k, 0.0)) for k in range(1, 17)]) / bsum
+        self.use_sampling_red = (abs(self.temp_red - 1.0) > 1e-9) or (self.top_p_red < 0.999)
+        self.use_sampling_blue = (abs(self.temp_blue - 1.0) > 1e-9) or (self.top_p_blue < 0.999)
+
+    # ---------- 计票 ----------
+    def tally(self, attempts: List[Dict[str, object]]) -> FusionTally:
+        t = FusionTally()
+        t.attempts = attempts
+        red_idx: List[int] = []
+        red_w: List[float] = []
+        blue_idx: List[int] = []
+        blue_w: List[float] = []
+        red_seen: Dict[int, None] = {}
+        blue_seen: Dict[int, None] = {}
+        for attempt in attempts:
+            w = 1.0
+            try:
+                w = float(self.weights.get(str(attempt.get('strategy')), 1.0))
+            except Exception:
+                w = 1.0
+            self.trace.setdefault("weights", {})[str(attempt.get('strategy'))] = w
+            for red in attempt.get('pred_reds', []):
+                red_seen.setdefault(red, None)
+                red_idx.append(red)
+                red_w.append(w)
+            blue = attempt.get('pred_blue')
+            if isinstance(blue, int):
+                blue_seen.setdefault(blue, None)
+                blue_idx.append(blue)
+                blue_w.append(w)
+        if any((not isinstance(r, (int, np.integer))) or not (1 <= r <= RED_N) for r in red_seen) or \
+                any(not (1 <= b <= BLUE_N) for b in blue_seen):
+            t.regular = False
+            return t
+        if red_idx:
+            np.add.at(t.red, np.asarray(red_idx, dtype=int) - 1, np.asarray(red_w, dtype=float))
+        if blue_idx:
+            np.add.at(t.blue, np.asarray(blue_idx, dtype=int) - 1, np.asarray(blue_w, dtype=float))
+        # 总票数按首次出现次序顺序累加（与 sum(Counter.values()) 完全一致）
+        total_red = float(sum(float(t.red[r - 1]) for r in red_seen))
+        total_blue = float(sum(float(t.blue[b - 1]) for b in blue_seen))
+        red_order = list(red_seen)
+        blue_order = list(blue_seen)
+        if total_red > 0:
+            t.red = t.red + self.alpha_red * self.red_prior * total_red
+            red_order += [k for k in range(1, RED_N + 1) if k not in red_seen]
+        if total_blue > 0:
+            t.blue = t.blue + self.alpha_blue * self.blue_prior * total_blue
+            blue_order += [k for k in range(1, BLUE_N + 1) if k not in blue_seen]
+        if total_red > 0 and self.mem_red is not None:
+            t.red = t.red + self.alpha_mem_red * self.mem_red * total_red
+        if total_blue > 0 and self.mem_blue is not None:
+            t.blue = t.blue + self.alpha_mem_blue * self.mem_blue * total_blue
+        t.red_keys = bool(red_order)
+        t.blue_keys = bool(blue_order)
+        # most_common：按票数降序，同票按插入次序
+        t.red_ranking = sorted(red_order, key=lambda k: t.red[k - 1], reverse=True)
+        t.blue_ranking = sorted(blue_order, key=lambda k: t.blue[k - 1], reverse=True)
+        # 判断每次采样消耗的随机数是否固定（否则退回标量路径）
+        red_sum = sum(float(t.red[k - 1]) for k in red_order)
+        sampling_red = self.use_sampling_red and red_sum > 0
+        if sampling_red:
+            ws = np.maximum(t.red, 0.0)
+            if abs(self.temp_red - 1.0) > 1e-9:
+                ws = ws ** (1.0 / max(1e-6, self.temp_red))
+            if int((ws > 0).sum()) < 6 or not np.isfinite(ws).all():
+                t.regular = False
+        elif len(red_order) < 6:
+            t.regular = False
+        if not t.blue_keys:
+            t.regular = False
+        elif self.use_sampling_blue:
+            ws = np.maximum(t.blue, 0.0)
+            if abs(self.temp_blue - 1.0) > 1e-9:
+                ws = ws ** (1.0 / max(1e-6, self.temp_blue))
+            if not (ws > 0).any() or not np.isfinite(ws).all():
+                t.regular = False
+        t.sampling_red = sampling_red
+        return t
+
+    # ---------- 采样 ----------
+    def _draws_per_sample(self, t: FusionTally) -> int:
+        return (6 if t.sampling_red else 0) + (1 if self.use_sampling_blue else 0)
+
+    def _cover_regions(self, fused_reds: List[int], ranking: List[int]) -> List[int]:
+        def _region_idx(x: int) -> Optional[int]:
+            for i, (lo, hi) in enumerate(self.region_buckets):
+                if lo <= x <= hi:
+                    return i
+            return None
+        regions: Dict[int, int] = {i: 0 for i in range(len(self.region_buckets))}
+        for r in fused_reds:
+            ri = _region_idx(r)
+            if ri is not None:
+                regions[ri] += 1
+        if any(v == 0 for v in regions.values()):
+            candidates_sorted = [n for n in ranking if n not in fused_reds]
+            for rid, v in regions.items():
+                if v > 0:
+                    continue
+                for c in candidates_sorted:
+                    if _region_idx(c) == rid:
+                        counts = {i: 0 for i in range(len(self.region_buckets))}
+                        for val in fused_reds:
+                            rj = _region_idx(val)
+                            if rj is not None:
+                                counts[rj] += 1
+                        replaced = False
+                        for i, v0 in enumerate(list(fused_reds)):
+                            rj = _region_idx(v0)
+                            if rj is not None and counts[rj] > 1:
+                                counts[rj] -= 1
+                                fused_reds[i] = c
+                                regions[rid] += 1
+                                replaced = True
+                                break
+                        if replaced:
+                            break
+        return fused_reds
+
+    def _sample_batch(self, t: FusionTally, u: np.ndarray) -> List[Tuple[List[int], int]]:
+        """u: (n, draws_per_sample) 的均匀数矩阵，按旧版消耗次序（先红6后蓝1）。"""
+        n = u.shape[0]
+        return self.sample_rows(
+            np.broadcast_to(t.red, (n, RED_N)), np.broadcast_to(t.blue, (n, BLUE_N)),
+            [t.red_ranking] * n, [t.blue_ranking] * n, u, t.sampling_red,
+        )
+
+    def sample_rows(self, red: np.ndarray, blue: np.ndarray, red_rankings: Sequence[List[int]],
+                    blue_rankings: Sequence[List[int]], u: np.ndarray, sampling_red: bool) -> List[Tuple[List[int], int]]:
+        """逐行计票各不相同的批量采样：red (n,33)/blue (n,16) 为各行票数，rankings 为各行 most_common 次序。
+
+        各行须为常规计票（见 FusionTally.regular）；u 每行先红 6 列（sampling_red 时）后蓝 1 列。
+        """
+        n = u.shape[0]
+        col = 0
+        if sampling_red:
+            pool = np.maximum(red, 0.0)
+            removed = np.zeros((n, RED_N), dtype=bool)
+            rows = np.arange(n)
+            picks = np.empty((n, 6), dtype=int)
+            for step in range(6):
+                c = _batch_weighted_rows(pool, removed, u[:, col], self.temp_red, self.top_p_red)
+                picks[:, step] = c + 1
+                pool[rows, c] = 0.0
+                removed[rows, c] = True
+                col += 1
+            red_rows = picks.tolist()
+        else:
+            red_rows = [list(r[:6]) for r in red_rankings]
+        if self.use_sampling_blue:
+            bw = np.maximum(blue, 0.0)
+            blues = (_batch_weighted_rows(bw, np.zeros((n, BLUE_N), dtype=bool), u[:, col], self.temp_blue, self.top_p_blue) + 1).tolist()
+        else:
+            blues = [r[0] for r in blue_rankings]
+        out: List[Tuple[List[int], int]] = []
+        for reds, blue_ball, ranking in zip(red_rows, blues, red_rankings):
+            if self.enforce_region_coverage:
+                reds = self._cover_regions(reds, ranking)
+            out.append((sorted(reds[:6]), int(blue_ball)))
+        return out
+
+    def _sample_scalar(self, t: FusionTally) -> Tuple[List[int], int]:
+        """非常规情形：逐次标量实现（与旧版逐球 Counter 逻辑一致）。"""
+        reds_counter: Counter = Counter()
+        blue_counter: Counter = Counter()
+        for attempt in t.attempts:
+            try:
+                w = float(self.weights.get(str(attempt.get('strategy')), 1.0))
+            except Exception:
+                w = 1.0
+            for red in attempt.get('pred_reds', []):
+                reds_counter[red] += w
+            blue = attempt.get('pred_blue')
+            if isinstance(blue, int):
+                blue_counter[blue] += w
+        total_red_votes = float(sum(reds_counter.values()))
+        total_blue_votes = float(sum(blue_counter.values()))
+        if total_red_votes > 0:
+            for k in range(1, 34):
+                reds_counter[k] += self.alpha_red * float(self.red_prior[k - 1]) * total_red_votes
+        if total_blue_votes > 0:
+            for k in range(1, 17):
+                blue_counter[k] += self.alpha_blue * float(self.blue_prior[k - 1]) * total_blue_votes
+        if total_red_votes > 0 and self.mem_red is not None:
+            for k in range(1, 34):
+                reds_counter[k] += self.alpha_mem_red * float(self.mem_red[k - 1]) * total_red_votes
+        if total_blue_votes > 0 and self.mem_blue is not None:
+            for k in range(1, 17):
+                blue_counter[k] += self.alpha_mem_blue * float(self.mem_blue[k - 1]) * total_blue_votes
+        if self.use_sampling_red and sum(reds_counter.values()) > 0:
+            fused_reds = weighted_sample_without_replacement(
+                values=list(range(1, 34)),
+                weights=[float(reds_counter.get(i, 0.0)) for i in range(1, 34)],
+                k=6,
+                temperature=self.temp_red,
+                top_p=self.top_p_red,
+            )
+        else:
+            fused_reds = [num for num, _ in reds_counter.most_common(6)]
+            while len(fused_reds) < 6:
+                candidate = random.randint(1, 33)
+                if candidate not in fused_reds:
+                    fused_reds.append(candidate)
+        if self.enforce_region_coverage:
+            fused_reds = self._cover_regions(fused_reds, [n for n, _ in reds_counter.most_common(33)])
+        fused_blue = None
+        if blue_counter:
+            if self.use_sampling_blue:
+                fused_blue = weighted_sample_single(
+                    values=list(range(1, 17)),
+                    weights=[float(blue_counter.get(i, 0.0)) for i in range(1, 17)],
+                    temperature=self.temp_blue,
+                    top_p=self.top_p_blue,
+                )
+            else:
+                fused_blue = blue_counter.most_common(1)[0][0]
+        if fused_blue is None:
+            fused_blue = random.randint(1, 16)
+        return sorted(fused_reds[:6]), fused_blue
+
+    def sample(self, t: FusionTally, n: int = 1) -> List[Tuple[List[int], int]]:
+        """连续采样 n 组融合号码，等价于 n 次逐次融合调用。"""
+        return list(self.iter_samples(t, n))
+
+    def iter_samples(self, t: FusionTally, n: Optional[int] = None, batch: int = 64):
+        """按需产出融合号码；内部按批量抽样，并在结束时按实际消耗推进随机流。"""
+        if not t.regular:
+            produced = 0
+            while n is None or produced < n:
+                yield self._sample_scalar(t)
+                produced += 1
+            return
+        per = self._draws_per_sample(t)
+        if per == 0:
+            # 贪心模式：无随机消耗，结果恒定
+            one = self._sample_batch(t, np.zeros((1, 0)))[0]
+            produced = 0
+            while n is None or produced < n:
+                yield (list(one[0]), one[1])
+                produced += 1
+            return
+        stream = UniformStream()
+        used = 0
+        size = max(1, min(int(n) if n is not None else batch, 4096))
+        try:
+            while n is None or used < n:
+                k = size if n is None else min(size, int(n) - used)
+                block = self._sample_batch(t, stream.draw(k * per).reshape(k, per))
+                for item in block:
+                    used += 1
+                    yield item
+                size = min(size * 2, 4096)
+        finally:
+            stream.commit(used * per)
@@ -0,0 +1,224 @@
+"""
+双色球历史特征索引（前缀和）
+- 一次构建：逐球累计出现次数矩阵（红 33 / 蓝 16）、逐球最近出现位置矩阵
+- “截至第 i 期之前”的频次、任意窗口 [start, end) 频次、遗漏期数、冷热号均为 O(1) 查询
+- 指数衰减冷热状态按衰减系数惰性生成并缓存（与逐期累乘完全同序，结果逐位一致）
+- 新开奖追加时增量扩展，无需重建；各矩阵按容量翻倍预分配，逐期追加均摊 O(1)；sync() 可对“同一份历史的前缀切片”做增量对齐
+
+约定：第 i 行表示 draws[:i] 的统计，行 0 为全零；最近出现位置以 -1 表示从未出现。
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+RED_N = 33
+BLUE_N = 16
+
+Draw = Tuple[Sequence[int], int]
+
+
+def _grow_rows(a: np.ndarray, cap: int, fill) -> np.ndarray:
+    out = np.full((cap,) + a.shape[1:], fill, dtype=a.dtype)
+    out[:a.shape[0]] = a
+    return out
+
+
+def dict_draw(d) -> Draw:
+    """回测数据格式 {'red_balls': [...], 'blue_ball': n} -> (reds, blue)，供 sync(key=...) 使用。"""
+    return d['red_balls'], d['blue_ball']
+
+
+class HistoryIndex:
+    """可增量追加的历史前缀和索引。"""
+
+    def __init__(self, draws: Iterable[Draw] = ()):
+        self._n = 0
+        self._red_cum = np.zeros((1, RED_N), dtype=np.int32)
+        self._blue_cum = np.zeros((1, BLUE_N), dtype=np.int32)
+        self._red_last = np.full((1, RED_N), -1, dtype=np.int32)
+        self._blue_last = np.full((1, BLUE_N), -1, dtype=np.int32)
+        # 衰减系数 -> (红, 蓝) 预分配缓冲区；有效行为前 _n + 1 行
+        self._decayed: Dict[float, Tuple[np.ndarray, np.ndarray]] = {}
+        self._tail = None  # 最近一次 sync 的末元素引用，用于识别前缀切片
+        self.extend(draws)
+
+    # ---------- 构建 ----------
+    @classmethod
+    def from_csv(cls, path: str) -> 'HistoryIndex':
+        """与 SSQDataManager.load_csv 相同的解析规则（兼容 Tab 分隔，忽略表头/异常行）。"""
+        draws: List[Draw] = []
+        with open(path, encoding='utf-8') as f:
+            for raw in f:
+                parts = raw.strip().split('\t') if '\t' in raw else raw.strip().split(',')
+                if len(parts) < 8 or not parts[0].isdigit():
+                    continue
+                try:
+                    reds = [int(parts[i]) for i in range(1, 7)]
+                    blue = int(parts[7])
+                except Exception:
+                    continue
+                if 1 <= blue <= 16:
+                    draws.append((reds, blue))
+        return cls(draws)
+
+    @classmethod
+    def from_db(cls, db_path: Optional[str] = None) -> 'HistoryIndex':
+        """从 data/ssq.db 的 ssq_draws 表按期号升序构建。"""
+        if db_path is None:
+            db_path = os.path.join(os.path.dirname(__file__), 'data', 'ssq.db')
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute('SELECT r1,r2,r3,r4,r5,r6,blue FROM ssq_draws ORDER BY period ASC').fetchall()
+        finally:
+            conn.close()
+        return cls(([r[0], r[1], r[2], r[3], r[4], r[5]], r[6]) for r in rows)
+
+    def _reserve(self, rows: int) -> None:
+        cap = self._red_cum.shape[0]
+        if rows <= cap:
+            return
+        new_cap = max(rows, cap * 2)
+        self._red_cum = _grow_rows(self._red_cum, new_cap, 0)
+        self._blue_cum = _grow_rows(self._blue_cum, new_cap, 0)
+        self._red_last = _grow_rows(self._red_last, new_cap, -1)
+        self._blue_last = _grow_rows(self._blue_last, new_cap, -1)
+
+    def extend(self, draws: Iterable[Draw]) -> int:
+        """批量追加开奖（增量更新），返回追加期数。"""
+        batch = [(list(r), int(b)) for r, b in draws]
+        m = len(batch)
+        if m == 0:
+            return 0
+        n = self._n
+        red_hot = np.zeros((m, RED_N), dtype=np.int32)
+        blue_hot = np.zeros((m, BLUE_N), dtype=np.int32)
+        for i, (reds, blue) in enumerate(batch):
+            for r in reds:
+                if 1 <= r <= RED_N:
+                    red_hot[i, r - 1] = 1
+            if 1 <= blue <= BLUE_N:
+                blue_hot[i, blue - 1] = 1
+        self._reserve(n + m + 1)
+        self._red_cum[n + 1:n + m + 1] = self._red_cum[n] + np.cumsum(red_hot, axis=0)
+        self._blue_cum[n + 1:n + m + 1] = self._blue_cum[n] + np.cumsum(blue_hot, axis=0)
+        pos = np.arange(n, n + m, dtype=np.int32)[:, None]
+        self._red_last[n + 1:n + m + 1] = np.maximum.accumulate(
+            np.vstack([self._red_last[n:n + 1], np.where(red_hot > 0, pos, -1)]), axis=0
+        )[1:]
+        self._blue_last[n + 1:n + m + 1] = np.maximum.accumulate(
+            np.vstack([self._blue_last[n:n + 1], np.where(blue_hot > 0, pos, -1)]), axis=0
+        )[1:]
+        self._n = n + m
+        for decay in list(self._decayed):
+            self._extend_decayed(decay, red_hot, blue_hot, n)
+        return m
+
+    def append(self, reds: Sequence[int], blue: int) -> None:
+        self.extend([(reds, blue)])
+
+    def sync(self, seq: Sequence, key: Optional[Callable[[object], Draw]] = None) -> 'HistoryIndex':
+        """与序列对齐：seq 为已索引内容的延长（含同一份数据的前缀切片）时只追加新增部分，否则重建。"""
+        key = key or (lambda x: x)
+        n = self._n
+        if len(seq) == n and (n == 0 or seq[n - 1] is self._tail):
+            return self
+        if n > 0 and not (len(seq) > n and seq[n - 1] is self._tail):
+            self.__init__()
+            n = 0
+        self.extend(key(x) for x in seq[n:])
+        self._tail = seq[-1] if len(seq) else None
+        return self
+
+    # ---------- 查询 ----------
+    def __len__(self) -> int:
+        return self._n
+
+    def _end(self, end: Optional[int]) -> int:
+        if end is None:
+            return self._n
+        return max(0, min(int(end), self._n))
+
+    def red_counts(self, end: Optional[int] = None, start: int = 0) -> np.ndarray:
+        """draws[start:end] 中各红球出现次数（长度 33）。"""
+        end = self._end(end)
+        start = max(0, min(int(start), end))
+        return self._red_cum[end] - self._red_cum[start]
+
+    def blue_counts(self, end: Optional[int] = None, start: int = 0) -> np.ndarray:
+        end = self._end(end)
+        start = max(0, min(int(start), end))
+        return self._blue_cum[end] - self._blue_cum[start]
+
+    def red_last_seen(self, end: Optional[int] = None) -> np.ndarray:
+        return self._red_last[self._end(end)]
+
+    def blue_last_seen(self, end: Optional[int] = None) -> np.ndarray:
+        return self._blue_last[self._end(end)]
+
+    def red_omission(self, end: Optional[int] = None) -> np.ndarray:
+        """截至 end 期之前各红球的遗漏期数（从未出现记为 end）。"""
+        end = self._end(end)
+        return end - 1 - self._red_last[end]
+
+    def blue_omission(self, end: Optional[int] = None) -> np.ndarray:
+        end = self._end(end)
+        return end - 1 - self._blue_last[end]
+
+    def hot_cold(self, end: Optional[int] = None, k: int = 6, start: int = 0) -> Tuple[List[int], List[int]]:
+        """红球冷热号；同频按号码升序，与逐期计数 + sorted 的结果一致。"""
+        cnt = self.red_counts(end, start)
+        hot = (np.argsort(-cnt, kind='stable')[:k] + 1).tolist()
+        cold = (np.argsort(cnt, kind='stable')[:k] + 1).tolist()
+        return hot, cold
+
+    def red_frequency(self, end: Optional[int] = None, start: int = 0) -> Dict[int, float]:
+        """归一化红球频率 {号码: 概率}；无数据时为全零。"""
+        cnt = self.red_counts(end, start).tolist()
+        total = float(sum(cnt)) or 1.0
+        return {i + 1: (c / total) for i, c in enumerate(cnt)}
+
+    def blue_frequency(self, end: Optional[int] = None, start: int = 0) -> np.ndarray:
+        arr = self.blue_counts(end, start).astype(float)
+        s = float(arr.sum()) or 1.0
+        return arr / s
+
+    # ---------- 指数衰减冷热 ----------
+    def _extend_decayed(self, decay: float, red_hot: np.ndarray, blue_hot: np.ndarray, start: int) -> None:
+        """在第 start 行（draws[:start] 的状态）之后写入 m 期；容量不足时翻倍扩展，不整表复制。"""
+        red, blue = self._decayed[decay]
+        m = red_hot.shape[0]
+        if start + m + 1 > red.shape[0]:
+            cap = max(start + m + 1, red.shape[0] * 2)
+            red = _grow_rows(red, cap, 0.0)
+            blue = _grow_rows(blue, cap, 0.0)
+        for i in range(m):
+            # 与逐期实现同序：先衰减再叠加当前期
+            hr = red[start + i] * decay if decay < 1.0 else red[start + i].copy()
+            hb = blue[start + i] * decay if decay < 1.0 else blue[start + i].copy()
+            red[start + i + 1] = hr + red_hot[i]
+            blue[start + i + 1] = hb + blue_hot[i]
+        self._decayed[decay] = (red, blue)
+
+    def decayed(self, decay: float, end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """截至 end 期之前的指数衰减计数（红 33、蓝 16，未归一化）。"""
+        decay = float(decay)
+        if decay not in self._decayed:
+            self._decayed[decay] = (np.zeros((1, RED_N)), np.zeros((1, BLUE_N)))
+            n = self._n
+            if n:
+                red_hot = np.diff(self._red_cum[:n + 1], axis=0)
+                blue_hot = np.diff(self._blue_cum[:n + 1], axis=0)
+                self._extend_decayed(decay, red_hot, blue_hot, 0)
+        red, blue = self._decayed[decay]
+        end = self._end(end)
+        return red[end], blue[end]
+
+    def decayed_matrix(self, decay: float) -> Tuple[np.ndarray, np.ndarray]:
+        """全部 n+1 行的衰减计数矩阵（截去预留容量的视图）。"""
+        self.decayed(decay)
+        red, blue = self._decayed[float(decay)]
+        return red[:self._n + 1], blue[:self._n + 1]
@@ -0,0 +1,144 @@
+"""
+持续预测流水日志（分段滚动 JSONL）
+- 按固定行数切分为段文件：追加 O(1)，不再整文件回读重写
+- 超出保留行数时整段删除最旧段文件完成截断
+- latest 快照通过临时文件 + os.replace 原子替换，读取方不会看到半截 JSON
+- tail() 自最新段向前读取最近 N 条记录，供 API/报告使用而无需读取全部历史
+
+目录布局：<dir>/seg_000000000001.jsonl, seg_000000000002.jsonl, ...
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+from typing import Any, Dict, List, Optional
+
+_SEG_RE = re.compile(r'^seg_(\d{12})\.jsonl$')
+
+
+def _default_file_mode() -> int:
+    # mkstemp 固定以 0600 创建；按当前 umask 还原普通 open() 的权限，替换后读取方（静态服务等）仍可读
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_json_atomic(path: str, obj: Any) -> None:
+    """原子写 JSON：同目录临时文件写完后 rename 覆盖。"""
+    d = os.path.dirname(os.path.abspath(path))
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=d)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, _default_file_mode())
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except Exception:
+            pass
+        raise
+
+
+def _list_segments(directory: str) -> List[int]:
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    seqs = []
+    for nm in names:
+        m = _SEG_RE.match(nm)
+        if m:
+            seqs.append(int(m.group(1)))
+    seqs.sort()
+    return seqs
+
+
+def _seg_path(directory: str, seq: int) -> str:
+    return os.path.join(directory, f'seg_{seq:012d}.jsonl')
+
+
+class RotatingJsonlLog:
+    """分段滚动的 JSONL 追加日志（单写多读）。"""
+
+    def __init__(self, directory: str, segment_lines: int = 500, max_lines: int = 2000):
+        self.directory = directory
+        self.segment_lines = max(1, int(segment_lines))
+        self.max_lines = max(1, int(max_lines))
+        os.makedirs(self.directory, exist_ok=True)
+        self._segments = _list_segments(self.directory)
+        self._active_lines = 0
+        if self._segments:
+            # 仅统计最新一段的行数（有界），用于判断何时滚动
+            try:
+                with open(_seg_path(self.directory, self._segments[-1]), 'rb') as f:
+                    self._active_lines = sum(1 for _ in f)
+            except Exception:
+                self._active_lines = self.segment_lines
+
+    def _roll(self) -> None:
+        nxt = (self._segments[-1] + 1) if self._segments else 1
+        self._segments.append(nxt)
+        self._active_lines = 0
+        # 保留足以覆盖 max_lines 的完整段数，其余整段删除
+        keep = (self.max_lines + self.segment_lines - 1) // self.segment_lines + 1
+        while len(self._segments) > keep:
+            old = self._segments.pop(0)
+            try:
+                os.unlink(_seg_path(self.directory, old))
+            except FileNotFoundError:
+                pass
+
+    def append(self, rec: Dict[str, Any]) -> None:
+        if not self._segments or self._active_lines >= self.segment_lines:
+            self._roll()
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with open(_seg_path(self.directory, self._segments[-1]), 'a', encoding='utf-8') as f:
+            f.write(line)
+        self._active_lines += 1
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        return tail_records(self.directory, n)
+
+
+def tail_records(directory: str, n: int, legacy_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """读取最近 n 条记录（旧→新）。目录无分段时可回退读取旧版单文件 JSONL。"""
+    n = max(0, int(n))
+    if n == 0:
+        return []
+    out: List[Dict[str, Any]] = []
+    segs = _list_segments(directory)
+    if not segs and legacy_path and os.path.exists(legacy_path):
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()[-n:]
+        return _parse_lines(lines)
+    for seq in reversed(segs):
+        try:
+            with open(_seg_path(directory, seq), 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            # 读取期间被滚动删除，继续更早的段已无意义
+            break
+        out = _parse_lines(lines[-(n - len(out)):]) + out
+        if len(out) >= n:
+            break
+    return out[-n:]
+
+
+def _parse_lines(lines: List[str]) -> List[Dict[str, Any]]:
+    recs: List[Dict[str, Any]] = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            recs.append(json.loads(line))
+        except Exception:
+            # 写入中的半行，跳过
+            continue
+    return recs
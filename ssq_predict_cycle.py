@@ -28,18 +28,40 @@ import os
 import random
 import re
 import time
-from collections import Counter
 from typing import Dict, List, Optional, Tuple
 
 from ssq_data import SSQDataManager
 from ssq_ai_model import SSQAIModel
-from cultural_predictor import CulturalPredictor
+from cultural_predictor import CulturalPredictor, SCORE_CACHE
 from cultural_deep_model import CulturalDeepModel
+from ssq_attempt_log import AttemptLog
+from ssq_attempt_budget import AttemptBudget
+from ssq_live_log import RotatingJsonlLog, write_json_atomic
+from ssq_fusion_engine import FusionEngine, weighted_sample_single, weighted_sample_without_replacement
+from ssq_strategy_table import StrategyTable, TABLE_VERSION
 try:
     from deepseek_api import DeepseekAPI  # type: ignore
 except Exception:  # 导入失败时保持占位，运行时再降级
     DeepseekAPI = None  # type: ignore
 
+# 每次融合都会读取的权重/先验/文化记忆 JSON：按 (mtime, size) 缓存解析结果，文件变化时自动重读
+_JSON_CACHE: Dict[str, Tuple[Tuple[int, int], object]] = {}
+
+
+def load_json_cached(path: str):
+    """读取并缓存 JSON 文件；缺失或损坏时与 json.load 一样抛出异常。返回对象为共享只读，调用方不得修改。"""
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    sig = (st.st_mtime_ns, st.st_size)
+    hit = _JSON_CACHE.get(key)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+    with open(key, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    _JSON_CACHE[key] = (sig, data)
+    return data
+
+
 class SSQPredictCycle:
     def __init__(self, data_path: str):
         self.data_manager = SSQDataManager(csv_path=data_path)
@@ -47,12 +69,18 @@ class SSQPredictCycle:
         self.history = self.data_manager.history
         self.models = ['liuyao', 'liuren', 'qimen', 'ai', 'cultural_dl']
         self._last_fusion_trace = None  # 保存最近一次融合的权重/先验轨迹，便于报告与审计
+        self._write_fusion_trace = True  # 是否落盘 reports/fusion_trace_last.json（并行子进程关闭）
         self.match_log: List[Dict[str, object]] = []
-        self.loop_attempts: List[Dict[str, object]] = []
+        self.loop_attempts = AttemptLog()  # 列式尝试日志，兼容 List[Dict] 读取
         self.issue_states: Dict[int, Dict[str, object]] = {}
+        self._frozen_weights: Optional[Dict[str, float]] = None  # 闭环复盘期间固定的融合权重（None 表示按需读取）
         self._deepseek_client: Optional[object] = None
         self._cultural_dl: Optional[CulturalDeepModel] = None
         self._cultural_dl_path = os.getenv('SSQ_CULDL_PATH', 'models/cultural_deep.joblib')
+        self._strategy_table: Optional[StrategyTable] = None  # 术数基础号码预计算表，首次使用时加载
+        self._strategy_table_path = os.getenv(
+            'SSQ_STRATEGY_TABLE_PATH', f'models/ssq_strategy_table_v{TABLE_VERSION}.npy'
+        )
 
         # 可配置融合参数（通过环境变量覆盖）
         self.alpha_red = self._get_env_float('SSQ_ALPHA_RED', 0.1, 0.0, 1.0)
@@ -67,6 +95,15 @@ class SSQPredictCycle:
         self.top_p_red = self._get_env_float('SSQ_TOPP_RED', 1.0, 0.05, 1.0)
         self.top_p_blue = self._get_env_float('SSQ_TOPP_BLUE', 1.0, 0.05, 1.0)
         self.enforce_candidate_diversity = self._get_env_bool('SSQ_DIVERSIFY', True)
+        # AI 模型滚动前推：每期只用之前的开奖，每 SSQ_AI_REFIT_EVERY 期按最近 SSQ_AI_WINDOW 对样本重训
+        self.ai_walk_forward = self._get_env_bool('SSQ_AI_WALK_FORWARD', False)
+        self.ai_refit_every = int(self._get_env_float('SSQ_AI_REFIT_EVERY', 50, 1))
+        self.ai_window = int(self._get_env_float('SSQ_AI_WINDOW', 1000, 0))
+        # 闭环复盘自适应预算：最佳部分命中连续若干轮无明显提升即提前结束本期
+        self.adaptive_budget = self._get_env_bool('SSQ_EARLY_EXIT', False)
+        self.budget_min_rounds = int(self._get_env_float('SSQ_EARLY_EXIT_MIN_ROUNDS', 3, 1))
+        self.budget_patience = int(self._get_env_float('SSQ_EARLY_EXIT_PATIENCE', 3, 1))
+        self.budget_min_gain = self._get_env_float('SSQ_EARLY_EXIT_MIN_GAIN', 0.5, 0.0)
         try:
             self.max_overlap_reds = int(float(os.getenv('SSQ_MAX_OVERLAP', '3')))
             self.max_overlap_reds = max(0, min(5, self.max_overlap_reds))
@@ -100,8 +137,10 @@ class SSQPredictCycle:
         # 连续预测产物路径
         self._reports_dir = os.path.join(os.getcwd(), 'reports')
         self._static_dir = os.path.join(os.getcwd(), 'static')
-        self._live_jsonl = os.path.join(self._reports_dir, 'ssq_live_predictions.jsonl')
+        self._live_jsonl = os.path.join(self._reports_dir, 'ssq_live_predictions.jsonl')  # 旧版单文件（只读兼容）
+        self._live_dir = os.path.join(self._reports_dir, 'ssq_live_predictions.d')
         self._live_latest = os.path.join(self._static_dir, 'ssq_live_prediction.json')
+        self._live_log: Optional[RotatingJsonlLog] = None
 
         # 文化推演与自学习开关/参数
         self.enable_culture_debate = self._get_env_bool('SSQ_CULTURE_DEBATE', True)
@@ -222,81 +261,43 @@ class SSQPredictCycle:
             buckets = [(1,11),(12,22),(23,33)]
         return buckets
 
+    def _strategy_base(self, strategy: str, issue_idx: int):
+        # 重排前的基础号码只依赖期次：优先查预计算表（memmap），表外期次逐期计算
+        if self._strategy_table is None:
+            try:
+                horizon = int(float(os.getenv('SSQ_STRATEGY_TABLE_HORIZON', '8192')))
+                horizon = max(horizon, len(self.history) + 64)
+                self._strategy_table = StrategyTable.load_or_build(self._strategy_table_path, horizon)
+            except Exception:
+                self._strategy_table = StrategyTable()
+        return self._strategy_table.get(strategy, issue_idx)
+
     def predict_liuyao(self, issue_idx):
         # 小六爻：以时为要、重时日，叠加文化五行偏好
-        reds = []
-        base = (issue_idx * 6) % 33
-        for i in range(6):
-            val = (base + i * 5 + i * issue_idx) % 33 + 1
-            reds.append(val)
+        reds, blue = self._strategy_base('liuyao', issue_idx)
         # 文化偏好打分并微调
         red_scores, blue_scores = CulturalPredictor().scores(bias={'hour': 1.6, 'day': 1.2})
         cg = self.cultural_gamma.get('liuyao', {'red': 1.0, 'blue': 1.0})
         reds = self._rerank_with_scores(reds, red_scores, gamma=cg.get('red', 1.0))
-        blue = (sum(reds) + issue_idx) % 16 + 1
         # 小幅叠加文化蓝球偏好
         blue = self._adjust_blue_with_scores(blue, blue_scores, gamma=cg.get('blue', 1.0))
         return sorted(set(reds))[:6], blue
 
     def predict_liuren(self, issue_idx):
         # 小六壬：以月日为纲，叠加文化偏好
-        stems_cycle = [4, 9, 2, 7, 1, 6, 10, 3, 8, 5]
-        branches_cycle = [11, 22, 5, 16, 27, 8, 19, 30, 13, 24, 35, 6]
-        stem = stems_cycle[issue_idx % len(stems_cycle)]
-        branch = branches_cycle[issue_idx % len(branches_cycle)]
-        base = (issue_idx * 7 + stem * 3 + branch) % 33
-        offsets = [stem, branch, stem + branch, stem * 2, branch // 2 + issue_idx, stem * branch]
-        reds = []
-        for off in offsets:
-            val = (base + off) % 33 + 1
-            if val not in reds:
-                reds.append(val)
-            if len(reds) == 6:
-                break
-        while len(reds) < 6:
-            base = (base + 5) % 33
-            val = base + 1
-            if val not in reds:
-                reds.append(val)
+        reds, blue = self._strategy_base('liuren', issue_idx)
         red_scores, blue_scores = CulturalPredictor().scores(bias={'month': 1.5, 'day': 1.3})
         cg = self.cultural_gamma.get('liuren', {'red': 1.0, 'blue': 1.0})
         reds = self._rerank_with_scores(reds, red_scores, gamma=cg.get('red', 1.0))
-        blue = (stem * 3 + branch + issue_idx) % 16 + 1
         blue = self._adjust_blue_with_scores(blue, blue_scores, gamma=cg.get('blue', 1.0))
         return sorted(reds), blue
 
     def predict_qimen(self, issue_idx):
         # 奇门遁甲：以季节与日主为重，叠加文化偏好
-        palaces = [1, 3, 5, 7, 9, 2, 4, 6, 8]
-        gates = [8, 9, 1, 2, 3, 4, 5, 6]
-        wonders = [3, 6, 9]
-        instruments = [6, 7, 8, 9, 1, 2]
-        base = (issue_idx * 9 + palaces[issue_idx % len(palaces)] * 2) % 33
-        reds = []
-        for i in range(6):
-            palace = palaces[(issue_idx + i) % len(palaces)]
-            gate = gates[(issue_idx + i) % len(gates)]
-            wonder = wonders[(issue_idx + i) % len(wonders)]
-            instrument = instruments[(issue_idx + i) % len(instruments)]
-            val = (base + palace * wonder + gate + instrument * (i + 1)) % 33 + 1
-            if val not in reds:
-                reds.append(val)
-            else:
-                val = (val + i + gate) % 33 + 1
-                if val not in reds:
-                    reds.append(val)
-            if len(reds) == 6:
-                break
-        while len(reds) < 6:
-            base = (base + 7) % 33
-            val = base + 1
-            if val not in reds:
-                reds.append(val)
+        reds, blue = self._strategy_base('qimen', issue_idx)
         red_scores, blue_scores = CulturalPredictor().scores(bias={'season': 1.5, 'day': 1.2})
         cg = self.cultural_gamma.get('qimen', {'red': 1.0, 'blue': 1.0})
         reds = self._rerank_with_scores(reds, red_scores, gamma=cg.get('red', 1.0))
-        blue_seed = palaces[issue_idx % len(palaces)] + wonders[issue_idx % len(wonders)]
-        blue = (sum(reds) + blue_seed + issue_idx) % 16 + 1
         blue = self._adjust_blue_with_scores(blue, blue_scores, gamma=cg.get('blue', 1.0))
         return sorted(reds), blue
 
@@ -305,6 +306,10 @@ class SSQPredictCycle:
         # 1. 基于历史开奖数据，自动训练随机森林/XGBoost模型
         # 2. 融合冷热号、奇偶、区间、连号、质数等统计特征
         # 3. 可集成启发式规则与大模型语义解读
+        if self.ai_walk_forward:
+            # 前推模式：以上一期为输入，同一模型版本下同期结果直接取缓存
+            self.ai_model.ensure_walk_forward(issue_idx, self.ai_refit_every, self.ai_window)
+            return self.ai_model.predict_issue(issue_idx)
         reds, blue = self.ai_model.predict()
         return reds, blue
 
@@ -314,12 +319,13 @@ class SSQPredictCycle:
         try:
             # 优先加载
             os.makedirs(os.path.dirname(self._cultural_dl_path), exist_ok=True)
-            mdl = None
-            if os.path.exists(self._cultural_dl_path):
-                mdl = CulturalDeepModel.load(self._cultural_dl_path)
+            # 优先内存映射 .npy 推理导出（纯 NumPy 前向），缺失时回退 joblib 并补写导出
+            mdl = CulturalDeepModel.load_fast(self._cultural_dl_path)
             if mdl is None:
                 mdl = CulturalDeepModel()
-                ok = mdl.fit(self.history)
+                # 与数据管理器共享历史索引（衰减冷热特征直接查表）
+                index = self.data_manager.index() if self.history is self.data_manager.history else None
+                ok = mdl.fit(self.history, index)
                 if ok:
                     try:
                         mdl.save(self._cultural_dl_path)
@@ -428,19 +434,24 @@ class SSQPredictCycle:
             'timestamp': time.time(),
             'meta': meta or {},
         }
-        self.loop_attempts.append(record)
+        # 日志按列追加；返回的 dict 仅供本期融合/外部建议等短期使用
+        self.loop_attempts.add(
+            issue_idx, strategy, record['pred_reds'], pred_blue, record['true_reds'], true_blue,
+            is_match, attempt_count, record['timestamp'], meta,
+        )
         return record
 
     def _load_strategy_weights(self) -> Optional[Dict[str, float]]:
+        if self._frozen_weights is not None:
+            return dict(self._frozen_weights) or None
         path = 'ssq_strategy_weights.json'
         try:
             if os.path.exists(path):
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    w = data.get('weights', {})
-                    if isinstance(w, dict) and w:
-                        # 接受策略集合（含 cultural_dl）
-                        return {str(k): float(v) for k, v in w.items() if str(k) in {'liuyao','liuren','qimen','ai','cultural_dl'}}
+                data = load_json_cached(path)
+                w = data.get('weights', {})
+                if isinstance(w, dict) and w:
+                    # 接受策略集合（含 cultural_dl）
+                    return {str(k): float(v) for k, v in w.items() if str(k) in {'liuyao','liuren','qimen','ai','cultural_dl'}}
         except Exception:
             return None
         # 动态回退：基于最近窗口表现自适应权重（若无配置文件）
@@ -483,26 +494,27 @@ class SSQPredictCycle:
             pass
         return None
 
-    def _fuse_from_attempts(self, attempts: List[Dict[str, object]]) -> Tuple[List[int], int]:
-        reds_counter = Counter()
-        blue_counter = Counter()
+    def _fusion_engine(self, attempts: List[Dict[str, object]]) -> FusionEngine:
+        """按期构造融合上下文：权重、号码先验、AI/文化分布与文化记忆只加载一次。
+
+        返回的引擎只与期次有关（与本期已有尝试无关），同一期内的多轮融合/多候选应复用它，不再逐轮重建。
+        """
         weights = self._load_strategy_weights() or {}
         fusion_trace = {"weights": dict(weights), "priors": {}}
         # 读取号码先验作为平滑项
         red_prior = {n: 0.0 for n in range(1,34)}
         blue_prior = {n: 0.0 for n in range(1,17)}
         try:
-            with open('ssq_ball_priors.json', 'r', encoding='utf-8') as f:
-                pri = json.load(f)
-                r = pri.get('red', {})
-                b = pri.get('blue', {})
-                # 归一化为概率
-                r_sum = sum(float(r.get(str(k), 0)) for k in range(1,34)) or 1.0
-                b_sum = sum(float(b.get(str(k), 0)) for k in range(1,17)) or 1.0
-                for k in range(1,34):
-                    red_prior[k] = float(r.get(str(k), 0)) / r_sum
-                for k in range(1,17):
-                    blue_prior[k] = float(b.get(str(k), 0)) / b_sum
+            pri = load_json_cached('ssq_ball_priors.json')
+            r = pri.get('red', {})
+            b = pri.get('blue', {})
+            # 归一化为概率
+            r_sum = sum(float(r.get(str(k), 0)) for k in range(1,34)) or 1.0
+            b_sum = sum(float(b.get(str(k), 0)) for k in range(1,17)) or 1.0
+            for k in range(1,34):
+                red_prior[k] = float(r.get(str(k), 0)) / r_sum
+            for k in range(1,17):
+                blue_prior[k] = float(b.get(str(k), 0)) / b_sum
         except Exception:
             pass
         # 结合 AI 与文化深度模型的分布作为先验（均值融合近似贝叶斯）
@@ -519,7 +531,11 @@ class SSQPredictCycle:
             ai_red_p, ai_blue_p = None, None
             if hasattr(self.ai_model, 'get_distributions'):
                 try:
-                    ai_red_p, ai_blue_p = self.ai_model.get_distributions()
+                    if self.ai_walk_forward:
+                        self.ai_model.ensure_walk_forward(cur_issue, self.ai_refit_every, self.ai_window)
+                        ai_red_p, ai_blue_p = self.ai_model.get_distributions(cur_issue)
+                    else:
+                        ai_red_p, ai_blue_p = self.ai_model.get_distributions()
                 except Exception:
                     ai_red_p, ai_blue_p = None, None
             # 文化深度分布
@@ -539,117 +555,30 @@ class SSQPredictCycle:
             fusion_trace["priors"] = {"red": red_prior.copy(), "blue": blue_prior.copy()}
         except Exception:
             pass
-        # 累计策略计票
-        for attempt in attempts:
-            w = 1.0
-            try:
-                w = float(weights.get(str(attempt.get('strategy')), 1.0))
-            except Exception:
-                w = 1.0
-            # 记录权重轨迹
-            fusion_trace.setdefault("weights", {})[str(attempt.get('strategy'))] = w
-            for red in attempt.get('pred_reds', []):
-                reds_counter[red] += w
-            blue = attempt.get('pred_blue')
-            if isinstance(blue, int):
-                blue_counter[blue] += w
-        # 加入小幅先验平滑与“文化记忆”，避免冷门极端化（强度可由环境变量配置）
-        alpha_red = float(self.alpha_red)
-        alpha_blue = float(self.alpha_blue)
-        total_red_votes = float(sum(reds_counter.values()))
-        total_blue_votes = float(sum(blue_counter.values()))
-        if total_red_votes > 0:
-            for k in range(1,34):
-                reds_counter[k] += alpha_red * red_prior.get(k, 0.0) * total_red_votes
-        if total_blue_votes > 0:
-            for k in range(1,17):
-                blue_counter[k] += alpha_blue * blue_prior.get(k, 0.0) * total_blue_votes
         # 文化记忆（来自“自学自推”）作为额外平滑
+        mem = None
         if (self.alpha_mem_red > 1e-9 or self.alpha_mem_blue > 1e-9):
             mem = self._load_cultural_memory()
-            if mem:
-                mred = mem.get('red', {})
-                mblue = mem.get('blue', {})
-                rsum = sum(float(mred.get(k, 0.0)) for k in range(1,34))
-                bsum = sum(float(mblue.get(k, 0.0)) for k in range(1,17))
-                if total_red_votes > 0 and rsum > 0:
-                    for k in range(1,34):
-                        reds_counter[k] += self.alpha_mem_red * (float(mred.get(k, 0.0)) / rsum) * total_red_votes
-                if total_blue_votes > 0 and bsum > 0:
-                    for k in range(1,17):
-                        blue_counter[k] += self.alpha_mem_blue * (float(mblue.get(k, 0.0)) / bsum) * total_blue_votes
-        # 采样或贪心选择
-        fused_reds: List[int] = []
-        use_sampling_red = (abs(self.temp_red - 1.0) > 1e-9) or (self.top_p_red < 0.999)
-        if use_sampling_red and sum(reds_counter.values()) > 0:
-            fused_reds = self._weighted_sample_without_replacement(
-                values=list(range(1,34)),
-                weights=[float(reds_counter.get(i, 0.0)) for i in range(1,34)],
-                k=6,
-                temperature=self.temp_red,
-                top_p=self.top_p_red,
-            )
-        else:
-            fused_reds = [num for num, _ in reds_counter.most_common(6)]
-            while len(fused_reds) < 6:
-                candidate = random.randint(1, 33)
-                if candidate not in fused_reds:
-                    fused_reds.append(candidate)
-        # 多样性约束：可配置的区域覆盖
-        if self.enforce_region_coverage:
-            def _region_idx(x: int) -> Optional[int]:
-                for i,(lo,hi) in enumerate(self.region_buckets):
-                    if lo <= x <= hi:
-                        return i
-                return None
-            regions: Dict[int,int] = {i:0 for i in range(len(self.region_buckets))}
-            for r in fused_reds:
-                ri = _region_idx(r)
-                if ri is not None:
-                    regions[ri] += 1
-            # 若有缺失区域，则尝试从剩余高票中补齐
-            if any(v == 0 for v in regions.values()):
-                candidates_sorted = [n for n, _ in reds_counter.most_common(33) if n not in fused_reds]
-                # 循环补齐至每个分桶至少1个
-                for rid, v in regions.items():
-                    if v > 0:
-                        continue
-                    for c in candidates_sorted:
-                        ri = _region_idx(c)
-                        if ri == rid:
-                            # 替换一个属于当前最多分桶的元素
-                            # 统计当前分桶分布
-                            counts = {i:0 for i in range(len(self.region_buckets))}
-                            for val in fused_reds:
-                                rj = _region_idx(val)
-                                if rj is not None:
-                                    counts[rj] += 1
-                            # 找到一个可替换位
-                            replaced = False
-                            for i, v0 in enumerate(list(fused_reds)):
-                                rj = _region_idx(v0)
-                                if rj is not None and counts[rj] > 1:
-                                    counts[rj] -= 1
-                                    fused_reds[i] = c
-                                    regions[rid] += 1
-                                    replaced = True
-                                    break
-                            if replaced:
-                                break
-        fused_blue = None
-        use_sampling_blue = (abs(self.temp_blue - 1.0) > 1e-9) or (self.top_p_blue < 0.999)
-        if blue_counter:
-            if use_sampling_blue:
-                fused_blue = self._weighted_sample_single(
-                    values=list(range(1,17)),
-                    weights=[float(blue_counter.get(i, 0.0)) for i in range(1,17)],
-                    temperature=self.temp_blue,
-                    top_p=self.top_p_blue,
-                )
-            else:
-                fused_blue = blue_counter.most_common(1)[0][0]
-        if fused_blue is None:
-            fused_blue = random.randint(1, 16)
+        return FusionEngine(
+            weights=weights,
+            red_prior=[red_prior[k] for k in range(1,34)],
+            blue_prior=[blue_prior[k] for k in range(1,17)],
+            mem_red=mem.get('red', {}) if mem else None,
+            mem_blue=mem.get('blue', {}) if mem else None,
+            alpha_red=float(self.alpha_red),
+            alpha_blue=float(self.alpha_blue),
+            alpha_mem_red=float(self.alpha_mem_red),
+            alpha_mem_blue=float(self.alpha_mem_blue),
+            temp_red=self.temp_red,
+            temp_blue=self.temp_blue,
+            top_p_red=self.top_p_red,
+            top_p_blue=self.top_p_blue,
+            region_buckets=self.region_buckets,
+            enforce_region_coverage=self.enforce_region_coverage,
+            trace=fusion_trace,
+        )
+
+    def _store_fusion_trace(self, fused_reds: List[int], fused_blue: int, fusion_trace: Dict[str, object]) -> None:
         # 存储轨迹（内存+文件），便于报告采集
         try:
             self._last_fusion_trace = {
@@ -657,88 +586,66 @@ class SSQPredictCycle:
                 "fused_blue": int(fused_blue),
                 "fusion": fusion_trace,
             }
+            if not self._write_fusion_trace:
+                return
             os.makedirs('reports', exist_ok=True)
             with open('reports/fusion_trace_last.json', 'w', encoding='utf-8') as f:
                 json.dump(self._last_fusion_trace, f, ensure_ascii=False, indent=2)
         except Exception:
             pass
-        return sorted(fused_reds[:6]), fused_blue
+
+    def _fuse_from_attempts(self, attempts: List[Dict[str, object]],
+                            engine: Optional[FusionEngine] = None) -> Tuple[List[int], int]:
+        if engine is None:
+            engine = self._fusion_engine(attempts)
+        fused_reds, fused_blue = engine.sample(engine.tally(attempts), 1)[0]
+        self._store_fusion_trace(fused_reds, fused_blue, engine.trace)
+        return fused_reds, fused_blue
 
     # ---------- 采样辅助 ----------
     def _weighted_sample_single(self, values: List[int], weights: List[float], temperature: float = 1.0, top_p: float = 1.0) -> int:
-        assert len(values) == len(weights)
-        # 温度缩放：p_i ∝ w_i^(1/T)
-        ws = [max(0.0, w) for w in weights]
-        if sum(ws) <= 0:
-            return random.choice(values)
-        if abs(temperature - 1.0) > 1e-9:
-            invT = 1.0 / max(1e-6, temperature)
-            ws = [w ** invT for w in ws]
-        s = sum(ws)
-        probs = [w / s for w in ws]
-        # top-p 过滤
-        if top_p < 0.999:
-            pairs = sorted(zip(values, probs), key=lambda x: x[1], reverse=True)
-            cum = 0.0
-            kept: List[Tuple[int,float]] = []
-            for v, p in pairs:
-                kept.append((v, p))
-                cum += p
-                if cum >= top_p:
-                    break
-            vs = [v for v, _ in kept]
-            ps = [p for _, p in kept]
-            s2 = sum(ps) or 1.0
-            ps = [p / s2 for p in ps]
-            return random.choices(vs, weights=ps, k=1)[0]
-        return random.choices(values, weights=probs, k=1)[0]
+        return weighted_sample_single(values, weights, temperature=temperature, top_p=top_p)
 
     def _weighted_sample_without_replacement(self, values: List[int], weights: List[float], k: int, temperature: float = 1.0, top_p: float = 1.0) -> List[int]:
-        selected: List[int] = []
-        pool_vals = list(values)
-        pool_w = [max(0.0, w) for w in weights]
-        for _ in range(max(0, k)):
-            if not pool_vals:
-                break
-            choice = self._weighted_sample_single(pool_vals, pool_w, temperature=temperature, top_p=top_p)
-            selected.append(choice)
-            # 移除已选择项
-            idx = pool_vals.index(choice)
-            pool_vals.pop(idx)
-            pool_w.pop(idx)
-        # 若不够则随机补齐
-        while len(selected) < k:
-            c = random.choice([v for v in range(1,34) if v not in selected])
-            selected.append(c)
-        return selected
-
-    def generate_candidates_from_attempts(self, attempts: List[Dict[str, object]], count: int = 5) -> List[Dict[str, int]]:
+        return weighted_sample_without_replacement(values, weights, k, temperature=temperature, top_p=top_p)
+
+    def generate_candidates_from_attempts(self, attempts: List[Dict[str, object]], count: int = 5,
+                                          engine: Optional[FusionEngine] = None) -> List[Dict[str, int]]:
         """基于若干尝试记录，生成多组候选，带多样性约束。"""
         candidates: List[Tuple[List[int], int]] = []
         tries_per = 50
-        for _ in range(max(1, min(50, count))):
-            ok = False
-            for _t in range(tries_per):
-                reds, blue = self._fuse_from_attempts(attempts)
-                if not self.enforce_candidate_diversity:
-                    ok = True
-                    cand = (reds, blue)
-                    break
-                # 检查与已选的重合度
-                too_similar = False
-                for r0, _b0 in candidates:
-                    overlap = len(set(r0) & set(reds))
-                    if overlap > self.max_overlap_reds:
-                        too_similar = True
+        n_slots = max(1, min(50, count))
+        # 融合上下文与计票只做一次，候选按批量采样逐个取用（随机流与逐次融合一致）
+        if engine is None:
+            engine = self._fusion_engine(attempts)
+        draws = engine.iter_samples(engine.tally(attempts), batch=n_slots)
+        try:
+            for _ in range(n_slots):
+                ok = False
+                for _t in range(tries_per):
+                    reds, blue = next(draws)
+                    if not self.enforce_candidate_diversity:
+                        ok = True
+                        cand = (reds, blue)
                         break
-                if not too_similar:
-                    ok = True
-                    cand = (reds, blue)
-                    break
-            if not ok:
-                # 退化：直接接受当前采样
-                cand = self._fuse_from_attempts(attempts)
-            candidates.append(cand)
+                    # 检查与已选的重合度
+                    too_similar = False
+                    for r0, _b0 in candidates:
+                        overlap = len(set(r0) & set(reds))
+                        if overlap > self.max_overlap_reds:
+                            too_similar = True
+                            break
+                    if not too_similar:
+                        ok = True
+                        cand = (reds, blue)
+                        break
+                if not ok:
+                    # 退化：直接接受当前采样
+                    cand = next(draws)
+                candidates.append(cand)
+        finally:
+            draws.close()
+        self._store_fusion_trace(cand[0], cand[1], engine.trace)
         raw = [{'reds': sorted(r), 'blue': int(b)} for r, b in candidates]
         # 文化推演与微调（可开关）
         if self.enable_culture_debate:
@@ -757,6 +664,16 @@ class SSQPredictCycle:
         except Exception:
             return None
 
+    def _dl_prefetch(self, indices: List[int]) -> None:
+        """一次前向计算预热多期分布；随后逐期读取命中模型内的按期 LRU。"""
+        mdl = self._ensure_cultural_dl()
+        if mdl is None:
+            return
+        try:
+            mdl.predict_distributions_batch(indices)
+        except Exception:
+            pass
+
     def _dl_score(self, issue_idx: int, reds: List[int], blue: int) -> float:
         d = self._dl_distributions(issue_idx)
         if not d:
@@ -782,6 +699,7 @@ class SSQPredictCycle:
             # 先计算文化分数与深度分数，并归一后线性混合
             cul_scores: List[float] = []
             dl_scores: List[float] = []
+            self._dl_prefetch([base_idx + i for i in range(len(cands))])
             for i, c in enumerate(cands):
                 reds = list(c.get('reds', []))
                 blue = int(c.get('blue', 1))
@@ -902,8 +820,7 @@ class SSQPredictCycle:
         try:
             if not os.path.exists(self.culmem_path):
                 return None
-            with open(self.culmem_path, 'r', encoding='utf-8') as f:
-                raw = json.load(f)
+            raw = load_json_cached(self.culmem_path)
             red = {int(k): float(v) for k, v in (raw.get('red', {}) or {}).items() if 1 <= int(k) <= 33}
             blue = {int(k): float(v) for k, v in (raw.get('blue', {}) or {}).items() if 1 <= int(k) <= 16}
             return {'red': red, 'blue': blue}
@@ -1075,156 +992,322 @@ class SSQPredictCycle:
         log_dir: str = 'reports',
         train_ai: bool = True,
         max_seconds_per_issue: float | None = None,
+        workers: int | None = None,
+        seed: int | None = None,
+        adaptive_budget: bool | None = None,
     ) -> Dict[str, object]:
-        """连续执行闭环预测并生成综合摘要。"""
+        """连续执行闭环预测并生成综合摘要。
+
+        单进程时逐期顺序复盘，融合权重随已完成期次动态回退（无权重文件时）。
+        workers>1 时按期次区间切分到进程池并行复盘：每期使用由 (seed, 期次) 派生的独立随机流，
+        融合权重在开始前固定一次，结果按期次顺序合并，与进程数和调度次序无关；
+        子进程的 AI/文化深度模型缓存命中计数合并回主进程。
+        adaptive_budget 为真（默认取 SSQ_EARLY_EXIT）时，按最佳部分命中的边际提升提前结束各期，
+        摘要 adaptive_budget 字段给出节省的尝试次数与 CPU 时间估计。
+        """
         self.loop_attempts.clear()
+        parallel = workers is not None and int(workers) > 1 and len(self.history) > 1
+        frozen: Optional[Dict[str, float]] = None
+        if parallel:
+            # 并行时先按上一轮的 issue_states 固定权重：不随各块内已完成期次（及分块方式）变化
+            self._frozen_weights = None
+            frozen = self._load_strategy_weights() or {}
         self.issue_states.clear()
         os.makedirs(log_dir, exist_ok=True)
-        if train_ai:
+        if train_ai and not self.ai_walk_forward:
+            # 前推模式下按期增量重训，不做全量训练
             try:
                 self.ai_model.train()
             except Exception:
                 pass
-        for issue_idx, (true_reds_raw, true_blue) in enumerate(self.history):
-            true_reds = list(true_reds_raw)
-            issue_state: Dict[str, object] = {
-                'issue': issue_idx,
-                'attempts': 0,
-                'matched': False,
-            }
-            issue_attempts: List[Dict[str, object]] = []
-            start_ts = time.time()
-            attempts_unlimited = (max_attempts_per_issue is None) or (int(max_attempts_per_issue) <= 0)
-            def _time_budget_ok() -> bool:
-                if max_seconds_per_issue is None:
-                    return True
-                try:
-                    return (time.time() - start_ts) < float(max_seconds_per_issue)
-                except Exception:
-                    return True
-            while attempts_unlimited or issue_state['attempts'] < max_attempts_per_issue:
-                if not _time_budget_ok():
-                    break
-                for model in self.models:
-                    if model == 'liuyao':
-                        pred_reds, pred_blue = self.predict_liuyao(issue_idx)
-                    elif model == 'liuren':
-                        pred_reds, pred_blue = self.predict_liuren(issue_idx)
-                    elif model == 'qimen':
-                        pred_reds, pred_blue = self.predict_qimen(issue_idx)
-                    elif model == 'ai':
-                        pred_reds, pred_blue = self.predict_ai(issue_idx)
-                    elif model == 'cultural_dl':
-                        pred_reds, pred_blue = self.predict_cultural_dl(issue_idx)
-                    else:
-                        continue
-                    attempt = self._record_attempt(
-                        issue_idx,
-                        model,
-                        pred_reds,
-                        pred_blue,
-                        true_reds,
-                        true_blue,
-                        issue_state,
-                    )
-                    issue_attempts.append(attempt)
-                    if issue_state.get('matched'):
-                        break
+        # 预计算文化排盘表：复盘内层循环只查表，不再调用历法库
+        try:
+            SCORE_CACHE.precompute(hours=int(float(os.getenv('SSQ_CULTURE_TABLE_HOURS', '48'))))
+        except Exception:
+            pass
+        replay_kwargs = {
+            'max_attempts_per_issue': max_attempts_per_issue,
+            'consult_external': consult_external,
+            'consult_interval': consult_interval,
+            'sleep_interval': sleep_interval,
+            'max_seconds_per_issue': max_seconds_per_issue,
+            'adaptive_budget': self.adaptive_budget if adaptive_budget is None else bool(adaptive_budget),
+        }
+        if parallel:
+            self._run_closed_loop_parallel(int(workers), self._replay_seed(seed), frozen or {}, replay_kwargs)
+        else:
+            for issue_idx, (true_reds_raw, true_blue) in enumerate(self.history):
+                self._replay_issue(issue_idx, true_reds_raw, true_blue, **replay_kwargs)
+        summary = self._build_closed_loop_summary(max_attempts_per_issue)
+        self._persist_closed_loop_summary(log_dir, summary)
+        return summary
+
+    @staticmethod
+    def _replay_seed(seed: int | None) -> int:
+        if seed is not None:
+            return int(seed)
+        raw = os.getenv('SSQ_SEED')
+        if raw is not None:
+            try:
+                return int(raw)
+            except Exception:
+                pass
+        return random.getrandbits(32)
+
+    def _run_closed_loop_parallel(self, workers: int, base_seed: int, weights: Dict[str, float],
+                                  replay_kwargs: Dict[str, object]) -> None:
+        from concurrent.futures import ProcessPoolExecutor
+        n = len(self.history)
+        # 切分为多于进程数的连续区间，均衡各期耗时差异
+        n_chunks = max(1, min(n, workers * 4))
+        step = (n + n_chunks - 1) // n_chunks
+        tasks = [(lo, min(n, lo + step), base_seed, weights, replay_kwargs) for lo in range(0, n, step)]
+        # 主进程先备好文化深度模型，子进程直接继承，避免各自训练/并发写模型文件
+        self._ensure_cultural_dl()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_closed_loop_worker_init, initargs=(self,)) as pool:
+            # map 保持提交顺序，合并结果与调度无关
+            for states, attempts, counters in pool.map(_closed_loop_worker, tasks):
+                for st in states:
+                    self.issue_states[int(st['issue'])] = st
+                self.loop_attempts.extend(attempts)
+                self._merge_cache_counters(counters)
+
+    def _cache_counters(self) -> Dict[str, int]:
+        return {
+            'ai_hits': int(getattr(self.ai_model, 'cache_hits', 0) or 0),
+            'ai_misses': int(getattr(self.ai_model, 'cache_misses', 0) or 0),
+            'culdl_hits': int(getattr(self._cultural_dl, 'dist_hits', 0) or 0),
+            'culdl_misses': int(getattr(self._cultural_dl, 'dist_misses', 0) or 0),
+        }
+
+    def _merge_cache_counters(self, counters: Dict[str, int]) -> None:
+        """把子进程本块的缓存命中增量累加到主进程模型上，供摘要 ai_cache/culdl_cache 汇总。"""
+        for obj, prefix, hits, misses in ((self.ai_model, 'ai', 'cache_hits', 'cache_misses'),
+                                          (self._cultural_dl, 'culdl', 'dist_hits', 'dist_misses')):
+            if obj is None:
+                continue
+            try:
+                setattr(obj, hits, getattr(obj, hits, 0) + int(counters.get(f'{prefix}_hits', 0)))
+                setattr(obj, misses, getattr(obj, misses, 0) + int(counters.get(f'{prefix}_misses', 0)))
+            except Exception:
+                pass
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # 外部客户端不跨进程传递，子进程按需重建
+        state['_deepseek_client'] = None
+        return state
+
+    def _replay_issue(
+        self,
+        issue_idx: int,
+        true_reds_raw: List[int],
+        true_blue: int,
+        max_attempts_per_issue: int = 120,
+        consult_external: bool = True,
+        consult_interval: int = 12,
+        sleep_interval: float = 0.0,
+        max_seconds_per_issue: float | None = None,
+        adaptive_budget: bool = False,
+    ) -> Dict[str, object]:
+        """对单期执行闭环尝试直至匹配、触达上限或（adaptive_budget）部分命中不再提升，结果写入 issue_states / loop_attempts。"""
+        true_reds = list(true_reds_raw)
+        issue_state: Dict[str, object] = {
+            'issue': issue_idx,
+            'attempts': 0,
+            'matched': False,
+        }
+        issue_attempts: List[Dict[str, object]] = []
+        start_ts = time.time()
+        start_cpu = time.process_time()
+        budget = AttemptBudget(self.budget_min_rounds, self.budget_patience, self.budget_min_gain) if adaptive_budget else None
+        engine: Optional[FusionEngine] = None  # 本期融合上下文：首轮融合时构建，之后各轮复用
+        early_exit = False
+        attempts_unlimited = (max_attempts_per_issue is None) or (int(max_attempts_per_issue) <= 0)
+        def _time_budget_ok() -> bool:
+            if max_seconds_per_issue is None:
+                return True
+            try:
+                return (time.time() - start_ts) < float(max_seconds_per_issue)
+            except Exception:
+                return True
+        while attempts_unlimited or issue_state['attempts'] < max_attempts_per_issue:
+            if not _time_budget_ok():
+                break
+            round_start = len(issue_attempts)
+            for model in self.models:
+                if model == 'liuyao':
+                    pred_reds, pred_blue = self.predict_liuyao(issue_idx)
+                elif model == 'liuren':
+                    pred_reds, pred_blue = self.predict_liuren(issue_idx)
+                elif model == 'qimen':
+                    pred_reds, pred_blue = self.predict_qimen(issue_idx)
+                elif model == 'ai':
+                    pred_reds, pred_blue = self.predict_ai(issue_idx)
+                elif model == 'cultural_dl':
+                    pred_reds, pred_blue = self.predict_cultural_dl(issue_idx)
+                else:
+                    continue
+                attempt = self._record_attempt(
+                    issue_idx,
+                    model,
+                    pred_reds,
+                    pred_blue,
+                    true_reds,
+                    true_blue,
+                    issue_state,
+                )
+                issue_attempts.append(attempt)
                 if issue_state.get('matched'):
                     break
-                if (not attempts_unlimited) and issue_state['attempts'] >= max_attempts_per_issue:
-                    break
-                if issue_attempts:
-                    fused_reds, fused_blue = self._fuse_from_attempts(issue_attempts)
-                    fused_attempt = self._record_attempt(
-                        issue_idx,
-                        'heuristic_fusion',
-                        fused_reds,
-                        fused_blue,
-                        true_reds,
-                        true_blue,
-                        issue_state,
-                        meta={'source': 'frequency_majority'},
-                    )
-                    issue_attempts.append(fused_attempt)
-                    if issue_state.get('matched'):
-                        break
-                if not _time_budget_ok():
-                    break
-                if (not attempts_unlimited) and issue_state['attempts'] >= max_attempts_per_issue:
-                    break
-                random_reds, random_blue = self._random_numbers()
-                random_attempt = self._record_attempt(
+            if issue_state.get('matched'):
+                break
+            if (not attempts_unlimited) and issue_state['attempts'] >= max_attempts_per_issue:
+                break
+            if issue_attempts:
+                if engine is None:
+                    engine = self._fusion_engine(issue_attempts)
+                fused_reds, fused_blue = self._fuse_from_attempts(issue_attempts, engine)
+                fused_attempt = self._record_attempt(
                     issue_idx,
-                    'random_fallback',
-                    random_reds,
-                    random_blue,
+                    'heuristic_fusion',
+                    fused_reds,
+                    fused_blue,
                     true_reds,
                     true_blue,
                     issue_state,
-                    meta={'source': 'stochastic'},
+                    meta={'source': 'frequency_majority'},
                 )
-                issue_attempts.append(random_attempt)
+                issue_attempts.append(fused_attempt)
                 if issue_state.get('matched'):
                     break
-                if (
-                    consult_external
-                    and issue_state['attempts'] >= consult_interval
-                    and issue_state['attempts'] % consult_interval == 0
-                ):
-                    suggestion = self._consult_deepseek(
-                        issue_idx,
-                        true_reds,
-                        true_blue,
-                        issue_state,
-                        issue_attempts,
-                    )
-                    if suggestion:
-                        issue_attempts.append(suggestion)
-                        if issue_state.get('matched'):
-                            break
-                if not _time_budget_ok():
-                    break
-                if (not attempts_unlimited) and issue_state['attempts'] >= max_attempts_per_issue:
-                    break
-                if sleep_interval > 0:
-                    time.sleep(sleep_interval)
-            if not issue_state.get('matched'):
-                issue_state['matched'] = False
-                issue_state.setdefault('strategies', {})
-                # 构造备注：兼容按次数与按时间两种限制
-                remark_parts = []
-                if not attempts_unlimited:
-                    remark_parts.append(f"未在尝试上限 {max_attempts_per_issue} 次内完成完全匹配")
-                if max_seconds_per_issue is not None:
-                    remark_parts.append(f"已达时间上限 {max_seconds_per_issue}s")
-                if remark_parts:
-                    issue_state['remarks'] = '，'.join(remark_parts) + '，已自动进入下一期。'
-                else:
-                    issue_state['remarks'] = '已自动进入下一期。'
-            # 汇总每期的外部建议采纳统计，便于报告做趋势分析
-            try:
-                strategies = issue_state.get('strategies', {}) or {}
-                ds = strategies.get('deepseek_suggestion', {}) or {}
-                issue_state['deepseek_attempts'] = int(ds.get('attempts', 0))
-                issue_state['deepseek_matched'] = bool(
-                    issue_state.get('matched_strategy') == 'deepseek_suggestion' or int(ds.get('matches', 0)) > 0
+            if not _time_budget_ok():
+                break
+            if (not attempts_unlimited) and issue_state['attempts'] >= max_attempts_per_issue:
+                break
+            random_reds, random_blue = self._random_numbers()
+            random_attempt = self._record_attempt(
+                issue_idx,
+                'random_fallback',
+                random_reds,
+                random_blue,
+                true_reds,
+                true_blue,
+                issue_state,
+                meta={'source': 'stochastic'},
+            )
+            issue_attempts.append(random_attempt)
+            if issue_state.get('matched'):
+                break
+            if (
+                consult_external
+                and issue_state['attempts'] >= consult_interval
+                and issue_state['attempts'] % consult_interval == 0
+            ):
+                suggestion = self._consult_deepseek(
+                    issue_idx,
+                    true_reds,
+                    true_blue,
+                    issue_state,
+                    issue_attempts,
                 )
-            except Exception:
-                pass
-            self.issue_states[issue_idx] = issue_state
-        summary = self._build_closed_loop_summary(max_attempts_per_issue)
-        self._persist_closed_loop_summary(log_dir, summary)
-        return summary
+                if suggestion:
+                    issue_attempts.append(suggestion)
+                    if issue_state.get('matched'):
+                        break
+            if not _time_budget_ok():
+                break
+            if (not attempts_unlimited) and issue_state['attempts'] >= max_attempts_per_issue:
+                break
+            if budget is not None:
+                for a in issue_attempts[round_start:]:
+                    budget.observe(a.get('strategy', ''), a.get('pred_reds', []), a.get('pred_blue', 0), true_reds, true_blue)
+                if budget.end_round():
+                    early_exit = True
+                    break
+            if sleep_interval > 0:
+                time.sleep(sleep_interval)
+        if budget is not None:
+            self._record_budget(issue_state, budget, early_exit, max_attempts_per_issue, max_seconds_per_issue, start_ts, start_cpu)
+        if not issue_state.get('matched'):
+            issue_state['matched'] = False
+            issue_state.setdefault('strategies', {})
+            # 构造备注：兼容按次数与按时间两种限制
+            remark_parts = []
+            if not attempts_unlimited:
+                remark_parts.append(f"未在尝试上限 {max_attempts_per_issue} 次内完成完全匹配")
+            if early_exit:
+                remark_parts = [f"部分命中连续 {self.budget_patience} 轮无明显提升，提前结束"]
+            elif max_seconds_per_issue is not None:
+                remark_parts.append(f"已达时间上限 {max_seconds_per_issue}s")
+            if remark_parts:
+                issue_state['remarks'] = '，'.join(remark_parts) + '，已自动进入下一期。'
+            else:
+                issue_state['remarks'] = '已自动进入下一期。'
+        # 汇总每期的外部建议采纳统计，便于报告做趋势分析
+        try:
+            strategies = issue_state.get('strategies', {}) or {}
+            ds = strategies.get('deepseek_suggestion', {}) or {}
+            issue_state['deepseek_attempts'] = int(ds.get('attempts', 0))
+            issue_state['deepseek_matched'] = bool(
+                issue_state.get('matched_strategy') == 'deepseek_suggestion' or int(ds.get('matches', 0)) > 0
+            )
+        except Exception:
+            pass
+        self.issue_states[issue_idx] = issue_state
+        return issue_state
+
+    @staticmethod
+    def _record_budget(
+        issue_state: Dict[str, object],
+        budget: AttemptBudget,
+        early_exit: bool,
+        max_attempts_per_issue: int | None,
+        max_seconds_per_issue: float | None,
+        start_ts: float,
+        start_cpu: float,
+    ) -> None:
+        # 记录本期最佳部分命中与提前退出节省量（CPU 时间按本期单次尝试均值外推）
+        attempts = int(issue_state.get('attempts', 0))
+        cpu_used = max(0.0, time.process_time() - start_cpu)
+        saved_attempts = 0
+        saved_cpu = 0.0
+        remaining = None
+        if early_exit:
+            if max_attempts_per_issue is not None and int(max_attempts_per_issue) > 0:
+                remaining = max(0, int(max_attempts_per_issue) - attempts)
+                saved_attempts = remaining
+                saved_cpu = cpu_used / max(1, attempts) * remaining
+            elif max_seconds_per_issue is not None:
+                saved_cpu = max(0.0, float(max_seconds_per_issue) - (time.time() - start_ts))
+        issue_state['best_hits'] = budget.best_hits()
+        issue_state['budget'] = {
+            'early_exit': early_exit,
+            'rounds': budget.rounds,
+            'cpu_seconds': round(cpu_used, 6),
+            'saved_attempts': saved_attempts,
+            'saved_cpu_seconds': round(saved_cpu, 6),
+            'exact_match_bound': budget.exact_match_bound(remaining),
+        }
+
+    def _budget_summary(self) -> Optional[Dict[str, object]]:
+        budgets = [st['budget'] for st in self.issue_states.values() if isinstance(st.get('budget'), dict)]
+        if not budgets:
+            return None
+        cpu_used = sum(b['cpu_seconds'] for b in budgets)
+        cpu_saved = sum(b['saved_cpu_seconds'] for b in budgets)
+        return {
+            'issues': len(budgets),
+            'issues_early_exit': sum(1 for b in budgets if b['early_exit']),
+            'saved_attempts': sum(b['saved_attempts'] for b in budgets),
+            'cpu_seconds': round(cpu_used, 3),
+            'saved_cpu_seconds_est': round(cpu_saved, 3),
+            'saved_ratio_est': round(cpu_saved / (cpu_used + cpu_saved), 4) if cpu_used + cpu_saved > 0 else 0.0,
+        }
 
     def _build_closed_loop_summary(self, max_attempts_per_issue: int) -> Dict[str, object]:
-        strategy_stats: Dict[str, Dict[str, int]] = {}
-        for attempt in self.loop_attempts:
-            strategy = str(attempt.get('strategy'))
-            entry = strategy_stats.setdefault(strategy, {'attempts': 0, 'matches': 0})
-            entry['attempts'] += 1
-            if attempt.get('is_match'):
-                entry['matches'] += 1
+        # 策略统计由列式日志增量维护，无需再遍历全部尝试
+        strategy_stats: Dict[str, Dict[str, int]] = self.loop_attempts.strategy_stats()
         total_attempts = sum(stat['attempts'] for stat in strategy_stats.values())
         total_matches = sum(stat['matches'] for stat in strategy_stats.values())
         summary = {
@@ -1233,8 +1316,21 @@ class SSQPredictCycle:
             'strategy_stats': strategy_stats,
             'issue_states': list(self.issue_states.values()),
             'max_attempts_per_issue': max_attempts_per_issue,
+            'culture_cache': SCORE_CACHE.stats(),
+            'ai_cache': {
+                'walk_forward': self.ai_walk_forward,
+                'hits': getattr(self.ai_model, 'cache_hits', 0),
+                'misses': getattr(self.ai_model, 'cache_misses', 0),
+            },
+            'culdl_cache': {
+                'hits': getattr(self._cultural_dl, 'dist_hits', 0),
+                'misses': getattr(self._cultural_dl, 'dist_misses', 0),
+            },
             'generated_at': time.time(),
         }
+        budget = self._budget_summary()
+        if budget is not None:
+            summary['adaptive_budget'] = budget
         return summary
 
     def _persist_closed_loop_summary(self, log_dir: str, summary: Dict[str, object]) -> None:
@@ -1252,6 +1348,14 @@ class SSQPredictCycle:
             f"- 总尝试次数: {summary.get('total_attempts', 0)}",
             f"- 完全匹配次数: {summary.get('total_matches', 0)}",
             f"- 单期尝试安全上限: {summary.get('max_attempts_per_issue', 0)}",
+        ]
+        budget = summary.get('adaptive_budget')
+        if budget:
+            lines.append(
+                f"- 自适应预算: 提前结束 {budget['issues_early_exit']}/{budget['issues']} 期，"
+                f"节省尝试 {budget['saved_attempts']} 次，估计节省 CPU {budget['saved_cpu_seconds_est']}s"
+            )
+        lines += [
             '',
             '## 策略统计',
         ]
@@ -1280,21 +1384,16 @@ class SSQPredictCycle:
     def _append_live_record(self, rec: Dict[str, object], max_lines: int = 2000) -> None:
         self._ensure_io_dirs()
         try:
-            # 1) 追加 JSONL
-            with open(self._live_jsonl, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-            # 2) 写 latest 静态 JSON
-            with open(self._live_latest, 'w', encoding='utf-8') as f:
-                json.dump(rec, f, ensure_ascii=False, indent=2)
-            # 3) 简易截断（保持最近 max_lines 行）
-            try:
-                with open(self._live_jsonl, 'r', encoding='utf-8') as rf:
-                    lines = rf.readlines()
-                if len(lines) > max_lines:
-                    with open(self._live_jsonl, 'w', encoding='utf-8') as wf:
-                        wf.writelines(lines[-max_lines:])
-            except Exception:
-                pass
+            # 1) 追加到分段滚动日志（超出 max_lines 时整段删除最旧段）
+            if self._live_log is None or self._live_log.max_lines != max(1, int(max_lines)):
+                try:
+                    seg_lines = int(float(os.getenv('SSQ_CONT_SEGMENT_LINES', '500')))
+                except Exception:
+                    seg_lines = 500
+                self._live_log = RotatingJsonlLog(self._live_dir, segment_lines=seg_lines, max_lines=max_lines)
+            self._live_log.append(rec)
+            # 2) 原子写 latest 静态 JSON
+            write_json_atomic(self._live_latest, rec)
         except Exception:
             pass
 
@@ -1303,7 +1402,8 @@ class SSQPredictCycle:
         环境变量控制：
           - SSQ_CONT_INTERVAL: 周期秒（默认 60）
           - SSQ_CONT_CANDIDATES: 每周期融合多候选数量（默认 5）
-          - SSQ_CONT_MAX_LOG: live JSONL 最多行数（默认 2000）
+          - SSQ_CONT_MAX_LOG: live 日志至少保留的记录数（默认 2000）
+          - SSQ_CONT_SEGMENT_LINES: live 日志每段行数（默认 500）
           - SSQ_CONT_MAX_TICKS: 最大循环次数（默认无限，用于验证）
         """
         try:
@@ -1345,13 +1445,17 @@ class SSQPredictCycle:
                     # 单策略失败时退化随机
                     pr, pb = self._random_numbers()
                 attempts.append({'strategy': model, 'pred_reds': pr, 'pred_blue': pb})
-            # 单组融合与多候选
+            # 单组融合与多候选（共用本 tick 的融合上下文）
             try:
-                fused_reds, fused_blue = self._fuse_from_attempts(attempts)
+                engine = self._fusion_engine(attempts)
+            except Exception:
+                engine = None
+            try:
+                fused_reds, fused_blue = self._fuse_from_attempts(attempts, engine)
             except Exception:
                 fused_reds, fused_blue = self._random_numbers()
             try:
-                candidates = self.generate_candidates_from_attempts(attempts, count=max(1, min(50, n_cands)))
+                candidates = self.generate_candidates_from_attempts(attempts, count=max(1, min(50, n_cands)), engine=engine)
             except Exception:
                 candidates = [{'reds': sorted(self._random_numbers()[0]), 'blue': self._random_numbers()[1]}]
             rec = {
@@ -1388,10 +1492,39 @@ class SSQPredictCycle:
             except KeyboardInterrupt:
                 break
 
+# ---------- 并行闭环复盘的子进程入口 ----------
+_WORKER_CYCLE: Optional[SSQPredictCycle] = None
+
+
+def _closed_loop_worker_init(cycle: SSQPredictCycle) -> None:
+    global _WORKER_CYCLE
+    _WORKER_CYCLE = cycle
+    # 子进程不写共享的融合轨迹文件，避免并发覆盖
+    cycle._write_fusion_trace = False
+
+
+def _closed_loop_worker(task) -> Tuple[List[Dict[str, object]], AttemptLog, Dict[str, int]]:
+    lo, hi, base_seed, weights, replay_kwargs = task
+    cyc = _WORKER_CYCLE
+    cyc.loop_attempts = AttemptLog()
+    cyc.issue_states = {}
+    # 使用主进程固定的权重，不随本块内已完成期次变化
+    cyc._frozen_weights = weights
+    before = cyc._cache_counters()
+    for issue_idx in range(lo, hi):
+        # 每期独立随机流：结果只取决于 (seed, 期次)
+        random.seed(f"{base_seed}:{issue_idx}")
+        true_reds_raw, true_blue = cyc.history[issue_idx]
+        cyc._replay_issue(issue_idx, true_reds_raw, true_blue, **replay_kwargs)
+    after = cyc._cache_counters()
+    counters = {k: after[k] - before[k] for k in after}
+    return [cyc.issue_states[k] for k in sorted(cyc.issue_states)], cyc.loop_attempts, counters
+
+
 if __name__ == '__main__':
     cycle = SSQPredictCycle(data_path='ssq_history.csv')
     # 若开启连续模式，则进入持续循环；否则执行一次闭环复盘
     if os.getenv('SSQ_CONTINUOUS', '0') == '1':
         cycle.run_continuous_live()
     else:
-        cycle.run_closed_loop(consult_external=False, max_attempts_per_issue=30)
+        cycle.run_closed_loop(consult_external=False, max_attempts_per_issue=30, workers=int(os.getenv('SSQ_LOOP_WORKERS', '1') or '1'))
@@ -0,0 +1,391 @@
+"""
+常驻双色球预测服务
+
+- 进程内保留一份预热好的 SSQPredictCycle 快照（历史、术数基础号码表、文化深度模型、权重与融合参数）
+- 每次请求前检查源文件（历史 CSV、权重、先验、文化深度模型）的 mtime/size：有变化时在独立的构建线程中后台重建，
+  构建完成后原子替换快照；替换前的请求继续使用旧快照，不会看到半成品，也不必排在构建之后
+- CPU 计算放进计算线程池（SSQ_PREDICT_WORKERS，默认 1），同时挂起的请求数由 SSQ_PREDICT_MAX_PENDING 限制，
+  async 处理器只 await 结果，不再阻塞事件循环
+- 各请求在快照的浅拷贝上运行（温度/top-p 等覆盖互不影响）；策略与融合依赖全局 random 并更新共享模型内部的缓存，
+  因此请求的计算段是串行的（进程内同一时刻只算一个请求），给定 seed 的请求仍可复现。
+  SSQ_PREDICT_WORKERS>1 不会提高吞吐，只是多几个排队等锁的线程；吞吐靠 PredictCache 的合并、缓存与预生成池
+- PredictCache：/ssq/predict 的合并与缓存层。带 seed 的相同请求并发时只计算一次（single-flight），
+  结果缓存到快照代次或文化时辰变化为止；不带 seed 的请求从按参数预生成的结果池中取用，池在后台补齐
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from cultural_deep_model import export_dir_for
+from env_config import env_int
+
+WEIGHTS_FILE = 'ssq_strategy_weights.json'
+PRIORS_FILE = 'ssq_ball_priors.json'
+
+
+class PredictSnapshot:
+    """一次构建的只读快照：预热的预测闭环实例与构建时的源文件签名。"""
+
+    __slots__ = ('cycle', 'signature', 'generation', 'loaded_at', 'build_sec')
+
+    def __init__(self, cycle, signature: Tuple, generation: int, build_sec: float):
+        self.cycle = cycle
+        self.signature = signature
+        self.generation = generation
+        self.loaded_at = time.time()
+        self.build_sec = build_sec
+
+
+class PredictService:
+    def __init__(
+        self,
+        data_path: str = 'ssq_history.csv',
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        check_interval: Optional[float] = None,
+        factory: Optional[Callable[[str], Any]] = None,
+    ):
+        self.data_path = data_path
+        self.workers = workers or env_int('SSQ_PREDICT_WORKERS', 1, lo=1)
+        self.max_pending = max_pending or env_int('SSQ_PREDICT_MAX_PENDING', 64, lo=1)
+        if check_interval is None:
+            try:
+                check_interval = float(os.getenv('SSQ_PREDICT_RELOAD_CHECK', '1.0'))
+            except Exception:
+                check_interval = 1.0
+        self.check_interval = max(0.0, float(check_interval))
+        self._factory = factory
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ssq-predict')
+        # 快照构建走单独的线程：计算线程池被请求占满时重载不排队，重载期间请求照常用旧快照
+        self._build_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ssq-predict-build')
+        # 计算段互斥（整段串行）：策略与融合全程使用全局 random，并会更新共享模型内部的缓存
+        self._compute_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._snapshot: Optional[PredictSnapshot] = None
+        self._generation = 0
+        self._last_check = 0.0
+        self._reloading: Optional[asyncio.Future] = None
+        self._pending: Optional[asyncio.Semaphore] = None
+        self.requests = 0
+        self.reloads = 0
+        self.reload_errors = 0
+
+    # ---------- 快照 ----------
+    def _source_paths(self):
+        paths = [self.data_path, WEIGHTS_FILE, PRIORS_FILE]
+        culdl = os.getenv('SSQ_CULDL_PATH', 'models/cultural_deep.joblib')
+        paths += [culdl, os.path.join(export_dir_for(culdl), 'meta.json')]
+        return paths
+
+    def signature(self) -> Tuple:
+        sig = []
+        for path in self._source_paths():
+            try:
+                st = os.stat(path)
+                sig.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append((path, None, None))
+        return tuple(sig)
+
+    def _new_cycle(self):
+        if self._factory is not None:
+            return self._factory(self.data_path)
+        from ssq_predict_cycle import SSQPredictCycle
+        return SSQPredictCycle(data_path=self.data_path)
+
+    def build(self) -> PredictSnapshot:
+        """同步构建并预热一份新快照后原子替换（在执行器线程中调用）。"""
+        with self._build_lock:
+            t0 = time.time()
+            sig = self.signature()
+            cycle = self._new_cycle()
+            history = getattr(cycle, 'history', None) or []
+            if history and hasattr(cycle, '_strategy_base'):
+                idx = len(history) - 1
+                # 预热：术数基础号码表与文化深度模型（缺失时此处训练，而不是在首个请求里）
+                for name in ('liuyao', 'liuren', 'qimen'):
+                    try:
+                        cycle._strategy_base(name, idx)
+                    except Exception:
+                        pass
+                try:
+                    cycle._ensure_cultural_dl()
+                except Exception:
+                    pass
+            self._generation += 1
+            snap = PredictSnapshot(cycle, sig, self._generation, time.time() - t0)
+            self._snapshot = snap
+            return snap
+
+    def snapshot(self) -> PredictSnapshot:
+        snap = self._snapshot
+        return snap if snap is not None else self.build()
+
+    def _start_build(self, loop: asyncio.AbstractEventLoop, counted: bool) -> asyncio.Future:
+        """在构建线程中重建快照；完成回调经 call_soon_threadsafe 回到事件循环线程，
+        _reloading 与重载计数只在事件循环线程中读写。"""
+        fut = loop.create_future()
+        self._reloading = fut
+
+        def _finished(cf) -> None:
+            try:
+                loop.call_soon_threadsafe(self._reload_done, fut, cf, counted)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+
+        self._build_executor.submit(self.build).add_done_callback(_finished)
+        return fut
+
+    def _reload_done(self, fut: asyncio.Future, cf, counted: bool) -> None:
+        if self._reloading is fut:
+            self._reloading = None
+        exc = None if cf.cancelled() else cf.exception()
+        failed = cf.cancelled() or exc is not None
+        if counted:
+            if failed:
+                self.reload_errors += 1
+            else:
+                self.reloads += 1
+        if fut.done():
+            return
+        if failed and not counted:
+            # 首次构建有请求在等：把异常交给它们
+            fut.set_exception(exc or asyncio.CancelledError())
+        else:
+            # 后台重载没人 await 结果；失败只计数，继续使用旧快照
+            fut.set_result(None)
+
+    async def _ensure_fresh(self) -> PredictSnapshot:
+        loop = asyncio.get_running_loop()
+        if self._snapshot is None:
+            fut = self._reloading or self._start_build(loop, counted=False)
+            await asyncio.shield(fut)
+            return self.snapshot()
+        # 先取当前快照：后台构建线程可能在本协程返回前就完成替换
+        snap = self._snapshot
+        now = time.monotonic()
+        if self._reloading is None and now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if self.signature() != snap.signature:
+                # 后台重建；构建期间继续使用旧快照
+                self._start_build(loop, counted=True)
+        return snap
+
+    # ---------- 执行 ----------
+    def _call(self, snap: PredictSnapshot, fn: Callable, args, kwargs):
+        with self._compute_lock:
+            # 浅拷贝：标量参数的临时覆盖只作用于本次请求，重量级状态（历史/模型/表）共享
+            return snap.generation, fn(copy.copy(snap.cycle), *args, **kwargs)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """同步调用（脚本与测试用）：fn(cycle, *args, **kwargs)。"""
+        return self._call(self.snapshot(), fn, args, kwargs)[1]
+
+    async def run_versioned(self, fn: Callable, *args, **kwargs) -> Tuple[int, Any]:
+        """同 run，另返回计算所用快照的代次（供结果缓存判断新旧）。"""
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(self.max_pending)
+        self.requests += 1
+        async with self._pending:
+            snap = await self._ensure_fresh()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._call, snap, fn, args, kwargs)
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """在有界执行器中运行 fn(cycle, *args, **kwargs)；挂起请求超过上限时排队等待。"""
+        return (await self.run_versioned(fn, *args, **kwargs))[1]
+
+    def stats(self) -> Dict[str, Any]:
+        snap = self._snapshot
+        return {
+            'generation': snap.generation if snap else 0,
+            'loaded_at': snap.loaded_at if snap else None,
+            'build_sec': round(snap.build_sec, 3) if snap else None,
+            'history': len(getattr(snap.cycle, 'history', []) or []) if snap else 0,
+            'requests': self.requests,
+            'reloads': self.reloads,
+            'reload_errors': self.reload_errors,
+            'reloading': self._reloading is not None,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+        self._build_executor.shutdown(wait=False)
+
+
+def _culture_bucket() -> Tuple[int, int, int, int]:
+    # 各策略的文化重排按时辰变化，跨时辰的结果不再复用
+    from cultural_predictor import _bucket_key
+    return _bucket_key(datetime.now())
+
+
+class PredictCache:
+    """预测结果的合并、缓存与预生成池（仅在事件循环线程中使用）。
+
+    - 每次请求先经 service._ensure_fresh() 检查历史/权重/先验是否变化；重载完成前仍返回旧代次结果
+    - 带 seed：同键并发请求合并为一次计算；结果按（快照代次, 文化时辰）标记，LRU 保留 SSQ_PREDICT_CACHE_SIZE 条
+    - 不带 seed：每个参数键维护 SSQ_PREDICT_POOL_SIZE 条预生成结果，取用后低于一半时后台补齐；
+      池空时本请求直接计算（各请求结果互不相同），同键的补池任务只有一个
+    - 只缓存 status=ok 的结果
+    """
+
+    def __init__(self, service: PredictService, size: Optional[int] = None, pool_size: Optional[int] = None,
+                 pool_keys: Optional[int] = None):
+        self.service = service
+        self.size = size or env_int('SSQ_PREDICT_CACHE_SIZE', 256, lo=1)
+        self.pool_size = pool_size or env_int('SSQ_PREDICT_POOL_SIZE', 8, lo=1)
+        self.pool_keys = pool_keys or env_int('SSQ_PREDICT_POOL_KEYS', 32, lo=1)
+        self._results: 'OrderedDict[Hashable, Tuple[Tuple, Any]]' = OrderedDict()
+        self._pools: 'OrderedDict[Hashable, Tuple[Tuple, Deque[Any]]]' = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._refilling: Dict[Hashable, asyncio.Future] = {}
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.pool_hits = 0
+        self.pool_misses = 0
+        self.refilled = 0
+
+    def _tag(self, generation: int) -> Tuple:
+        return (generation, _culture_bucket())
+
+    def _current_tag(self) -> Optional[Tuple]:
+        snap = self.service._snapshot
+        return self._tag(snap.generation) if snap is not None else None
+
+    @staticmethod
+    def _ok(value: Any) -> bool:
+        return isinstance(value, dict) and value.get('status') == 'ok'
+
+    async def get(self, fn: Callable, key: Hashable, seeded: bool, **kwargs):
+        self.requests += 1
+        # 命中缓存前先做（按 check_interval 节流的）源文件签名检查：变化时后台重载，新代次生效后旧结果自然失效
+        await self.service._ensure_fresh()
+        if seeded:
+            return await self._get_seeded(fn, key, kwargs)
+        return await self._get_pooled(fn, key, kwargs)
+
+    # ---------- 带 seed：single-flight + 结果缓存 ----------
+    async def _get_seeded(self, fn: Callable, key: Hashable, kwargs):
+        tag = self._current_tag()
+        hit = self._results.get(key)
+        if hit is not None and hit[0] == tag:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return hit[1]
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._compute(fn, key, kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        else:
+            self.coalesced += 1
+        # shield：单个调用方断开不会取消其他调用方共享的计算
+        return await asyncio.shield(task)
+
+    async def _compute(self, fn: Callable, key: Hashable, kwargs):
+        generation, value = await self.service.run_versioned(fn, **kwargs)
+        if self._ok(value):
+            self._results[key] = (self._tag(generation), value)
+            self._results.move_to_end(key)
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+        return value
+
+    # ---------- 不带 seed：预生成池 ----------
+    def _pool(self, key: Hashable, tag: Optional[Tuple]) -> Deque[Any]:
+        entry = self._pools.get(key)
+        if entry is None or entry[0] != tag:
+            entry = (tag, deque())
+            self._pools[key] = entry
+        self._pools.move_to_end(key)
+        while len(self._pools) > self.pool_keys:
+            self._pools.popitem(last=False)
+        return entry[1]
+
+    async def _get_pooled(self, fn: Callable, key: Hashable, kwargs):
+        pool = self._pool(key, self._current_tag())
+        if pool:
+            self.pool_hits += 1
+            value = pool.popleft()
+        else:
+            self.pool_misses += 1
+            value = None
+        if len(pool) <= self.pool_size // 2:
+            self._schedule_refill(fn, key, kwargs)
+        if value is None:
+            value = await self.service.run(fn, **kwargs)
+        return value
+
+    def _schedule_refill(self, fn: Callable, key: Hashable, kwargs) -> None:
+        if key in self._refilling:
+            return
+
+        async def refill():
+            # 逐条提交到执行器，与前台请求交替占用计算段
+            while key in self._pools and len(self._pools[key][1]) < self.pool_size:
+                generation, value = await self.service.run_versioned(fn, **kwargs)
+                if not self._ok(value):
+                    break
+                self._pool(key, self._tag(generation)).append(value)
+                self.refilled += 1
+
+        task = asyncio.ensure_future(refill())
+        self._refilling[key] = task
+        task.add_done_callback(lambda _t, k=key: self._refilling.pop(k, None))
+
+    def stats(self) -> Dict[str, Any]:
+        served = self.hits + self.coalesced + self.pool_hits
+        return {
+            'requests': self.requests,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'pool_hits': self.pool_hits,
+            'pool_misses': self.pool_misses,
+            'refilled': self.refilled,
+            'hit_ratio': (served / self.requests) if self.requests else 0.0,
+            'cached': len(self._results),
+            'pools': len(self._pools),
+            'pooled': sum(len(v[1]) for v in self._pools.values()),
+            'inflight': len(self._inflight),
+            'refilling': len(self._refilling),
+        }
+
+
+_SERVICE: Optional[PredictService] = None
+_CACHE: Optional[PredictCache] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_service() -> PredictService:
+    """进程级单例。"""
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = PredictService(data_path='ssq_history.csv')
+    return _SERVICE
+
+
+def get_predict_cache() -> PredictCache:
+    """进程级 /ssq/predict 缓存层，挂在 get_service() 之上。"""
+    global _CACHE
+    if _CACHE is None:
+        service = get_service()
+        with _SERVICE_LOCK:
+            if _CACHE is None:
+                _CACHE = PredictCache(service)
+    return _CACHE
@@ -0,0 +1,181 @@
+"""
+术数策略基础号码预计算表
+- 小六爻 / 小六壬 / 奇门遁甲在文化重排之前只是期次的模运算函数，与随机流无关
+- 预先为 [0, horizon) 全部期次生成基础红球（保持原始次序）与基础蓝球，存为 .npy 并以只读 memmap 加载
+- 闭环/网格复盘时策略只查表，再叠加随机的文化重排
+- 超出表范围（或负期次）时回退到逐期计算，结果一致
+
+表结构：int8 数组 (3, horizon, 7)，第一维依次为 liuyao、liuren、qimen；
+每行 6 个红球（0 为占位，小六爻可能不足 6 个不重复号码）+ 1 个蓝球。
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+TABLE_VERSION = 1
+STRATEGIES = ('liuyao', 'liuren', 'qimen')
+
+_STEMS_CYCLE = [4, 9, 2, 7, 1, 6, 10, 3, 8, 5]
+_BRANCHES_CYCLE = [11, 22, 5, 16, 27, 8, 19, 30, 13, 24, 35, 6]
+_PALACES = [1, 3, 5, 7, 9, 2, 4, 6, 8]
+_GATES = [8, 9, 1, 2, 3, 4, 5, 6]
+_WONDERS = [3, 6, 9]
+_INSTRUMENTS = [6, 7, 8, 9, 1, 2]
+
+
+# ---------- 逐期计算（重排前） ----------
+def liuyao_base(issue_idx: int) -> Tuple[List[int], int]:
+    # 小六爻：以时为要、重时日
+    base = (issue_idx * 6) % 33
+    reds = list(dict.fromkeys((base + i * 5 + i * issue_idx) % 33 + 1 for i in range(6)))
+    # 重排不改变集合，蓝球只依赖红球之和
+    blue = (sum(reds) + issue_idx) % 16 + 1
+    return reds, blue
+
+
+def liuren_base(issue_idx: int) -> Tuple[List[int], int]:
+    # 小六壬：以月日为纲
+    stem = _STEMS_CYCLE[issue_idx % len(_STEMS_CYCLE)]
+    branch = _BRANCHES_CYCLE[issue_idx % len(_BRANCHES_CYCLE)]
+    base = (issue_idx * 7 + stem * 3 + branch) % 33
+    offsets = [stem, branch, stem + branch, stem * 2, branch // 2 + issue_idx, stem * branch]
+    reds: List[int] = []
+    for off in offsets:
+        val = (base + off) % 33 + 1
+        if val not in reds:
+            reds.append(val)
+        if len(reds) == 6:
+            break
+    while len(reds) < 6:
+        base = (base + 5) % 33
+        val = base + 1
+        if val not in reds:
+            reds.append(val)
+    blue = (stem * 3 + branch + issue_idx) % 16 + 1
+    return reds, blue
+
+
+def qimen_base(issue_idx: int) -> Tuple[List[int], int]:
+    # 奇门遁甲：以季节与日主为重
+    base = (issue_idx * 9 + _PALACES[issue_idx % len(_PALACES)] * 2) % 33
+    reds: List[int] = []
+    for i in range(6):
+        palace = _PALACES[(issue_idx + i) % len(_PALACES)]
+        gate = _GATES[(issue_idx + i) % len(_GATES)]
+        wonder = _WONDERS[(issue_idx + i) % len(_WONDERS)]
+        instrument = _INSTRUMENTS[(issue_idx + i) % len(_INSTRUMENTS)]
+        val = (base + palace * wonder + gate + instrument * (i + 1)) % 33 + 1
+        if val not in reds:
+            reds.append(val)
+        else:
+            val = (val + i + gate) % 33 + 1
+            if val not in reds:
+                reds.append(val)
+        if len(reds) == 6:
+            break
+    while len(reds) < 6:
+        base = (base + 7) % 33
+        val = base + 1
+        if val not in reds:
+            reds.append(val)
+    blue_seed = _PALACES[issue_idx % len(_PALACES)] + _WONDERS[issue_idx % len(_WONDERS)]
+    blue = (sum(reds) + blue_seed + issue_idx) % 16 + 1
+    return reds, blue
+
+
+_BASE_FUNCS = {'liuyao': liuyao_base, 'liuren': liuren_base, 'qimen': qimen_base}
+
+
+def build_table(horizon: int) -> np.ndarray:
+    table = np.zeros((len(STRATEGIES), max(0, int(horizon)), 7), dtype=np.int8)
+    for s, name in enumerate(STRATEGIES):
+        fn = _BASE_FUNCS[name]
+        for idx in range(table.shape[1]):
+            reds, blue = fn(idx)
+            table[s, idx, :len(reds)] = reds
+            table[s, idx, 6] = blue
+    return table
+
+
+def _save_atomic(path: str, table: np.ndarray) -> None:
+    d = os.path.dirname(os.path.abspath(path))
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', suffix='.npy', dir=d)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, table)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except Exception:
+            pass
+        raise
+
+
+class StrategyTable:
+    """基础号码查表（只读 memmap），表外期次回退逐期计算。"""
+
+    def __init__(self, table: Optional[np.ndarray] = None, path: Optional[str] = None):
+        self.table = table
+        self.path = path
+        self.horizon = 0 if table is None else int(table.shape[1])
+        self.hits = 0
+        self.misses = 0
+        self._rows = {}  # 策略 -> [(红球元组, 蓝球)]，首次访问时由表整体转换一次
+
+    @classmethod
+    def load_or_build(cls, path: str, horizon: int) -> 'StrategyTable':
+        """已有表覆盖 horizon 时直接 memmap 加载，否则重建并原子落盘；落盘失败时仅在内存中使用。"""
+        horizon = max(1, int(horizon))
+        try:
+            if os.path.exists(path):
+                tbl = np.load(path, mmap_mode='r')
+                if tbl.ndim == 3 and tbl.shape[0] == len(STRATEGIES) and tbl.shape[2] == 7 and tbl.shape[1] >= horizon:
+                    return cls(tbl, path)
+        except Exception:
+            pass
+        tbl = build_table(horizon)
+        try:
+            _save_atomic(path, tbl)
+            return cls(np.load(path, mmap_mode='r'), path)
+        except Exception:
+            return cls(tbl, None)
+
+    def get(self, strategy: str, issue_idx: int) -> Tuple[List[int], int]:
+        """返回 (重排前红球列表（原始次序）, 蓝球)。"""
+        issue_idx = int(issue_idx)
+        if self.table is not None and 0 <= issue_idx < self.horizon:
+            rows = self._rows.get(strategy)
+            if rows is None:
+                # 逐元素读 ndarray 比直接计算还慢，故按策略一次性转为 Python 元组
+                rows = [
+                    (tuple(v for v in r[:6] if v), r[6])
+                    for r in self.table[STRATEGIES.index(strategy), :self.horizon].tolist()
+                ]
+                self._rows[strategy] = rows
+            reds, blue = rows[issue_idx]
+            self.hits += 1
+            return list(reds), blue
+        self.misses += 1
+        return _BASE_FUNCS[strategy](issue_idx)
+
+    def __getstate__(self):
+        # 跨进程只传路径，子进程重新 memmap，避免复制整表
+        state = self.__dict__.copy()
+        state['_rows'] = {}
+        if self.path:
+            state['table'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.table is None and self.path:
+            try:
+                self.table = np.load(self.path, mmap_mode='r')
+            except Exception:
+                self.horizon = 0
@@ -0,0 +1,68 @@
+"""
+test_bazi_naming.py
+单元测试：字库索引与元数据、按 mtime 重载；整列评分与逐条 _score_combo 一致；有界堆取前 N 保持原排序口径
+"""
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import bazi_naming
+from bazi_naming import CharLibrary, WUXING_ORDER, _score_combo, _score_pairs, get_char_library, pick_names
+
+
+class TestBaziNaming(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        os.makedirs('data')
+        self.path = os.path.join('data', 'element_chars.json')
+
+    def _write(self, data):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    def test_library_index_metadata_and_reload(self):
+        self._write({'金': [{'char': '铭', 'strokes': 14, 'pinyin': 'ming'}, '锋'], '木': ['林', '铭'],
+                     '水': [], '火': [], '土': []})
+        lib = get_char_library()
+        self.assertIs(get_char_library(), lib)
+        self.assertEqual(lib.element_of['铭'], '金')  # 同字多属取首次出现
+        self.assertEqual(lib.meta['铭'], {'strokes': 14, 'pinyin': 'ming'})
+        self.assertEqual(bazi_naming.load_element_chars()['金'], ['铭', '锋'])
+        self._write({'金': ['钧'], '木': [], '水': [], '火': [], '土': []})
+        self.assertEqual(get_char_library().chars['金'], ['钧'])
+
+    def test_vector_scores_match_scalar(self):
+        lib = CharLibrary(bazi_naming._FALLBACK_CHARS)
+        chars = [c for e in WUXING_ORDER for c in lib.chars[e]] + ['无']
+        gseq, sseq = bazi_naming._gender_pref_sequence('female'), bazi_naming._style_pref_sequence('modern')
+        c1 = [a for a in chars for _ in chars]
+        c2 = [b for _ in chars for b in chars]
+        e1 = np.array([lib.eid(c) for c in c1])
+        e2 = np.array([lib.eid(c) for c in c2])
+        got = _score_pairs(lib, e1, e2, '水', '火', gseq, sseq)
+        want = [_score_combo(a, b, '水', '火', gseq, sseq, lib.chars) for a, b in zip(c1, c2)]
+        self.assertTrue(np.allclose(got, want, rtol=0, atol=1e-9))
+        single = _score_pairs(lib, e1[:len(chars)], None, '水', '火', gseq, sseq)
+        self.assertTrue(np.allclose(single, [_score_combo(a, None, '水', '火', gseq, sseq, lib.chars) for a in c1[:len(chars)]]))
+
+    def test_top_k_is_stable_sorted_prefix(self):
+        self._write({e: [chr(0x4e00 + 100 * i + j) for j in range(40)] for i, e in enumerate(WUXING_ORDER)})
+        counts = {'金': 2, '木': 0, '水': 1, '火': 3, '土': 2}
+        top = pick_names('李', counts, 'male', 10)
+        full = pick_names('李', counts, 'male', 100)
+        self.assertEqual([x['name'] for x in top], [x['name'] for x in full[:10]])
+        self.assertTrue(all(x['primary'] == '木' and x['secondary'] == '水' for x in top))
+        self.assertEqual(len(pick_names('李', counts, 'female', 5, single=True)), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+test_bazi_naming_queue.py
+单元测试：租约/ack、可见性超时后重新租出、旧租约 ack 被拒、超过尝试次数转 dead（记完成时间）、旧版 JSONL 迁入、
+队列指标（在途与延迟重试分开计数）；process_batch 失败 nack、成功落盘并 ack
+"""
+import json
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+import bazi_naming_cycle
+from bazi_naming_queue import NamingQueue
+
+
+class TestNamingQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.q = NamingQueue(os.path.join(self.tmp.name, 'q.db'), visibility=60, max_attempts=2)
+
+    def test_lease_ack(self):
+        ids = self.q.enqueue_many([{'n': 1}, {'n': 2}, {'n': 3}])
+        jobs = self.q.lease(2)
+        self.assertEqual([j.id for j in jobs], ids[:2])
+        self.assertEqual(jobs[0].payload, {'n': 1})
+        self.assertEqual([j.id for j in self.q.lease(5)], ids[2:])
+        self.assertEqual(self.q.lease(5), [])
+        self.assertTrue(self.q.ack(jobs[0]))
+        self.assertFalse(self.q.ack(jobs[0]))
+        st = self.q.stats()
+        self.assertEqual((st['depth'], st['in_flight'], st['recent_done']), (0, 2, 1))
+        self.assertIsNotNone(st['latency_p50_sec'])
+
+    def test_visibility_timeout_and_dead(self):
+        self.q.enqueue({'n': 1})
+        first = self.q.lease(1)[0]
+        self.assertEqual(self.q.lease(1), [])
+        later = time.time() + 61
+        with mock.patch('bazi_naming_queue.time.time', return_value=later):
+            second = self.q.lease(1)[0]
+        self.assertEqual((second.id, second.attempts), (first.id, 2))
+        self.assertFalse(self.q.ack(first))
+        with mock.patch('bazi_naming_queue.time.time', return_value=later + 61):
+            self.assertEqual(self.q.lease(1), [])
+            self.assertEqual(self.q.stats()['dead'], 1)
+        finished = self.q._conn().execute("SELECT finished_at FROM jobs WHERE id=?", (first.id,)).fetchone()[0]
+        self.assertEqual(finished, later + 61)
+
+    def test_nack_delay(self):
+        self.q.enqueue({'n': 1})
+        job = self.q.lease(1)[0]
+        self.assertTrue(self.q.nack(job, 'boom', delay=30))
+        self.assertEqual(self.q.lease(1), [])
+        st = self.q.stats()
+        self.assertEqual((st['depth'], st['in_flight'], st['delayed']), (0, 0, 1))
+        with mock.patch('bazi_naming_queue.time.time', return_value=time.time() + 31):
+            self.assertEqual(self.q.lease(1)[0].id, job.id)
+
+    def test_import_jsonl(self):
+        legacy = Path(self.tmp.name) / 'legacy.jsonl'
+        legacy.write_text(json.dumps({'surname': '刘'}, ensure_ascii=False) + '\n\nnot json\n', encoding='utf-8')
+        self.assertEqual(self.q.import_jsonl(legacy), 1)
+        self.assertEqual(legacy.read_text(encoding='utf-8'), '')
+        self.assertEqual(self.q.lease(1)[0].payload, {'surname': '刘'})
+
+
+class TestProcessBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.q = NamingQueue(os.path.join(self.tmp.name, 'q.db'), visibility=60, max_attempts=3)
+        for patch in (mock.patch.object(bazi_naming_cycle, 'OUT_DIR', Path(self.tmp.name)),
+                      mock.patch.dict(os.environ, {'BAZI_NAMING_DEEPSEEK': '0'})):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_success_and_failure(self):
+        def fake_generate(req):
+            if req.get('fail'):
+                raise RuntimeError('boom')
+            return {'ok': True, 'surname': req['surname']}
+
+        self.q.enqueue_many([{'surname': '刘'}, {'surname': '王', 'fail': True}])
+        jobs = self.q.lease(2)
+        with mock.patch.object(bazi_naming_cycle, '_generate', side_effect=fake_generate), \
+                ThreadPoolExecutor(2) as pool:
+            done = bazi_naming_cycle.process_batch(self.q, jobs, pool)
+        self.assertEqual(done, 1)
+        latest = json.loads((Path(self.tmp.name) / 'latest.json').read_text(encoding='utf-8'))
+        self.assertEqual(latest['result']['surname'], '刘')
+        st = self.q.stats()
+        self.assertEqual((st['recent_done'], st['in_flight'], st['delayed'], st['dead']), (1, 0, 1, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+test_bazi_paipan_batch.py
+单元测试：solar2bazi_many / lunar2bazi_many 逐行与单条接口一致；/bazi/paipan_batch 流式 JSONL/CSV
+"""
+import csv
+import io
+import json
+import random
+import unittest
+
+from fastapi.testclient import TestClient
+
+from bazi_chart import bazi_records, lunar2bazi, lunar2bazi_many, solar2bazi, solar2bazi_many
+from celestial_nexus.api import app
+
+
+class TestBaziMany(unittest.TestCase):
+    def test_rows_match_single_calls(self):
+        rng = random.Random(5)
+        n = 300
+        ys = [rng.randint(1901, 2099) for _ in range(n)]
+        ms = [rng.randint(1, 12) for _ in range(n)]
+        ds = [rng.randint(1, 30) for _ in range(n)]
+        hs = [rng.choice((0, 11, 23, rng.randint(0, 23))) for _ in range(n)]
+        tzs = [rng.choice((None, 'UTC', 'UTC-5:30', 'Asia/Tokyo')) for _ in range(n)]
+        sects = [rng.choice((1, 2)) for _ in range(n)]
+        # 末尾两行：表外年份回退 lunar-python；非法日期只影响本行
+        ys += [1890, 2024]
+        ms += [3, 2]
+        ds += [15, 30]
+        hs += [8, 8]
+        tzs += [None, None]
+        sects += [2, 2]
+
+        cols = solar2bazi_many(ys, ms, ds, hs, 30, 0, tz=tzs, sect=sects)
+        for i, rec in enumerate(bazi_records(cols)):
+            try:
+                expected = solar2bazi(ys[i], ms[i], ds[i], hs[i], 30, 0, tz=tzs[i], sect=sects[i])
+            except Exception:
+                expected = None
+            self.assertEqual(rec, expected, i)
+        self.assertIsNotNone(cols['error'][-1])
+        self.assertEqual(cols['solar_year'][-2], 1890)
+
+        leaps = [rng.random() < 0.2 for _ in range(n + 2)]
+        cols = lunar2bazi_many(ys, ms, ds, leaps, hs, tz=tzs, sect=sects)
+        for i, rec in enumerate(bazi_records(cols)):
+            self.assertEqual(rec, lunar2bazi(ys[i], ms[i], ds[i], leaps[i], hs[i], tz=tzs[i], sect=sects[i]), i)
+
+
+class TestPaipanBatchEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_jsonl_stream_in_order(self):
+        lines = [
+            {'id': 'a', 'year': 1990, 'month': 1, 'day': 1, 'hour': 8, 'minute': 30},
+            {'id': 'b', 'source': 'lunar', 'year': 2024, 'month': 1, 'day': 1, 'hour': 23, 'sect': 1},
+            {'id': 'c', 'year': 2024},
+        ]
+        body = '\n'.join(json.dumps(x) for x in lines) + '\nnot json\n'
+        r = self.client.post('/bazi/paipan_batch?tz=UTC%2B8', content=body.encode('utf-8'))
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.headers['content-type'].startswith('application/x-ndjson'))
+        rows = [json.loads(x) for x in r.text.splitlines()]
+        self.assertEqual([x['id'] for x in rows], ['a', 'b', 'c', None])
+        self.assertEqual(rows[0]['day'], solar2bazi(1990, 1, 1, 8, 30, 0)['day'])
+        self.assertEqual(rows[1]['hour'], lunar2bazi(2024, 1, 1, hour=23, sect=1)['hour'])
+        self.assertIn('month', rows[2]['error'])
+        self.assertIsNotNone(rows[3]['error'])
+
+    def test_csv_round_trip(self):
+        body = 'id,year,month,day,hour,tz\n1,2000,2,4,20,UTC\n2,2100,12,31,23,\n'
+        r = self.client.post('/bazi/paipan_batch', content=body.encode('utf-8'), headers={'Content-Type': 'text/csv'})
+        self.assertEqual(r.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(r.text)))
+        self.assertEqual([x['id'] for x in rows], ['1', '2'])
+        self.assertEqual(rows[0]['year'], solar2bazi(2000, 2, 4, 20, tz='UTC')['year'])
+        self.assertEqual(rows[1]['hour'], solar2bazi(2100, 12, 31, 23)['hour'])
+
+
+if __name__ == "__main__":
+    unittest.main()
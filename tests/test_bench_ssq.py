@@ -0,0 +1,42 @@
+"""
+test_bench_ssq.py
+单元测试：基准结果对比（回退判定）与合成历史生成
+"""
+import importlib.util
+import os
+import tempfile
+import unittest
+
+_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools', 'bench_ssq.py')
+_spec = importlib.util.spec_from_file_location('bench_ssq', _PATH)
+bench_ssq = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench_ssq)
+
+
+def _rec(case, ops, p99, rss, status='ok'):
+    return {'case': case, 'size': 2000, 'status': status, 'ops_per_sec': ops, 'p99_ms': p99, 'peak_rss_mb': rss}
+
+
+class TestBenchCompare(unittest.TestCase):
+    def test_flags_regressions_only_beyond_tolerance(self):
+        base = {'results': [_rec('fuse', 100.0, 10.0, 100.0), _rec('ai_train', 1.0, 900.0, 500.0),
+                            _rec('eval_grid', 5.0, 200.0, 100.0)]}
+        cur = {'results': [_rec('fuse', 90.0, 11.0, 110.0), _rec('ai_train', 0.5, 2000.0, 500.0),
+                           _rec('eval_grid', 0, 0, 0, status='timeout'), _rec('culdl_fit', 1.0, 1.0, 1.0)]}
+        rows, regressed = bench_ssq.compare(base, cur, tolerance=0.15, rss_tolerance=0.25)
+        status = {r['case']: r['status'] for r in rows}
+        self.assertTrue(regressed)
+        self.assertEqual(status, {'fuse': 'ok', 'ai_train': 'regressed', 'eval_grid': 'regressed', 'culdl_fit': 'new'})
+        _, regressed = bench_ssq.compare(base, base)
+        self.assertFalse(regressed)
+
+    def test_synthetic_history_loads(self):
+        from ssq_data import SSQDataManager
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'h.csv')
+            bench_ssq.write_synthetic_history(path, 50)
+            self.assertEqual(len(SSQDataManager(path).history), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
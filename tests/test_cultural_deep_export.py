@@ -0,0 +1,54 @@
+"""
+test_cultural_deep_export.py
+单元测试：CulturalDeepModel 的 .npy 推理导出、内存映射加载与纯 NumPy 叠加前向
+"""
+import os
+import random
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from cultural_deep_model import CulturalDeepModel, StackedMLP, export_dir_for
+
+
+class TestCulturalDeepExport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(0)
+        cls.history = [(sorted(rng.sample(range(1, 34), 6)), rng.randint(1, 16)) for _ in range(60)]
+        cls.model = CulturalDeepModel()
+        if not cls.model.fit(cls.history):
+            raise unittest.SkipTest("训练失败")
+
+    def test_stacked_forward_matches_sklearn(self):
+        X, _, _ = self.model._build_dataset(self.history)
+        xs = (X - self.model._mu) / self.model._std
+        expected = np.hstack([self.model.red_model.predict(xs), self.model.blue_model.predict(xs)])
+        self.assertIsInstance(self.model._stacked, StackedMLP)
+        self.assertTrue(np.allclose(self.model._stacked.predict(xs), expected, rtol=0, atol=1e-12))
+
+    def test_save_exports_npy_and_load_fast_maps_it(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cultural_deep.joblib')
+            self.assertTrue(self.model.save(path))
+            out_dir = export_dir_for(path)
+            self.assertTrue(os.path.exists(os.path.join(out_dir, 'meta.json')))
+            # 导出目录对其他用户可读、可遍历（不沿用 mkdtemp 的 0700）
+            self.assertEqual(os.stat(out_dir).st_mode & 0o777, 0o755)
+            fast = CulturalDeepModel.load_fast(path)
+            self.assertIsNone(fast.red_model)
+            self.assertIsInstance(fast._stacked.layers[0][0], np.memmap)
+            full = CulturalDeepModel.load(path)
+            self.assertEqual(fast.predict_distributions_batch([55, 56]), full.predict_distributions_batch([55, 56]))
+            # joblib 比导出新时回退 joblib 并重写导出
+            later = os.path.getmtime(os.path.join(out_dir, 'meta.json')) + 10
+            os.utime(path, (later, later))
+            again = CulturalDeepModel.load_fast(path)
+            self.assertIsNotNone(again.red_model)
+            self.assertGreaterEqual(os.path.getmtime(os.path.join(out_dir, 'meta.json')), time.time() - 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
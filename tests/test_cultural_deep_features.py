@@ -0,0 +1,64 @@
+"""
+test_cultural_deep_features.py
+单元测试：CulturalDeepModel 整批特征构造与逐期特征一致；批量分布推理与按期 LRU
+"""
+import random
+import unittest
+
+import numpy as np
+
+from cultural_deep_model import CulturalDeepModel
+
+
+class _Linear:
+    """替代 MultiOutputRegressor 的线性桩，逐行计算以便与批量结果对照。"""
+
+    def __init__(self, w):
+        self.w = w
+        self.rows = 0
+
+    def predict(self, xs):
+        self.rows += len(xs)
+        return np.array([x @ self.w for x in xs])
+
+
+class TestCulturalDeepFeatures(unittest.TestCase):
+    def test_batch_rows_match_per_issue_features(self):
+        rng = random.Random(7)
+        history = [(sorted(rng.sample(range(1, 34), 6)), rng.randint(1, 16)) for _ in range(120)]
+        history[5] = ([3, 4, 5, 6, 20, 33], 16)  # 含四连号的一期
+        model = CulturalDeepModel()
+        X, Yr, Yb = model._build_dataset(history)
+        self.assertEqual(X.shape, (120, 96))
+        self.assertEqual(Yr.sum(axis=1).tolist(), [6.0] * 120)
+        self.assertEqual(Yb.argmax(axis=1).tolist(), [b - 1 for _, b in history])
+        for i in (0, 1, 6, 77, 119):
+            # 衰减冷热列直接取自批量矩阵，其余列须与逐期实现逐位一致
+            row = model._features_for_issue(i, X[i, 47:80], X[i, 80:])
+            self.assertTrue(np.array_equal(row, X[i]), i)
+        self.assertEqual(X[6, 44], 4.0)
+        self.assertEqual(len(model._hot_red_last), 33)
+
+    def test_batch_distributions_one_pass_and_cached(self):
+        rng = random.Random(3)
+        history = [(sorted(rng.sample(range(1, 34), 6)), rng.randint(1, 16)) for _ in range(80)]
+        model = CulturalDeepModel()
+        X, _, _ = model._build_dataset(history)
+        gen = np.random.RandomState(0)
+        model.red_model = _Linear(gen.normal(size=(96, 33)) * 0.1)
+        model.blue_model = _Linear(gen.normal(size=(96, 16)) * 0.1)
+        model._mu, model._std, model._fitted = X.mean(axis=0), X.std(axis=0) + 1.0, True
+        batch = model.predict_distributions_batch([70, 71, 72, 70])
+        self.assertEqual(model.red_model.rows, 3)
+        self.assertEqual(batch[0], batch[3])
+        self.assertAlmostEqual(sum(batch[1][0]), 1.0)
+        # 逐期调用命中 LRU，不再前向计算
+        self.assertEqual(model.predict_distributions(71), batch[1])
+        self.assertEqual((model.red_model.rows, model.dist_hits, model.dist_misses), (3, 1, 3))
+        x = (model._features_for_issue(72) - model._mu) / model._std
+        red = 1.0 / (1.0 + np.exp(-(x @ model.red_model.w)))
+        self.assertTrue(np.allclose(batch[2][0], red / red.sum(), rtol=0, atol=1e-12))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+test_cultural_score_cache.py
+单元测试：文化打分按时辰分桶缓存与预计算表（两者均 LRU 有界）
+"""
+import unittest
+from datetime import datetime
+
+from cultural_predictor import CulturalScoreCache, _compute_scores, _bazi_for_datetime
+
+
+class TestCulturalScoreCache(unittest.TestCase):
+    def test_same_hour_bucket_hits(self):
+        cache = CulturalScoreCache(maxsize=8)
+        bias = {'hour': 1.6, 'day': 1.2}
+        a = cache.scores(datetime(2024, 3, 1, 9, 5), bias)
+        b = cache.scores(datetime(2024, 3, 1, 10, 55), bias)  # 同属巳时
+        self.assertEqual(a, b)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        dt = datetime(2024, 3, 1, 9, 5)
+        self.assertEqual(a, _compute_scores(_bazi_for_datetime(dt), dt.month, bias))
+
+    def test_late_zi_hour_is_separate_bucket(self):
+        cache = CulturalScoreCache(maxsize=8)
+        cache.scores(datetime(2024, 3, 1, 0, 10))
+        cache.scores(datetime(2024, 3, 1, 23, 10))
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_lru_bound_and_precompute_table(self):
+        cache = CulturalScoreCache(maxsize=2)
+        for h in (1, 3, 5, 7):
+            cache.scores(datetime(2024, 5, 2, h))
+        self.assertEqual(cache.stats()['size'], 2)
+        cache.clear()
+        cache.precompute(datetime(2024, 6, 1), hours=24)
+        calls = cache.stats()['calendar_calls']
+        for h in range(24):
+            cache.scores(datetime(2024, 6, 1, h, 30), {'month': 1.5})
+        self.assertEqual(cache.stats()['calendar_calls'], calls)
+        self.assertGreater(cache.stats()['table_hits'], 0)
+
+    def test_precompute_table_is_bounded(self):
+        cache = CulturalScoreCache(maxsize=8, table_maxsize=16)
+        cache.precompute(datetime(2024, 6, 1), hours=24)  # 13 个时辰桶（含晚子时）
+        cache.bazi(datetime(2024, 6, 1, 0, 30))  # 最早的桶被访问，移到最近
+        cache.precompute(datetime(2024, 6, 2), hours=6)  # 再加 4 个桶，淘汰最久未用的丑时
+        self.assertEqual(cache.stats()['table_size'], 16)
+        hits = cache.stats()['table_hits']
+        cache.bazi(datetime(2024, 6, 1, 0, 30))
+        self.assertEqual(cache.stats()['table_hits'], hits + 1)
+        calls = cache.stats()['calendar_calls']
+        cache.bazi(datetime(2024, 6, 1, 1, 30))  # 已被淘汰，回到历法库
+        self.assertEqual(cache.stats()['calendar_calls'], calls + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
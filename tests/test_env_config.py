@@ -0,0 +1,26 @@
+"""
+test_env_config.py
+单元测试：环境变量读取的默认值回退与区间截断
+"""
+import os
+import unittest
+from unittest import mock
+
+from env_config import env_float, env_int
+
+
+class TestEnvConfig(unittest.TestCase):
+    def test_defaults_and_clamp(self):
+        with mock.patch.dict(os.environ, {'X_INT': '4.0', 'X_BAD': 'abc', 'X_BIG': '500', 'X_F': '0.25'}):
+            os.environ.pop('X_MISSING', None)
+            self.assertEqual(env_int('X_INT', 1), 4)
+            self.assertEqual(env_int('X_BAD', 7, lo=1), 7)
+            self.assertEqual(env_int('X_MISSING', 3), 3)
+            self.assertEqual(env_int('X_BIG', 4, lo=1, hi=64), 64)
+            self.assertEqual(env_float('X_F', 1.0), 0.25)
+            self.assertEqual(env_float('X_F', 1.0, lo=0.5), 0.5)
+            self.assertEqual(env_float('X_BAD', 2.5), 2.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+test_ganzhi_calendar.py
+单元测试：干支历预计算表与 lunar-python 逐字段一致（交节前后、晚子时两种流派、农历反查、越界回退）
+"""
+import datetime as dt
+import os
+import tempfile
+import unittest
+
+import bazi_chart
+import ganzhi_calendar
+from ganzhi_calendar import GanzhiCalendar, build_table, save_table, verify
+
+
+class TestGanzhiCalendar(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # 2024 立春（02-04 16:26:53）与除夕前后
+        table = build_table(dt.date(2024, 1, 20), dt.date(2024, 2, 20))
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = save_table(table, os.path.join(cls.tmp.name, 'ganzhi_calendar.npy'))
+        cls.calendar = GanzhiCalendar.load(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        saved = ganzhi_calendar._CALENDAR
+        self.addCleanup(setattr, ganzhi_calendar, '_CALENDAR', saved)
+
+    def _both(self, fn, *args, **kwargs):
+        ganzhi_calendar._CALENDAR = self.calendar
+        fast = fn(*args, **kwargs)
+        ganzhi_calendar._CALENDAR = False
+        return fast, fn(*args, **kwargs)
+
+    def test_matches_lunar_python_around_lichun_and_late_zi(self):
+        cases = [
+            (2024, 2, 4, 16, 26, 52), (2024, 2, 4, 16, 26, 53), (2024, 2, 9, 23, 30, 0),
+            (2024, 2, 10, 0, 10, 0), (2024, 1, 31, 12, 0, 0), (2024, 2, 20, 23, 59, 59),
+        ]
+        for args in cases:
+            for sect in (1, 2):
+                fast, slow = self._both(bazi_chart.solar2bazi, *args, sect=sect)
+                self.assertEqual(fast, slow, (args, sect))
+        self.assertEqual(verify(self.calendar, samples=200), 0)
+
+    def test_timezone_and_lunar_input(self):
+        fast, slow = self._both(bazi_chart.solar2bazi, 2024, 2, 4, 8, 27, 0, tz='UTC')
+        self.assertEqual(fast, slow)
+        self.assertEqual(fast['month'], '丙寅')
+        fast, slow = self._both(bazi_chart.lunar2bazi, 2024, 1, 1, hour=9, tz='Asia/Tokyo')
+        self.assertEqual(fast, slow)
+        self.assertEqual(self.calendar.lunar_to_solar(2024, 1, 1), (2024, 2, 10))
+
+    def test_out_of_range_falls_back(self):
+        self.assertIsNone(self.calendar.bazi(1990, 1, 1, 8, 30, 0))
+        fast, slow = self._both(bazi_chart.solar2bazi, 1990, 1, 1, 8, 30, 0)
+        self.assertEqual(fast, slow)
+        self.assertEqual(fast['day'], '丙寅')
+
+
+if __name__ == "__main__":
+    unittest.main()
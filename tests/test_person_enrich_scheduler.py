@@ -0,0 +1,78 @@
+"""
+test_person_enrich_scheduler.py
+单元测试：令牌桶限速；调度器按到期时间执行、并发有上限、未到期人物不执行、异常后重试、状态合并落盘
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from person_enrich_scheduler import EnrichScheduler, EnrichTask, PersonStatusStore, TokenBucket
+
+
+class TestPersonEnrichScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'status.json')
+
+    def test_token_bucket(self):
+        async def go():
+            bucket = TokenBucket(rate=50, capacity=1)
+            t0 = time.monotonic()
+            for _ in range(6):
+                await bucket.acquire()
+            return time.monotonic() - t0
+
+        self.assertGreaterEqual(asyncio.run(go()), 5 / 50 * 0.9)
+
+    def test_schedule_concurrency_and_batched_status(self):
+        now = time.time()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'persons': {'p0': {'last_expand_ts': now}}}, f)
+        store = PersonStatusStore(self.path, flush_seconds=60)
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0, 'calls': []}
+
+        def work(person):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+                state['calls'].append(person['name'])
+            time.sleep(0.01)
+            with lock:
+                state['active'] -= 1
+            if person['name'] == 'p1':
+                raise RuntimeError('boom')
+            return True, None
+
+        task = EnrichTask('expand', work, 3600, 'last_expand_ts', TokenBucket(0))
+        sched = EnrichScheduler(store, [task], concurrency=3, retry_seconds=0.05)
+
+        async def go():
+            self.assertEqual(sched.schedule([{'name': f'p{i}'} for i in range(20)]), 20)
+            runner = asyncio.create_task(sched.run())
+            for _ in range(300):
+                await asyncio.sleep(0.01)
+                if sched.counts['done'] >= 18 and sched.counts['failed'] >= 2:
+                    break
+            sched.stop()
+            await runner
+
+        asyncio.run(go())
+        self.assertNotIn('p0', state['calls'])
+        self.assertEqual(sorted(set(state['calls'])), sorted(f'p{i}' for i in range(1, 20)))
+        self.assertGreaterEqual(state['calls'].count('p1'), 2)
+        self.assertLessEqual(state['peak'], 3)
+        self.assertEqual(store.writes, 1)
+        with open(self.path, encoding='utf-8') as f:
+            persons = json.load(f)['persons']
+        self.assertEqual(len([p for p in persons.values() if 'last_expand_ts' in p]), 19)
+        self.assertNotIn('last_expand_ts', persons.get('p1', {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+test_ssq_ai_walk_forward.py
+单元测试：SSQAIModel 滚动前推训练与按期缓存
+"""
+import random
+import unittest
+
+from ssq_ai_model import SSQAIModel, _get_np, _get_sklearn_rf
+
+
+class _History:
+    def __init__(self, n, seed=1):
+        rng = random.Random(seed)
+        self.history = [(sorted(rng.sample(range(1, 34), 6)), rng.randint(1, 16)) for _ in range(n)]
+
+    def get_hot_cold(self, end=None):
+        count = {n: 0 for n in range(1, 34)}
+        for reds, _ in self.history[:end]:
+            for n in reds:
+                count[n] += 1
+        ranked = sorted(count, key=lambda x: -count[x])
+        return ranked[:6], ranked[-6:]
+
+
+@unittest.skipIf(_get_np() is None or _get_sklearn_rf() is None, "需要 numpy 与 scikit-learn")
+class TestWalkForward(unittest.TestCase):
+    def test_refit_boundary_aligned_and_no_leakage(self):
+        model = SSQAIModel(_History(120))
+        model._best_rf_n = 10
+        self.assertTrue(model.ensure_walk_forward(73, refit_every=20, window=40))
+        self.assertEqual((model._wf_start, model._wf_end), (19, 60))
+        # 同一窗口内的期次不重训；越过边界或回退都会重训
+        self.assertFalse(model.ensure_walk_forward(79, refit_every=20, window=40))
+        self.assertTrue(model.ensure_walk_forward(80, refit_every=20, window=40))
+        self.assertTrue(model.ensure_walk_forward(25, refit_every=20, window=40))
+        self.assertEqual(model._wf_end, 20)
+
+    def test_predict_issue_served_from_cache(self):
+        model = SSQAIModel(_History(80))
+        model._best_rf_n = 10
+        model.ensure_walk_forward(60, refit_every=20, window=0)
+        a = model.predict_issue(60)
+        b = model.predict_issue(60)
+        self.assertEqual(a, b)
+        self.assertEqual((model.cache_hits, model.cache_misses), (1, 1))
+        red_p, blue_p = model.get_distributions(60)
+        self.assertEqual((len(red_p), len(blue_p)), (33, 16))
+        self.assertEqual(model.get_distributions(60), (red_p, blue_p))
+        # 重训后版本变化，缓存失效
+        model.ensure_walk_forward(80, refit_every=20, window=0)
+        model.predict_issue(60)
+        self.assertEqual(model.cache_misses, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+"""
+test_ssq_attempt_budget.py
+单元测试：闭环复盘自适应尝试预算的提前退出判定
+"""
+import unittest
+
+from ssq_attempt_budget import P_EXACT, AttemptBudget, partial_score
+
+
+class TestAttemptBudget(unittest.TestCase):
+    def test_partial_score(self):
+        self.assertEqual(partial_score([1, 2, 3, 4, 5, 6], 7, [4, 5, 6, 7, 8, 9], 7), (3, 1))
+
+    def test_stops_after_plateau(self):
+        truth = ([1, 2, 3, 4, 5, 6], 1)
+        budget = AttemptBudget(min_rounds=2, patience=2, min_gain=0.5)
+        budget.observe('a', [1, 2, 10, 11, 12, 13], 2, *truth)
+        self.assertFalse(budget.end_round())
+        # 第 2 轮有提升（红 2→3），不应退出
+        budget.observe('a', [1, 2, 3, 11, 12, 13], 2, *truth)
+        self.assertFalse(budget.end_round())
+        budget.observe('a', [1, 20, 21, 22, 23, 24], 2, *truth)
+        self.assertFalse(budget.end_round())
+        # 连续 2 轮无提升
+        budget.observe('a', [1, 20, 21, 22, 23, 24], 2, *truth)
+        self.assertTrue(budget.end_round())
+        self.assertEqual(budget.best_hits(), {'a': [3, 0]})
+
+    def test_exact_match_bound(self):
+        self.assertIsNone(AttemptBudget.exact_match_bound(None))
+        self.assertAlmostEqual(AttemptBudget.exact_match_bound(100), 100 * P_EXACT)
+
+
+if __name__ == "__main__":
+    unittest.main()
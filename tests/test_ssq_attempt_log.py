@@ -0,0 +1,46 @@
+"""
+test_ssq_attempt_log.py
+单元测试：列式尝试日志的 dict 兼容视图、合并与增量统计
+"""
+import unittest
+
+from ssq_attempt_log import AttemptLog
+
+
+class TestAttemptLog(unittest.TestCase):
+    def test_roundtrip_and_stats(self):
+        log = AttemptLog()
+        log.add(3, 'liuyao', [9, 1, 5, 20, 33, 12], 7, [1, 2, 3, 4, 5, 6], 16, False, 1, 10.5)
+        log.add(3, 'ai', [1, 2, 3, 4, 5, 6], 16, [1, 2, 3, 4, 5, 6], 16, True, 2, 11.0, {'src': 'x'})
+        self.assertEqual(len(log), 2)
+        first = log[0]
+        self.assertEqual(first['pred_reds'], [1, 5, 9, 12, 20, 33])
+        self.assertEqual(first['true_blue'], 16)
+        self.assertFalse(first['is_match'])
+        self.assertEqual(first['meta'], {})
+        self.assertEqual(log[-1]['meta'], {'src': 'x'})
+        self.assertEqual([r['strategy'] for r in log], ['liuyao', 'ai'])
+        self.assertEqual(log.strategy_stats()['ai'], {'attempts': 1, 'matches': 1})
+
+    def test_extend_remaps_strategies(self):
+        a, b = AttemptLog(), AttemptLog()
+        a.add(0, 'liuren', [1, 2, 3, 4, 5, 6], 1, [7, 8, 9, 10, 11, 12], 2, False, 1, 0.0)
+        b.add(1, 'qimen', [2, 3, 4, 5, 6, 7], 3, [1, 2, 3, 4, 5, 6], 4, False, 1, 0.0, {'k': 1})
+        b.add(1, 'liuren', [2, 3, 4, 5, 6, 7], 4, [1, 2, 3, 4, 5, 6], 4, False, 2, 0.0)
+        a.extend(b)
+        self.assertEqual([r['strategy'] for r in a], ['liuren', 'qimen', 'liuren'])
+        self.assertEqual(a[1]['meta'], {'k': 1})
+        self.assertEqual(a[2]['true_reds'], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(a.strategy_stats()['liuren']['attempts'], 2)
+
+    def test_missing_blue_pick_round_trips(self):
+        log = AttemptLog()
+        log.add(5, 'deepseek_suggestion', [3, 8], None, [1, 2, 3, 4, 5, 6], 9, False, 1, 0.0)
+        log.add(5, 'ai', [1, 2, 3, 4, 5, 6], 16, [1, 2, 3, 4, 5, 6], 9, False, 2, 0.0)
+        self.assertEqual((log[0]['pred_reds'], log[0]['pred_blue']), ([3, 8], None))
+        self.assertEqual(log[1]['pred_blue'], 16)
+        self.assertEqual(log.strategy_stats()['deepseek_suggestion'], {'attempts': 1, 'matches': 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
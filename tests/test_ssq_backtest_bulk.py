@@ -0,0 +1,73 @@
+"""
+test_ssq_backtest_bulk.py
+单元测试：回测逐注预测的批量向量化路径与逐次实现逐位一致（含均匀数取到边界值时的红/蓝抽样）
+"""
+import asyncio
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import ssq_ai_backtest as bt
+
+
+def _history(n, seed):
+    rng = random.Random(seed)
+    return [{'red_balls': sorted(rng.sample(range(1, 34), 6)), 'blue_ball': rng.randint(1, 16)} for _ in range(n)]
+
+
+def _run(seed, history, target, max_attempts, bulk):
+    random.seed(seed)
+    predictor = bt.SSQFusionPredictor()
+    predictor.models[0].weight, predictor.models[1].weight = 0.3, 1.7
+    result = asyncio.run(predictor.predict_until_match(history, target, max_attempts=max_attempts, bulk=bulk))
+    return result, [m.weight for m in predictor.models], random.random()
+
+
+class TestBacktestBulk(unittest.TestCase):
+    def setUp(self):
+        if not bt.SSQFusionPredictor()._bulk_supported():
+            self.skipTest("已配置外部模型，批量路径不可用")
+
+    def test_matches_sequential(self):
+        # 不足 10 期（无随机特征）与 10 期以上两种随机数消耗模式
+        for seed, n, max_attempts in ((1, 5, 700), (2, 30, 1500)):
+            history = _history(n, seed)
+            for target in (history[-1], {'red_balls': [1, 2, 3, 4, 5, 6], 'blue_ball': 1}):
+                self.assertEqual(_run(seed, history, target, max_attempts, True),
+                                 _run(seed, history, target, max_attempts, False))
+
+    def test_stops_at_exact_match(self):
+        history = _history(40, 9)
+        random.seed(9)
+        predictor = bt.SSQFusionPredictor()
+        for _ in range(2):
+            reds, blue = asyncio.run(predictor.predict(history))
+        target = {'red_balls': reds, 'blue_ball': blue}
+        bulk = _run(9, history, target, 500, True)
+        self.assertEqual(bulk[0][1], 7)
+        self.assertEqual(bulk, _run(9, history, target, 500, False))
+
+    def test_pattern_bulk_edge_uniforms(self):
+        history = _history(40, 4)
+        pattern = bt.PatternBasedModel()
+        asyncio.run(pattern.detect_patterns(history))
+        u = np.random.RandomState(4).random_sample((64, bt.PatternBasedModel.BULK_DRAWS))
+        u[:4] = 0.0
+        u[4:8] = np.nextafter(1.0, 0.0)
+        u[8, :3] = 0.0
+        reds, blue = pattern.predict_bulk(u)
+        for row in range(len(u)):
+            with mock.patch.object(bt.random, 'random', side_effect=list(u[row])):
+                expected = asyncio.run(pattern.predict(history))
+            self.assertEqual((sorted(reds[row].tolist()), int(blue[row])), expected)
+
+    def test_popcount(self):
+        x = np.array([0, 1, 0b1011, (1 << 33) - 1], dtype=np.int64)
+        self.assertEqual(bt._popcount(x).tolist(), [0, 1, 3, 33])
+        self.assertEqual(bt._red_mask(np.array([[1, 2, 33, 4, 5, 6]])).tolist(), [(1 << 32) | 0b111011])
+
+
+if __name__ == "__main__":
+    unittest.main()
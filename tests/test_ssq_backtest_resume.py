@@ -0,0 +1,83 @@
+"""
+test_ssq_backtest_resume.py
+单元测试：回测检查点断点续跑与统计旁路文件
+"""
+import asyncio
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import ssq_ai_backtest as bt
+
+
+def _history(n, seed=4):
+    rng = random.Random(seed)
+    return [{'period': str(2020001 + i), 'date': '', 'red_balls': sorted(rng.sample(range(1, 34), 6)),
+             'blue_ball': rng.randint(1, 16)} for i in range(n)]
+
+
+def _predictor(crash_at=None):
+    predictor = bt.SSQFusionPredictor()
+    run = predictor.predict_until_match
+
+    async def limited(history, target, max_attempts=100000, bulk=None):
+        if target['period'] == crash_at:
+            raise KeyboardInterrupt
+        return await run(history, target, max_attempts=200)
+
+    predictor.predict_until_match = limited
+    return predictor
+
+
+def _snapshot(predictor):
+    return (predictor.match_history, predictor.attempt_counts, predictor.learning_cycles,
+            [m.state_dict() for m in predictor.models], random.random())
+
+
+class TestBacktestResume(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patches = {name: os.path.join(self.tmp.name, getattr(bt, name))
+                   for name in ('CHECKPOINT_FILE', 'STATS_FILE', 'MODEL_STATE_FILE')}
+        for name, path in patches.items():
+            p = mock.patch.object(bt, name, path)
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_resume_matches_uninterrupted_run(self):
+        history = _history(26)
+        random.seed(11)
+        full = _predictor()
+        asyncio.run(full.learn_from_history(history, checkpoint_every=5))
+        expected = _snapshot(full)
+
+        random.seed(11)
+        crashed = _predictor(crash_at=history[13]['period'])
+        with self.assertRaises(KeyboardInterrupt):
+            asyncio.run(crashed.learn_from_history(history, checkpoint_every=5))
+        # 中断后随机数状态已不同，续跑必须完全依赖检查点
+        random.seed(99)
+        resumed = _predictor()
+        asyncio.run(resumed.learn_from_history(history, resume=True, checkpoint_every=5))
+        self.assertEqual(_snapshot(resumed), expected)
+
+        stats = np.fromfile(bt.STATS_FILE, dtype=bt.STATS_DTYPE)
+        self.assertEqual(stats['index'].tolist(), list(range(1, 26)))
+        self.assertEqual(stats['level'].tolist(), expected[0])
+
+    def test_mismatched_checkpoint_starts_over(self):
+        random.seed(1)
+        asyncio.run(_predictor().learn_from_history(_history(8), checkpoint_every=3))
+        other = _predictor()
+        asyncio.run(other.learn_from_history(_history(8, seed=5), resume=True, checkpoint_every=3))
+        self.assertEqual(other.learning_cycles, 7)
+        self.assertEqual(len(np.fromfile(bt.STATS_FILE, dtype=bt.STATS_DTYPE)), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+test_ssq_closed_loop_workers.py
+单元测试：并行闭环复盘在相同 seed 下，不同进程数（分块方式）得到完全一致的各期状态与尝试号码，
+子进程缓存计数合并回主进程；单进程复盘不固定权重；融合上下文每期只构建一次
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ssq_predict_cycle import SSQPredictCycle
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestClosedLoopWorkers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        with open(os.path.join(ROOT, 'ssq_history.csv'), encoding='utf-8') as src, \
+                open('ssq_history.csv', 'w', encoding='utf-8') as dst:
+            dst.writelines(line for _, line in zip(range(25), src))
+
+    def _run(self, workers):
+        cycle = SSQPredictCycle(data_path='ssq_history.csv')
+        cycle.run_closed_loop(max_attempts_per_issue=14, consult_external=False, train_ai=False,
+                              workers=workers, seed=5, log_dir='reports')
+        picks = [(a['issue'], a['strategy'], list(a['pred_reds']), a['pred_blue']) for a in cycle.loop_attempts]
+        return cycle, picks
+
+    def test_workers_do_not_change_results(self):
+        cycle_2, picks_2 = self._run(2)
+        cycle_3, picks_3 = self._run(3)
+        self.assertEqual(len(cycle_2.issue_states), 24)
+        self.assertEqual(cycle_2.issue_states, cycle_3.issue_states)
+        self.assertEqual(picks_2, picks_3)
+        # 子进程的缓存计数已合并回主进程
+        served = cycle_2.ai_model.cache_hits + cycle_2.ai_model.cache_misses
+        self.assertGreater(served, 0)
+        self.assertEqual(served, cycle_3.ai_model.cache_hits + cycle_3.ai_model.cache_misses)
+
+    def test_sequential_keeps_adaptive_weights(self):
+        cycle = SSQPredictCycle(data_path='ssq_history.csv')
+        frozen = []
+        original = cycle._replay_issue
+
+        def spy(*args, **kwargs):
+            frozen.append(cycle._frozen_weights)
+            return original(*args, **kwargs)
+
+        with mock.patch.object(cycle, '_replay_issue', side_effect=spy):
+            cycle.run_closed_loop(max_attempts_per_issue=6, consult_external=False, train_ai=False,
+                                  workers=1, seed=5, log_dir='reports')
+        self.assertEqual(len(frozen), 24)
+        self.assertTrue(all(w is None for w in frozen))
+
+    def test_fusion_context_built_once_per_issue(self):
+        cycle = SSQPredictCycle(data_path='ssq_history.csv')
+        with mock.patch.object(cycle, '_fusion_engine', wraps=cycle._fusion_engine) as build:
+            cycle.run_closed_loop(max_attempts_per_issue=60, consult_external=False, train_ai=False,
+                                  seed=5, log_dir='reports')
+        fused = {a['issue'] for a in cycle.loop_attempts if a['strategy'] == 'heuristic_fusion'}
+        rounds = sum(1 for a in cycle.loop_attempts if a['strategy'] == 'heuristic_fusion')
+        self.assertGreater(rounds, len(fused))
+        self.assertEqual(build.call_count, len(fused))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+test_ssq_draw_table.py
+单元测试：打包开奖表与零拷贝历史视图
+"""
+import json
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from ssq_draw_table import DrawTable, as_history_view, draw_arrays, history_index
+
+
+def _records(n, seed=0):
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        reds = sorted(rng.sample(range(1, 34), 6))
+        blue = rng.randint(1, 16)
+        out.append({
+            "period": str(2020001 + i),
+            "date": "2020-01-01",
+            "red_balls": reds,
+            "blue_ball": blue,
+            "full_code": " ".join(f"{x:02d}" for x in reds) + f" + {blue:02d}",
+        })
+    return out
+
+
+class TestDrawTable(unittest.TestCase):
+    def test_view_behaves_like_list(self):
+        records = _records(50)
+        view = as_history_view(records)
+        self.assertEqual(view.reds.dtype, np.int8)
+        self.assertEqual(list(view), records)
+        for sl in (slice(None, 20), slice(-10, None), slice(5, 5), slice(None, None, 3)):
+            self.assertEqual(list(view[sl]), records[sl])
+        # 视图的切片仍是同一张表上的视图
+        sub = view[:30][-10:]
+        self.assertIs(sub.table, view.table)
+        self.assertEqual((sub.start, sub.stop), (20, 30))
+        self.assertTrue(np.shares_memory(sub.reds, view.table.reds))
+        self.assertEqual(sub[-1], records[29])
+        with self.assertRaises(IndexError):
+            sub[10]
+
+    def test_draw_arrays_tail(self):
+        records = _records(30, 1)
+        view = as_history_view(records)
+        for k in (0, 10, 100, None):
+            a = draw_arrays(view[:25], k)
+            b = draw_arrays(records[:25], k)
+            self.assertTrue(np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1]))
+        self.assertEqual(draw_arrays(records, 10)[0].shape, (10, 6))
+
+    def test_history_index_shared_by_views(self):
+        records = _records(60, 3)
+        view = as_history_view(records)
+        for hist in (view[:40], view[15:40], records[:40]):
+            index, end = history_index(hist)
+            reds, blues = draw_arrays(hist, 10)
+            self.assertEqual(index.red_counts(end, end - 10).tolist(),
+                             np.bincount(reds.ravel(), minlength=34)[1:].tolist())
+            self.assertEqual(index.blue_counts(end, end - 10).tolist(),
+                             np.bincount(blues, minlength=17)[1:].tolist())
+        # 同表视图共用一份整表索引
+        self.assertIs(history_index(view[:20])[0], history_index(view[5:50])[0])
+        self.assertEqual(len(view.table.index()), 60)
+
+    def test_from_json(self):
+        records = _records(12, 2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ssq_history_data.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(records, f)
+            table = DrawTable.from_json(path)
+        self.assertEqual(len(table), 12)
+        self.assertEqual(list(table.view()), records)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+test_ssq_eval_grid.py
+单元测试：网格评估共享预计算、矩阵化逐期融合与逐轮减半；默认串行，spawn 进程池与串行结果一致
+"""
+import os
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from ssq_eval_grid import EvalConfig, _combo_engine, build_grid_data, halving_rungs, score_rows, search_grid
+from ssq_fusion_engine import FusionEngine
+
+
+def _grid(n, seed=5, truths=None):
+    rng = random.Random(seed)
+    attempts = [[{'strategy': s, 'pred_reds': rng.sample(range(1, 34), 6), 'pred_blue': rng.randint(1, 16)}
+                 for s in ('liuyao', 'liuren', 'qimen', 'ai')] for _ in range(n)]
+    attempts[3] = [{'strategy': 'ai', 'pred_reds': [], 'pred_blue': None}]  # 非常规计票走标量回退
+    engines = [FusionEngine(weights={'liuyao': 1.3, 'ai': 0.7},
+                            red_prior=np.random.RandomState(i).dirichlet(np.ones(33)),
+                            blue_prior=np.random.RandomState(100 + i).dirichlet(np.ones(16)))
+               for i in range(n)]
+    if truths is None:
+        truths = [(sorted(rng.sample(range(1, 34), 6)), rng.randint(1, 16)) for _ in range(n)]
+    return build_grid_data(list(range(n)), attempts, engines, truths, seed=3)
+
+
+class TestEvalGrid(unittest.TestCase):
+    def test_rows_match_per_issue_fusion(self):
+        data = _grid(24)
+        for params in (EvalConfig().combos()[0], EvalConfig().combos()[-1]):
+            fused = []
+            for j in range(len(data)):
+                engine = _combo_engine(data, params, j)
+                t = engine.tally(data.attempts[j])
+                if t.regular:
+                    u = data.uniforms[j:j + 1] if t.sampling_red else data.uniforms[j:j + 1, 6:]
+                    fused.append(engine._sample_batch(t, u)[0])
+                else:
+                    random.seed(f"3:{j}")
+                    fused.append(engine.sample(t, 1)[0])
+            # 以逐期融合结果作为"开奖号码"，矩阵化评估须全部完全命中
+            ref = _grid(24, truths=fused)
+            self.assertEqual(score_rows(ref, params, 0, 24), (24 * 6, 24, 24))
+
+    def test_halving_prunes_and_is_deterministic(self):
+        self.assertEqual(halving_rungs(100, 3, 20), [33, 100])
+        self.assertEqual(halving_rungs(100, 1, 20), [100])
+        data = _grid(60)
+        cfg = EvalConfig(workers=1, halving_eta=3, halving_min_issues=10)
+        results, rungs = search_grid(data, cfg)
+        self.assertEqual(rungs, [20, 60])
+        self.assertEqual(len(results), 486)
+        full = [r for r in results if not r['pruned']]
+        self.assertEqual(len(full), 162)
+        self.assertTrue(all(r['window'] == 60 for r in full))
+        self.assertTrue(all(r['window'] == 20 for r in results[162:]))
+        # 幸存组合的完整窗口得分与不减半时一致
+        plain = {tuple(r[k] for k in ('temp_red', 'top_p_red', 'alpha_red', 'temp_blue', 'top_p_blue', 'alpha_blue')):
+                 r['score'] for r in search_grid(data, EvalConfig(workers=1, halving_eta=1))[0]}
+        for r in full:
+            key = tuple(r[k] for k in ('temp_red', 'top_p_red', 'alpha_red', 'temp_blue', 'top_p_blue', 'alpha_blue'))
+            self.assertEqual(r['score'], plain[key])
+        self.assertEqual(results, search_grid(data, cfg)[0])
+
+    def test_default_serial_and_spawn_pool(self):
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('SSQ_GRID_WORKERS', None)
+            self.assertEqual(EvalConfig().resolved_workers(), 1)
+            with mock.patch.dict(os.environ, {'SSQ_GRID_WORKERS': '3'}):
+                self.assertEqual(EvalConfig().resolved_workers(), 3)
+        data = _grid(30)
+        small = dict(temp_red_list=[0.9, 1.0], top_p_red_list=[1.0], alpha_red_list=[0.0, 0.1],
+                     temp_blue_list=[1.0], top_p_blue_list=[1.0], alpha_blue_list=[0.0], halving_min_issues=10)
+        serial = search_grid(data, EvalConfig(workers=1, **small))
+        self.assertEqual(search_grid(data, EvalConfig(workers=2, **small)), serial)
+
+
+if __name__ == "__main__":
+    unittest.main()
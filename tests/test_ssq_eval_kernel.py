@@ -0,0 +1,91 @@
+"""
+test_ssq_eval_kernel.py
+单元测试：评估内核的掩码命中统计与按历史/权重哈希的落盘缓存
+"""
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import ssq_eval_kernel as kernel
+
+
+class _Cycle:
+    """最小化的预测闭环替身：四个策略各自随机出号，并记录调用次数。"""
+
+    def __init__(self, n, seed=0):
+        rng = random.Random(seed)
+        self.history = [(sorted(rng.sample(range(1, 34), 6)), rng.randint(1, 16)) for _ in range(n)]
+        self.calls = 0
+
+    def _predict(self, idx, k=6):
+        self.calls += 1
+        return random.sample(range(1, 34), k), random.randint(1, 16)
+
+    def predict_liuyao(self, idx):
+        return self._predict(idx, 5)  # 去重后不足 6 个红球
+
+    predict_liuren = predict_qimen = predict_ai = _predict
+
+
+class TestEvalKernel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.weights = os.path.join(self.tmp.name, 'weights.json')
+        p = mock.patch.object(kernel, 'WEIGHTS_FILE', self.weights)
+        p.start()
+        self.addCleanup(p.stop)
+        self.cache = os.path.join(self.tmp.name, 'cache')
+
+    def test_hits_match_set_intersection(self):
+        cycle = _Cycle(40)
+        win = kernel.predict_window(cycle, range(10, 40), seed=1)
+        self.assertEqual(win.preds.shape, (30, 4, 7))
+        red, blue = win.red_hits(), win.blue_hits()
+        for i in range(len(win)):
+            true_reds, true_blue = cycle.history[10 + i]
+            for s, attempt in enumerate(win.attempts(i)):
+                self.assertEqual(red[i, s], len(set(attempt['pred_reds']) & set(true_reds)))
+                self.assertEqual(blue[i, s], attempt['pred_blue'] == true_blue)
+        self.assertEqual(len(win.attempts(0)[0]['pred_reds']), 5)
+        rate = win.strategy_rates('qimen')
+        self.assertAlmostEqual(rate[0], red[:, 2].sum() / 30 / 6.0)
+        self.assertEqual(win.strategy_rates('unknown'), (0.0, 0.0, 0))
+
+    def test_cache_keyed_by_history_and_weights(self):
+        cycle = _Cycle(25)
+        first = kernel.load_window(cycle, window=20, seed=7, cache_dir=self.cache)
+        after_miss = random.random()
+        calls = cycle.calls
+        again = kernel.load_window(cycle, window=20, seed=7, cache_dir=self.cache)
+        self.assertEqual(cycle.calls, calls)
+        self.assertTrue(np.array_equal(first.preds, again.preds))
+        # 命中与未命中缓存后的随机状态一致，后续融合可复现
+        self.assertEqual(random.random(), after_miss)
+        with open(self.weights, 'w', encoding='utf-8') as f:
+            f.write('{"weights": {"ai": 2.0}}')
+        kernel.load_window(cycle, window=20, seed=7, cache_dir=self.cache)
+        self.assertEqual(cycle.calls, calls * 2)
+        cycle.history.append(([1, 2, 3, 4, 5, 6], 1))
+        self.assertEqual(kernel.load_window(cycle, window=20, seed=7, cache_dir=self.cache).issues[-1], 25)
+        self.assertEqual(len(os.listdir(self.cache)), 3)
+
+    def test_unseeded_windows_not_cached_by_default(self):
+        cycle = _Cycle(25)
+        kernel.load_window(cycle, window=20, cache_dir=self.cache)
+        calls = cycle.calls
+        kernel.load_window(cycle, window=20, cache_dir=self.cache)
+        self.assertEqual(cycle.calls, calls * 2)
+        self.assertFalse(os.path.exists(self.cache) and os.listdir(self.cache))
+        # 显式开启时仍可复用
+        kernel.load_window(cycle, window=20, cache=True, cache_dir=self.cache)
+        kernel.load_window(cycle, window=20, cache=True, cache_dir=self.cache)
+        self.assertEqual(cycle.calls, calls * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+test_ssq_fusion_engine.py
+单元测试：向量化融合引擎与逐次标量实现在固定种子下结果一致
+"""
+import random
+import unittest
+
+from ssq_fusion_engine import FusionEngine
+
+
+def _attempts(seed):
+    rng = random.Random(seed)
+    return [
+        {'issue': 7, 'strategy': s, 'pred_reds': sorted(rng.sample(range(1, 34), 6)), 'pred_blue': rng.randint(1, 16)}
+        for s in ['liuyao', 'liuren', 'qimen', 'ai', 'cultural_dl']
+    ]
+
+
+class TestFusionEngine(unittest.TestCase):
+    def _engine(self, temp_red, temp_blue, top_p_red, top_p_blue):
+        prior_r = [1.0 / 33] * 33
+        prior_b = [(i + 1) / 136.0 for i in range(16)]
+        return FusionEngine(
+            weights={'liuyao': 0.3, 'liuren': 0.2, 'qimen': 0.25, 'ai': 0.15},
+            red_prior=prior_r, blue_prior=prior_b,
+            mem_red={i: float(i % 5) for i in range(1, 34)}, mem_blue={i: 1.0 for i in range(1, 17)},
+            alpha_mem_red=0.05, alpha_mem_blue=0.05,
+            temp_red=temp_red, temp_blue=temp_blue, top_p_red=top_p_red, top_p_blue=top_p_blue,
+        )
+
+    def test_batch_matches_scalar(self):
+        for cfg in [(1.0, 1.0, 1.0, 1.0), (0.7, 1.3, 0.9, 0.8), (1.5, 0.6, 0.5, 0.7)]:
+            engine = self._engine(*cfg)
+            tally = engine.tally(_attempts(3))
+            self.assertTrue(tally.regular)
+            random.seed(11)
+            expected = [engine._sample_scalar(tally) for _ in range(40)]
+            after_expected = random.random()
+            random.seed(11)
+            got = engine.sample(tally, 40)
+            self.assertEqual(got, expected)
+            # 随机流按实际消耗推进
+            self.assertEqual(random.random(), after_expected)
+
+    def test_partial_consumption_advances_stream(self):
+        engine = self._engine(0.8, 0.8, 0.9, 0.9)
+        tally = engine.tally(_attempts(5))
+        random.seed(2)
+        expected = [engine._sample_scalar(tally) for _ in range(3)]
+        after_expected = random.random()
+        random.seed(2)
+        draws = engine.iter_samples(tally, batch=16)
+        got = [next(draws) for _ in range(3)]
+        draws.close()
+        self.assertEqual(got, expected)
+        self.assertEqual(random.random(), after_expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+test_ssq_history_index.py
+单元测试：历史前缀和索引的截至查询、增量对齐与衰减冷热
+"""
+import random
+import unittest
+
+import numpy as np
+
+from ssq_history_index import HistoryIndex, dict_draw
+
+
+def _draws(n, seed=0):
+    rng = random.Random(seed)
+    return [(sorted(rng.sample(range(1, 34), 6)), rng.randint(1, 16)) for _ in range(n)]
+
+
+class TestHistoryIndex(unittest.TestCase):
+    def test_as_of_queries_match_rescan(self):
+        draws = _draws(120)
+        idx = HistoryIndex(draws[:50])
+        idx.extend(draws[50:])
+        for end in (0, 1, 37, 120):
+            red = [0] * 33
+            last = [-1] * 33
+            for i, (reds, _) in enumerate(draws[:end]):
+                for r in reds:
+                    red[r - 1] += 1
+                    last[r - 1] = i
+            self.assertEqual(idx.red_counts(end).tolist(), red)
+            self.assertEqual(idx.red_last_seen(end).tolist(), last)
+            self.assertEqual(idx.red_omission(end).tolist(), [end - 1 - x for x in last])
+            count = {n: red[n - 1] for n in range(1, 34)}
+            self.assertEqual(idx.hot_cold(end)[0], sorted(count, key=lambda x: -count[x])[:6])
+        blue_win = [0] * 16
+        for _, b in draws[100:110]:
+            blue_win[b - 1] += 1
+        self.assertEqual(idx.blue_counts(110, 100).tolist(), blue_win)
+
+    def test_sync_prefix_slices_incrementally(self):
+        data = [{'red_balls': r, 'blue_ball': b} for r, b in _draws(40, 1)]
+        idx = HistoryIndex()
+        for i in (10, 11, 25, 40):
+            idx.sync(data[:i], key=dict_draw)
+            self.assertEqual(len(idx), i)
+        self.assertEqual(idx.red_counts().tolist(), HistoryIndex(dict_draw(d) for d in data).red_counts().tolist())
+        # 与已索引内容不连续的序列触发重建
+        other = [{'red_balls': r, 'blue_ball': b} for r, b in _draws(5, 2)]
+        idx.sync(other, key=dict_draw)
+        self.assertEqual(len(idx), 5)
+
+    def test_decayed_matches_sequential_update(self):
+        draws = _draws(60, 3)
+        idx = HistoryIndex(draws[:30])
+        idx.decayed(0.99)
+        idx.extend(draws[30:])
+        hot = np.zeros(33)
+        for reds, _ in draws:
+            hot *= 0.99
+            for r in reds:
+                hot[r - 1] += 1.0
+        self.assertTrue(np.array_equal(idx.decayed(0.99)[0], hot))
+
+    def test_decayed_appends_one_draw_at_a_time(self):
+        draws = _draws(300, 4)
+        idx = HistoryIndex(draws[:1])
+        idx.decayed(0.95)
+        grown = 0
+        for d in draws[1:]:
+            before = idx._decayed[0.95][0]
+            idx.append(*d)
+            grown += idx._decayed[0.95][0] is not before
+        # 容量翻倍：300 期只重新分配 O(log n) 次，有效行之外不暴露
+        self.assertLessEqual(grown, 10)
+        red, blue = idx.decayed_matrix(0.95)
+        self.assertEqual((red.shape, blue.shape), ((301, 33), (301, 16)))
+        fresh = HistoryIndex(draws).decayed_matrix(0.95)
+        self.assertTrue(np.array_equal(red, fresh[0]) and np.array_equal(blue, fresh[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
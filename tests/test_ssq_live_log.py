@@ -0,0 +1,51 @@
+"""
+test_ssq_live_log.py
+单元测试：分段滚动日志的截断、尾部读取与原子快照
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from ssq_live_log import RotatingJsonlLog, tail_records, write_json_atomic
+
+
+class TestRotatingJsonlLog(unittest.TestCase):
+    def test_rotation_keeps_recent_records(self):
+        with tempfile.TemporaryDirectory() as d:
+            log = RotatingJsonlLog(os.path.join(d, 'live'), segment_lines=10, max_lines=25)
+            for i in range(103):
+                log.append({'tick': i})
+            segs = os.listdir(os.path.join(d, 'live'))
+            self.assertLessEqual(len(segs), 4)
+            tail = log.tail(25)
+            self.assertEqual([r['tick'] for r in tail], list(range(78, 103)))
+            # 重新打开后继续在最新段追加
+            log2 = RotatingJsonlLog(os.path.join(d, 'live'), segment_lines=10, max_lines=25)
+            log2.append({'tick': 103})
+            self.assertEqual(tail_records(os.path.join(d, 'live'), 2), [{'tick': 102}, {'tick': 103}])
+
+    def test_legacy_fallback_and_atomic_write(self):
+        with tempfile.TemporaryDirectory() as d:
+            legacy = os.path.join(d, 'old.jsonl')
+            with open(legacy, 'w', encoding='utf-8') as f:
+                for i in range(5):
+                    f.write(json.dumps({'i': i}) + '\n')
+            self.assertEqual(tail_records(os.path.join(d, 'none'), 2, legacy_path=legacy), [{'i': 3}, {'i': 4}])
+            path = os.path.join(d, 'latest.json')
+            write_json_atomic(path, {'ok': True})
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(json.load(f), {'ok': True})
+            self.assertEqual(os.listdir(d).count('latest.json'), 1)
+            self.assertFalse([n for n in os.listdir(d) if n.startswith('.tmp_')])
+            # 权限与普通 open() 创建的文件一致（mkstemp 默认 0600）
+            umask = os.umask(0o022)
+            try:
+                write_json_atomic(path, {'ok': False})
+            finally:
+                os.umask(umask)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+
+
+if __name__ == "__main__":
+    unittest.main()
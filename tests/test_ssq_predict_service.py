@@ -0,0 +1,162 @@
+"""
+test_ssq_predict_service.py
+单元测试：常驻预测服务的快照预热、源文件变化后的后台原子重载与请求隔离、计算占满时重载不排队、重载状态只在事件循环线程更新；
+预测合并缓存与预生成池
+"""
+import asyncio
+import os
+import tempfile
+import itertools
+import threading
+import time
+import unittest
+
+from ssq_predict_service import PredictCache, PredictService
+
+
+class _Cycle:
+    builds = 0
+
+    def __init__(self, path):
+        type(self).builds += 1
+        with open(path, 'r', encoding='utf-8') as f:
+            self.history = [line.strip() for line in f if line.strip()]
+        self.temp_red = 1.0
+
+
+def _job(cycle, temp_red=None):
+    if temp_red is not None:
+        cycle.temp_red = temp_red
+    return len(cycle.history), cycle.temp_red, threading.current_thread().name
+
+
+_COUNTER = itertools.count()
+
+
+def _predict(cycle, seed=None):
+    time.sleep(0.01)
+    return {'status': 'ok', 'n': next(_COUNTER), 'history': len(cycle.history), 'seed': seed}
+
+
+class TestPredictService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'ssq_history.csv')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('a\nb\n')
+        _Cycle.builds = 0
+        self.service = PredictService(self.path, workers=2, check_interval=0.0, factory=_Cycle)
+        self.addCleanup(self.service.shutdown)
+
+    def test_requests_share_warm_snapshot_in_executor(self):
+        async def burst():
+            return await asyncio.gather(*[self.service.run(_job, temp_red=0.5 if i % 2 else None) for i in range(20)])
+
+        out = asyncio.run(burst())
+        self.assertEqual(_Cycle.builds, 1)
+        self.assertTrue(all(name.startswith('ssq-predict') for _, _, name in out))
+        # 请求内的参数覆盖不会写回常驻实例
+        self.assertEqual([t for _, t, _ in out], [0.5 if i % 2 else 1.0 for i in range(20)])
+        self.assertEqual(self.service.snapshot().cycle.temp_red, 1.0)
+
+    def test_reload_on_source_change(self):
+        threads = []
+        done = self.service._reload_done
+
+        def spy(*args):
+            threads.append(threading.current_thread())
+            return done(*args)
+
+        self.service._reload_done = spy
+
+        async def scenario():
+            first = await self.service.run(_job)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('c\n')
+            # 检测到变化的请求仍使用旧快照，后台重建完成后原子切换
+            during = await self.service.run(_job)
+            while self.service._reloading is not None:
+                await asyncio.sleep(0.01)
+            after = await self.service.run(_job)
+            return first[0], during[0], after[0]
+
+        self.assertEqual(asyncio.run(scenario()), (2, 2, 3))
+        # 重载状态只在事件循环线程（此处即主线程）中更新
+        self.assertEqual(threads, [threading.current_thread()] * 2)
+        stats = self.service.stats()
+        self.assertEqual((stats['generation'], stats['reloads'], stats['history']), (2, 1, 3))
+
+    def test_reload_not_queued_behind_busy_compute(self):
+        service = PredictService(self.path, check_interval=0.0, factory=_Cycle)
+        self.addCleanup(service.shutdown)
+        self.assertEqual(service.workers, 1)
+        release = threading.Event()
+
+        def _slow(cycle):
+            release.wait(5)
+            return len(cycle.history)
+
+        async def scenario():
+            first = await service.run(_job)
+            slow = asyncio.ensure_future(service.run(_slow))
+            await asyncio.sleep(0.05)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('c\n')
+            await service._ensure_fresh()
+            # 唯一的计算线程被占用时，重建照常在构建线程完成
+            for _ in range(200):
+                if service._reloading is None:
+                    break
+                await asyncio.sleep(0.01)
+            reloaded = service.stats()['reloads']
+            release.set()
+            return first[0], reloaded, await slow
+
+        self.assertEqual(asyncio.run(scenario()), (2, 1, 2))
+
+    def test_seeded_requests_coalesce_and_cache_until_reload(self):
+        cache = PredictCache(self.service, pool_size=4)
+
+        async def scenario():
+            burst = await asyncio.gather(*[cache.get(_predict, ('s', 7), True, seed=7) for _ in range(10)])
+            again = await cache.get(_predict, ('s', 7), True, seed=7)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('c\n')
+            # 只经 cache.get：命中前的签名检查发起后台重载，重载期间仍返回旧结果
+            during = await cache.get(_predict, ('s', 7), True, seed=7)
+            while self.service._reloading is not None:
+                await asyncio.sleep(0.01)
+            fresh = await cache.get(_predict, ('s', 7), True, seed=7)
+            return burst, again, during, fresh
+
+        burst, again, during, fresh = asyncio.run(scenario())
+        self.assertEqual(len({r['n'] for r in burst}), 1)
+        self.assertIs(again, burst[0])
+        # 重载可能在本次请求取结果前完成：旧结果或新代次结果均可，但不会是其他
+        self.assertIn(during['history'], (2, 3))
+        self.assertEqual((fresh['history'], burst[0]['history']), (3, 2))
+        self.assertEqual((self.service.stats()['reloads'], self.service.stats()['generation']), (1, 2))
+        stats = cache.stats()
+        self.assertEqual((stats['misses'], stats['coalesced'], stats['hits']), (2, 9, 2))
+
+    def test_unseeded_requests_served_from_refilled_pool(self):
+        cache = PredictCache(self.service, pool_size=4)
+
+        async def scenario():
+            first = await cache.get(_predict, ('u',), False)
+            while cache._refilling:
+                await asyncio.sleep(0.01)
+            pooled = [await cache.get(_predict, ('u',), False) for _ in range(3)]
+            return first, pooled
+
+        first, pooled = asyncio.run(scenario())
+        self.assertEqual(len({r['n'] for r in [first] + pooled}), 4)
+        stats = cache.stats()
+        self.assertEqual((stats['pool_misses'], stats['pool_hits']), (1, 3))
+        self.assertGreaterEqual(stats['refilled'], 4)
+        self.assertAlmostEqual(stats['hit_ratio'], 0.75)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+"""
+test_ssq_strategy_table.py
+单元测试：术数基础号码预计算表与逐期计算一致，并可 memmap 复用
+"""
+import os
+import pickle
+import tempfile
+import unittest
+
+from ssq_strategy_table import STRATEGIES, StrategyTable, liuren_base, liuyao_base, qimen_base
+
+
+class TestStrategyTable(unittest.TestCase):
+    def test_table_matches_direct_and_reloads(self):
+        funcs = {'liuyao': liuyao_base, 'liuren': liuren_base, 'qimen': qimen_base}
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'tbl.npy')
+            tbl = StrategyTable.load_or_build(path, 200)
+            self.assertTrue(os.path.exists(path))
+            for name in STRATEGIES:
+                for idx in list(range(200)) + [-3, 500]:
+                    self.assertEqual(tbl.get(name, idx), funcs[name](idx))
+            self.assertEqual(tbl.misses, 6)
+            # 已有表覆盖更小的 horizon 时直接复用
+            again = StrategyTable.load_or_build(path, 150)
+            self.assertEqual(again.horizon, 200)
+            clone = pickle.loads(pickle.dumps(again))
+            self.assertEqual(clone.get('qimen', 77), qimen_base(77))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+双色球预测热点路径基准测试
+- 覆盖：融合 _fuse_from_attempts、候选生成 generate_candidates_from_attempts、闭环复盘 run_closed_loop（N 期）、
+  SSQAIModel.train/predict、CulturalDeepModel.fit/predict_distributions、ssq_eval_grid.evaluate_grid
+- 合成历史规模默认 2k/20k/200k 期（固定种子），每个规模在独立临时目录中运行，不触碰仓库内的数据与模型文件
+- 每个 (用例, 规模) 在独立子进程中执行，峰值 RSS 互不干扰；输出 JSON：ops/sec、p50/p99 延迟、峰值 RSS
+- compare 模式对比基线 JSON，吞吐下降 / p99 上升 / 内存上升超过阈值时返回非零退出码
+
+用法：
+  python tools/bench_ssq.py run --sizes 2000,20000,200000 --out reports/bench/ssq_bench.json
+  python tools/bench_ssq.py run --quick --compare reports/bench/ssq_bench_baseline.json
+  python tools/bench_ssq.py compare reports/bench/ssq_bench_baseline.json reports/bench/ssq_bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+CASES = [
+    'fuse',
+    'candidates',
+    'closed_loop',
+    'ai_train',
+    'ai_predict',
+    'culdl_fit',
+    'culdl_predict',
+    'eval_grid',
+]
+DEFAULT_SIZES = [2000, 20000, 200000]
+
+
+# ---------- 合成数据与工作目录 ----------
+def write_synthetic_history(path: str, n: int, seed: int = 20240101) -> None:
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('期号,红1,红2,红3,红4,红5,红6,蓝\n')
+        for i in range(n):
+            reds = sorted(rng.sample(range(1, 34), 6))
+            f.write(f"{i + 1},{','.join(map(str, reds))},{rng.randint(1, 16)}\n")
+
+
+def prepare_workdir(base: str, size: int, culdl_window: int) -> str:
+    """生成合成历史，并预训练文化深度模型（最近 culdl_window 期），避免各用例在初始化时全量训练。"""
+    wd = os.path.join(base, f'n{size}')
+    os.makedirs(os.path.join(wd, 'models'), exist_ok=True)
+    write_synthetic_history(os.path.join(wd, 'ssq_history.csv'), size)
+    code = (
+        'from cultural_deep_model import CulturalDeepModel\n'
+        'from ssq_data import SSQDataManager\n'
+        'h = SSQDataManager("ssq_history.csv").history\n'
+        f'h = h[-{int(culdl_window)}:]\n'
+        'm = CulturalDeepModel()\n'
+        'm.fit(h) and m.save("models/cultural_deep.joblib")\n'
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=wd, env=_child_env(), check=False)
+    return wd
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + (os.pathsep + env['PYTHONPATH'] if env.get('PYTHONPATH') else '')
+    env.setdefault('SSQ_SEED', '42')
+    return env
+
+
+# ---------- 计时 ----------
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def _measure(fn: Callable[[], Any], iterations: int, warmup: int, units_per_op: int = 1) -> Dict[str, Any]:
+    for _ in range(warmup):
+        fn()
+    lat: List[float] = []
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        s = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - s)
+    total = time.perf_counter() - t0
+    lat.sort()
+    return {
+        'iterations': iterations,
+        'units_per_op': units_per_op,
+        'seconds': round(total, 6),
+        'ops_per_sec': round(iterations * units_per_op / total, 3) if total > 0 else None,
+        'p50_ms': round(_percentile(lat, 0.50) * 1000.0, 4),
+        'p99_ms': round(_percentile(lat, 0.99) * 1000.0, 4),
+        'mean_ms': round(total / max(1, iterations) * 1000.0, 4),
+    }
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 为 KB，macOS 为字节
+    return round(rss / (1024.0 * 1024.0) if sys.platform == 'darwin' else rss / 1024.0, 2)
+
+
+# ---------- 用例（在子进程、工作目录内执行） ----------
+def _cycle():
+    from ssq_predict_cycle import SSQPredictCycle
+    cyc = SSQPredictCycle(data_path='ssq_history.csv')
+    cyc._write_fusion_trace = False
+    return cyc
+
+
+def _attempts(cyc, idx: int) -> List[Dict[str, Any]]:
+    out = []
+    for name, fn in (('liuyao', cyc.predict_liuyao), ('liuren', cyc.predict_liuren),
+                     ('qimen', cyc.predict_qimen), ('ai', cyc.predict_ai)):
+        reds, blue = fn(idx)
+        out.append({'issue': idx, 'strategy': name, 'pred_reds': reds, 'pred_blue': blue})
+    return out
+
+
+def run_case(case: str, args: argparse.Namespace) -> Dict[str, Any]:
+    random.seed(42)
+    if case in ('fuse', 'candidates'):
+        cyc = _cycle()
+        idx = len(cyc.history) - 1
+        attempts = _attempts(cyc, idx)
+        if case == 'fuse':
+            return _measure(lambda: cyc._fuse_from_attempts(attempts), args.iterations, 3)
+        return _measure(lambda: cyc.generate_candidates_from_attempts(attempts, count=5), max(1, args.iterations // 10), 1)
+    if case == 'closed_loop':
+        cyc = _cycle()
+        n = min(args.loop_issues, len(cyc.history))
+        # 只复盘最近 n 期（索引/先验仍基于全量历史）
+        cyc.history = cyc.history[-n:]
+        log_dir = os.path.join(os.getcwd(), 'reports')
+        return _measure(
+            lambda: cyc.run_closed_loop(max_attempts_per_issue=args.loop_attempts, consult_external=False,
+                                        log_dir=log_dir, train_ai=False),
+            1, 0, units_per_op=n,
+        )
+    if case in ('ai_train', 'ai_predict'):
+        from ssq_ai_model import SSQAIModel
+        from ssq_data import SSQDataManager
+        model = SSQAIModel(SSQDataManager('ssq_history.csv'))
+        if case == 'ai_train':
+            return _measure(model.train, 1, 0)
+        model.train()
+        return _measure(model.predict, args.iterations, 3)
+    if case in ('culdl_fit', 'culdl_predict'):
+        from cultural_deep_model import CulturalDeepModel
+        from ssq_data import SSQDataManager
+        hist = SSQDataManager('ssq_history.csv').history
+        if case == 'culdl_fit':
+            return _measure(lambda: CulturalDeepModel().fit(hist), 1, 0)
+        mdl = CulturalDeepModel.load('models/cultural_deep.joblib') or CulturalDeepModel()
+        counter = iter(range(10 ** 9))
+
+        def cold_predict():
+            # 度量前向计算本身：清空按期分布 LRU，避免测到缓存命中
+            getattr(mdl, '_dist_cache', {}).clear()
+            return mdl.predict_distributions(len(hist) - 1 - next(counter) % 100)
+        return _measure(cold_predict, args.iterations, 3)
+    if case == 'eval_grid':
+        import ssq_eval_grid
+        cfg = ssq_eval_grid.EvalConfig(
+            window=args.grid_window,
+            temp_red_list=[0.9, 1.0], top_p_red_list=[0.9, 1.0], alpha_red_list=[0.0, 0.1],
+            temp_blue_list=[1.0], top_p_blue_list=[1.0], alpha_blue_list=[0.0],
+        )
+        return _measure(lambda: ssq_eval_grid.evaluate_grid(cfg), 1, 0, units_per_op=8 * args.grid_window)
+    raise ValueError(f'unknown case: {case}')
+
+
+def _run_child(case: str, size: int, workdir: str, args: argparse.Namespace) -> Dict[str, Any]:
+    cmd = [
+        sys.executable, os.path.abspath(__file__), '_case', case,
+        '--iterations', str(args.iterations), '--loop-issues', str(args.loop_issues),
+        '--loop-attempts', str(args.loop_attempts), '--grid-window', str(args.grid_window),
+    ]
+    rec: Dict[str, Any] = {'case': case, 'size': size}
+    try:
+        proc = subprocess.run(cmd, cwd=workdir, env=_child_env(), capture_output=True, text=True, timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        rec['status'] = 'timeout'
+        return rec
+    lines = [ln for ln in proc.stdout.splitlines() if ln.startswith('BENCH_RESULT ')]
+    if proc.returncode != 0 or not lines:
+        rec['status'] = 'error'
+        rec['error'] = (proc.stderr or proc.stdout).strip().splitlines()[-1:] or ['no output']
+        return rec
+    rec.update(json.loads(lines[-1][len('BENCH_RESULT '):]))
+    rec['status'] = 'ok'
+    return rec
+
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    sizes = [2000] if args.quick else [int(x) for x in args.sizes.split(',') if x.strip()]
+    cases = [c for c in args.cases.split(',') if c.strip()] if args.cases else list(CASES)
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix='ssq_bench_') as base:
+        for size in sizes:
+            t = time.time()
+            wd = prepare_workdir(base, size, args.culdl_window)
+            print(f'[bench] 规模 {size}: 数据准备 {time.time() - t:.1f}s', flush=True)
+            for case in cases:
+                rec = _run_child(case, size, wd, args)
+                results.append(rec)
+                if rec['status'] == 'ok':
+                    print(f"[bench] {case:<14} n={size:<7} {rec['ops_per_sec']:>12} ops/s  "
+                          f"p50={rec['p50_ms']}ms p99={rec['p99_ms']}ms rss={rec['peak_rss_mb']}MB", flush=True)
+                else:
+                    print(f"[bench] {case:<14} n={size:<7} {rec['status']} {rec.get('error', '')}", flush=True)
+    return {
+        'meta': {
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'commit': _git_commit(),
+            'params': {k: getattr(args, k) for k in ('iterations', 'loop_issues', 'loop_attempts', 'grid_window', 'culdl_window')},
+        },
+        'results': results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+# ---------- 对比 ----------
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.15,
+            rss_tolerance: float = 0.25) -> Tuple[List[Dict[str, Any]], bool]:
+    """逐 (用例, 规模) 对比；返回 (明细, 是否存在回退)。基线/当前任一侧缺失或非 ok 的条目只报告不判定。"""
+    base = {(r['case'], r['size']): r for r in baseline.get('results', [])}
+    rows: List[Dict[str, Any]] = []
+    regressed = False
+    for cur in current.get('results', []):
+        key = (cur['case'], cur['size'])
+        ref = base.get(key)
+        row: Dict[str, Any] = {'case': key[0], 'size': key[1], 'status': 'new' if ref is None else 'ok', 'reasons': []}
+        if ref is not None and cur.get('status') == 'ok' and ref.get('status') == 'ok':
+            row['ops_ratio'] = round(cur['ops_per_sec'] / ref['ops_per_sec'], 4) if ref.get('ops_per_sec') else None
+            if row['ops_ratio'] is not None and row['ops_ratio'] < 1.0 - tolerance:
+                row['reasons'].append(f"ops/sec {ref['ops_per_sec']} -> {cur['ops_per_sec']}")
+            if ref.get('p99_ms') and cur['p99_ms'] > ref['p99_ms'] * (1.0 + tolerance):
+                row['reasons'].append(f"p99 {ref['p99_ms']}ms -> {cur['p99_ms']}ms")
+            if ref.get('peak_rss_mb') and cur['peak_rss_mb'] > ref['peak_rss_mb'] * (1.0 + rss_tolerance):
+                row['reasons'].append(f"rss {ref['peak_rss_mb']}MB -> {cur['peak_rss_mb']}MB")
+        elif ref is not None and ref.get('status') == 'ok' and cur.get('status') != 'ok':
+            row['reasons'].append(f"status {cur.get('status')}")
+        if row['reasons']:
+            row['status'] = 'regressed'
+            regressed = True
+        rows.append(row)
+    return rows, regressed
+
+
+def _print_compare(rows: List[Dict[str, Any]]) -> None:
+    for r in rows:
+        ratio = r.get('ops_ratio')
+        ratio_s = f'{ratio:.3f}x' if isinstance(ratio, float) else '-'
+        print(f"[compare] {r['case']:<14} n={r['size']:<7} {r['status']:<9} {ratio_s:>8}  {'; '.join(r['reasons'])}")
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description='SSQ 热点路径基准测试')
+    sub = p.add_subparsers(dest='cmd', required=True)
+
+    def add_common(sp):
+        sp.add_argument('--iterations', type=int, default=200, help='轻量用例的计时迭代次数')
+        sp.add_argument('--loop-issues', type=int, default=50, help='闭环复盘期数')
+        sp.add_argument('--loop-attempts', type=int, default=30, help='闭环单期尝试上限')
+        sp.add_argument('--grid-window', type=int, default=20, help='网格评估窗口')
+
+    r = sub.add_parser('run', help='运行基准并输出 JSON')
+    add_common(r)
+    r.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='合成历史规模，逗号分隔')
+    r.add_argument('--quick', action='store_true', help='只跑 2k 规模')
+    r.add_argument('--cases', default='', help=f"用例子集，逗号分隔（默认全部：{','.join(CASES)}）")
+    r.add_argument('--culdl-window', type=int, default=5000, help='预训练文化深度模型所用最近期数')
+    r.add_argument('--timeout', type=float, default=1800.0, help='单个用例超时（秒）')
+    r.add_argument('--out', default='reports/bench/ssq_bench.json')
+    r.add_argument('--compare', default='', help='运行后与该基线 JSON 对比')
+    r.add_argument('--tolerance', type=float, default=0.15)
+    r.add_argument('--rss-tolerance', type=float, default=0.25)
+
+    c = sub.add_parser('compare', help='对比两份基准 JSON，出现回退时退出码为 1')
+    c.add_argument('baseline')
+    c.add_argument('current')
+    c.add_argument('--tolerance', type=float, default=0.15)
+    c.add_argument('--rss-tolerance', type=float, default=0.25)
+
+    k = sub.add_parser('_case', help=argparse.SUPPRESS)
+    k.add_argument('case', choices=CASES)
+    add_common(k)
+
+    args = p.parse_args(argv)
+    if args.cmd == '_case':
+        res = run_case(args.case, args)
+        res['peak_rss_mb'] = _peak_rss_mb()
+        print('BENCH_RESULT ' + json.dumps(res), flush=True)
+        return 0
+    if args.cmd == 'compare':
+        rows, regressed = compare(_load(args.baseline), _load(args.current), args.tolerance, args.rss_tolerance)
+        _print_compare(rows)
+        return 1 if regressed else 0
+    report = run_suite(args)
+    out = os.path.abspath(args.out)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'[bench] 结果 -> {out}')
+    if args.compare:
+        rows, regressed = compare(_load(args.compare), report, args.tolerance, args.rss_tolerance)
+        _print_compare(rows)
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
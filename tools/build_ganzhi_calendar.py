@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+生成干支历预计算表（1900-2100）并与 lunar-python 交叉校验，供 bazi_chart 查表排盘。
+- 输出：data/ganzhi_calendar.npy（BAZI_CALENDAR_PATH 可覆盖，或作为第一个参数传入）
+- 可选：BAZI_CALENDAR_VERIFY 随机校验样本数（默认 5000，0 为跳过）
+"""
+import os
+import sys
+import time
+
+from ganzhi_calendar import DEFAULT_PATH, GanzhiCalendar, build_table, save_table, verify
+
+
+def main():
+    out_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    try:
+        samples = int(os.getenv('BAZI_CALENDAR_VERIFY', '5000'))
+    except Exception:
+        samples = 5000
+    t0 = time.time()
+    table = build_table()
+    print(f'[build_ganzhi_calendar] 已生成 {len(table)} 天，用时 {time.time() - t0:.1f}s')
+    if samples > 0:
+        bad = verify(GanzhiCalendar(table), samples=samples)
+        if bad:
+            print(f'[build_ganzhi_calendar] 校验失败：{bad} 处与 lunar-python 不一致，未保存。')
+            sys.exit(1)
+        print(f'[build_ganzhi_calendar] 校验通过（{samples} 个随机时刻 × 2 流派）')
+    print(f'[build_ganzhi_calendar] 已保存 -> {save_table(table, out_path)}')
+
+
+if __name__ == '__main__':
+    main()
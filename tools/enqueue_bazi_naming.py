@@ -1,17 +1,15 @@
 #!/usr/bin/env python3
 """
-将起名请求写入队列：queue/bazi_naming.jsonl
-- 解决中文转义和并发写入：使用 json.dumps + fcntl.flock(APPEND + LOCK_EX)
+将起名请求写入持久队列（bazi_naming_queue，SQLite：queue/bazi_naming.db）
+- 事务写入，多个写入方与消费方并发安全
 - 参数：--surname --bazi [--gender female|male|neutral] [--count 10] [--style neutral] [--single 0/1]
 """
 import argparse
-import json
 import os
-from pathlib import Path
 import sys
 
-QUEUE = Path(__file__).resolve().parent.parent / 'queue' / 'bazi_naming.jsonl'
-QUEUE.parent.mkdir(parents=True, exist_ok=True)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bazi_naming_queue import get_queue  # noqa: E402
 
 def main():
     p = argparse.ArgumentParser(description='Enqueue a BaZi naming task')
@@ -33,14 +31,9 @@ def main():
     }
 
     try:
-        import fcntl
-        with open(QUEUE, 'a', encoding='utf-8') as f:
-            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-            f.write(json.dumps(payload, ensure_ascii=False) + '\n')
-            f.flush()
-            os.fsync(f.fileno())
-            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-        print(f"enqueued -> {QUEUE}")
+        queue = get_queue()
+        job_id = queue.enqueue(payload)
+        print(f"enqueued #{job_id} -> {queue.path} (depth={queue.stats()['depth']})")
     except Exception as e:
         print(f"enqueue failed: {e}", file=sys.stderr)
         sys.exit(1)
@@ -2,7 +2,7 @@
 """
 离线训练深度文化模型并持久化，供线上推理使用。
 - 输入：ssq_history.csv
-- 输出：models/cultural_deep.joblib
+- 输出：models/cultural_deep.joblib，以及同名 _npy/ 目录下的 .npy 推理导出（供 load_fast 内存映射加载）
 """
 import os
 import sys